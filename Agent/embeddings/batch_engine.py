@@ -0,0 +1,216 @@
+"""
+Concurrent, quota-aware batch embedding engine
+
+Splits texts into provider-sized batches, runs them on a bounded thread pool,
+paces API calls against the per-minute limits tracked by QuotaManager, retries
+transient failures with exponential backoff, bisects batches rejected because
+of their input and reports per-item failures instead of substituting zero
+vectors.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from backend.utils.quota_manager import QuotaExceededException
+
+logger = logging.getLogger(__name__)
+
+# Error class names the provider SDKs use for outages rather than bad input
+_TRANSIENT_ERROR_NAMES = {
+    "DeadlineExceeded", "ServiceUnavailable", "InternalServerError", "ResourceExhausted",
+    "TooManyRequests", "GatewayTimeout", "BadGateway", "ReadTimeout", "ConnectTimeout",
+    "ConnectError", "RemoteProtocolError",
+}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (google.api_core sets .code, httpx/requests a response)"""
+    for candidate in (
+        getattr(exc, "code", None),
+        getattr(exc, "status_code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if isinstance(candidate, int) and 100 <= candidate < 600:
+            return candidate
+    return None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for outages (5xx, 429, timeouts, connection errors) as opposed to rejected input"""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status >= 500 or status == 429
+    return type(exc).__name__ in _TRANSIENT_ERROR_NAMES
+
+
+@dataclass
+class BatchEmbeddingResult:
+    """Outcome of a batch embedding run, aligned with the input texts"""
+    embeddings: List[Optional[List[float]]]
+    failures: Dict[int, str] = field(default_factory=dict)  # input index -> error message
+    api_calls: int = 0
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.embeddings) - len(self.failures)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+class EmbeddingBatchError(ValueError):
+    """Raised when some texts of a batch could not be embedded"""
+
+    def __init__(self, result: BatchEmbeddingResult):
+        self.result = result
+        first_errors = "; ".join(
+            f"#{idx}: {msg}" for idx, msg in list(sorted(result.failures.items()))[:3]
+        )
+        super().__init__(
+            f"Failed to embed {len(result.failures)}/{len(result.embeddings)} texts ({first_errors})"
+        )
+
+
+class BatchEmbeddingEngine:
+    """
+    Runs a provider's batch embedding call over many texts
+
+    Args:
+        embed_many: Callable embedding a list of texts in one provider call
+        quota_manager: QuotaManager used for pacing (one unit per API call)
+        quota_service: Quota service name (e.g. "gemini_embeddings")
+        max_batch_size: Texts per provider call (Gemini batch endpoint accepts 100)
+        max_workers: Concurrent provider calls
+        max_retries: Retries per call on transient errors before the batch fails
+        backoff_base: Initial backoff in seconds (doubles per retry, with jitter)
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[List[float]]],
+        quota_manager=None,
+        quota_service: str = "gemini_embeddings",
+        max_batch_size: int = 100,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        max_quota_wait: float = 120.0
+    ):
+        self.embed_many = embed_many
+        self.quota_manager = quota_manager
+        self.quota_service = quota_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.max_quota_wait = max_quota_wait
+        self._calls_lock = threading.Lock()
+
+    def embed(self, texts: Sequence[str]) -> BatchEmbeddingResult:
+        """Embed all texts; failed items are reported in result.failures"""
+        result = BatchEmbeddingResult(embeddings=[None] * len(texts))
+        if not texts:
+            return result
+
+        batches = [
+            list(range(start, min(start + self.max_batch_size, len(texts))))
+            for start in range(0, len(texts), self.max_batch_size)
+        ]
+        logger.info(
+            f"Embedding {len(texts)} texts in {len(batches)} batches "
+            f"(batch_size={self.max_batch_size}, workers={self.max_workers})"
+        )
+
+        workers = min(self.max_workers, len(batches))
+        if workers == 1:
+            for indexes in batches:
+                self._run_batch(texts, indexes, result)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+                futures = [pool.submit(self._run_batch, texts, indexes, result) for indexes in batches]
+                for future in futures:
+                    future.result()
+
+        logger.info(
+            f"Embedded {result.succeeded}/{len(texts)} texts with {result.api_calls} API calls"
+            + (f", {len(result.failures)} failed" if result.failures else "")
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _run_batch(self, texts: Sequence[str], indexes: List[int], result: BatchEmbeddingResult):
+        try:
+            vectors = self._call_with_retry([texts[i] for i in indexes], result)
+            for idx, vector in zip(indexes, vectors):
+                result.embeddings[idx] = vector
+        except QuotaExceededException as e:
+            # Daily/monthly quota: no point retrying the remaining items
+            for idx in indexes:
+                result.failures[idx] = str(e)
+        except Exception as e:
+            if len(indexes) == 1 or is_transient_error(e):
+                # Outage (retries already spent) or a single rejected text: fail the items
+                for idx in indexes:
+                    result.failures[idx] = str(e)
+                return
+            # Input rejected: bisect to isolate the bad item(s) in O(log n) extra calls
+            middle = len(indexes) // 2
+            logger.warning(f"Batch of {len(indexes)} rejected ({e}), bisecting")
+            self._run_batch(texts, indexes[:middle], result)
+            self._run_batch(texts, indexes[middle:], result)
+
+    def _call_with_retry(self, batch: List[str], result: BatchEmbeddingResult) -> List[List[float]]:
+        attempt = 0
+        while True:
+            self._acquire_quota()
+            try:
+                with self._calls_lock:
+                    result.api_calls += 1
+                vectors = self.embed_many(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(f"Provider returned {len(vectors)} embeddings for {len(batch)} texts")
+                return vectors
+            except QuotaExceededException:
+                raise
+            except Exception as e:
+                # Rejected input fails the same way on every retry
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.warning(f"Embedding call failed (attempt {attempt + 1}/{self.max_retries + 1}): {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _acquire_quota(self):
+        """Block until one API call fits in the quota; raise if the daily/monthly quota is gone"""
+        if self.quota_manager is None:
+            return
+
+        waited = 0.0
+        while True:
+            reserved, wait = self.quota_manager.reserve_quota(self.quota_service, 1)
+            if reserved:
+                return
+            if wait is None or waited >= self.max_quota_wait:
+                status = self.quota_manager.get_quota_status(self.quota_service).get(self.quota_service, {})
+                daily = status.get("daily") or status.get("monthly") or {}
+                raise QuotaExceededException(self.quota_service, {
+                    "period": "daily" if "daily" in status else "monthly",
+                    "used": daily.get("used", 0),
+                    "limit": daily.get("limit", 0)
+                })
+            # Per-minute rate limit: sleep into the next window
+            sleep_for = max(0.5, wait)
+            logger.info(f"Rate limit reached for {self.quota_service}, waiting {sleep_for:.1f}s")
+            time.sleep(sleep_for)
+            waited += sleep_for
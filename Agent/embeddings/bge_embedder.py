@@ -3,6 +3,8 @@ import logging
 import os
 from pathlib import Path
 from Agent.embeddings.embedding_config import get_model_name, get_model_info, get_active_engine_config, ACTIVE_MODEL
+from Agent.embeddings.batch_engine import BatchEmbeddingEngine, BatchEmbeddingResult, EmbeddingBatchError
+from Agent.embeddings.embedding_cache import cache_model_key, get_embedding_cache
 from backend.utils.quota_manager import get_quota_manager, QuotaExceededException
 
 # Setup logging
@@ -161,7 +163,24 @@ class BGEEmbedder:
         padding = [0.0] * (target_dim - current_dim)
         return embedding + padding
     
+    @property
+    def cache_key(self) -> str:
+        """Embedding cache namespace for the loaded model"""
+        return cache_model_key(self.model_key, self.dimension)
+    
     def embed_text(self, text: str) -> List[float]:
+        """Generate embedding for a single text (served from the embedding cache when possible)"""
+        cache = get_embedding_cache()
+        cached = cache.get(self.cache_key, text)
+        if cached is not None:
+            logger.debug(f"Embedding cache hit (length: {len(text)} chars)")
+            return cached
+        
+        embedding = self._embed_text_uncached(text)
+        cache.put(self.cache_key, text, embedding)
+        return embedding
+    
+    def _embed_text_uncached(self, text: str) -> List[float]:
         """Generate embedding for a single text with quota management"""
         logger.debug(f"Embedding single text (length: {len(text)} chars)")
         
@@ -198,71 +217,108 @@ class BGEEmbedder:
             embedding = self.model.encode(text, convert_to_numpy=True)
             return embedding.tolist()
     
-    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    def _gemini_embed_many(self, texts: List[str]) -> List[List[float]]:
+        """One Gemini batchEmbedContents call for several texts"""
+        result = self.genai.embed_content(
+            model=self.model["model_name"],
+            content=texts,
+            task_type="retrieval_document"
+        )
+        vectors = result['embedding']
+        # A single-item request comes back as one flat vector
+        if vectors and not isinstance(vectors[0], (list, tuple)):
+            vectors = [vectors]
+        # Pad Gemini embeddings (768) to 1024 for BGE-M3 compatibility
+        return [self._pad_embedding(list(vector), target_dim=1024) for vector in vectors]
+    
+    def _get_batch_engine(self) -> BatchEmbeddingEngine:
+        """Batch engine for the Gemini API (created lazily, shared by the singleton)"""
+        engine = getattr(self, "_batch_engine", None)
+        if engine is None:
+            engine = BatchEmbeddingEngine(
+                embed_many=self._gemini_embed_many,
+                quota_manager=self.quota_manager,
+                quota_service="gemini_embeddings",
+                max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "100")),
+                max_workers=int(os.getenv("EMBEDDING_MAX_WORKERS", "4")),
+                max_retries=int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+            )
+            self._batch_engine = engine
+        return engine
+    
+    def embed_batch_detailed(self, texts: List[str], batch_size: int = 32) -> BatchEmbeddingResult:
         """
-        Generate embeddings for multiple texts with quota management
+        Generate embeddings for multiple texts, reporting per-item failures
         
         Args:
             texts: List of texts to embed
-            batch_size: Batch size for processing (ignored for Gemini)
+            batch_size: Batch size for local models (Gemini uses EMBEDDING_BATCH_SIZE)
+        
+        Returns:
+            BatchEmbeddingResult with embeddings aligned to texts (None where failed)
         """
+        cache = get_embedding_cache()
+        cached = cache.get_many(self.cache_key, texts)
+        missing = [idx for idx in range(len(texts)) if idx not in cached]
+        
+        result = BatchEmbeddingResult(embeddings=[cached.get(idx) for idx in range(len(texts))])
+        if cached:
+            logger.info(f"Embedding cache: {len(cached)}/{len(texts)} texts already embedded")
+        if not missing:
+            return result
+        
+        # Embed each distinct missing text once (repeated boilerplate chunks are common)
+        unique_texts = list(dict.fromkeys(texts[idx] for idx in missing))
+        fresh = self._embed_batch_uncached(unique_texts, batch_size=batch_size)
+        result.api_calls = fresh.api_calls
+        position_of = {text: position for position, text in enumerate(unique_texts)}
+        computed = {}
+        for idx in missing:
+            position = position_of[texts[idx]]
+            embedding = fresh.embeddings[position]
+            result.embeddings[idx] = embedding
+            if position in fresh.failures:
+                result.failures[idx] = fresh.failures[position]
+            elif embedding is not None:
+                computed[texts[idx]] = embedding
+        cache.put_many(self.cache_key, computed)
+        return result
+    
+    def _embed_batch_uncached(self, texts: List[str], batch_size: int = 32) -> BatchEmbeddingResult:
+        """Embed texts through the provider (no cache lookup)"""
         logger.info(f"Embedding batch of {len(texts)} texts")
         
         if self.engine_type == "gemini" or self.cloud_only:
-            # Check quota for entire batch
-            try:
-                allowed, error_msg, quota_info = self.quota_manager.check_quota("gemini_embeddings", len(texts))
-                if not allowed:
-                    raise QuotaExceededException("gemini_embeddings", quota_info)
-                
-                # Gemini doesn't have native batch support, process one by one
-                embeddings = []
-                successful_requests = 0
-                
-                for i, text in enumerate(texts):
-                    try:
-                        result = self.genai.embed_content(
-                            model=self.model["model_name"],
-                            content=text,
-                            task_type="retrieval_document"
-                        )
-                        embedding = result['embedding']
-                        # Pad Gemini embeddings (768) to 1024 for BGE-M3 compatibility
-                        embedding = self._pad_embedding(embedding, target_dim=1024)
-                        embeddings.append(embedding)
-                        successful_requests += 1
-                        
-                        if (i + 1) % 10 == 0:
-                            logger.debug(f"Embedded {i + 1}/{len(texts)} texts (padded to 1024 dims)")
-                    
-                    except Exception as e:
-                        logger.error(f"Failed to embed text {i+1}: {e}")
-                        # Add zero embedding as placeholder
-                        embeddings.append([0.0] * 1024)
-                
-                # Consume quota for successful requests only
-                if successful_requests > 0:
-                    self.quota_manager.consume_quota("gemini_embeddings", successful_requests)
-                
-                logger.info(f"Successfully generated {successful_requests}/{len(texts)} embeddings (padded to 1024 dims)")
-                return embeddings
-                
-            except QuotaExceededException as e:
-                logger.error(f"Quota exceeded for batch embeddings: {e}")
-                raise ValueError(f"Daily embedding quota exceeded. Please try again tomorrow. {error_msg}")
-            except Exception as e:
-                logger.error(f"Batch embedding failed: {e}")
-                raise ValueError(f"Embedding service temporarily unavailable: {str(e)}")
-        else:
-            # Local model (development only)
-            embeddings = self.model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
-            logger.info(f"Successfully generated {len(embeddings)} embeddings")
-            return embeddings.tolist()
+            result = self._get_batch_engine().embed(texts)
+            logger.info(f"Successfully generated {result.succeeded}/{len(texts)} embeddings (padded to 1024 dims)")
+            return result
+        
+        # Local model (development only)
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=True,
+            convert_to_numpy=True
+        )
+        logger.info(f"Successfully generated {len(embeddings)} embeddings")
+        return BatchEmbeddingResult(embeddings=embeddings.tolist())
+    
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts with quota management
+        
+        Args:
+            texts: List of texts to embed
+            batch_size: Batch size for local models (Gemini uses EMBEDDING_BATCH_SIZE)
+        
+        Raises:
+            EmbeddingBatchError: If any text could not be embedded (never zero-filled)
+        """
+        result = self.embed_batch_detailed(texts, batch_size=batch_size)
+        if not result.ok:
+            logger.error(str(EmbeddingBatchError(result)))
+            raise EmbeddingBatchError(result)
+        return result.embeddings
     
     def get_dimension(self) -> int:
         """Get embedding dimension"""
@@ -271,3 +327,7 @@ class BGEEmbedder:
     def get_quota_status(self) -> dict:
         """Get current quota status for embeddings"""
         return self.quota_manager.get_quota_status("gemini_embeddings")
+    
+    def get_cache_stats(self) -> dict:
+        """Get embedding cache hit/miss statistics"""
+        return get_embedding_cache().get_stats()
@@ -0,0 +1,286 @@
+"""
+Content-addressed embedding cache
+
+Embeddings are keyed by (model key and output dimension, SHA256 of
+whitespace-normalized text), so
+identical chunks, family samples and repeated queries are embedded once per
+model. Two tiers:
+- In-process LRU (EMBEDDING_CACHE_MEMORY_SIZE entries)
+- Postgres table embedding_cache, shared across workers and restarts
+  (EMBEDDING_CACHE_BACKEND=postgres|memory|none)
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-extracted text with different line breaks still hits"""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def cache_model_key(model: str, dimension: int) -> str:
+    """Cache namespace for a model; padding to a new dimension must not reuse old vectors"""
+    return f"{model}:{dimension}"
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache with hit/miss metrics
+
+    Usage:
+        cache = get_embedding_cache()
+        found = cache.get_many(model_key, texts)   # {index: embedding}
+        cache.put_many(model_key, {text: embedding})
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        memory_size: Optional[int] = None,
+        max_store_entries: Optional[int] = None,
+        max_age_days: Optional[int] = None
+    ):
+        self.backend = (backend or os.getenv("EMBEDDING_CACHE_BACKEND", "postgres")).lower()
+        self.memory_size = memory_size or int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+        self.max_store_entries = max_store_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2000000"))
+        self.max_age_days = max_age_days or int(os.getenv("EMBEDDING_CACHE_MAX_AGE_DAYS", "180"))
+        self.evict_every = 1000  # Run store eviction after this many writes
+
+        self._memory: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._stats = {
+            "memory_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "store_evictions": 0,
+            "store_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    @property
+    def store_enabled(self) -> bool:
+        return self.backend == "postgres"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, model_key: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model_key, [text]).get(0)
+
+    def put(self, model_key: str, text: str, embedding: List[float]) -> None:
+        self.put_many(model_key, {text: embedding})
+
+    def get_many(self, model_key: str, texts: Sequence[str]) -> Dict[int, List[float]]:
+        """
+        Look up embeddings for texts
+
+        Returns:
+            Dict mapping input index -> copy of the cached embedding (missing indexes are misses)
+        """
+        if not self.enabled or not texts:
+            return {}
+
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[int, List[float]] = {}
+        pending: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for idx, h in enumerate(hashes):
+                key = (model_key, h)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[idx] = list(self._memory[key])
+                    self._stats["memory_hits"] += 1
+                else:
+                    pending.setdefault(h, []).append(idx)
+
+        if pending and self.store_enabled:
+            stored = self._store_get(model_key, list(pending))
+            for h, embedding in stored.items():
+                self._remember(model_key, h, embedding)
+                for idx in pending.pop(h):
+                    found[idx] = list(embedding)
+                    with self._lock:
+                        self._stats["store_hits"] += 1
+
+        with self._lock:
+            self._stats["misses"] += sum(len(indexes) for indexes in pending.values())
+        return found
+
+    def put_many(self, model_key: str, items: Dict[str, List[float]]) -> None:
+        """Store text -> embedding pairs in both tiers"""
+        if not self.enabled or not items:
+            return
+
+        by_hash = {}
+        for text, embedding in items.items():
+            if embedding is None:
+                continue
+            vector = embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+            by_hash[text_hash(text)] = vector
+
+        for h, vector in by_hash.items():
+            self._remember(model_key, h, vector)
+
+        with self._lock:
+            self._stats["writes"] += len(by_hash)
+
+        if self.store_enabled and by_hash:
+            self._store_put(model_key, by_hash)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["store_hits"]) / lookups if lookups else 0.0
+        stats["backend"] = self.backend
+        return stats
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def evict(self) -> int:
+        """Trim the store tier to max_store_entries and drop entries unused for max_age_days"""
+        if not self.store_enabled:
+            return 0
+
+        from sqlalchemy import text
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+            deleted = db.execute(
+                text("DELETE FROM embedding_cache WHERE last_used_at < :cutoff"),
+                {"cutoff": cutoff}
+            ).rowcount or 0
+            # LRU trim: everything older than the Nth most recently used entry
+            deleted += db.execute(
+                text(
+                    "DELETE FROM embedding_cache WHERE last_used_at < ("
+                    "SELECT last_used_at FROM embedding_cache "
+                    "ORDER BY last_used_at DESC OFFSET :max_entries LIMIT 1)"
+                ),
+                {"max_entries": self.max_store_entries}
+            ).rowcount or 0
+            db.commit()
+            with self._lock:
+                self._stats["store_evictions"] += deleted
+            if deleted:
+                logger.info(f"Evicted {deleted} embedding cache entries")
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Embedding cache eviction failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _remember(self, model_key: str, h: str, embedding: List[float]) -> None:
+        with self._lock:
+            key = (model_key, h)
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def _store_get(self, model_key: str, hashes: List[str]) -> Dict[str, List[float]]:
+        from sqlalchemy import text
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            # Fetch and touch LRU bookkeeping in one round trip
+            rows = db.execute(
+                text(
+                    "UPDATE embedding_cache SET last_used_at = now(), hit_count = hit_count + 1 "
+                    "WHERE model_key = :model_key AND text_hash = ANY(:hashes) "
+                    "RETURNING text_hash, embedding::text AS embedding"
+                ),
+                {"model_key": model_key, "hashes": hashes}
+            ).fetchall()
+            db.commit()
+            return {row.text_hash: [float(v) for v in row.embedding.strip("[]").split(",")] for row in rows}
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._stats["store_errors"] += 1
+            logger.warning(f"Embedding cache lookup failed, continuing without store tier: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def _store_put(self, model_key: str, by_hash: Dict[str, List[float]]) -> None:
+        from sqlalchemy.dialects.postgresql import insert
+        from backend.database import SessionLocal, EmbeddingCacheEntry
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            statement = insert(EmbeddingCacheEntry.__table__).values([
+                {
+                    "model_key": model_key,
+                    "text_hash": h,
+                    "embedding": vector,
+                    "dimension": len(vector),
+                    "hit_count": 0,
+                    "created_at": now,
+                    "last_used_at": now,
+                }
+                for h, vector in by_hash.items()
+            ]).on_conflict_do_nothing(index_elements=["model_key", "text_hash"])
+            db.execute(statement)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._stats["store_errors"] += 1
+            logger.warning(f"Embedding cache write failed: {e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self._writes_since_evict += len(by_hash)
+            run_eviction = self._writes_since_evict >= self.evict_every
+            if run_eviction:
+                self._writes_since_evict = 0
+        if run_eviction:
+            self.evict()
+
+
+# Global embedding cache instance
+_embedding_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create global embedding cache"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
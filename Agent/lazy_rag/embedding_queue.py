@@ -0,0 +1,322 @@
+"""
+Background embedding queue
+
+Embedding work (download, extract, chunk, embed, store) is recorded in the
+Postgres table embedding_jobs and drained by a pool of worker threads that
+claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several workers and
+uvicorn processes can share the queue without double-processing a document.
+
+Producers:
+- Uploads, approvals and scraping enqueue new documents
+- Chat queries that hit un-embedded documents enqueue a high-priority boost
+  and answer from metadata instead of embedding inline
+
+Times (run_after, leases) come from the app's UTC clock, like the column
+defaults. Only the row lock is Postgres-specific; SQLite backs the unit tests.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.database import EmbeddingJob, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Job priorities (higher runs first)
+PRIORITY_QUERY = 100
+PRIORITY_UPLOAD = 50
+PRIORITY_APPROVAL = 50
+PRIORITY_SCRAPE = 10
+PRIORITY_BACKFILL = 0
+
+
+def queue_enabled() -> bool:
+    """False falls back to embedding inline in the query path"""
+    return os.getenv("EMBEDDING_QUEUE_ENABLED", "true").lower() == "true"
+
+
+def retry_delay(attempts: int, base: float = 30.0, cap: float = 3600.0) -> float:
+    """Seconds before a failed job is retried (exponential, capped)"""
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+class EmbeddingJobQueue:
+    """Postgres-backed embedding job queue"""
+
+    def __init__(self, max_attempts: Optional[int] = None, lease_seconds: Optional[int] = None):
+        self.max_attempts = max_attempts or int(os.getenv("EMBEDDING_JOB_MAX_ATTEMPTS", "5"))
+        # A running job whose worker died is handed out again after this long
+        self.lease_seconds = lease_seconds or int(os.getenv("EMBEDDING_JOB_LEASE", "900"))
+
+    def enqueue(self, document_id: int, priority: int = PRIORITY_UPLOAD, source: str = "upload") -> bool:
+        """Add a document to the queue, or raise the priority of its pending job"""
+        return self.enqueue_many([document_id], priority, source) > 0
+
+    def enqueue_many(self, document_ids: List[int], priority: int = PRIORITY_UPLOAD, source: str = "upload") -> int:
+        if not document_ids:
+            return 0
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            jobs = EmbeddingJob.__table__
+            insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+            statement = insert(jobs).values([
+                {
+                    "document_id": document_id, "priority": priority, "source": source, "status": "pending",
+                    "attempts": 0, "run_after": now, "created_at": now, "updated_at": now,
+                }
+                for document_id in dict.fromkeys(document_ids)
+            ])
+            # A document with an active job keeps it; the job gets the higher priority / earlier run_after
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=["document_id"],
+                index_where=text("status IN ('pending', 'running')"),
+                set_={
+                    "priority": case((excluded.priority > jobs.c.priority, excluded.priority), else_=jobs.c.priority),
+                    "run_after": case((excluded.run_after < jobs.c.run_after, excluded.run_after), else_=jobs.c.run_after),
+                    "updated_at": now,
+                }
+            )
+            result = db.execute(statement)
+            db.commit()
+            logger.info(f"Queued {len(document_ids)} documents for embedding (source={source}, priority={priority})")
+            return result.rowcount or 0
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to enqueue embedding jobs for {document_ids}: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Lock the highest-priority runnable job for this worker"""
+        db = SessionLocal()
+        try:
+            # Concurrent workers skip each other's locked rows (SQLite serializes writers anyway)
+            lock = " FOR UPDATE SKIP LOCKED" if db.get_bind().dialect.name == "postgresql" else ""
+            row = db.execute(
+                text(
+                    "UPDATE embedding_jobs SET status = 'running', locked_by = :worker_id, "
+                    "locked_at = :now, attempts = attempts + 1, updated_at = :now "
+                    "WHERE id = ("
+                    "  SELECT id FROM embedding_jobs "
+                    "  WHERE status = 'pending' AND run_after <= :now "
+                    "  ORDER BY priority DESC, run_after, id "
+                    f"  LIMIT 1{lock}"
+                    ") RETURNING id, document_id, priority, source, attempts"
+                ),
+                {"worker_id": worker_id, "now": datetime.utcnow()}
+            ).fetchone()
+            db.commit()
+            return dict(row._mapping) if row else None
+        finally:
+            db.close()
+
+    def complete(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(text("DELETE FROM embedding_jobs WHERE id = :job_id"), {"job_id": job_id})
+            db.commit()
+        finally:
+            db.close()
+
+    def fail(self, job_id: int, attempts: int, error: str) -> None:
+        """Schedule a retry with backoff, or park the job as failed after max_attempts"""
+        final = attempts >= self.max_attempts
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            db.execute(
+                text(
+                    "UPDATE embedding_jobs SET status = :status, last_error = :error, "
+                    "run_after = :run_after, "
+                    "locked_by = NULL, locked_at = NULL, updated_at = :now "
+                    "WHERE id = :job_id"
+                ),
+                {
+                    "job_id": job_id,
+                    "status": "failed" if final else "pending",
+                    "error": (error or "")[:2000],
+                    "run_after": now + timedelta(seconds=retry_delay(attempts)),
+                    "now": now,
+                }
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def requeue_stale(self) -> int:
+        """Return jobs held by crashed workers to the queue"""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                text(
+                    "UPDATE embedding_jobs SET status = 'pending', locked_by = NULL, locked_at = NULL, updated_at = :now "
+                    "WHERE status = 'running' AND locked_at < :stale_before"
+                ),
+                {"now": now, "stale_before": now - timedelta(seconds=self.lease_seconds)}
+            )
+            db.commit()
+            if result.rowcount:
+                logger.warning(f"Requeued {result.rowcount} stale embedding jobs")
+            return result.rowcount or 0
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                text("SELECT status, count(*) AS n FROM embedding_jobs GROUP BY status")
+            ).fetchall()
+            return {row.status: row.n for row in rows}
+        finally:
+            db.close()
+
+
+class EmbeddingWorkerPool:
+    """Threads that drain the embedding queue"""
+
+    def __init__(self, num_workers: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.num_workers = num_workers or int(os.getenv("EMBEDDING_WORKERS", "2"))
+        self.poll_interval = poll_interval or float(os.getenv("EMBEDDING_QUEUE_POLL_INTERVAL", "2"))
+        self.queue = get_embedding_queue()
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self._lazy_embedder = None
+        self._stop_event = threading.Event()
+
+    @property
+    def lazy_embedder(self):
+        if self._lazy_embedder is None:
+            from Agent.lazy_rag.lazy_embedder import LazyEmbedder
+            self._lazy_embedder = LazyEmbedder()
+        return self._lazy_embedder
+
+    def start(self):
+        if self.running:
+            logger.warning("Embedding workers already running")
+            return
+
+        self.running = True
+        self._stop_event.clear()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{prefix}:{i}",), name=f"embedding-worker-{i}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Started {self.num_workers} embedding workers")
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        self.threads = []
+        logger.info("Embedding workers stopped")
+
+    def run_once(self, worker_id: str) -> bool:
+        """Process one job; returns False when the queue had nothing runnable"""
+        job = self.queue.claim(worker_id)
+        if job is None:
+            return False
+
+        logger.info(
+            f"[{worker_id}] Embedding document {job['document_id']} "
+            f"(job {job['id']}, source={job['source']}, attempt {job['attempts']})"
+        )
+        try:
+            result = self.lazy_embedder.embed_document(job["document_id"])
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+
+        if result.get("status") == "success":
+            self.queue.complete(job["id"])
+        else:
+            logger.warning(f"Embedding job {job['id']} failed: {result.get('message')}")
+            self.queue.fail(job["id"], job["attempts"], result.get("message", "unknown error"))
+        return True
+
+    def _run(self, worker_id: str):
+        last_stale_check = 0.0
+        while self.running:
+            try:
+                if time.time() - last_stale_check > 60:
+                    self.queue.requeue_stale()
+                    last_stale_check = time.time()
+                if self.run_once(worker_id):
+                    continue
+            except Exception as e:
+                logger.error(f"[{worker_id}] Embedding worker error: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+
+def sync_document_embeddings(document, priority: int = PRIORITY_APPROVAL, source: str = "approval") -> None:
+    """
+    Propagate a document's access fields to its embeddings, or queue it if not embedded yet
+
+    Args:
+        document: Document whose approval/visibility changed (already committed)
+    """
+    from Agent.vector_store.pgvector_store import PGVectorStore
+
+    db = SessionLocal()
+    try:
+        embedded = db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM document_embeddings WHERE document_id = :doc_id)"),
+            {"doc_id": document.id}
+        ).scalar()
+    finally:
+        db.close()
+
+    if embedded:
+        PGVectorStore().update_document_metadata(
+            document.id,
+            visibility_level=document.visibility_level,
+            institution_id=document.institution_id,
+            approval_status=document.approval_status
+        )
+    elif document.approval_status in ("approved", "pending"):
+        get_embedding_queue().enqueue(document.id, priority=priority, source=source)
+
+
+# Global instances
+_embedding_queue = None
+_worker_pool = None
+
+
+def get_embedding_queue() -> EmbeddingJobQueue:
+    """Get or create global embedding queue"""
+    global _embedding_queue
+    if _embedding_queue is None:
+        _embedding_queue = EmbeddingJobQueue()
+    return _embedding_queue
+
+
+def enqueue_embedding(document_id: int, priority: int = PRIORITY_UPLOAD, source: str = "upload") -> bool:
+    """Queue a document for background embedding"""
+    return get_embedding_queue().enqueue(document_id, priority=priority, source=source)
+
+
+def start_embedding_workers():
+    """Start the global embedding worker pool"""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = EmbeddingWorkerPool()
+    _worker_pool.start()
+
+
+def stop_embedding_workers():
+    """Stop the global embedding worker pool"""
+    if _worker_pool is not None:
+        _worker_pool.stop()
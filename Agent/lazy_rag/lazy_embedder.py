@@ -128,7 +128,8 @@ class LazyEmbedder:
                 visibility_level=doc.visibility_level,
                 institution_id=doc.institution_id,
                 approval_status=doc.approval_status,
-                db=db
+                db=db,
+                upsert=True  # Re-embeds of amended documents only rewrite changed chunks
             )
             
             # Update embedding status in metadata
@@ -0,0 +1,382 @@
+"""
+Persistent, compact LangGraph checkpointer for PolicyRAGAgent
+
+MemorySaver kept every checkpoint of every thread inside the API process, so
+RSS grew for as long as the server ran, and conversation memory was lost on
+restart and not shared between uvicorn workers. PostgresCheckpointSaver keeps
+checkpoints in the agent_checkpoints table instead:
+- one row per thread: only the latest checkpoint is stored, since the agent
+  never replays or forks earlier ones
+- pending writes of in-flight steps go to agent_checkpoint_writes, so
+  another worker can resume the thread; a new checkpoint drops the writes
+  of the one it supersedes
+- window compaction: the messages channel is cut to the last
+  AGENT_HISTORY_WINDOW messages before it is written
+- TTL eviction: threads idle for AGENT_CHECKPOINT_TTL_HOURS are deleted,
+  with their pending writes, including writes of runs that died before
+  their next checkpoint (checked at most every
+  AGENT_CHECKPOINT_PRUNE_INTERVAL seconds)
+- lazy loading: a thread is read only when a run asks for it; a thread with
+  no checkpoint (evicted, or older than this table) is rebuilt from its
+  ChatSession messages by load_thread_history()
+
+Nothing per thread is held in memory.
+AGENT_CHECKPOINT_BACKEND=memory restores the in-process MemorySaver.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+HISTORY_WINDOW = int(os.getenv("AGENT_HISTORY_WINDOW", "20"))
+
+
+def compact_checkpoint(checkpoint: Checkpoint, window: int = HISTORY_WINDOW) -> Checkpoint:
+    """Copy of checkpoint with the messages channel cut to the last `window` messages"""
+    values = checkpoint.get("channel_values") or {}
+    messages = values.get("messages")
+    if not messages or len(messages) <= window:
+        return checkpoint
+    return {**checkpoint, "channel_values": {**values, "messages": list(messages)[-window:]}}
+
+
+def load_thread_history(thread_id: str, limit: int = HISTORY_WINDOW) -> List[Dict[str, str]]:
+    """Last `limit` messages of the ChatSession owning thread_id, oldest first"""
+    from backend.database import SessionLocal, ChatSession, ChatMessage
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ChatMessage.role, ChatMessage.content)
+            .join(ChatSession, ChatSession.id == ChatMessage.session_id)
+            .filter(ChatSession.thread_id == thread_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(limit)
+            .all()
+        )
+    finally:
+        db.close()
+    return [{"role": row.role, "content": row.content} for row in reversed(rows)]
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer over agent_checkpoints; see module docstring
+
+    Usage:
+        saver = get_checkpointer()
+        graph = workflow.compile(checkpointer=saver)
+        saver.prune()   # drop idle threads now
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        ttl_hours: Optional[float] = None,
+        prune_interval: Optional[float] = None
+    ):
+        super().__init__()
+        self.window = window or HISTORY_WINDOW
+        self.ttl_hours = ttl_hours or float(os.getenv("AGENT_CHECKPOINT_TTL_HOURS", "72"))
+        self.prune_interval = prune_interval or float(os.getenv("AGENT_CHECKPOINT_PRUNE_INTERVAL", "600"))
+
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    @property
+    def _table(self):
+        from backend.database import AgentCheckpoint
+        return AgentCheckpoint.__table__
+
+    @property
+    def _writes_table(self):
+        from backend.database import AgentCheckpointWrite
+        return AgentCheckpointWrite.__table__
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        from backend.database import engine
+
+        thread_id, checkpoint_ns = self._thread_key(config)
+        table = self._table
+        checkpoint_id = get_checkpoint_id(config)
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(table).where(table.c.thread_id == thread_id, table.c.checkpoint_ns == checkpoint_ns)
+            ).fetchone()
+            if row is None or (checkpoint_id and row.checkpoint_id != checkpoint_id):
+                return None
+            return self._to_tuple(row, self._pending_writes(conn, row))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        from backend.database import engine
+
+        table = self._table
+        query = select(table).order_by(table.c.updated_at.desc())
+        if config is not None:
+            thread_id, checkpoint_ns = self._thread_key(config)
+            query = query.where(table.c.thread_id == thread_id, table.c.checkpoint_ns == checkpoint_ns)
+        before_id = get_checkpoint_id(before) if before else None
+        if before_id:
+            query = query.where(table.c.checkpoint_id < before_id)
+
+        with engine.connect() as conn:
+            rows = [(row, self._pending_writes(conn, row)) for row in conn.execute(query).fetchall()]
+
+        returned = 0
+        for row, pending in rows:
+            if limit is not None and returned >= limit:
+                break
+            item = self._to_tuple(row, pending)
+            if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                continue
+            returned += 1
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        from backend.database import engine
+
+        thread_id, checkpoint_ns = self._thread_key(config)
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(compact_checkpoint(checkpoint, self.window))
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        values = {
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint_type": checkpoint_type,
+            "checkpoint": checkpoint_blob,
+            "metadata_type": metadata_type,
+            "checkpoint_metadata": metadata_blob,
+            "updated_at": datetime.utcnow(),
+        }
+
+        writes = self._writes_table
+        with engine.begin() as conn:
+            statement = self._insert(conn)(self._table).values(thread_id=thread_id, checkpoint_ns=checkpoint_ns, **values)
+            conn.execute(statement.on_conflict_do_update(index_elements=["thread_id", "checkpoint_ns"], set_=values))
+
+            # Writes of the superseded checkpoint are no longer needed for resumption
+            conn.execute(writes.delete().where(
+                writes.c.thread_id == thread_id,
+                writes.c.checkpoint_ns == checkpoint_ns,
+                writes.c.checkpoint_id != checkpoint["id"]
+            ))
+
+        self._maybe_prune()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        from backend.database import engine
+
+        thread_id, checkpoint_ns = self._thread_key(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        created_at = datetime.utcnow()
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                # Special channels (ERROR, INTERRUPT, ...) have fixed negative slots
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "task_path": task_path,
+                "value_type": value_type,
+                "value": value_blob,
+                "created_at": created_at,
+            })
+        if not rows:
+            return
+
+        # As in MemorySaver: special-channel writes replace, regular writes are kept once
+        with engine.begin() as conn:
+            insert = self._insert(conn)
+            keys = ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]
+            special = [row for row in rows if row["idx"] < 0]
+            regular = [row for row in rows if row["idx"] >= 0]
+            if special:
+                statement = insert(self._writes_table).values(special)
+                conn.execute(statement.on_conflict_do_update(index_elements=keys, set_={
+                    column: statement.excluded[column]
+                    for column in ("channel", "task_path", "value_type", "value", "created_at")
+                }))
+            if regular:
+                conn.execute(insert(self._writes_table).values(regular).on_conflict_do_nothing(index_elements=keys))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def prune(self) -> int:
+        """Delete checkpoints and pending writes of threads idle for longer than ttl_hours"""
+        from backend.database import engine
+
+        table = self._table
+        writes = self._writes_table
+        cutoff = datetime.utcnow() - timedelta(hours=self.ttl_hours)
+        with engine.begin() as conn:
+            deleted = conn.execute(table.delete().where(table.c.updated_at < cutoff)).rowcount or 0
+            # Also catches writes of runs that died before their next checkpoint
+            conn.execute(writes.delete().where(writes.c.created_at < cutoff))
+        if deleted:
+            logger.info(f"Evicted {deleted} idle agent checkpoint(s)")
+        return deleted
+
+    def _maybe_prune(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = time.monotonic()
+        try:
+            self.prune()
+        except Exception as e:
+            logger.warning(f"Agent checkpoint eviction failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _insert(conn):
+        # Same upsert API on both; SQLite backs the unit tests
+        return sqlite.insert if conn.dialect.name == "sqlite" else postgresql.insert
+
+    @staticmethod
+    def _thread_key(config: RunnableConfig) -> Tuple[str, str]:
+        configurable = config["configurable"]
+        return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+    def _pending_writes(self, conn, row) -> List[Tuple[str, str, Any]]:
+        """(task_id, channel, value) writes stored against row's checkpoint"""
+        writes = self._writes_table
+        write_rows = conn.execute(
+            select(writes.c.task_id, writes.c.channel, writes.c.value_type, writes.c.value)
+            .where(
+                writes.c.thread_id == row.thread_id,
+                writes.c.checkpoint_ns == row.checkpoint_ns,
+                writes.c.checkpoint_id == row.checkpoint_id
+            )
+            .order_by(writes.c.task_id, writes.c.idx)
+        ).fetchall()
+        return [
+            (write.task_id, write.channel, self.serde.loads_typed((write.value_type, write.value)))
+            for write in write_rows
+        ]
+
+    def _to_tuple(self, row, pending: List[Tuple[str, str, Any]]) -> CheckpointTuple:
+        def thread_config(checkpoint_id: str) -> RunnableConfig:
+            return {
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=thread_config(row.checkpoint_id),
+            checkpoint=self.serde.loads_typed((row.checkpoint_type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=thread_config(row.parent_checkpoint_id) if row.parent_checkpoint_id else None,
+            pending_writes=pending,
+        )
+
+
+# Global instance
+_checkpointer: Optional[BaseCheckpointSaver] = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Get or create global agent checkpointer (AGENT_CHECKPOINT_BACKEND: postgres | memory)"""
+    global _checkpointer
+    if _checkpointer is None:
+        backend = os.getenv("AGENT_CHECKPOINT_BACKEND", "postgres").lower()
+        if backend == "memory":
+            _checkpointer = MemorySaver()
+        else:
+            _checkpointer = PostgresCheckpointSaver()
+        logger.info(f"Agent checkpointer: {backend}")
+    return _checkpointer
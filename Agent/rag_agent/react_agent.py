@@ -1,20 +1,18 @@
 """ReAct agent with LangGraph for policy Q&A with quota management"""
 import logging
 import os
-from typing import TypedDict, Annotated, Sequence, AsyncGenerator, List
+from typing import TypedDict, Sequence, AsyncGenerator, List
 from pathlib import Path
-import operator
 import time
 import asyncio
 
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain.tools import Tool, StructuredTool
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -23,6 +21,7 @@ from Agent.tools.lazy_search_tools import (
     search_specific_document_lazy
 )
 from Agent.rag_enhanced.family_aware_retriever import enhanced_search_documents
+from Agent.rag_agent.checkpointer import get_checkpointer, load_thread_history
 from backend.utils.quota_manager import get_quota_manager, QuotaExceededException
 
 def search_documents_with_metadata_fallback(query: str, top_k: int = 5, user_role: Optional[str] = None, user_institution_id: Optional[int] = None) -> str:
@@ -101,16 +100,14 @@ def search_documents_with_metadata_fallback(query: str, top_k: int = 5, user_rol
 
 
 def _perform_metadata_search(query: str, top_k: int, user_role: Optional[str], user_institution_id: Optional[int]) -> str:
-    """Perform metadata-based search with BM25 ranking"""
+    """Perform metadata-based search ranked by Postgres full-text search"""
     from backend.database import SessionLocal, DocumentMetadata, Document
-    from sqlalchemy import or_, and_
-    from rank_bm25 import BM25Okapi
+    from backend.utils.access_scope import apply_search_access
+    from Agent.retrieval.text_search import rank_documents_by_metadata
     
     db = SessionLocal()
     
     try:
-        query_words = query.lower().split()
-        
         # Build query for metadata search
         metadata_query = db.query(Document, DocumentMetadata).outerjoin(
             DocumentMetadata, Document.id == DocumentMetadata.document_id
@@ -119,94 +116,23 @@ def _perform_metadata_search(query: str, top_k: int, user_role: Optional[str], u
         )
         
         # Apply role-based filters
-        from backend.constants.roles import DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN
-        if user_role == DEVELOPER:
-            pass  # Can access all
-        elif user_role == MINISTRY_ADMIN:
-            metadata_query = metadata_query.filter(
-                Document.visibility_level.in_(['public', 'restricted', 'institution_only'])
-            )
-        elif user_role == UNIVERSITY_ADMIN:
-            metadata_query = metadata_query.filter(
-                or_(
-                    Document.visibility_level == 'public',
-                    and_(
-                        Document.visibility_level.in_(['institution_only', 'restricted']),
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            )
-        else:
-            filters = [Document.visibility_level == 'public']
-            if user_institution_id:
-                filters.append(
-                    and_(
-                        Document.visibility_level == 'institution_only',
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            metadata_query = metadata_query.filter(or_(*filters))
-        
-        # Search in metadata fields with fuzzy matching
-        search_conditions = []
-        for word in query_words:
-            if len(word) > 2:  # Skip very short words
-                word_conditions = [
-                    DocumentMetadata.title.ilike(f'%{word}%'),
-                    DocumentMetadata.summary.ilike(f'%{word}%'),
-                    DocumentMetadata.bm25_keywords.ilike(f'%{word}%'),
-                    Document.filename.ilike(f'%{word}%')
-                ]
-                search_conditions.extend(word_conditions)
-        
-        if search_conditions:
-            metadata_query = metadata_query.filter(or_(*search_conditions))
+        metadata_query = apply_search_access(
+            metadata_query, Document.access_scopes, user_role, user_institution_id
+        )
         
-        metadata_results = metadata_query.all()
+        # Match and rank in SQL against the GIN-indexed metadata search_vector;
+        # only the top_k rows come back to Python
+        ranked = rank_documents_by_metadata(
+            metadata_query, query, limit=top_k, filename_column=Document.filename
+        )
         
-        if not metadata_results:
+        if not ranked:
             return None
         
-        # Rank results using BM25 on metadata
-        documents = []
-        corpus = []
-        
-        for doc, meta in metadata_results:
-            doc_dict = {
-                "doc": doc,
-                "meta": meta,
-                "id": doc.id,
-                "title": meta.title if meta and meta.title else doc.filename,
-                "filename": doc.filename
-            }
-            documents.append(doc_dict)
-            
-            # Create searchable text from metadata (handle None values)
-            title = meta.title if meta and meta.title else ""
-            summary = meta.summary if meta and meta.summary else ""
-            keywords = meta.bm25_keywords if meta and meta.bm25_keywords else ""
-            filename = doc.filename if doc.filename else ""
-            
-            searchable_text = f"{title} {summary} {keywords} {filename}".lower()
-            corpus.append(searchable_text.split())
-        
-        # Rank using BM25
-        bm25 = BM25Okapi(corpus)
-        query_tokens = query.lower().split()
-        bm25_scores = bm25.get_scores(query_tokens)
-        
-        # Sort by relevance score
-        ranked_indices = bm25_scores.argsort()[::-1]  # Descending order
-        top_results = [documents[i] for i in ranked_indices[:top_k]]
-        
         # Format results
-        formatted = f"Found {len(top_results)} relevant results (metadata search):\n\n"
+        formatted = f"Found {len(ranked)} relevant results (metadata search):\n\n"
         
-        for i, doc_dict in enumerate(top_results, 1):
-            doc = doc_dict['doc']
-            meta = doc_dict['meta']
-            score = bm25_scores[ranked_indices[i-1]]
-            
+        for i, (doc, meta, score) in enumerate(ranked, 1):
             approval_badge = "Approved" if doc.approval_status == 'approved' else "Pending Approval"
             
             formatted += f"**Result {i}** (Relevance Score: {score:.2f}) [{approval_badge}]\n"
@@ -221,7 +147,7 @@ def _perform_metadata_search(query: str, top_k: int, user_role: Optional[str], u
             
             formatted += "\n"
         
-        logger.info(f"Metadata search returned {len(top_results)} results")
+        logger.info(f"Metadata search returned {len(ranked)} results")
         return formatted
         
     finally:
@@ -246,35 +172,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class StreamingCallbackHandler(BaseCallbackHandler):
-    """Callback handler for streaming LLM tokens"""
-    
-    def __init__(self):
-        self.tokens = []
-        self.token_queue = asyncio.Queue()
-        
-    def on_llm_new_token(self, token: str, **kwargs):
-        """Called when LLM generates a new token"""
-        self.tokens.append(token)
-        # Put token in queue for async consumption
-        try:
-            loop = asyncio.get_event_loop()
-            loop.call_soon_threadsafe(self.token_queue.put_nowait, token)
-        except:
-            pass
-    
-    async def get_token(self):
-        """Get next token from queue"""
-        return await self.token_queue.get()
-    
-    def has_tokens(self):
-        """Check if there are tokens in queue"""
-        return not self.token_queue.empty()
+def _chunk_text(content) -> str:
+    """Text of a streamed message chunk (Gemini may send a list of content parts)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return ""
 
 
 class AgentState(TypedDict):
     """State for the agent"""
-    messages: Annotated[Sequence[dict], operator.add]
+    # Replaced, not appended: query() passes the whole history and nodes return the full state
+    # (an operator.add reducer re-appended the history on every node)
+    messages: Sequence[dict]
     query: str
     intent: str  # Query intent: "comparison" | "count" | "list" | "qa"
     intent_confidence: float  # Classification confidence
@@ -338,8 +253,8 @@ class PolicyRAGAgent:
         # Setup tools and agent
         self._setup_tools()
         
-        # Setup LangGraph with memory
-        self.memory = MemorySaver()
+        # Setup LangGraph with persistent, compacted memory
+        self.memory = get_checkpointer()
         self.graph = self._create_graph()
         
         logger.info("PolicyRAGAgent initialized successfully with quota management")
@@ -369,7 +284,6 @@ class PolicyRAGAgent:
                     model="gemini-2.5-flash",
                     google_api_key=google_api_key,
                     temperature=temperature,
-                    streaming=False,
                     convert_system_message_to_human=True  # Important for Gemini
                 )
                 
@@ -431,7 +345,6 @@ class PolicyRAGAgent:
                     api_key=openrouter_api_key,
                     base_url="https://openrouter.ai/api/v1",
                     temperature=temperature,
-                    streaming=False,  # Disable streaming for tool calling reliability
                     default_headers={
                         "HTTP-Referer": "https://github.com/your-repo",
                         "X-Title": "Policy RAG Agent"
@@ -448,8 +361,7 @@ class PolicyRAGAgent:
                 return ChatOpenAI(
                     model="gpt-4o-mini",
                     api_key=openai_api_key,
-                    temperature=temperature,
-                    streaming=False
+                    temperature=temperature
                 )
             
             elif provider == "ollama" and not self.cloud_only:
@@ -461,8 +373,7 @@ class PolicyRAGAgent:
                     model=ollama_model,
                     base_url=f"{ollama_base_url}/v1",
                     api_key="ollama",  # Ollama doesn't need real API key
-                    temperature=temperature,
-                    streaming=False
+                    temperature=temperature
                 )
             
             elif self.cloud_only and provider != "gemini":
@@ -770,7 +681,7 @@ REMEMBER: Search in English, respond in user's language!"""),
         
         return state
     
-    def _process_query(self, state: AgentState) -> AgentState:
+    def _process_query(self, state: AgentState, config: RunnableConfig = None) -> AgentState:
         """Process the user query using ReAct agent"""
         # Safe Unicode logging
         try:
@@ -795,7 +706,7 @@ REMEMBER: Search in English, respond in user's language!"""),
             else:
                 input_with_context = state["query"]
             
-            result = self.agent_executor.invoke({"input": input_with_context})
+            result = self.agent_executor.invoke({"input": input_with_context}, config=config)
             
             # Check if agent hit iteration limit
             if "intermediate_steps" in result and len(result["intermediate_steps"]) >= 15:
@@ -907,18 +818,12 @@ REMEMBER: Search in English, respond in user's language!"""),
         
         return state
     
-    def query(self, question: str, thread_id: str = None, user_role: str = None, user_institution_id: int = None) -> dict:
+    def _prepare_run(self, question: str, thread_id: str = None, user_role: str = None, user_institution_id: int = None):
         """
-        Query the agent with user context for role-based access
-        
-        Args:
-            question: User question
-            thread_id: Thread ID for conversation memory
-            user_role: User's role for access control
-            user_institution_id: User's institution ID
+        Set user context and build the graph input and config for one question
         
         Returns:
-            Response dict with answer, citations, and confidence
+            (initial state, run config)
         """
         # Safe Unicode logging
         try:
@@ -938,50 +843,63 @@ REMEMBER: Search in English, respond in user's language!"""),
         
         config = {"configurable": {"thread_id": thread_id}}
         
+        # Get current state from memory (if exists)
+        current_state = None
         try:
-            # Get current state from memory (if exists)
-            current_state = None
+            # Try to get the last state from checkpointer using get_tuple
+            checkpoint_tuple = self.memory.get_tuple(config)
+            if checkpoint_tuple and checkpoint_tuple.checkpoint:
+                # Extract the state values from the checkpoint
+                current_state = checkpoint_tuple.checkpoint.get("channel_values", {})
+                if current_state and "messages" in current_state:
+                    logger.info(f"Loaded previous state with {len(current_state.get('messages', []))} messages")
+        except Exception as e:
+            logger.info(f"No previous state found, starting fresh: {e}")
+        
+        # No checkpoint (evicted or never written): rebuild from the chat session
+        if not (current_state and current_state.get("messages")):
             try:
-                # Try to get the last state from checkpointer using get_tuple
-                checkpoint_tuple = self.memory.get_tuple(config)
-                if checkpoint_tuple and checkpoint_tuple.checkpoint:
-                    # Extract the state values from the checkpoint
-                    current_state = checkpoint_tuple.checkpoint.get("channel_values", {})
-                    if current_state and "messages" in current_state:
-                        logger.info(f"Loaded previous state with {len(current_state.get('messages', []))} messages")
+                history = load_thread_history(thread_id)
+                # chat_router stores the question before querying the agent
+                if history and history[-1] == {"role": "user", "content": question}:
+                    history.pop()
+                if history:
+                    current_state = {"messages": history}
+                    logger.info(f"Loaded {len(history)} messages from chat session history")
             except Exception as e:
-                logger.info(f"No previous state found, starting fresh: {e}")
-            
-            # Build new state by appending to existing messages
-            if current_state and "messages" in current_state:
-                # Append new user message to existing conversation
-                new_state = {
-                    "messages": current_state["messages"] + [{"role": "user", "content": question}],
-                    "query": question,
-                    "intent": "",
-                    "intent_confidence": 0.0,
-                    "extracted_params": {},
-                    "response": "",
-                    "format_type": "text",
-                    "structured_data": None,
-                    "citations": [],
-                    "confidence": 0.0
-                }
-            else:
-                # First message in conversation
-                new_state = {
-                    "messages": [{"role": "user", "content": question}],
-                    "query": question,
-                    "intent": "",
-                    "intent_confidence": 0.0,
-                    "extracted_params": {},
-                    "response": "",
-                    "format_type": "text",
-                    "structured_data": None,
-                    "citations": [],
-                    "confidence": 0.0
-                }
-            
+                logger.info(f"No chat session history for thread: {e}")
+        
+        # Build new state by appending to existing messages
+        previous_messages = list(current_state["messages"]) if current_state and "messages" in current_state else []
+        new_state = {
+            "messages": previous_messages + [{"role": "user", "content": question}],
+            "query": question,
+            "intent": "",
+            "intent_confidence": 0.0,
+            "extracted_params": {},
+            "response": "",
+            "format_type": "text",
+            "structured_data": None,
+            "citations": [],
+            "confidence": 0.0
+        }
+        return new_state, config
+    
+    def query(self, question: str, thread_id: str = None, user_role: str = None, user_institution_id: int = None) -> dict:
+        """
+        Query the agent with user context for role-based access
+        
+        Args:
+            question: User question
+            thread_id: Thread ID for conversation memory
+            user_role: User's role for access control
+            user_institution_id: User's institution ID
+        
+        Returns:
+            Response dict with answer, citations, and confidence
+        """
+        try:
+            new_state, config = self._prepare_run(question, thread_id, user_role, user_institution_id)
             result = self.graph.invoke(new_state, config)
             
             return {
@@ -1002,51 +920,100 @@ REMEMBER: Search in English, respond in user's language!"""),
                 "status": "error"
             }
     
-    async def query_stream(self, question: str, thread_id: str = "default", user_role: str = None, user_institution_id: int = None) -> AsyncGenerator[dict, None]:
+    async def query_stream(self, question: str, thread_id: str = None, user_role: str = None, user_institution_id: int = None) -> AsyncGenerator[dict, None]:
         """
         Query the agent with streaming response
         
+        Runs the graph with astream_events, so tool progress and answer tokens
+        are forwarded as the provider emits them. A model run whose first
+        non-empty chunk is a tool call is never forwarded; if a run that
+        started with text turns out to call tools, a retract event tells the
+        client to drop the content streamed so far.
+        
         Args:
             question: User question
             thread_id: Thread ID for conversation memory
         
         Yields:
             Stream events:
+            - {"type": "tool", "status": "start" | "end", "tool": "search_documents", "timestamp": ...}
             - {"type": "content", "token": "...", "timestamp": ...}
+            - {"type": "retract", "timestamp": ...} (discard the content streamed so far)
             - {"type": "citation", "citation": {...}, "timestamp": ...}
-            - {"type": "metadata", "confidence": 0.95, "status": "success", "timestamp": ...}
+            - {"type": "metadata", "confidence": 0.95, "status": "success", "answer": "...", "timestamp": ...}
+            
+            metadata.answer is the final (formatted) answer; it can differ from the
+            streamed tokens when the formatter rewrote the response.
         
-        Note: This uses the graph with MemorySaver checkpointer to maintain conversation history
+        Note: This uses the graph with the persistent checkpointer to maintain conversation history
         """
         logger.info(f"Streaming query received: '{question}'")
         
         try:
-            # Use the query method which properly uses the graph with memory
-            # The graph.invoke() with thread_id config enables conversation memory via MemorySaver
-            result = await asyncio.to_thread(self.query, question, thread_id, user_role, user_institution_id)
+            # Checkpoint / chat history lookups hit the database
+            new_state, config = await asyncio.to_thread(
+                self._prepare_run, question, thread_id, user_role, user_institution_id
+            )
             
-            # Get the answer
-            answer = result.get("answer", "")
-            citations = result.get("citations", [])
-            confidence = result.get("confidence", 0.0)
+            streamed = []
+            run_kinds = {}  # run_id -> "answer" | "tool", decided by the run's first non-empty chunk
             
-            # Stream the answer word by word
-            words = answer.split()
-            for i, word in enumerate(words):
-                # Add space except for first word
-                token = word if i == 0 else f" {word}"
+            async for event in self.graph.astream_events(new_state, config, version="v2"):
+                kind = event["event"]
                 
+                if kind in ("on_chat_model_stream", "on_chat_model_end"):
+                    # Only the ReAct agent's answer is user-facing
+                    if event.get("metadata", {}).get("langgraph_node") != "process_query":
+                        continue
+                    run_id = event["run_id"]
+                    
+                    if kind == "on_chat_model_stream":
+                        chunk = event["data"]["chunk"]
+                        token = _chunk_text(chunk.content)
+                        calls_tools = bool(getattr(chunk, "tool_call_chunks", None))
+                    else:
+                        token = ""
+                        calls_tools = bool(getattr(event["data"].get("output"), "tool_calls", None))
+                    
+                    if calls_tools:
+                        # Text already sent was a preamble to a tool call, not the answer
+                        if run_kinds.get(run_id) == "answer" and streamed:
+                            streamed.clear()
+                            yield {"type": "retract", "timestamp": time.time()}
+                        run_kinds[run_id] = "tool"
+                    elif token and run_kinds.setdefault(run_id, "answer") == "answer":
+                        streamed.append(token)
+                        yield {
+                            "type": "content",
+                            "token": token,
+                            "timestamp": time.time()
+                        }
+                    
+                    if kind == "on_chat_model_end":
+                        run_kinds.pop(run_id, None)
+                
+                elif kind in ("on_tool_start", "on_tool_end"):
+                    yield {
+                        "type": "tool",
+                        "status": "start" if kind == "on_tool_start" else "end",
+                        "tool": event["name"],
+                        "timestamp": time.time()
+                    }
+            
+            snapshot = await self.graph.aget_state(config)
+            result = snapshot.values
+            answer = result.get("response", "")
+            
+            # Provider did not stream (quota message, error, non-streaming model)
+            if not streamed and answer:
                 yield {
                     "type": "content",
-                    "token": token,
+                    "token": answer,
                     "timestamp": time.time()
                 }
-                
-                # Small delay to simulate streaming (adjust for faster/slower streaming)
-                await asyncio.sleep(0.05)
             
             # Send citations
-            for citation in citations:
+            for citation in result.get("citations", []):
                 yield {
                     "type": "citation",
                     "citation": citation,
@@ -1056,10 +1023,11 @@ REMEMBER: Search in English, respond in user's language!"""),
             # Send final metadata
             yield {
                 "type": "metadata",
-                "confidence": confidence,
-                "format": result.get("format", "text"),
-                "data": result.get("data"),
-                "status": result.get("status", "success"),
+                "confidence": result.get("confidence", 0.0),
+                "format": result.get("format_type", "text"),
+                "data": result.get("structured_data"),
+                "answer": answer,
+                "status": "success",
                 "timestamp": time.time()
             }
             
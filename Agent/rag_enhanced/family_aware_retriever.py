@@ -1,5 +1,6 @@
 """Family-Aware RAG Retriever for Enhanced Accuracy"""
 import logging
+import os
 from typing import List, Dict, Optional, Tuple
 import numpy as np
 from sqlalchemy.orm import Session
@@ -11,16 +12,58 @@ from backend.database import (
 )
 from Agent.embeddings.bge_embedder import BGEEmbedder
 from Agent.vector_store.pgvector_store import PGVectorStore
+from Agent.retrieval.query_cache import get_query_cache
+from backend.utils.access_scope import apply_search_access
 
 logger = logging.getLogger(__name__)
 
 
+def mmr_family_order(scores: np.ndarray, family_codes: np.ndarray, mmr_lambda: float) -> np.ndarray:
+    """
+    Maximal marginal relevance order over family ids
+    
+    Two results are fully redundant when they share a family and unrelated
+    otherwise, so each greedy step picks
+    argmax(lambda * relevance - (1 - lambda) * [family already picked]).
+    Relevance is the score scaled to [0, 1]; ties keep score order.
+    
+    Args:
+        scores: Result scores
+        family_codes: Integer family index per result
+        mmr_lambda: Relevance weight in [0, 1]
+        
+    Returns:
+        Indices of results in ranked order
+    """
+    by_score = np.argsort(-scores, kind="stable")
+    relevance = scores[by_score] / (scores.max() or 1.0)
+    families = family_codes[by_score]
+    
+    family_seen = np.zeros(families.max() + 1, dtype=bool)
+    remaining = np.ones(len(by_score), dtype=bool)
+    order = np.empty(len(by_score), dtype=int)
+    
+    for position in range(len(by_score)):
+        marginal = mmr_lambda * relevance - (1.0 - mmr_lambda) * family_seen[families]
+        marginal[~remaining] = -np.inf
+        pick = int(np.argmax(marginal))
+        order[position] = by_score[pick]
+        remaining[pick] = False
+        family_seen[families[pick]] = True
+    
+    return order
+
+
 class FamilyAwareRetriever:
     """Enhanced RAG retriever that considers document families and versions"""
     
     def __init__(self):
         self.embedder = BGEEmbedder()
         self.pgvector_store = PGVectorStore()
+        self.query_cache = get_query_cache()
+        # Relevance vs. family diversity trade-off for MMR: 0 (default) puts the best
+        # hit of every family first, as before; 1.0 is plain score order
+        self.mmr_lambda = float(os.getenv("FAMILY_MMR_LAMBDA", "0"))
         
     def search_with_family_awareness(
         self,
@@ -43,6 +86,11 @@ class FamilyAwareRetriever:
             prefer_latest: Whether to prefer latest versions
             family_diversity: Whether to ensure diversity across families
         """
+        cache_params = {"top_k": top_k, "prefer_latest": prefer_latest, "family_diversity": family_diversity}
+        cached = self.query_cache.get("family_search", query, user_role, user_institution_id, **cache_params)
+        if cached is not None:
+            return cached
+        
         close_db = False
         if db is None:
             db = SessionLocal()
@@ -77,7 +125,9 @@ class FamilyAwareRetriever:
             )
             
             # Step 4: Return top results
-            return ranked_results[:top_k]
+            top_results = ranked_results[:top_k]
+            self.query_cache.set("family_search", query, user_role, user_institution_id, top_results, **cache_params)
+            return top_results
             
         finally:
             if close_db:
@@ -299,38 +349,53 @@ class FamilyAwareRetriever:
                 db.close()
     
     def _enhance_with_family_info(self, results: List[Dict], db: Session) -> List[Dict]:
-        """Enhance search results with family information"""
-        enhanced = []
+        """Enhance search results with family information (one query for all hits)"""
+        doc_ids = {result["document_id"] for result in results}
+        
+        # Only the columns we return; extracted_text and vectors stay in Postgres
+        rows = db.query(
+            Document.id,
+            Document.filename,
+            Document.version_number,
+            Document.is_latest_version,
+            Document.document_family_id,
+            Document.content_hash,
+            Document.source_url,
+            DocumentFamily.canonical_title,
+            DocumentFamily.category,
+            DocumentFamily.ministry,
+            DocumentMetadata.title,
+            DocumentMetadata.document_type,
+            DocumentMetadata.department
+        ).outerjoin(
+            DocumentFamily, Document.document_family_id == DocumentFamily.id
+        ).outerjoin(
+            DocumentMetadata, Document.id == DocumentMetadata.document_id
+        ).filter(Document.id.in_(doc_ids)).all()
+        
+        family_info = {}
+        for row in rows:
+            family_info.setdefault(row.id, {
+                "filename": row.filename,
+                "version_number": row.version_number,
+                "is_latest_version": row.is_latest_version,
+                "family_id": row.document_family_id,
+                "family_title": row.canonical_title,
+                "family_category": row.category,
+                "family_ministry": row.ministry,
+                "document_title": row.title or row.filename,
+                "document_type": row.document_type,
+                "department": row.department,
+                "content_hash": row.content_hash,
+                "source_url": row.source_url
+            })
         
+        enhanced = []
         for result in results:
-            doc_id = result["document_id"]
-            
-            # Get document and family info
-            doc_info = db.query(Document, DocumentFamily, DocumentMetadata).outerjoin(
-                DocumentFamily, Document.document_family_id == DocumentFamily.id
-            ).outerjoin(
-                DocumentMetadata, Document.id == DocumentMetadata.document_id
-            ).filter(Document.id == doc_id).first()
-            
-            if doc_info:
-                doc, family, metadata = doc_info
-                
+            info = family_info.get(result["document_id"])
+            if info:
                 enhanced_result = result.copy()
-                enhanced_result.update({
-                    "filename": doc.filename,
-                    "version_number": doc.version_number,
-                    "is_latest_version": doc.is_latest_version,
-                    "family_id": doc.document_family_id,
-                    "family_title": family.canonical_title if family else None,
-                    "family_category": family.category if family else None,
-                    "family_ministry": family.ministry if family else None,
-                    "document_title": metadata.title if metadata else doc.filename,
-                    "document_type": metadata.document_type if metadata else None,
-                    "department": metadata.department if metadata else None,
-                    "content_hash": doc.content_hash,
-                    "source_url": doc.source_url
-                })
-                
+                enhanced_result.update(info)
                 enhanced.append(enhanced_result)
         
         return enhanced
@@ -345,87 +410,28 @@ class FamilyAwareRetriever:
         if not results:
             return results
         
-        # Group by family
-        family_groups = {}
-        for result in results:
-            family_id = result.get("family_id")
-            if family_id not in family_groups:
-                family_groups[family_id] = []
-            family_groups[family_id].append(result)
-        
-        # Rank within each family
-        for family_id, family_results in family_groups.items():
-            # Sort by score first
-            family_results.sort(key=lambda x: x["score"], reverse=True)
-            
-            if prefer_latest:
-                # Boost latest versions
-                for result in family_results:
-                    if result.get("is_latest_version"):
-                        result["score"] *= 1.2  # 20% boost for latest versions
-        
-        # Flatten and sort all results
-        all_results = []
-        for family_results in family_groups.values():
-            all_results.extend(family_results)
+        if prefer_latest:
+            # Boost latest versions
+            for result in results:
+                if result.get("is_latest_version"):
+                    result["score"] *= 1.2  # 20% boost for latest versions
         
-        all_results.sort(key=lambda x: x["score"], reverse=True)
+        scores = np.array([result["score"] for result in results], dtype=float)
         
         # Apply family diversity if requested
         if family_diversity:
-            diverse_results = []
-            used_families = set()
-            
-            # First pass: one result per family
-            for result in all_results:
-                family_id = result.get("family_id")
-                if family_id not in used_families:
-                    diverse_results.append(result)
-                    used_families.add(family_id)
-            
-            # Second pass: fill remaining slots
-            remaining_slots = len(all_results) - len(diverse_results)
-            for result in all_results:
-                if result not in diverse_results and remaining_slots > 0:
-                    diverse_results.append(result)
-                    remaining_slots -= 1
-            
-            return diverse_results
+            _, family_codes = np.unique(
+                np.array([str(result.get("family_id")) for result in results]), return_inverse=True
+            )
+            order = mmr_family_order(scores, family_codes, self.mmr_lambda)
+        else:
+            order = np.argsort(-scores, kind="stable")
         
-        return all_results
+        return [results[i] for i in order]
     
     def _apply_role_filters(self, query, user_role: str, user_institution_id: Optional[int]):
         """Apply role-based filtering to document query"""
-        from backend.constants.roles import DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN
-        
-        if user_role == DEVELOPER:
-            return query  # No filtering for developers
-        elif user_role == MINISTRY_ADMIN:
-            return query.filter(
-                Document.visibility_level.in_(['public', 'restricted', 'institution_only'])
-            )
-        elif user_role == UNIVERSITY_ADMIN:
-            return query.filter(
-                or_(
-                    Document.visibility_level == 'public',
-                    and_(
-                        Document.visibility_level.in_(['institution_only', 'restricted']),
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            )
-        else:
-            # Students and public users
-            filters = [Document.visibility_level == 'public']
-            if user_institution_id:
-                filters.append(
-                    and_(
-                        Document.visibility_level == 'institution_only',
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            return query.filter(or_(*filters))
-
+        return apply_search_access(query, Document.access_scopes, user_role, user_institution_id)
 
 # Integration functions for existing RAG system
 def enhanced_search_documents(
@@ -1,9 +1,11 @@
 import numpy as np
-from typing import List, Dict, Tuple
-from rank_bm25 import BM25Okapi
+from typing import List, Dict, Tuple, Optional
 import logging
+import os
 from pathlib import Path
 
+from Agent.retrieval.text_search import reciprocal_rank_fusion
+
 # Setup logging
 log_dir = Path("Agent/agent_logs")
 logging.basicConfig(
@@ -29,6 +31,8 @@ class HybridRetriever:
         """
         self.vector_weight = vector_weight
         self.bm25_weight = bm25_weight
+        self.candidate_pool = int(os.getenv("HYBRID_CANDIDATES", "40"))  # Rows per ranking before fusion
+        self.rrf_k = int(os.getenv("HYBRID_RRF_K", "60"))
         logger.info(f"Initialized HybridRetriever (vector: {vector_weight}, bm25: {bm25_weight})")
     
     def _normalize_scores(self, scores: List[float]) -> List[float]:
@@ -39,6 +43,92 @@ class HybridRetriever:
         max_score = max(scores)
         return [(s - min_score) / (max_score - min_score) for s in scores]
     
+    def search(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        pgvector_store,
+        top_k: int = 5,
+        user_role: Optional[str] = None,
+        user_institution_id: Optional[int] = None,
+        db=None,
+        document_ids: Optional[List[int]] = None
+    ) -> List[Dict]:
+        """
+        Server-side hybrid retrieval over pgvector + Postgres full-text search
+        
+        Vector and lexical candidates are fetched independently (so keyword
+        matches are found even when they miss the vector top-k) and fused with
+        weighted reciprocal rank fusion.
+        
+        Args:
+            query: Search query (used for the lexical ranking)
+            query_embedding: Embedding of the query
+            pgvector_store: PGVectorStore instance
+            top_k: Number of results to return
+            user_role: User's role for access control
+            user_institution_id: User's institution ID
+            db: Optional database session
+            document_ids: Optional list of document IDs to search within only
+        
+        Returns:
+            Results in PGVectorStore.search format; score is the fused score
+            scaled to 0-1, with vector_score and bm25_score (text rank) alongside
+        """
+        pool = max(self.candidate_pool, top_k * 2)
+        search_args = dict(
+            top_k=pool,
+            user_role=user_role,
+            user_institution_id=user_institution_id,
+            db=db,
+            document_ids=document_ids
+        )
+        vector_results = pgvector_store.search(query_embedding=query_embedding, **search_args)
+        try:
+            lexical_results = pgvector_store.lexical_search(query_text=query, **search_args)
+        except Exception as e:
+            # Lexical index unavailable (e.g. migration not applied): fall back to vector-only
+            logger.warning(f"Lexical search failed, using vector results only: {e}")
+            if db is not None:
+                db.rollback()
+            lexical_results = []
+        
+        return self.fuse(vector_results, lexical_results, top_k)
+    
+    def fuse(self, vector_results: List[Dict], lexical_results: List[Dict], top_k: int) -> List[Dict]:
+        """Weighted RRF over vector and lexical result lists keyed by (document_id, chunk_index)"""
+        def key(result):
+            return (result["document_id"], result["chunk_index"])
+        
+        fused = reciprocal_rank_fusion(
+            [[key(r) for r in vector_results], [key(r) for r in lexical_results]],
+            weights=[self.vector_weight, self.bm25_weight],
+            k=self.rrf_k
+        )
+        # Best possible fused score: rank 1 in both lists
+        best = (self.vector_weight + self.bm25_weight) / (self.rrf_k + 1)
+        
+        merged = {}
+        for result in lexical_results:
+            merged[key(result)] = dict(result, vector_score=0.0, bm25_score=result["score"])
+        for result in vector_results:
+            lexical = merged.get(key(result))
+            merged[key(result)] = dict(
+                result,
+                vector_score=result["score"],
+                bm25_score=lexical["bm25_score"] if lexical else 0.0
+            )
+        
+        ranked = sorted(merged.values(), key=lambda r: fused[key(r)], reverse=True)[:top_k]
+        for result in ranked:
+            result["score"] = fused[key(result)] / best if best else 0.0
+        
+        logger.info(
+            f"Hybrid search fused {len(vector_results)} vector + {len(lexical_results)} lexical "
+            f"candidates into {len(ranked)} results"
+        )
+        return ranked
+    
     def retrieve(
         self,
         query: str,
@@ -50,6 +140,9 @@ class HybridRetriever:
         """
         Hybrid retrieval combining vector and BM25 search
         
+        In-memory path for the local FAISS store, which has no lexical index;
+        Postgres deployments use search().
+        
         Args:
             query: Search query
             vector_store: FAISS vector store
@@ -100,6 +193,7 @@ class HybridRetriever:
             return []
         
         # 2. BM25 search (keyword)
+        from rank_bm25 import BM25Okapi
         try:
             tokenized_corpus = [text.lower().split() for text in texts]
             bm25 = BM25Okapi(tokenized_corpus)
@@ -0,0 +1,219 @@
+"""
+Query result cache for the chat retrieval path
+
+Caches retrieval results keyed by (namespace, normalized query, role,
+institution scope, parameters) with TTL + LRU eviction. Every entry is stamped
+with the corpus version; PGVectorStore bumps the version whenever embeddings
+are added, deleted or have their access metadata changed, so stale results are
+never served after the corpus changes.
+
+The version is a local counter combined with the Postgres sequence
+corpus_version_seq, so a change made by one uvicorn worker invalidates the
+other workers' caches within CORPUS_VERSION_REFRESH seconds.
+"""
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form used for cache keys"""
+    return " ".join(query.lower().split())
+
+
+class CorpusVersion:
+    """Monotonic stamp that changes whenever searchable embeddings change"""
+
+    def __init__(self, refresh_seconds: Optional[float] = None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.getenv("CORPUS_VERSION_REFRESH", "5")
+        )
+        self._local = 0
+        self._shared = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Tuple[int, int]:
+        now = time.time()
+        with self._lock:
+            stale = now - self._checked_at >= self.refresh_seconds
+        if stale:
+            shared = self._read_shared()
+            with self._lock:
+                if shared is not None:
+                    self._shared = shared
+                self._checked_at = now
+        with self._lock:
+            return (self._shared, self._local)
+
+    def bump(self) -> None:
+        """Invalidate cached results in this process now and in other workers on their next refresh"""
+        with self._lock:
+            self._local += 1
+        self._advance_shared()
+
+    def _read_shared(self) -> Optional[int]:
+        try:
+            from sqlalchemy import text
+            from backend.database import engine
+
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT last_value FROM corpus_version_seq")).scalar()
+        except Exception as e:
+            logger.debug(f"Could not read corpus version: {e}")
+            return None
+
+    def _advance_shared(self) -> None:
+        try:
+            from sqlalchemy import text
+            from backend.database import engine
+
+            with engine.connect() as conn:
+                value = conn.execute(text("SELECT nextval('corpus_version_seq')")).scalar()
+            with self._lock:
+                self._shared = value
+                self._checked_at = time.time()
+        except Exception as e:
+            logger.debug(f"Could not advance corpus version: {e}")
+
+
+class QueryResultCache:
+    """
+    TTL + LRU cache for retrieval results
+
+    Usage:
+        cache = get_query_cache()
+        result = cache.get("lazy_search", query, user_role, user_institution_id, top_k=5)
+        if result is None:
+            result = ...
+            cache.set("lazy_search", query, user_role, user_institution_id, result, top_k=5)
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        corpus_version: Optional[CorpusVersion] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "2000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("QUERY_CACHE_TTL", "600"))
+        self.enabled = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+        self.corpus_version = corpus_version or get_corpus_version()
+
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[int, int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def make_key(
+        self,
+        namespace: str,
+        query: str,
+        user_role: Optional[str],
+        user_institution_id: Optional[int],
+        **params
+    ) -> str:
+        parts = [
+            namespace,
+            normalize_query(query),
+            user_role or "",
+            str(user_institution_id) if user_institution_id is not None else "",
+        ]
+        parts.extend(f"{name}={params[name]}" for name in sorted(params))
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        namespace: str,
+        query: str,
+        user_role: Optional[str],
+        user_institution_id: Optional[int],
+        **params
+    ) -> Any:
+        """Cached value (a copy) or None"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(namespace, query, user_role, user_institution_id, **params)
+        version = self.corpus_version.current()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key, _MISS)
+            if entry is _MISS:
+                self._stats["misses"] += 1
+                return None
+            stored_at, stored_version, value = entry
+            if stored_version != version or now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+
+        # Callers mutate result dicts (e.g. adding document info), never hand out the cached object
+        return copy.deepcopy(value)
+
+    def set(
+        self,
+        namespace: str,
+        query: str,
+        user_role: Optional[str],
+        user_institution_id: Optional[int],
+        value: Any,
+        **params
+    ) -> None:
+        if not self.enabled or value is None:
+            return
+
+        key = self.make_key(namespace, query, user_role, user_institution_id, **params)
+        version = self.corpus_version.current()
+
+        with self._lock:
+            self._entries[key] = (time.time(), version, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# Global instances
+_corpus_version = None
+_query_cache = None
+
+
+def get_corpus_version() -> CorpusVersion:
+    """Get or create global corpus version stamp"""
+    global _corpus_version
+    if _corpus_version is None:
+        _corpus_version = CorpusVersion()
+    return _corpus_version
+
+
+def get_query_cache() -> QueryResultCache:
+    """Get or create global query result cache"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryResultCache()
+    return _query_cache
@@ -0,0 +1,141 @@
+"""
+Postgres full-text search helpers
+
+Lexical retrieval runs against the generated tsvector columns
+document_embeddings.search_vector and document_metadata.search_vector (GIN
+indexed), so keyword ranking happens inside Postgres instead of building an
+in-memory BM25 index over rows pulled into Python on every query.
+"""
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column, or_
+
+# Must match the configuration used by the generated search_vector columns
+TS_CONFIG = "english"
+
+# Normalization flag for ts_rank_cd: divide by 1 + log(document length), like BM25's length prior
+RANK_NORMALIZATION = 1
+
+
+def _is_word_char(char: str) -> bool:
+    # Letters, digits and combining marks; marks keep Devanagari matras/viramas inside the word
+    return unicodedata.category(char)[0] in ("L", "N", "M")
+
+
+def _tokens(text: str) -> List[str]:
+    tokens, current = [], []
+    for char in text:
+        if _is_word_char(char):
+            current.append(char)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def query_terms(query: str, min_length: int = 2) -> List[str]:
+    """Distinct lowercase word terms of a query (any script), in order"""
+    seen = []
+    for token in _tokens(query.lower()):
+        if len(token) >= min_length and token not in seen:
+            seen.append(token)
+    return seen
+
+
+def build_tsquery(query: str) -> Optional[str]:
+    """
+    OR-tsquery text for to_tsquery (any term may match, more matches rank higher)
+
+    Terms are reduced to runs of Unicode letters, digits and marks so user input
+    can never produce tsquery syntax errors. Returns None when the query has no
+    usable terms.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    return " | ".join(terms)
+
+
+def tsquery_expression(query: str):
+    """SQL to_tsquery expression for a user query (None when nothing to search)"""
+    tsquery = build_tsquery(query)
+    if tsquery is None:
+        return None
+    return func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), tsquery)
+
+
+def rank_expression(search_vector, tsquery):
+    return func.ts_rank_cd(search_vector, tsquery, RANK_NORMALIZATION)
+
+
+def rank_documents_by_metadata(query, search_text: str, limit: int, filename_column=None) -> List[Tuple]:
+    """
+    Rank a (Document, DocumentMetadata) query by full-text relevance in SQL
+
+    Args:
+        query: SQLAlchemy query selecting (Document, DocumentMetadata), already
+               filtered for access control
+        search_text: User query
+        limit: Maximum rows to return
+        filename_column: Optional Document.filename; documents whose filename
+                         contains a query term fill the remaining slots with
+                         score 0 (trigram indexed, run as a separate query so
+                         the full-text match keeps using its GIN index)
+
+    Returns:
+        List of (Document, DocumentMetadata, score) ordered by score
+    """
+    from backend.database import Document, DocumentMetadata
+
+    tsquery = tsquery_expression(search_text)
+    if tsquery is None:
+        return []
+
+    rank = rank_expression(DocumentMetadata.search_vector, tsquery)
+    rows = (
+        query.add_columns(func.coalesce(rank, 0.0).label("text_rank"))
+        .filter(DocumentMetadata.search_vector.op("@@")(tsquery))
+        .order_by(literal_column("text_rank").desc())
+        .limit(limit)
+        .all()
+    )
+    ranked = [(row[0], row[1], float(row.text_rank)) for row in rows]
+
+    filename_terms = query_terms(search_text, min_length=3) if filename_column is not None else []
+    if filename_terms and len(ranked) < limit:
+        found_ids = [doc.id for doc, _meta, _score in ranked]
+        filename_query = query.filter(or_(*(filename_column.ilike(f"%{term}%") for term in filename_terms)))
+        if found_ids:
+            filename_query = filename_query.filter(Document.id.notin_(found_ids))
+        ranked.extend(
+            (doc, meta, 0.0)
+            for doc, meta in filename_query.limit(limit - len(ranked)).all()
+        )
+    return ranked
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Iterable],
+    weights: Optional[Sequence[float]] = None,
+    k: int = 60
+) -> Dict:
+    """
+    Fuse several rankings with weighted reciprocal rank fusion
+
+    Args:
+        ranked_lists: Each an iterable of hashable keys, best first
+        weights: Per-list weight (default 1.0 each)
+        k: RRF damping constant
+
+    Returns:
+        Dict key -> fused score
+    """
+    weights = weights or [1.0] * len(ranked_lists)
+    scores: Dict = {}
+    for ranking, weight in zip(ranked_lists, weights):
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return scores
@@ -2,19 +2,26 @@
 import logging
 from typing import List, Dict, Optional
 import google.generativeai as genai
+import numpy as np
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_
 
 from backend.database import Document, DocumentMetadata
 from Agent.lazy_rag.lazy_embedder import LazyEmbedder
 from Agent.vector_store.pgvector_store import PGVectorStore
 from Agent.embeddings.bge_embedder import BGEEmbedder
+from Agent.retrieval.query_cache import get_query_cache
+from backend.utils.access_scope import apply_dashboard_access
+from backend.utils.document_text import get_text_previews
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Candidate text is only used for prompts (cut to 2000 chars there)
+CANDIDATE_TEXT_CHARS = 2000
+
 
 class ConflictDetector:
     """Tool for detecting conflicts between policy documents using semantic search + LLM"""
@@ -31,6 +38,7 @@ class ConflictDetector:
         self.lazy_embedder = LazyEmbedder()
         self.pgvector_store = PGVectorStore()
         self.embedder = BGEEmbedder()
+        self.query_cache = get_query_cache()
         logger.info("ConflictDetector initialized with Gemini 2.5 Flash")
     
     def detect_conflicts(
@@ -169,9 +177,11 @@ class ConflictDetector:
             # Get candidates
             candidates = query.limit(max_candidates * 2).all()  # Get more for filtering
             
-            # Prepare candidate data
+            # Prepare candidate data (only the text prefix the LLM prompt uses)
+            candidates = candidates[:max_candidates]
+            previews = get_text_previews(db, [candidate.id for candidate in candidates], CANDIDATE_TEXT_CHARS)
             candidate_docs = []
-            for candidate in candidates[:max_candidates]:
+            for candidate in candidates:
                 candidate_metadata = db.query(DocumentMetadata).filter(
                     DocumentMetadata.document_id == candidate.id
                 ).first()
@@ -180,7 +190,7 @@ class ConflictDetector:
                     "id": candidate.id,
                     "title": candidate_metadata.title if candidate_metadata and candidate_metadata.title else candidate.filename,
                     "filename": candidate.filename,
-                    "text": candidate.extracted_text or "",
+                    "text": previews.get(candidate.id, ""),
                     "department": candidate_metadata.department if candidate_metadata else None,
                     "document_type": candidate_metadata.document_type if candidate_metadata else None,
                     "approval_status": candidate.approval_status,
@@ -200,56 +210,7 @@ class ConflictDetector:
         user_institution_id: Optional[int]
     ):
         """Apply role-based access control filters to query"""
-        
-        if user_role == "developer":
-            # Full access
-            pass
-        
-        elif user_role == "ministry_admin":
-            # Limited access (respects institutional autonomy)
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.approval_status == "pending",
-                    Document.institution_id == user_institution_id,
-                    Document.uploader_id == user_institution_id  # Assuming uploader_id check
-                )
-            )
-        
-        elif user_role in ["university_admin", "document_officer"]:
-            # Public + their institution
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == user_institution_id
-                )
-            )
-        
-        elif user_role == "student":
-            # Approved public + their institution's approved institution_only
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    or_(
-                        Document.visibility_level == "public",
-                        and_(
-                            Document.visibility_level == "institution_only",
-                            Document.institution_id == user_institution_id
-                        )
-                    )
-                )
-            )
-        
-        elif user_role == "public_viewer":
-            # Only approved public
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    Document.visibility_level == "public"
-                )
-            )
-        
-        return query
+        return apply_dashboard_access(query, user_role, user_institution_id)
     
     def _lazy_embed_candidates(self, candidate_docs: List[Dict]):
         """
@@ -288,17 +249,25 @@ class ConflictDetector:
         try:
             # Generate embedding for source document's key content
             doc_text = document.get('text', '')[:2000]  # Use first 2000 chars
-            query_embedding = self.embedder.embed(doc_text)
+            candidate_ids = sorted(doc['id'] for doc in candidate_docs)
             
-            # Search in pgvector for similar chunks
-            candidate_ids = [doc['id'] for doc in candidate_docs]
-            
-            similar_results = self.pgvector_store.search(
-                query_embedding=query_embedding,
-                top_k=10,
-                document_ids=candidate_ids,  # Only search within candidates
-                db=db
+            # Same document against the same candidates: reuse the previous search
+            similar_results = self.query_cache.get(
+                "conflict_semantic", doc_text, None, None, candidates=candidate_ids
             )
+            if similar_results is None:
+                query_embedding = np.array(self.embedder.embed_text(doc_text))
+                
+                # Search in pgvector for similar chunks
+                similar_results = self.pgvector_store.search(
+                    query_embedding=query_embedding,
+                    top_k=10,
+                    document_ids=candidate_ids,  # Only search within candidates
+                    db=db
+                )
+                self.query_cache.set(
+                    "conflict_semantic", doc_text, None, None, similar_results, candidates=candidate_ids
+                )
             
             # Group by document and get top similar documents
             doc_scores = {}
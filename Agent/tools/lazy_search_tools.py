@@ -3,13 +3,16 @@ import logging
 from typing import List, Dict, Optional
 from pathlib import Path
 import os
-from rank_bm25 import BM25Okapi
 
 from Agent.retrieval.hybrid_retriever import HybridRetriever
+from Agent.retrieval.text_search import rank_documents_by_metadata
 from Agent.embeddings.bge_embedder import BGEEmbedder
 from Agent.vector_store.pgvector_store import PGVectorStore
 from Agent.metadata.reranker import DocumentReranker
 from Agent.lazy_rag.lazy_embedder import LazyEmbedder
+from Agent.lazy_rag.embedding_queue import get_embedding_queue, queue_enabled, PRIORITY_QUERY
+from Agent.retrieval.query_cache import get_query_cache
+from backend.utils.access_scope import apply_search_access
 
 # Setup logging
 log_dir = Path("Agent/agent_logs")
@@ -29,6 +32,7 @@ retriever = HybridRetriever(vector_weight=0.7, bm25_weight=0.3)
 reranker = DocumentReranker()  # Use environment RERANKER_PROVIDER
 lazy_embedder = LazyEmbedder()
 pgvector_store = PGVectorStore()
+query_cache = get_query_cache()
 
 
 def search_documents_lazy(query: str, top_k: int = 5, user_role: Optional[str] = None, user_institution_id: Optional[int] = None) -> str:
@@ -46,6 +50,12 @@ def search_documents_lazy(query: str, top_k: int = 5, user_role: Optional[str] =
     """
     logger.info(f"Lazy search for query: '{query}' (role={user_role}, institution={user_institution_id})")
     
+    # Repeated questions (and repeated tool calls within one agent run) skip embedding and pgvector
+    cached = query_cache.get("lazy_search", query, user_role, user_institution_id, top_k=top_k)
+    if cached is not None:
+        logger.info("Lazy search served from query cache")
+        return cached
+    
     try:
         from backend.database import SessionLocal, DocumentMetadata, Document, DocumentEmbedding
         db = SessionLocal()
@@ -61,87 +71,30 @@ def search_documents_lazy(query: str, top_k: int = 5, user_role: Optional[str] =
         )
         
         # Apply role-based filters to find which docs user can access
-        from backend.constants.roles import DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN
-        if user_role == DEVELOPER:
-            pass  # Can access all
-        elif user_role == MINISTRY_ADMIN:
-            query_docs = query_docs.filter(
-                Document.visibility_level.in_(['public', 'restricted', 'institution_only'])
-            )
-        elif user_role == UNIVERSITY_ADMIN:
-            from sqlalchemy import or_, and_
-            query_docs = query_docs.filter(
-                or_(
-                    Document.visibility_level == 'public',
-                    and_(
-                        Document.visibility_level.in_(['institution_only', 'restricted']),
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            )
-        else:
-            from sqlalchemy import or_, and_
-            filters = [Document.visibility_level == 'public']
-            if user_institution_id:
-                filters.append(
-                    and_(
-                        Document.visibility_level == 'institution_only',
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            query_docs = query_docs.filter(or_(*filters))
+        query_docs = apply_search_access(query_docs, Document.access_scopes, user_role, user_institution_id)
         
-        unembed_docs = query_docs.all()  # Get all unembed docs user can access
+        # Step 2: Rank unembedded documents by metadata relevance in Postgres (full-text index)
+        pending_matches = rank_documents_by_metadata(query_docs, query, limit=3)
         
-        # Step 2: Rank documents by metadata relevance using BM25
-        if unembed_docs:
-            logger.info(f"Found {len(unembed_docs)} unembed documents, ranking by metadata...")
-            
-            # Build BM25 corpus from metadata
-            documents = []
-            corpus = []
-            for doc, meta in unembed_docs:
-                doc_dict = {
-                    "doc": doc,
-                    "meta": meta,
-                    "id": doc.id,
-                    "title": meta.title,
-                    "filename": doc.filename
-                }
-                documents.append(doc_dict)
-                
-                # Create searchable text from metadata
-                text_for_bm25 = f"{meta.title or ''} {meta.bm25_keywords or ''} {meta.summary or ''} {meta.department or ''}".lower()
-                corpus.append(text_for_bm25.split())
-            
-            # Rank using BM25
-            from rank_bm25 import BM25Okapi
-            bm25 = BM25Okapi(corpus)
-            query_tokens = query.lower().split()
-            bm25_scores = bm25.get_scores(query_tokens)
-            
-            # Sort by relevance score
-            ranked_indices = bm25_scores.argsort()[::-1]  # Descending order
-            ranked_docs = [documents[i] for i in ranked_indices]
-            
-            # Take top 3 most relevant documents to embed
-            top_docs_to_embed = ranked_docs[:3]
-            
-            logger.info(f"Ranked documents by metadata. Top 3 to embed: {[d['id'] for d in top_docs_to_embed]}")
-            
-            # Step 3: Lazy embed top-ranked documents
-            for doc_dict in top_docs_to_embed:
-                doc = doc_dict['doc']
-                meta = doc_dict['meta']
-                try:
-                    logger.info(f"Lazy embedding document {doc.id}: {doc.filename} (ranked by metadata)")
-                    result = lazy_embedder.embed_document(doc.id)
-                    if result['status'] == 'success':
-                        logger.info(f"Embedded doc {doc.id}: {result['num_chunks']} chunks")
-                    else:
-                        logger.warning(f"Failed to embed doc {doc.id}: {result.get('message')}")
-                except Exception as e:
-                    logger.error(f"Error embedding doc {doc.id}: {str(e)}")
+        # Step 3: Boost the top matches in the background embedding queue and answer
+        # from their metadata below instead of embedding inside this request
+        if pending_matches:
+            pending_ids = [doc.id for doc, _meta, _score in pending_matches]
+            if queue_enabled():
+                logger.info(f"Queueing un-embedded matches for embedding: {pending_ids}")
+                get_embedding_queue().enqueue_many(pending_ids, priority=PRIORITY_QUERY, source="query")
+            else:
+                for doc, _meta, _score in pending_matches:
+                    try:
+                        logger.info(f"Lazy embedding document {doc.id}: {doc.filename} (ranked by metadata)")
+                        result = lazy_embedder.embed_document(doc.id)
+                        if result['status'] == 'success':
+                            logger.info(f"Embedded doc {doc.id}: {result['num_chunks']} chunks")
+                        else:
+                            logger.warning(f"Failed to embed doc {doc.id}: {result.get('message')}")
+                    except Exception as e:
+                        logger.error(f"Error embedding doc {doc.id}: {str(e)}")
+                pending_matches = []
         
         # Step 4: Generate query embedding
         import numpy as np
@@ -149,16 +102,18 @@ def search_documents_lazy(query: str, top_k: int = 5, user_role: Optional[str] =
         if isinstance(query_embedding, list):
             query_embedding = np.array(query_embedding)
         
-        # Step 5: Search pgvector with role-based filtering
-        results = pgvector_store.search(
-            query_embedding=query_embedding,
+        # Step 5: Hybrid search (pgvector + full-text) with role-based filtering
+        results = retriever.search(
+            query,
+            query_embedding,
+            pgvector_store,
             top_k=top_k * 2,  # Get more results for reranking
             user_role=user_role,
             user_institution_id=user_institution_id,
             db=db
         )
         
-        if not results:
+        if not results and not pending_matches:
             db.close()
             return "No relevant documents found matching your access permissions."
         
@@ -204,7 +159,16 @@ def search_documents_lazy(query: str, top_k: int = 5, user_role: Optional[str] =
             formatted += f"Visibility: {result['visibility_level']}\n"
             formatted += f"Text: {result['text'][:300]}...\n\n"
         
+        if pending_matches:
+            formatted += "Other matching documents (still being indexed, matched on metadata):\n\n"
+            for doc, meta, _score in pending_matches:
+                formatted += f"- Document ID: {doc.id} | {meta.title or doc.filename} ({doc.filename})\n"
+                if meta.summary:
+                    formatted += f"  Summary: {meta.summary[:300]}...\n"
+            formatted += "\n"
+        
         logger.info(f"Returned {len(top_results)} results")
+        query_cache.set("lazy_search", query, user_role, user_institution_id, formatted, top_k=top_k)
         return formatted
         
     except Exception as e:
@@ -239,40 +203,10 @@ def search_specific_document_lazy(document_id: int, query: str, top_k: int = 5,
             return f"Document {document_id} not found."
         
         # Check if user has access to this document
-        from Agent.vector_store.pgvector_store import PGVectorStore
-        temp_store = PGVectorStore()
-        filters = temp_store._build_role_filters(user_role, user_institution_id)
-        
-        # Verify access
-        access_query = db.query(Document).filter(Document.id == document_id)
-        if filters is not None:
-            # Apply same filters to document table
-            if user_role == "ministry_admin":
-                access_query = access_query.filter(
-                    Document.visibility_level.in_(['public', 'restricted', 'institution_only'])
-                )
-            elif user_role == "university_admin":
-                from sqlalchemy import or_, and_
-                access_query = access_query.filter(
-                    or_(
-                        Document.visibility_level == 'public',
-                        and_(
-                            Document.visibility_level.in_(['institution_only', 'restricted']),
-                            Document.institution_id == user_institution_id
-                        )
-                    )
-                )
-            else:
-                from sqlalchemy import or_, and_
-                access_filters = [Document.visibility_level == 'public']
-                if user_institution_id:
-                    access_filters.append(
-                        and_(
-                            Document.visibility_level == 'institution_only',
-                            Document.institution_id == user_institution_id
-                        )
-                    )
-                access_query = access_query.filter(or_(*access_filters))
+        access_query = apply_search_access(
+            db.query(Document).filter(Document.id == document_id),
+            Document.access_scopes, user_role, user_institution_id
+        )
         
         if not access_query.first():
             db.close()
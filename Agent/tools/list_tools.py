@@ -54,7 +54,7 @@ def list_documents(
     
     try:
         from backend.database import SessionLocal, Document, DocumentMetadata
-        from backend.constants.roles import DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN
+        from backend.utils.access_scope import apply_search_access
         from sqlalchemy import or_, and_, extract
         
         db = SessionLocal()
@@ -65,36 +65,7 @@ def list_documents(
         )
         
         # Apply role-based access control
-        if user_role == DEVELOPER:
-            # Developer can see all documents
-            pass
-        elif user_role == MINISTRY_ADMIN:
-            # Ministry admin can see public, restricted, and institution_only
-            query = query.filter(
-                Document.visibility_level.in_(['public', 'restricted', 'institution_only'])
-            )
-        elif user_role == UNIVERSITY_ADMIN:
-            # University admin can see public and their institution's documents
-            query = query.filter(
-                or_(
-                    Document.visibility_level == 'public',
-                    and_(
-                        Document.visibility_level.in_(['institution_only', 'restricted']),
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            )
-        else:
-            # Other roles can see public and their institution's documents
-            filters = [Document.visibility_level == 'public']
-            if user_institution_id:
-                filters.append(
-                    and_(
-                        Document.visibility_level == 'institution_only',
-                        Document.institution_id == user_institution_id
-                    )
-                )
-            query = query.filter(or_(*filters))
+        query = apply_search_access(query, Document.access_scopes, user_role, user_institution_id)
         
         # Apply filters
         filters_applied = []
@@ -0,0 +1,348 @@
+"""Approximate-nearest-neighbour index management for document_embeddings
+
+Keeps the pgvector HNSW/IVFFlat index on ``document_embeddings.embedding`` in
+one place and decides, per query, whether the role filters should be applied
+before the vector ordering (exact scan over a small candidate set) or after it
+(ANN index scan with a widened search beam).
+"""
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "idx_embeddings_ann"
+TABLE_NAME = "document_embeddings"
+
+# Search strategies returned by the planner
+STRATEGY_ANN = "ann_postfilter"     # Use the ANN index, filter the candidates it yields
+STRATEGY_EXACT = "exact_prefilter"  # Filter first (B-tree indexes), exact distance sort
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ANNIndexConfig:
+    """Index and search tuning read from the environment"""
+
+    def __init__(self):
+        self.index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()  # hnsw, ivfflat, none
+        # HNSW build / search parameters
+        self.hnsw_m = _env_int("HNSW_M", 16)
+        self.hnsw_ef_construction = _env_int("HNSW_EF_CONSTRUCTION", 64)
+        self.hnsw_ef_search = _env_int("HNSW_EF_SEARCH", 40)
+        self.max_ef_search = _env_int("HNSW_MAX_EF_SEARCH", 1000)
+        # IVFFlat build / search parameters (lists=0 means derive from row count)
+        self.ivfflat_lists = _env_int("IVFFLAT_LISTS", 0)
+        self.ivfflat_probes = _env_int("IVFFLAT_PROBES", 10)
+        # Planner thresholds
+        self.exact_max_rows = _env_int("VECTOR_EXACT_MAX_ROWS", 20000)
+        self.prefilter_selectivity = _env_float("VECTOR_PREFILTER_SELECTIVITY", 0.02)
+        self.stats_ttl_seconds = _env_int("VECTOR_STATS_TTL", 300)
+
+    def ivfflat_lists_for(self, row_count: int) -> int:
+        """pgvector guidance: rows/1000 up to 1M rows, sqrt(rows) above"""
+        if self.ivfflat_lists > 0:
+            return self.ivfflat_lists
+        if row_count <= 1_000_000:
+            return max(10, row_count // 1000)
+        return int(math.sqrt(row_count))
+
+
+class ANNIndexManager:
+    """
+    Manages the ANN index on document_embeddings and plans filtered searches
+
+    Features:
+    - Create / drop / rebuild (REINDEX CONCURRENTLY) of the HNSW or IVFFlat index
+    - Per-query ef_search / probes tuning via SET LOCAL
+    - Distribution stats of (visibility, institution, approval), refreshed in
+      the background, to estimate how selective a user's role filter is
+    """
+
+    def __init__(self, config: Optional[ANNIndexConfig] = None):
+        self.config = config or ANNIndexConfig()
+        self._stats: Optional[Dict] = None
+        self._stats_loaded_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Index lifecycle
+    # ------------------------------------------------------------------
+
+    def index_exists(self, db: Session) -> bool:
+        row = db.execute(
+            text("SELECT 1 FROM pg_indexes WHERE tablename = :table AND indexname = :name"),
+            {"table": TABLE_NAME, "name": INDEX_NAME}
+        ).first()
+        return row is not None
+
+    def build_index_sql(self, row_count: int = 0) -> Optional[str]:
+        """CREATE INDEX statement for the configured index type"""
+        if self.config.index_type == "hnsw":
+            return (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME} "
+                f"USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = {self.config.hnsw_m}, ef_construction = {self.config.hnsw_ef_construction})"
+            )
+        if self.config.index_type == "ivfflat":
+            lists = self.config.ivfflat_lists_for(row_count)
+            return (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON {TABLE_NAME} "
+                f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+            )
+        return None
+
+    def create_index(self) -> bool:
+        """
+        Create the ANN index if missing
+
+        Runs outside a transaction (CONCURRENTLY) so ingestion keeps working
+        while the index builds.
+        """
+        from backend.database import engine
+
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            row_count = conn.execute(text(f"SELECT count(*) FROM {TABLE_NAME}")).scalar() or 0
+            sql = self.build_index_sql(row_count)
+            if sql is None:
+                logger.info("VECTOR_INDEX_TYPE=none, skipping ANN index creation")
+                return False
+            # Building a large graph is memory heavy, give it room for this session only
+            conn.execute(text("SET maintenance_work_mem = '512MB'"))
+            try:
+                logger.info(f"Creating {self.config.index_type} index {INDEX_NAME} over {row_count} rows")
+                conn.execute(text(sql))
+            finally:
+                # The connection goes back to the pool
+                conn.execute(text("RESET maintenance_work_mem"))
+        self.invalidate_stats()
+        return True
+
+    def drop_index(self) -> None:
+        from backend.database import engine
+
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+        logger.info(f"Dropped index {INDEX_NAME}")
+
+    def rebuild_index(self, recreate: bool = False) -> None:
+        """
+        Rebuild the ANN index
+
+        Args:
+            recreate: Drop and create with the current config (needed after
+                      changing index type or build parameters). Otherwise a
+                      REINDEX CONCURRENTLY refreshes the existing index, e.g.
+                      after IVFFlat centroids drift from a large backfill.
+        """
+        from backend.database import engine
+
+        if recreate:
+            self.drop_index()
+            self.create_index()
+            return
+
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("SET maintenance_work_mem = '512MB'"))
+            try:
+                conn.execute(text(f"REINDEX INDEX CONCURRENTLY {INDEX_NAME}"))
+            finally:
+                conn.execute(text("RESET maintenance_work_mem"))
+        logger.info(f"Rebuilt index {INDEX_NAME}")
+
+    def get_index_info(self, db: Optional[Session] = None) -> Dict:
+        close_db = False
+        if db is None:
+            db = SessionLocal()
+            close_db = True
+
+        try:
+            row = db.execute(
+                text(
+                    "SELECT indexdef, pg_size_pretty(pg_relation_size(indexname::regclass)) AS size "
+                    "FROM pg_indexes WHERE tablename = :table AND indexname = :name"
+                ),
+                {"table": TABLE_NAME, "name": INDEX_NAME}
+            ).first()
+            return {
+                "index_name": INDEX_NAME,
+                "exists": row is not None,
+                "definition": row.indexdef if row else None,
+                "size": row.size if row else None,
+                "configured_type": self.config.index_type,
+                "ef_search": self.config.hnsw_ef_search,
+                "probes": self.config.ivfflat_probes,
+            }
+        finally:
+            if close_db:
+                db.close()
+
+    # ------------------------------------------------------------------
+    # Query planning
+    # ------------------------------------------------------------------
+
+    def invalidate_stats(self) -> None:
+        """Mark the stats stale; the next plan() refreshes them in the background"""
+        with self._lock:
+            self._stats_loaded_at = 0.0
+
+    def refresh_stats(self) -> Dict:
+        """
+        Recount searchable rows grouped by the columns the role filters look at
+
+        This is a scan of document_embeddings, so it never runs on the search
+        path: plan() schedules it on a background thread when the cached stats
+        are older than VECTOR_STATS_TTL.
+        """
+        db = SessionLocal()
+        try:
+            rows = db.execute(text(
+                f"SELECT visibility_level, institution_id, count(*) AS n FROM {TABLE_NAME} "
+                f"WHERE approval_status IN ('approved', 'pending') "
+                f"GROUP BY visibility_level, institution_id"
+            )).fetchall()
+        finally:
+            db.close()
+
+        stats = {"total": 0, "groups": {}}
+        for row in rows:
+            stats["groups"][(row.visibility_level, row.institution_id)] = row.n
+            stats["total"] += row.n
+
+        with self._lock:
+            self._stats = stats
+            self._stats_loaded_at = time.time()
+        return stats
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh_stats()
+        except Exception as e:
+            logger.warning(f"Could not refresh vector stats: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def cached_stats(self) -> Optional[Dict]:
+        """
+        Last computed stats (possibly stale), without touching the database
+
+        Starts one background refresh when the stats are missing or older than
+        the TTL. Returns None until the first refresh has finished.
+        """
+        with self._lock:
+            stats = self._stats
+            stale = time.time() - self._stats_loaded_at >= self.config.stats_ttl_seconds
+            start_refresh = (stats is None or stale) and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if start_refresh:
+            threading.Thread(
+                target=self._refresh_in_background, name="vector-stats", daemon=True
+            ).start()
+        return stats
+
+    @staticmethod
+    def count_visible_rows(stats: Dict, user_role: Optional[str], user_institution_id: Optional[int]) -> int:
+        """Number of searchable rows the role filter lets through (mirrors _build_role_filters)"""
+        from backend.utils.access_scope import document_scopes, user_scopes
+
+        allowed_scopes = user_scopes(user_role, user_institution_id) if user_role else None
+        if allowed_scopes is None:
+            return stats["total"]
+
+        allowed_scopes = set(allowed_scopes)
+        return sum(
+            n for (visibility, institution_id), n in stats["groups"].items()
+            if allowed_scopes.intersection(document_scopes(visibility, institution_id))
+        )
+
+    def plan(
+        self,
+        user_role: Optional[str] = None,
+        user_institution_id: Optional[int] = None,
+        document_id_filter: Optional[int] = None
+    ) -> Dict:
+        """
+        Choose between pre-filtering and post-filtering for a search
+
+        Returns:
+            Dict with strategy, estimated candidate rows and selectivity
+        """
+        # A single document (or an explicit list of documents) has at most a
+        # few hundred chunks each: always exact
+        if document_id_filter is not None or self.config.index_type == "none":
+            return {"strategy": STRATEGY_EXACT, "candidates": None, "selectivity": None}
+
+        stats = self.cached_stats()
+        if stats is None:
+            # First searches after startup, while the stats load in the background
+            return {"strategy": STRATEGY_ANN, "candidates": None, "selectivity": 1.0}
+
+        total = stats["total"]
+        candidates = self.count_visible_rows(stats, user_role, user_institution_id)
+        selectivity = (candidates / total) if total else 1.0
+
+        # Small candidate sets are cheaper to scan exactly, and exact results
+        # cannot be starved by the ANN beam returning only filtered-out rows
+        if candidates <= self.config.exact_max_rows or selectivity < self.config.prefilter_selectivity:
+            strategy = STRATEGY_EXACT
+        else:
+            strategy = STRATEGY_ANN
+
+        return {"strategy": strategy, "candidates": candidates, "selectivity": selectivity}
+
+    def apply_search_params(self, db: Session, top_k: int, selectivity: Optional[float]) -> None:
+        """
+        Widen the ANN search beam for the current transaction
+
+        With post-filtering only ~selectivity of the visited candidates survive,
+        so the beam has to grow by 1/selectivity to still yield top_k rows.
+        """
+        selectivity = selectivity or 1.0
+        needed = int(math.ceil(top_k / max(selectivity, 1e-3)))
+
+        if self.config.index_type == "hnsw":
+            ef_search = min(max(self.config.hnsw_ef_search, needed * 2), self.config.max_ef_search)
+            db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        elif self.config.index_type == "ivfflat":
+            scale = max(1.0, 1.0 / max(selectivity, 1e-3))
+            probes = int(min(self.config.ivfflat_probes * scale, self.config.ivfflat_probes * 10))
+            db.execute(text(f"SET LOCAL ivfflat.probes = {probes}"))
+
+
+# Global index manager instance
+_index_manager = None
+
+
+def get_index_manager() -> ANNIndexManager:
+    """Get or create global ANN index manager"""
+    global _index_manager
+    if _index_manager is None:
+        _index_manager = ANNIndexManager()
+    return _index_manager
@@ -0,0 +1,313 @@
+"""Bulk writer for document_embeddings
+
+Streams chunks, vectors and metadata into Postgres in batches instead of one
+ORM object per chunk:
+- "copy":   binary COPY (vectors sent as pgvector's binary format, no text round trip)
+- "values": psycopg2 execute_values multi-row INSERTs
+- ORM bulk_insert_mappings fallback for non-Postgres databases (tests)
+
+Upsert mode compares chunk hashes (text and metadata) with the stored rows and
+only replaces chunks that changed, instead of delete-all-then-insert.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import struct
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.database import DocumentEmbedding
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = (
+    "document_id", "chunk_index", "chunk_text", "embedding", "visibility_level",
+    "institution_id", "approval_status", "chunk_metadata", "created_at", "updated_at"
+)
+
+# Binary COPY framing (https://www.postgresql.org/docs/current/sql-copy.html)
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack("!h", -1)
+_PG_EPOCH = datetime(2000, 1, 1)
+_NULL_FIELD = struct.pack("!i", -1)
+
+
+def chunk_text_hash(chunk: str) -> str:
+    """Hash of a chunk's text (matches md5(chunk_text) in SQL)"""
+    return hashlib.md5(clean_chunk_text(chunk).encode("utf-8")).hexdigest()
+
+
+def canonical_metadata(metadata: Optional[Dict]) -> str:
+    """Metadata as stored in jsonb (default=str, as the writers send it), with sorted keys"""
+    return json.dumps(json.loads(json.dumps(metadata, default=str)), sort_keys=True)
+
+
+def chunk_hash(text_hash: str, metadata: Optional[Dict]) -> str:
+    """Hash used to detect changed chunks: text hash plus canonical metadata"""
+    return hashlib.md5(f"{text_hash}:{canonical_metadata(metadata)}".encode("utf-8")).hexdigest()
+
+
+def clean_chunk_text(chunk: str) -> str:
+    """Postgres text columns reject NUL bytes, which PDF extraction sometimes yields"""
+    return chunk.replace("\x00", "")
+
+
+def _field(payload: bytes) -> bytes:
+    return struct.pack("!i", len(payload)) + payload
+
+
+def _int4(value: Optional[int]) -> bytes:
+    if value is None:
+        return _NULL_FIELD
+    return _field(struct.pack("!i", int(value)))
+
+
+def _text(value: Optional[str]) -> bytes:
+    if value is None:
+        return _NULL_FIELD
+    return _field(value.encode("utf-8"))
+
+
+def _vector(values) -> bytes:
+    # pgvector binary format: int16 dim, int16 unused, float4[dim] (big-endian)
+    array = np.asarray(values, dtype=">f4")
+    return _field(struct.pack("!hh", array.shape[0], 0) + array.tobytes())
+
+
+def _jsonb(value: Optional[Dict]) -> bytes:
+    if value is None:
+        return _NULL_FIELD
+    # jsonb binary format: version byte (1) followed by the JSON text
+    return _field(b"\x01" + json.dumps(value, default=str).encode("utf-8"))
+
+
+def _timestamp(value: datetime) -> bytes:
+    delta = value - _PG_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return _field(struct.pack("!q", micros))
+
+
+def _vector_literal(values) -> str:
+    return "[" + ",".join(repr(float(v)) for v in values) + "]"
+
+
+class BulkEmbeddingWriter:
+    """
+    Batched writer for document_embeddings rows
+
+    Usage:
+        writer = BulkEmbeddingWriter()
+        writer.write(db, document_id, chunks, embeddings, metadata_list,
+                     visibility_level, institution_id, approval_status, upsert=True)
+        db.commit()
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, mode: Optional[str] = None):
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_WRITE_BATCH_SIZE", "500"))
+        self.mode = (mode or os.getenv("EMBEDDING_WRITE_MODE", "copy")).lower()  # copy, values
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def write(
+        self,
+        db: Session,
+        document_id: int,
+        chunks: Sequence[str],
+        embeddings,
+        metadata_list: Sequence[Dict],
+        visibility_level: str,
+        institution_id: Optional[int],
+        approval_status: str,
+        upsert: bool = False
+    ) -> Dict:
+        """
+        Write all chunks of a document (caller commits)
+
+        Args:
+            upsert: Keep rows whose chunk text and metadata are unchanged and only
+                    replace changed / new chunks; rows past the new chunk count are removed
+
+        Returns:
+            Dict with inserted, unchanged and deleted counts
+        """
+        if len(chunks) != len(embeddings) or len(chunks) != len(metadata_list):
+            raise ValueError(
+                f"Mismatched input lengths: {len(chunks)} chunks, "
+                f"{len(embeddings)} embeddings, {len(metadata_list)} metadata entries"
+            )
+
+        if upsert:
+            changed = self.changed_chunk_indexes(db, document_id, chunks, metadata_list)
+            deleted = self._delete_chunks(db, document_id, changed, keep_below=len(chunks))
+            unchanged = len(chunks) - len(changed)
+            if unchanged:
+                # Access control may have changed even when the text did not
+                self._sync_denormalized_fields(db, document_id, visibility_level, institution_id, approval_status)
+        else:
+            changed = set(range(len(chunks)))
+            deleted = db.query(DocumentEmbedding).filter(
+                DocumentEmbedding.document_id == document_id
+            ).delete(synchronize_session=False)
+            unchanged = 0
+
+        rows = [
+            (idx, clean_chunk_text(chunks[idx]), embeddings[idx], metadata_list[idx])
+            for idx in sorted(changed)
+        ]
+        self._insert_rows(db, document_id, rows, visibility_level, institution_id, approval_status)
+
+        return {"inserted": len(rows), "unchanged": unchanged, "deleted": deleted}
+
+    def changed_chunk_indexes(
+        self,
+        db: Session,
+        document_id: int,
+        chunks: Sequence[str],
+        metadata_list: Sequence[Optional[Dict]]
+    ) -> Set[int]:
+        """Indexes of chunks that are new or whose text or metadata differs from the stored row"""
+        stored = self.stored_chunk_hashes(db, document_id)
+        return {
+            idx for idx, (chunk, metadata) in enumerate(zip(chunks, metadata_list))
+            if stored.get(idx) != chunk_hash(chunk_text_hash(chunk), metadata)
+        }
+
+    def stored_chunk_hashes(self, db: Session, document_id: int) -> Dict[int, str]:
+        """chunk_index -> chunk_hash for a document; the text is hashed server-side"""
+        rows = db.execute(
+            text(
+                "SELECT chunk_index, md5(chunk_text) AS text_hash, chunk_metadata "
+                "FROM document_embeddings WHERE document_id = :doc_id"
+            ),
+            {"doc_id": document_id}
+        ).fetchall()
+        return {row.chunk_index: chunk_hash(row.text_hash, row.chunk_metadata) for row in rows}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _delete_chunks(self, db: Session, document_id: int, changed: Set[int], keep_below: int) -> int:
+        """Delete changed chunks plus any chunk index that no longer exists"""
+        result = db.execute(
+            text(
+                "DELETE FROM document_embeddings WHERE document_id = :doc_id "
+                "AND (chunk_index >= :keep_below OR chunk_index = ANY(:changed))"
+            ),
+            {"doc_id": document_id, "keep_below": keep_below, "changed": sorted(changed)}
+        )
+        return result.rowcount or 0
+
+    def _sync_denormalized_fields(self, db, document_id, visibility_level, institution_id, approval_status):
+        db.query(DocumentEmbedding).filter(
+            DocumentEmbedding.document_id == document_id
+        ).update({
+            DocumentEmbedding.visibility_level: visibility_level,
+            DocumentEmbedding.institution_id: institution_id,
+            DocumentEmbedding.approval_status: approval_status,
+            DocumentEmbedding.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+
+    def _insert_rows(self, db, document_id, rows, visibility_level, institution_id, approval_status):
+        if not rows:
+            return
+
+        if db.bind.dialect.name != "postgresql":
+            self._insert_orm(db, document_id, rows, visibility_level, institution_id, approval_status)
+            return
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if self.mode == "values":
+                self._insert_values(db, document_id, batch, visibility_level, institution_id, approval_status)
+            else:
+                self._insert_copy(db, document_id, batch, visibility_level, institution_id, approval_status)
+            logger.debug(f"Wrote embeddings {start + 1}-{start + len(batch)}/{len(rows)} for document {document_id}")
+
+    def _raw_cursor(self, db: Session):
+        # DBAPI connection bound to the session's current transaction
+        return db.connection().connection.cursor()
+
+    def _insert_copy(self, db, document_id, batch, visibility_level, institution_id, approval_status):
+        now = datetime.utcnow()
+        timestamp = _timestamp(now)
+        field_count = struct.pack("!h", len(COPY_COLUMNS))
+        # Fields shared by every row of the document
+        doc_field = _int4(document_id)
+        access_fields = (_text(visibility_level), _int4(institution_id), _text(approval_status))
+
+        buffer = io.BytesIO()
+        buffer.write(_PGCOPY_HEADER)
+        for idx, chunk, embedding, metadata in batch:
+            buffer.write(field_count)
+            buffer.write(doc_field)
+            buffer.write(_int4(idx))
+            buffer.write(_text(chunk))
+            buffer.write(_vector(embedding))
+            buffer.write(access_fields[0])
+            buffer.write(access_fields[1])
+            buffer.write(access_fields[2])
+            buffer.write(_jsonb(metadata))
+            buffer.write(timestamp)
+            buffer.write(timestamp)
+        buffer.write(_PGCOPY_TRAILER)
+        buffer.seek(0)
+
+        cursor = self._raw_cursor(db)
+        try:
+            cursor.copy_expert(
+                f"COPY document_embeddings ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def _insert_values(self, db, document_id, batch, visibility_level, institution_id, approval_status):
+        from psycopg2.extras import execute_values
+
+        now = datetime.utcnow()
+        values = [
+            (
+                document_id, idx, chunk, _vector_literal(embedding), visibility_level,
+                institution_id, approval_status, json.dumps(metadata, default=str) if metadata is not None else None,
+                now, now
+            )
+            for idx, chunk, embedding, metadata in batch
+        ]
+        cursor = self._raw_cursor(db)
+        try:
+            execute_values(
+                cursor,
+                f"INSERT INTO document_embeddings ({', '.join(COPY_COLUMNS)}) VALUES %s",
+                values,
+                template="(%s, %s, %s, %s::vector, %s, %s, %s, %s::jsonb, %s, %s)",
+                page_size=self.batch_size
+            )
+        finally:
+            cursor.close()
+
+    def _insert_orm(self, db, document_id, rows, visibility_level, institution_id, approval_status):
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(DocumentEmbedding, [
+            {
+                "document_id": document_id,
+                "chunk_index": idx,
+                "chunk_text": chunk,
+                "embedding": embedding.tolist() if hasattr(embedding, "tolist") else list(embedding),
+                "visibility_level": visibility_level,
+                "institution_id": institution_id,
+                "approval_status": approval_status,
+                "chunk_metadata": metadata,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for idx, chunk, embedding, metadata in rows
+        ])
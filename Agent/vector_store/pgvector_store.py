@@ -3,10 +3,13 @@ import logging
 from typing import List, Dict, Optional
 import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
 from pgvector.sqlalchemy import Vector
 
 from backend.database import DocumentEmbedding, SessionLocal
+from Agent.vector_store.ann_index import get_index_manager, STRATEGY_EXACT
+from Agent.vector_store.bulk_writer import BulkEmbeddingWriter
+from Agent.retrieval.query_cache import get_corpus_version
+from Agent.retrieval.text_search import tsquery_expression, rank_expression
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,8 @@ class PGVectorStore:
     def __init__(self):
         """Initialize PGVector store"""
         self.dimension = 1024  # BGE-large-en-v1.5 embedding dimension
+        self.index_manager = get_index_manager()
+        self.writer = BulkEmbeddingWriter()
     
     def add_embeddings(
         self,
@@ -27,7 +32,8 @@ class PGVectorStore:
         visibility_level: str,
         institution_id: Optional[int],
         approval_status: str,
-        db: Optional[Session] = None
+        db: Optional[Session] = None,
+        upsert: bool = False
     ) -> int:
         """
         Add embeddings to pgvector
@@ -41,9 +47,11 @@ class PGVectorStore:
             institution_id: Institution ID (can be None)
             approval_status: Document approval status
             db: Optional database session (creates new if None)
+            upsert: Only replace chunks whose text or metadata changed instead
+                    of deleting and re-inserting every chunk
         
         Returns:
-            Number of embeddings added
+            Number of embeddings stored for the document (written or kept unchanged)
         """
         close_db = False
         if db is None:
@@ -51,34 +59,26 @@ class PGVectorStore:
             close_db = True
         
         try:
-            # Delete existing embeddings for this document
-            db.query(DocumentEmbedding).filter(
-                DocumentEmbedding.document_id == document_id
-            ).delete()
-            
-            # Add new embeddings
-            for idx, (chunk, embedding, metadata) in enumerate(zip(chunks, embeddings, metadata_list)):
-                # Convert to list if it's a numpy array
-                if hasattr(embedding, 'tolist'):
-                    embedding_list = embedding.tolist()
-                else:
-                    embedding_list = embedding  # Already a list
-                
-                doc_embedding = DocumentEmbedding(
-                    document_id=document_id,
-                    chunk_index=idx,
-                    chunk_text=chunk,
-                    embedding=embedding_list,
-                    visibility_level=visibility_level,
-                    institution_id=institution_id,
-                    approval_status=approval_status,
-                    chunk_metadata=metadata
-                )
-                db.add(doc_embedding)
+            # Batched COPY / multi-row insert via the bulk writer
+            result = self.writer.write(
+                db,
+                document_id=document_id,
+                chunks=chunks,
+                embeddings=embeddings,
+                metadata_list=metadata_list,
+                visibility_level=visibility_level,
+                institution_id=institution_id,
+                approval_status=approval_status,
+                upsert=upsert
+            )
             
             db.commit()
-            logger.info(f"Added {len(chunks)} embeddings for document {document_id}")
-            return len(chunks)
+            get_corpus_version().bump()
+            logger.info(
+                f"Added {result['inserted']} embeddings for document {document_id} "
+                f"({result['unchanged']} unchanged, {result['deleted']} removed)"
+            )
+            return result['inserted'] + result['unchanged']
             
         except Exception as e:
             db.rollback()
@@ -95,7 +95,8 @@ class PGVectorStore:
         user_role: Optional[str] = None,
         user_institution_id: Optional[int] = None,
         document_id_filter: Optional[int] = None,
-        db: Optional[Session] = None
+        db: Optional[Session] = None,
+        document_ids: Optional[List[int]] = None
     ) -> List[Dict]:
         """
         Search for similar embeddings with role-based filtering
@@ -107,6 +108,7 @@ class PGVectorStore:
             user_institution_id: User's institution ID
             document_id_filter: Optional document ID to search within only
             db: Optional database session
+            document_ids: Optional list of document IDs to search within only
         
         Returns:
             List of results with text, score, metadata, document_id
@@ -117,39 +119,54 @@ class PGVectorStore:
             close_db = True
         
         try:
-            # Build base query
-            query = db.query(DocumentEmbedding)
+            query_vector = query_embedding.tolist()
+            cosine_distance = DocumentEmbedding.embedding.cosine_distance(query_vector)
+            l2_distance = DocumentEmbedding.embedding.l2_distance(query_vector)
             
-            # Filter by specific document if provided
-            if document_id_filter is not None:
-                query = query.filter(DocumentEmbedding.document_id == document_id_filter)
+            # Only fetch the columns we return; the 1024-dim vector itself stays in Postgres
+            query = db.query(
+                DocumentEmbedding.chunk_text,
+                DocumentEmbedding.chunk_metadata,
+                DocumentEmbedding.document_id,
+                DocumentEmbedding.chunk_index,
+                DocumentEmbedding.approval_status,
+                DocumentEmbedding.visibility_level,
+                DocumentEmbedding.institution_id,
+                l2_distance.label("l2_distance")
+            )
             
-            # Apply role-based filtering
-            if user_role:
-                filters = self._build_role_filters(user_role, user_institution_id)
-                if filters is not None:
-                    query = query.filter(filters)
+            query = self._apply_search_filters(
+                query, user_role, user_institution_id, document_id_filter, document_ids
+            )
             
-            # Filter by approval status (approved or pending only)
-            # Draft, rejected, and changes_requested documents are NOT searchable
-            query = query.filter(
-                DocumentEmbedding.approval_status.in_(['approved', 'pending'])
+            # Decide whether the role filter runs before or after the vector ordering
+            plan = self.index_manager.plan(
+                user_role=user_role,
+                user_institution_id=user_institution_id,
+                document_id_filter=document_id_filter if document_ids is None else document_ids
             )
             
+            if plan["strategy"] == STRATEGY_EXACT:
+                # "+ 0" hides the ordering from the ANN index so Postgres narrows
+                # rows with the B-tree filter indexes and sorts the survivors exactly
+                order_expression = cosine_distance + 0
+            else:
+                # ANN index scan; widen the beam so enough rows survive the filter
+                self.index_manager.apply_search_params(db, top_k, plan["selectivity"])
+                order_expression = cosine_distance
+            
             # Perform vector similarity search using cosine distance
             # pgvector uses <=> for cosine distance
-            query = query.order_by(
-                DocumentEmbedding.embedding.cosine_distance(query_embedding.tolist())
-            ).limit(top_k)
+            query = query.order_by(order_expression).limit(top_k)
             
             results = query.all()
+            logger.debug(f"Vector search plan: {plan}")
             
             # Format results
             formatted_results = []
             for result in results:
-                # Calculate similarity score (1 - cosine_distance)
-                distance = np.linalg.norm(query_embedding - np.array(result.embedding))
-                score = 1.0 / (1.0 + distance)  # Convert distance to similarity
+                # Convert euclidean distance to similarity score
+                score = 1.0 / (1.0 + float(result.l2_distance))
                 
                 formatted_results.append({
                     "text": result.chunk_text,
@@ -172,6 +189,99 @@ class PGVectorStore:
             if close_db:
                 db.close()
     
+    def lexical_search(
+        self,
+        query_text: str,
+        top_k: int = 5,
+        user_role: Optional[str] = None,
+        user_institution_id: Optional[int] = None,
+        document_id_filter: Optional[int] = None,
+        db: Optional[Session] = None,
+        document_ids: Optional[List[int]] = None
+    ) -> List[Dict]:
+        """
+        Full-text search over chunk text using the GIN-indexed search_vector
+        
+        Same filters and result format as search(); score is the ts_rank_cd rank.
+        """
+        tsquery = tsquery_expression(query_text)
+        if tsquery is None:
+            return []
+        
+        close_db = False
+        if db is None:
+            db = SessionLocal()
+            close_db = True
+        
+        try:
+            rank = rank_expression(DocumentEmbedding.search_vector, tsquery)
+            query = db.query(
+                DocumentEmbedding.chunk_text,
+                DocumentEmbedding.chunk_metadata,
+                DocumentEmbedding.document_id,
+                DocumentEmbedding.chunk_index,
+                DocumentEmbedding.approval_status,
+                DocumentEmbedding.visibility_level,
+                DocumentEmbedding.institution_id,
+                rank.label("text_rank")
+            ).filter(DocumentEmbedding.search_vector.op("@@")(tsquery))
+            
+            query = self._apply_search_filters(
+                query, user_role, user_institution_id, document_id_filter, document_ids
+            )
+            results = query.order_by(rank.desc()).limit(top_k).all()
+            
+            formatted_results = [
+                {
+                    "text": result.chunk_text,
+                    "score": float(result.text_rank),
+                    "metadata": result.chunk_metadata or {},
+                    "document_id": result.document_id,
+                    "chunk_index": result.chunk_index,
+                    "approval_status": result.approval_status,
+                    "visibility_level": result.visibility_level,
+                    "institution_id": result.institution_id
+                }
+                for result in results
+            ]
+            
+            logger.info(f"Found {len(formatted_results)} lexical results for query")
+            return formatted_results
+            
+        except Exception as e:
+            logger.error(f"Error in lexical search: {str(e)}")
+            raise
+        finally:
+            if close_db:
+                db.close()
+    
+    def _apply_search_filters(
+        self,
+        query,
+        user_role: Optional[str],
+        user_institution_id: Optional[int],
+        document_id_filter: Optional[int],
+        document_ids: Optional[List[int]]
+    ):
+        """Document scope, role-based access and approval filters shared by all search paths"""
+        # Filter by specific document if provided
+        if document_id_filter is not None:
+            query = query.filter(DocumentEmbedding.document_id == document_id_filter)
+        if document_ids is not None:
+            query = query.filter(DocumentEmbedding.document_id.in_(document_ids))
+        
+        # Apply role-based filtering
+        if user_role:
+            filters = self._build_role_filters(user_role, user_institution_id)
+            if filters is not None:
+                query = query.filter(filters)
+        
+        # Filter by approval status (approved or pending only)
+        # Draft, rejected, and changes_requested documents are NOT searchable
+        return query.filter(
+            DocumentEmbedding.approval_status.in_(['approved', 'pending'])
+        )
+    
     def _build_role_filters(self, user_role: str, user_institution_id: Optional[int]):
         """
         Build SQLAlchemy filters based on user role
@@ -182,40 +292,13 @@ class PGVectorStore:
         
         Returns:
             SQLAlchemy filter expression or None for no filtering
+
+        Visibility rules live in backend/utils/access_scope.py; this is a single
+        overlap test on the GIN-indexed access_scopes column.
         """
-        from backend.constants.roles import DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN
-        
-        # Developer sees everything
-        if user_role == DEVELOPER:
-            return None
-        
-        # MoE Admin sees public, restricted, and institution_only (all institutions)
-        elif user_role == MINISTRY_ADMIN:
-            return DocumentEmbedding.visibility_level.in_([
-                'public', 'restricted', 'institution_only'
-            ])
-        
-        # University Admin sees public + their institution's docs
-        elif user_role == UNIVERSITY_ADMIN:
-            return or_(
-                DocumentEmbedding.visibility_level == 'public',
-                and_(
-                    DocumentEmbedding.visibility_level.in_(['institution_only', 'restricted']),
-                    DocumentEmbedding.institution_id == user_institution_id
-                )
-            )
-        
-        # Students and others see public + their institution's institution_only docs
-        else:
-            filters = [DocumentEmbedding.visibility_level == 'public']
-            if user_institution_id:
-                filters.append(
-                    and_(
-                        DocumentEmbedding.visibility_level == 'institution_only',
-                        DocumentEmbedding.institution_id == user_institution_id
-                    )
-                )
-            return or_(*filters)
+        from backend.utils.access_scope import scope_filter, user_scopes
+
+        return scope_filter(DocumentEmbedding.access_scopes, user_scopes(user_role, user_institution_id))
     
     def delete_document_embeddings(self, document_id: int, db: Optional[Session] = None):
         """
@@ -235,6 +318,7 @@ class PGVectorStore:
                 DocumentEmbedding.document_id == document_id
             ).delete()
             db.commit()
+            get_corpus_version().bump()
             logger.info(f"Deleted {deleted} embeddings for document {document_id}")
             return deleted
         except Exception as e:
@@ -282,6 +366,7 @@ class PGVectorStore:
                     embedding.approval_status = approval_status
             
             db.commit()
+            get_corpus_version().bump()
             logger.info(f"Updated metadata for {len(embeddings)} embeddings of document {document_id}")
         except Exception as e:
             db.rollback()
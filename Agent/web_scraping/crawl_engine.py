@@ -0,0 +1,648 @@
+"""
+Async crawl engine shared by the web scrapers
+
+One httpx client (HTTP/2, keep-alive pooled) runs on a dedicated event loop
+thread, so scheduler jobs, routers and async code all share its connections
+and its politeness budgets:
+- per-domain concurrency and minimum spacing between request starts
+  (a site scraper's rate_limit_delay raises its domain's spacing)
+- conditional GET (If-None-Match / If-Modified-Since) against an on-disk
+  response cache; a 304 is answered from disk and flagged not_modified
+- retries with backoff on transport errors, 429 and 5xx (Retry-After honoured)
+
+Listing crawls fetch each wave of discovered pagination links concurrently,
+and document downloads stream to disk, so sources on different domains
+crawl in parallel and no thread sleeps between requests.
+
+Sync callers use engine.run(coro) (or engine.submit(coro) to overlap work).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from .config import ScrapingConfig
+
+logger = logging.getLogger(__name__)
+
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "data/crawl_cache")
+CACHE_MAX_AGE_DAYS = int(os.getenv("CRAWL_CACHE_MAX_AGE_DAYS", "30"))
+DOMAIN_CONCURRENCY = int(os.getenv("CRAWL_DOMAIN_CONCURRENCY", "2"))
+DOMAIN_DELAY = float(os.getenv("CRAWL_DOMAIN_DELAY", str(ScrapingConfig.RATE_LIMIT_DELAY)))
+MAX_CONNECTIONS = int(os.getenv("CRAWL_MAX_CONNECTIONS", "50"))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+# Connection-level headers are not allowed on HTTP/2 requests
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60.0
+
+
+class CrawlError(Exception):
+    """HTTP error status from a crawled URL"""
+
+    def __init__(self, url: str, status_code: int):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.url = url
+        self.status_code = status_code
+
+
+class CrawlResponse:
+    """The parts of requests.Response the scrapers use"""
+
+    def __init__(self, url: str, status_code: int, content: bytes, headers,
+                 from_cache: bool = False, not_modified: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = httpx.Headers(headers)
+        self.from_cache = from_cache
+        self.not_modified = not_modified
+
+    @property
+    def text(self) -> str:
+        content_type = self.headers.get('content-type', '')
+        encoding = 'utf-8'
+        if 'charset=' in content_type:
+            encoding = content_type.split('charset=')[-1].split(';')[0].strip() or encoding
+        try:
+            return self.content.decode(encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise CrawlError(self.url, self.status_code)
+
+
+class ResponseCache:
+    """
+    On-disk cache of page bodies and their validators, one entry per URL
+
+    Only responses carrying an ETag or Last-Modified are kept; without a
+    validator the body could never be revalidated.
+    """
+
+    CACHED_HEADERS = ('etag', 'last-modified', 'content-type')
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age_days: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or CRAWL_CACHE_DIR)
+        self.max_age_days = max_age_days if max_age_days is not None else CACHE_MAX_AGE_DAYS
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        directory = self.cache_dir / key[:2]
+        return directory / f"{key}.json", directory / f"{key}.body"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored validators and headers for url (None if absent or expired)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if time.time() - meta.get('stored_at', 0) > self.max_age_days * 86400 or not body_path.exists():
+            return None
+        return meta
+
+    def body(self, url: str) -> Optional[bytes]:
+        _, body_path = self._paths(url)
+        try:
+            return body_path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, url: str, headers, content: bytes) -> bool:
+        headers = httpx.Headers(headers)
+        if not headers.get('etag') and not headers.get('last-modified'):
+            return False
+
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'headers': {name: headers[name] for name in self.CACHED_HEADERS if name in headers},
+        }
+        try:
+            meta_path.parent.mkdir(parents=True, exist_ok=True)
+            # Body first, metadata last: a reader never sees metadata without its body
+            self._write_atomic(body_path, content)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            return True
+        except OSError as e:
+            logger.warning(f"Could not cache response for {url}: {e}")
+            return False
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated now"""
+        meta = self.get(url)
+        if meta:
+            meta['stored_at'] = time.time()
+            meta_path, _ = self._paths(url)
+            try:
+                self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            except OSError:
+                pass
+
+    def prune(self) -> int:
+        """Delete entries not revalidated within max_age_days"""
+        cutoff = time.time() - self.max_age_days * 86400
+        removed = 0
+        for meta_path in self.cache_dir.glob('*/*.json'):
+            try:
+                if meta_path.stat().st_mtime < cutoff:
+                    meta_path.unlink()
+                    meta_path.with_suffix('.body').unlink(missing_ok=True)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class DomainThrottle:
+    """
+    Per-domain politeness: at most `concurrency` requests in flight and at
+    least `delay` seconds between request starts. Used only on the engine loop.
+    """
+
+    def __init__(self, concurrency: int = DOMAIN_CONCURRENCY, delay: float = DOMAIN_DELAY):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._delays: Dict[str, float] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def set_delay(self, domain: str, delay: float) -> None:
+        """Raise a domain's spacing (never lowers the default)"""
+        self._delays[domain] = max(self._delays.get(domain, self.delay), delay)
+
+    def backoff(self, domain: str, seconds: float) -> None:
+        """Hold off new requests to a domain (429 / Retry-After)"""
+        now = time.monotonic()
+        self._next_start[domain] = max(self._next_start.get(domain, now), now + seconds)
+
+    @asynccontextmanager
+    async def slot(self, domain: str):
+        semaphore = self._semaphores.setdefault(domain, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(domain, now))
+            # Reserve the slot before waiting so concurrent callers queue up behind it
+            self._next_start[domain] = start + self._delays.get(domain, self.delay)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def validators_match(stored: Optional[Dict[str, Any]], headers) -> bool:
+    """
+    True if a response's ETag / Last-Modified match validators stored from an
+    earlier download (for servers that ignore conditional request headers)
+    """
+    if not stored:
+        return False
+    etag = headers.get('etag')
+    last_modified = headers.get('last-modified')
+    length = headers.get('content-length')
+
+    if stored.get('content_length') and length and length.isdigit() and int(length) != stored['content_length']:
+        return False
+    if stored.get('etag') and etag:
+        # Weak comparison: W/"x" and "x" name the same representation
+        return stored['etag'].removeprefix('W/') == etag.removeprefix('W/')
+    if stored.get('last_modified') and last_modified:
+        return stored['last_modified'] == last_modified
+    return False
+
+
+def _validators(url: str, headers) -> Dict[str, Any]:
+    length = headers.get('content-length')
+    return {
+        'url': url,
+        'etag': headers.get('etag'),
+        'last_modified': headers.get('last-modified'),
+        'content_length': int(length) if length and length.isdigit() else None,
+    }
+
+
+def _clean_headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {
+        name: value for name, value in (headers or {}).items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    }
+
+
+class CrawlEngine:
+    """Shared async HTTP engine for page fetches, listing crawls and downloads"""
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        domain_concurrency: Optional[int] = None,
+        domain_delay: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.cache = cache or ResponseCache()
+        self.throttle = DomainThrottle(
+            domain_concurrency or DOMAIN_CONCURRENCY,
+            domain_delay if domain_delay is not None else DOMAIN_DELAY
+        )
+        self.max_retries = max_retries if max_retries is not None else ScrapingConfig.MAX_RETRIES
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'not_modified': 0,
+            'retries': 0,
+            'errors': 0,
+            'bytes_downloaded': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Event loop bridging
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="crawl-engine", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the engine loop; returns a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the engine loop and wait for its result (sync callers)"""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("CrawlEngine.run() called on the engine loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=min(20, MAX_CONNECTIONS),
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(ScrapingConfig.REQUEST_TIMEOUT, connect=10.0),
+                follow_redirects=True
+            )
+        return self._client
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    async def _get(self, url: str, headers: Dict[str, str], timeout: Optional[float]) -> httpx.Response:
+        """GET with politeness slot and retries (body fully read)"""
+        domain = urlparse(url).netloc.lower()
+        client = self._get_client()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.throttle.slot(domain):
+                    self._stats['requests'] += 1
+                    response = await client.get(url, headers=headers, timeout=timeout or ScrapingConfig.REQUEST_TIMEOUT)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    self._stats['errors'] += 1
+                    raise
+                self._stats['retries'] += 1
+                await asyncio.sleep(ScrapingConfig.RETRY_DELAY_BASE * 2 ** attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._stats['retries'] += 1
+                self.throttle.backoff(domain, _retry_after(response) or ScrapingConfig.RETRY_DELAY_BASE * 2 ** attempt)
+                continue
+            return response
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        min_delay: Optional[float] = None
+    ) -> CrawlResponse:
+        """
+        GET a page, revalidating against the on-disk cache
+
+        Args:
+            url: Page URL
+            headers: Extra request headers (a scraper's session headers)
+            timeout: Request timeout in seconds
+            use_cache: Send conditional headers and cache the response
+            min_delay: Minimum spacing for this URL's domain (site rate_limit_delay)
+
+        Returns:
+            CrawlResponse (status is not raised; call raise_for_status())
+        """
+        domain = urlparse(url).netloc.lower()
+        if min_delay:
+            self.throttle.set_delay(domain, min_delay)
+
+        request_headers = _clean_headers(headers)
+        cached = self.cache.get(url) if use_cache else None
+        if cached:
+            validators = cached['headers']
+            if validators.get('etag'):
+                request_headers['If-None-Match'] = validators['etag']
+            if validators.get('last-modified'):
+                request_headers['If-Modified-Since'] = validators['last-modified']
+
+        response = await self._get(url, request_headers, timeout)
+
+        if response.status_code == 304 and cached:
+            body = self.cache.body(url)
+            if body is not None:
+                self._stats['not_modified'] += 1
+                self.cache.touch(url)
+                return CrawlResponse(url, 200, body, cached['headers'], from_cache=True, not_modified=True)
+            return await self.fetch(url, headers, timeout, use_cache=False)
+
+        if use_cache and response.status_code == 200:
+            self.cache.put(url, response.headers, response.content)
+        return CrawlResponse(str(response.url), response.status_code, response.content, response.headers)
+
+    async def fetch_many(self, urls: Sequence[str], **kwargs) -> List[Any]:
+        """Fetch URLs concurrently (within domain budgets); exceptions are returned in place"""
+        return await asyncio.gather(*(self.fetch(url, **kwargs) for url in urls), return_exceptions=True)
+
+    async def download(
+        self,
+        url: str,
+        dest_path: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60,
+        retries: Optional[int] = None,
+        validators: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a document to dest_path
+
+        With `validators` ({'etag', 'last_modified', 'content_length'} from an
+        earlier download) the GET is conditional: a 304, or a 200 whose
+        validators still match, returns {'status': 'not_modified'} without
+        reading the body.
+
+        Returns:
+            dict: {'status', 'url', 'filepath', 'file_size', 'file_hash', 'content_type',
+                   'etag', 'last_modified', 'content_length'},
+                  {'status': 'not_modified', 'url', 'etag', 'last_modified', 'content_length'}
+                  or {'status': 'error', 'url', 'error'}
+        """
+        domain = urlparse(url).netloc.lower()
+        client = self._get_client()
+        retries = self.max_retries if retries is None else retries
+        last_error = None
+
+        request_headers = _clean_headers(headers)
+        if validators:
+            if validators.get('etag'):
+                request_headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                request_headers['If-Modified-Since'] = validators['last_modified']
+
+        for attempt in range(retries + 1):
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                async with self.throttle.slot(domain):
+                    self._stats['requests'] += 1
+                    async with client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+                        if response.status_code == 304 or (
+                            response.status_code == 200 and validators_match(validators, response.headers)
+                        ):
+                            self._stats['not_modified'] += 1
+                            return {**_validators(url, response.headers), 'status': 'not_modified'}
+                        if response.status_code in RETRY_STATUSES and attempt < retries:
+                            self.throttle.backoff(domain, _retry_after(response) or ScrapingConfig.RETRY_DELAY_BASE * 2 ** attempt)
+                            last_error = f"HTTP {response.status_code}"
+                            self._stats['retries'] += 1
+                            continue
+                        if response.status_code >= 400:
+                            raise CrawlError(url, response.status_code)
+                        with open(dest_path, 'wb') as f:
+                            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                                f.write(chunk)
+                                digest.update(chunk)
+                                size += len(chunk)
+
+                self._stats['bytes_downloaded'] += size
+                return {
+                    **_validators(url, response.headers),
+                    'status': 'success',
+                    'filepath': dest_path,
+                    'file_size': size,
+                    'file_hash': digest.hexdigest(),
+                    'content_type': response.headers.get('content-type', ''),
+                }
+            except CrawlError as e:
+                last_error = str(e)
+                break
+            except httpx.HTTPError as e:
+                last_error = str(e) or e.__class__.__name__
+                if attempt < retries:
+                    self._stats['retries'] += 1
+                    await asyncio.sleep(ScrapingConfig.RETRY_DELAY_BASE * 2 ** attempt)
+
+        self._stats['errors'] += 1
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return {'status': 'error', 'url': url, 'error': last_error}
+
+    async def download_many(
+        self,
+        items: Sequence[Tuple[str, str]],
+        headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Download (url, dest_path) pairs concurrently, results in input order
+
+        headers_for(url) builds each request's headers (e.g. a per-URL Referer);
+        otherwise every request gets kwargs['headers'].
+        """
+        if headers_for:
+            return await asyncio.gather(*(
+                self.download(url, path, headers=headers_for(url), **kwargs) for url, path in items
+            ))
+        return await asyncio.gather(*(self.download(url, path, **kwargs) for url, path in items))
+
+    # ------------------------------------------------------------------
+    # Listing crawls
+    # ------------------------------------------------------------------
+
+    async def crawl_listing(
+        self,
+        scraper,
+        start_url: str,
+        max_pages: int = ScrapingConfig.DEFAULT_MAX_PAGES,
+        max_documents: Optional[int] = None,
+        stop_flag: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Crawl a document listing and its pagination with a site scraper
+
+        Pages are fetched in waves: every pagination link discovered on the
+        current wave is fetched concurrently in the next one. The scraper only
+        parses (get_document_links / get_pagination_links), so site scrapers
+        plug in unchanged.
+
+        Returns:
+            dict: {'documents', 'pages_scraped', 'pages_not_modified', 'errors', 'stopped'}
+        """
+        headers = getattr(scraper, 'headers', None)
+        min_delay = getattr(scraper, 'rate_limit_delay', None)
+
+        documents: List[Dict[str, Any]] = []
+        seen_documents = set()
+        visited = {start_url}
+        frontier = [start_url]
+        result = {'documents': documents, 'pages_scraped': 0, 'pages_not_modified': 0, 'errors': [], 'stopped': False}
+
+        while frontier and result['pages_scraped'] < max_pages:
+            if stop_flag and stop_flag():
+                result['stopped'] = True
+                break
+
+            wave = frontier[:max_pages - result['pages_scraped']]
+            frontier = []
+            responses = await self.fetch_many(wave, headers=headers, min_delay=min_delay)
+
+            # Results are handled in discovery order so document order is stable
+            for url, response in zip(wave, responses):
+                if isinstance(response, Exception):
+                    result['errors'].append(f"Page {url}: {response}")
+                    continue
+                if response.status_code >= 400:
+                    result['errors'].append(f"Page {url}: HTTP {response.status_code}")
+                    continue
+
+                result['pages_scraped'] += 1
+                result['pages_not_modified'] += 1 if response.not_modified else 0
+                page_documents, pagination_links = await asyncio.to_thread(
+                    _parse_listing, scraper, response.content, url
+                )
+                for doc in page_documents:
+                    if doc['url'] not in seen_documents:
+                        seen_documents.add(doc['url'])
+                        documents.append(doc)
+                for link in pagination_links:
+                    if link not in visited:
+                        visited.add(link)
+                        frontier.append(link)
+
+            if max_documents and len(documents) >= max_documents:
+                del documents[max_documents:]
+                break
+
+        logger.info(
+            f"Crawled {result['pages_scraped']} pages from {start_url} "
+            f"({result['pages_not_modified']} not modified), {len(documents)} documents"
+        )
+        return result
+
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+    async def _aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the engine loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(10)
+        except Exception as e:
+            logger.warning(f"Error closing crawl client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+def _parse_listing(scraper, content: bytes, url: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    soup = BeautifulSoup(content, 'html.parser')
+    return scraper.get_document_links(soup, url), scraper.get_pagination_links(soup, url)
+
+
+# Global crawl engine instance
+_crawl_engine: Optional[CrawlEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_crawl_engine() -> CrawlEngine:
+    """Get or create the shared crawl engine"""
+    global _crawl_engine
+    with _engine_lock:
+        if _crawl_engine is None:
+            _crawl_engine = CrawlEngine()
+        return _crawl_engine
+
+
+def shutdown_crawl_engine() -> None:
+    """Close the shared crawl engine (app shutdown)"""
+    global _crawl_engine
+    with _engine_lock:
+        engine, _crawl_engine = _crawl_engine, None
+    if engine is not None:
+        engine.close()
@@ -4,8 +4,9 @@ Improved logic for document identity checking using URL-first approach
 """
 import hashlib
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Iterable
 from datetime import datetime
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from urllib.parse import urlparse, parse_qs
 
@@ -14,13 +15,24 @@ from backend.database import Document, ScrapedDocument, DocumentMetadata
 logger = logging.getLogger(__name__)
 
 
+def normalize_source_url(url: str) -> str:
+    """
+    Normalize URL by removing query string, fragment and trailing slash
+    
+    Python mirror of backend.database.NORMALIZED_SOURCE_URL_EXPRESSION, which
+    generates Document.normalized_source_url; the two must stay in sync.
+    """
+    return url.split('#', 1)[0].split('?', 1)[0].rstrip('/')
+
+
 class DocumentIdentityManager:
     """Manage document identity checking and deduplication"""
     
     def __init__(self):
         """Initialize document identity manager"""
-        self.url_cache = {}  # Cache for URL-based lookups
-        self.hash_cache = {}  # Cache for content hash lookups
+        self.url_cache = {}  # Cache for URL-based lookups (None = known absent)
+        self.hash_cache = {}  # Cache for content hash lookups (None = known absent)
+        self.normalized_url_cache = {}  # normalized URL -> candidate documents
         
     def check_document_identity(
         self,
@@ -44,7 +56,142 @@ class DocumentIdentityManager:
         try:
             # Calculate content hash
             content_hash = self._calculate_content_hash(content)
+            return self._check_identity(url, content_hash, title, db)
+            
+        except Exception as e:
+            logger.error(f"Error checking document identity for {url}: {str(e)}")
+            return {
+                'action': 'error',
+                'reason': 'identity_check_failed',
+                'error': str(e),
+                'url': url
+            }
+    
+    def resolve_identities(
+        self,
+        urls: Iterable[str],
+        db: Session,
+        content_hashes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve all document links of a listing page in bulk
+        
+        One query matches every URL by source URL or normalized URL, and one
+        more matches content hashes when they are known (e.g. from the
+        tracker). Results fill url_cache, hash_cache and
+        normalized_url_cache, including misses, so check_document_identity
+        for these URLs is answered from memory.
+        
+        Args:
+            urls: Document URLs found on the page
+            db: Database session
+            content_hashes: Known content hashes by URL (optional)
             
+        Returns:
+            Per URL: the check_document_identity result when its content hash
+            is given, otherwise {'found', 'document_id', 'content_hash',
+            'matched_url', 'reason'}
+        """
+        urls = list(dict.fromkeys(urls))
+        content_hashes = content_hashes or {}
+        
+        try:
+            self._load_url_identities(urls, db)
+            self._load_hash_identities(set(content_hashes.values()), db)
+        except Exception as e:
+            logger.error(f"Error resolving identities for {len(urls)} URLs: {str(e)}")
+            return {url: {'found': False, 'error': str(e)} for url in urls}
+        
+        results = {}
+        for url in urls:
+            if url in content_hashes:
+                results[url] = self._check_identity(url, content_hashes[url], None, db)
+                continue
+            
+            cached_doc = self.url_cache.get(url)
+            if cached_doc:
+                results[url] = {
+                    'found': True,
+                    'reason': 'same_url',
+                    'document_id': cached_doc['document_id'],
+                    'content_hash': cached_doc['content_hash'],
+                    'matched_url': url
+                }
+                continue
+            
+            equivalent = next((
+                candidate for candidate in self.normalized_url_cache.get(normalize_source_url(url), [])
+                if self._urls_are_equivalent(url, candidate['url'])
+            ), None)
+            if equivalent:
+                results[url] = {
+                    'found': True,
+                    'reason': 'equivalent_url',
+                    'document_id': equivalent['document_id'],
+                    'content_hash': equivalent['content_hash'],
+                    'matched_url': equivalent['url']
+                }
+            else:
+                results[url] = {'found': False}
+        
+        logger.debug(f"Resolved {len(urls)} document identities, {sum(r['found'] for r in results.values())} known")
+        return results
+    
+    def _load_url_identities(self, urls: List[str], db: Session):
+        """Fill URL caches (and hash_cache) with one source_url/normalized_source_url query"""
+        normalized = {normalize_source_url(url) for url in urls}
+        pending = [url for url in urls if url not in self.url_cache]
+        pending_normalized = normalized - self.normalized_url_cache.keys()
+        if not pending and not pending_normalized:
+            return
+        
+        rows = db.query(
+            Document.id, Document.source_url, Document.normalized_source_url, Document.content_hash
+        ).filter(or_(
+            Document.source_url.in_(pending),
+            Document.normalized_source_url.in_(list(pending_normalized))
+        )).all()
+        
+        for key in pending_normalized:
+            self.normalized_url_cache[key] = []
+        for url in pending:
+            self.url_cache[url] = None
+        
+        for doc_id, source_url, normalized_url, content_hash in rows:
+            doc = {'document_id': doc_id, 'content_hash': content_hash}
+            if source_url in pending:
+                self.url_cache[source_url] = doc
+            if normalized_url in pending_normalized:
+                self.normalized_url_cache[normalized_url].append({**doc, 'url': source_url})
+            if content_hash and not self.hash_cache.get(content_hash):
+                self.hash_cache[content_hash] = {
+                    'document_id': doc_id,
+                    'url': source_url
+                }
+    
+    def _load_hash_identities(self, content_hashes: set, db: Session):
+        """Fill hash_cache for content_hashes with one query"""
+        pending = [content_hash for content_hash in content_hashes if content_hash and content_hash not in self.hash_cache]
+        if not pending:
+            return
+        
+        for content_hash in pending:
+            self.hash_cache[content_hash] = None
+        
+        rows = db.query(Document.id, Document.source_url, Document.content_hash).filter(
+            Document.content_hash.in_(pending)
+        ).all()
+        
+        for doc_id, source_url, content_hash in rows:
+            if self.hash_cache[content_hash] is None:
+                self.hash_cache[content_hash] = {
+                    'document_id': doc_id,
+                    'url': source_url
+                }
+    
+    def _check_identity(self, url: str, content_hash: str, title: Optional[str], db: Session) -> Dict[str, Any]:
+        """Run the URL-first identity checks for a known content hash"""
+        try:
             # Step 1: Check by source URL (primary identifier)
             url_result = self._check_by_source_url(url, content_hash, db)
             
@@ -98,6 +245,8 @@ class DocumentIdentityManager:
             # Check cache first
             if url in self.url_cache:
                 cached_doc = self.url_cache[url]
+                if cached_doc is None:
+                    return {'found': False}
                 if cached_doc['content_hash'] == content_hash:
                     return {
                         'action': 'skip_unchanged',
@@ -172,6 +321,8 @@ class DocumentIdentityManager:
             # Check cache first
             if content_hash in self.hash_cache:
                 cached_info = self.hash_cache[content_hash]
+                if cached_info is None or cached_info['url'] == url:
+                    return {'found': False}
                 return {
                     'action': 'link_duplicate',
                     'reason': 'same_content_different_url',
@@ -227,20 +378,25 @@ class DocumentIdentityManager:
             # Normalize URL (remove query parameters, fragments, etc.)
             normalized_url = self._normalize_url(url)
             
-            # Find similar URLs
-            similar_docs = db.query(Document).filter(
-                Document.source_url.like(f"{normalized_url}%")
-            ).all()
-            
-            for doc in similar_docs:
-                if self._urls_are_equivalent(url, doc.source_url):
-                    if doc.content_hash == content_hash:
+            # Find similar URLs (indexed equality on the generated column)
+            if normalized_url not in self.normalized_url_cache:
+                similar_docs = db.query(Document.id, Document.source_url, Document.content_hash).filter(
+                    Document.normalized_source_url == normalized_url
+                ).all()
+                self.normalized_url_cache[normalized_url] = [
+                    {'document_id': doc_id, 'url': source_url, 'content_hash': doc_hash}
+                    for doc_id, source_url, doc_hash in similar_docs
+                ]
+            
+            for doc in self.normalized_url_cache[normalized_url]:
+                if self._urls_are_equivalent(url, doc['url']):
+                    if doc['content_hash'] == content_hash:
                         return {
                             'action': 'skip_unchanged',
                             'reason': 'equivalent_url_same_content',
                             'found': True,
-                            'document_id': doc.id,
-                            'original_url': doc.source_url,
+                            'document_id': doc['document_id'],
+                            'original_url': doc['url'],
                             'new_url': url
                         }
                     else:
@@ -248,10 +404,10 @@ class DocumentIdentityManager:
                             'action': 'update_version',
                             'reason': 'equivalent_url_different_content',
                             'found': True,
-                            'document_id': doc.id,
-                            'original_url': doc.source_url,
+                            'document_id': doc['document_id'],
+                            'original_url': doc['url'],
                             'new_url': url,
-                            'old_hash': doc.content_hash,
+                            'old_hash': doc['content_hash'],
                             'new_hash': content_hash
                         }
             
@@ -449,6 +605,13 @@ class DocumentIdentityManager:
         """Handle new document creation"""
         content_hash = identity_result['content_hash']
         
+        # The caller creates the document, so cached misses are now stale
+        if self.url_cache.get(url, True) is None:
+            del self.url_cache[url]
+        if self.hash_cache.get(content_hash, True) is None:
+            del self.hash_cache[content_hash]
+        self.normalized_url_cache.pop(self._normalize_url(url), None)
+        
         # This will be handled by the calling function
         # We just return the information needed for creation
         return {
@@ -470,13 +633,7 @@ class DocumentIdentityManager:
     
     def _normalize_url(self, url: str) -> str:
         """Normalize URL by removing query parameters and fragments"""
-        try:
-            parsed = urlparse(url)
-            # Keep scheme, netloc, and path only
-            normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            return normalized.rstrip('/')
-        except:
-            return url
+        return normalize_source_url(url)
     
     def _urls_are_equivalent(self, url1: str, url2: str) -> bool:
         """Check if two URLs are equivalent (ignoring minor differences)"""
@@ -536,6 +693,7 @@ class DocumentIdentityManager:
                 'multi_source_documents': multi_source_docs,
                 'cache_size_urls': len(self.url_cache),
                 'cache_size_hashes': len(self.hash_cache),
+                'cache_size_normalized_urls': len(self.normalized_url_cache),
                 'deduplication_rate': round((duplicate_count / total_docs * 100), 2) if total_docs > 0 else 0
             }
             
@@ -547,6 +705,7 @@ class DocumentIdentityManager:
         """Clear identity caches"""
         self.url_cache.clear()
         self.hash_cache.clear()
+        self.normalized_url_cache.clear()
         logger.info("Document identity caches cleared")
     
     def preload_cache(self, source_id: int, db: Session, limit: int = 1000):
@@ -2,8 +2,8 @@
 import logging
 import hashlib
 import os
-import requests
-from typing import List, Dict, Optional, Set
+import tempfile
+from typing import Any, Iterator, List, Dict, Optional, Set, Tuple
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
@@ -13,9 +13,13 @@ from backend.database import SessionLocal, Document, DocumentMetadata, WebScrapi
 from backend.utils.text_extractor import extract_text
 from Agent.metadata.extractor import MetadataExtractor
 from Agent.document_families.family_manager import process_scraped_document
+from Agent.lazy_rag.embedding_queue import enqueue_embedding, PRIORITY_SCRAPE
 
 # Import enhanced scraping components
 from .enhanced_scraping_orchestrator import EnhancedScrapingOrchestrator
+from .config import ScrapingConfig
+from .crawl_engine import get_crawl_engine
+from .page_hash_tracker import PageHashTracker
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +29,11 @@ class EnhancedWebScrapingProcessor:
     
     def __init__(self):
         self.metadata_extractor = MetadataExtractor()
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.engine = get_crawl_engine()
+        self.hash_tracker = PageHashTracker()
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }
         
     def scrape_source_enhanced(
         self,
@@ -91,7 +96,7 @@ class EnhancedWebScrapingProcessor:
                     logger.info(f"Scraping page: {current_url}")
                     
                     # Get page content
-                    response = self.session.get(current_url, timeout=30)
+                    response = self.engine.run(self.engine.fetch(current_url, headers=self.headers, timeout=30))
                     response.raise_for_status()
                     
                     soup = BeautifulSoup(response.content, 'html.parser')
@@ -143,9 +148,6 @@ class EnhancedWebScrapingProcessor:
                             
                             stats["documents_processed"] += 1
                             
-                            # Rate limiting
-                            time.sleep(0.5)
-                            
                         except Exception as e:
                             logger.error(f"Error processing document {doc_url}: {str(e)}")
                             stats["errors"].append(f"Document {doc_url}: {str(e)}")
@@ -273,43 +275,48 @@ class EnhancedWebScrapingProcessor:
         doc_url = doc_info["url"]
         
         try:
-            # Download document
-            logger.info(f"Downloading document: {doc_url}")
+            # Conditional download: unchanged documents cost a 304, not a transfer
+            validators = self.hash_tracker.get_validators(doc_url, db) if incremental else None
             
-            response = self.session.get(doc_url, timeout=60)
-            response.raise_for_status()
+            logger.info(f"Downloading document: {doc_url}")
             
-            # Get last modified date from headers
-            last_modified_str = response.headers.get('Last-Modified')
-            last_modified_at_source = None
-            if last_modified_str:
-                try:
-                    from email.utils import parsedate_to_datetime
-                    last_modified_at_source = parsedate_to_datetime(last_modified_str)
-                except:
-                    pass
-            
-            # Extract text content
-            content = ""
-            if doc_info["file_type"] in ["pdf", "doc", "docx"]:
-                # Save temporarily and extract
-                import tempfile
-                import os
+            fd, tmp_path = tempfile.mkstemp(suffix=f".{doc_info['file_type']}")
+            os.close(fd)
+            try:
+                download = self.engine.run(self.engine.download(
+                    doc_url, tmp_path, headers=self.headers, timeout=60, validators=validators
+                ))
                 
-                with tempfile.NamedTemporaryFile(
-                    delete=False, 
-                    suffix=f".{doc_info['file_type']}"
-                ) as tmp_file:
-                    tmp_file.write(response.content)
-                    tmp_path = tmp_file.name
+                if download["status"] == "not_modified":
+                    self.hash_tracker.update_validators(doc_url, download, source.id, db)
+                    logger.info(f"Document not modified at source: {doc_url}")
+                    return {
+                        "status": "unchanged",
+                        "document_id": validators.get("document_id"),
+                        "message": "Source not modified since last scrape"
+                    }
+                if download["status"] != "success":
+                    raise Exception(download["error"])
                 
-                try:
+                # Get last modified date from headers
+                last_modified_at_source = None
+                if download.get("last_modified"):
+                    try:
+                        from email.utils import parsedate_to_datetime
+                        last_modified_at_source = parsedate_to_datetime(download["last_modified"])
+                    except:
+                        pass
+                
+                # Extract text content
+                if doc_info["file_type"] in ["pdf", "doc", "docx"]:
                     content = extract_text(tmp_path, doc_info["file_type"])
-                finally:
+                else:
+                    # For other types, use the body as text
+                    with open(tmp_path, 'rb') as f:
+                        content = f.read().decode('utf-8', errors='replace')
+            finally:
+                if os.path.exists(tmp_path):
                     os.unlink(tmp_path)
-            else:
-                # For other types, use response text
-                content = response.text
             
             if not content or len(content.strip()) < 100:
                 return {
@@ -327,6 +334,9 @@ class EnhancedWebScrapingProcessor:
                 )
                 
                 if update_check["status"] == "unchanged":
+                    self.hash_tracker.update_validators(
+                        doc_url, download, source.id, db, document_id=update_check.get("document_id")
+                    )
                     return update_check
             
             # Create document record
@@ -393,9 +403,13 @@ class EnhancedWebScrapingProcessor:
                 # Remove the document we just created since it's a duplicate
                 db.delete(document)
                 db.commit()
+                self.hash_tracker.update_validators(doc_url, download, source.id, db)
                 return family_result
             
+            self.hash_tracker.update_validators(doc_url, download, source.id, db, document_id=document.id)
+            
             logger.info(f"Successfully processed document {document.id} into family {family_result.get('family_id')}")
+            enqueue_embedding(document.id, priority=PRIORITY_SCRAPE, source="scrape")
             
             return {
                 "status": "new" if family_result["status"] == "added" else family_result["status"],
@@ -443,6 +457,55 @@ class EnhancedWebScrapingProcessor:
         return pagination_links[:5]  # Limit to 5 pagination links per page
 
 
+def _iter_downloads(
+    documents: List[Dict],
+    headers: Optional[Dict[str, str]] = None,
+    batch_size: int = ScrapingConfig.MAX_WORKERS
+) -> Iterator[Tuple[Dict, Dict[str, Any]]]:
+    """
+    Yield (doc_info, download) pairs, downloading the next batch while the caller
+    processes the current one. Temp files are removed once their batch is consumed.
+    """
+    engine = get_crawl_engine()
+    batches = [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
+    
+    def start(batch):
+        items = []
+        for doc_info in batch:
+            fd, tmp_path = tempfile.mkstemp(suffix=f".{doc_info.get('file_type', 'pdf')}")
+            os.close(fd)
+            items.append((doc_info['url'], tmp_path))
+        return items, engine.submit(engine.download_many(items, headers=headers, timeout=30))
+    
+    def cleanup(items):
+        for _, tmp_path in items:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    
+    pending = start(batches[0]) if batches else None
+    try:
+        for index, batch in enumerate(batches):
+            items, future = pending
+            pending = None
+            try:
+                downloads = future.result()
+                if index + 1 < len(batches):
+                    pending = start(batches[index + 1])
+                for doc_info, download in zip(batch, downloads):
+                    yield doc_info, download
+            finally:
+                cleanup(items)
+    finally:
+        # Stopped early: let the prefetched batch settle before removing its files
+        if pending:
+            items, future = pending
+            try:
+                future.result()
+            except Exception:
+                pass
+            cleanup(items)
+
+
 # Integration function for existing web scraping system
 def enhanced_scrape_source(
     source_id: int,
@@ -464,6 +527,7 @@ def enhanced_scrape_source(
     
     # Initialize metadata extractor
     metadata_extractor = MetadataExtractor()
+    hash_tracker = PageHashTracker()
     
     db = SessionLocal()
     start_time = time.time()
@@ -529,64 +593,54 @@ def enhanced_scrape_source(
         try:
             logger.info(f"Scraping page: {source.url}")
             
-            # Get page content using site-specific scraper
-            page_result = scraper.scrape_page(source.url)
+            # Listing pages are fetched concurrently (per-domain politeness and
+            # conditional GETs are handled by the crawl engine)
+            crawl = scraper.crawl(
+                source.url,
+                max_pages=max_pages if pagination_enabled else 1,
+                max_documents=max_documents,
+                stop_flag=stop_flag
+            )
             
-            if page_result['status'] != 'success':
-                raise Exception(f"Failed to scrape page: {page_result.get('error')}")
+            if crawl['pages_scraped'] == 0:
+                raise Exception(f"Failed to scrape page: {'; '.join(crawl['errors']) or 'no pages fetched'}")
             
-            stats["pages_scraped"] = 1
+            if crawl['stopped']:
+                logger.info(f"Scraping stopped by user during pagination after {crawl['pages_scraped']} pages")
             
-            # Extract document links
-            documents = scraper.get_document_links(page_result['soup'], source.url)
+            documents = crawl['documents']
+            stats["pages_scraped"] = crawl['pages_scraped']
             stats["documents_discovered"] = len(documents)
             
-            logger.info(f"Found {len(documents)} document links on first page")
+            logger.info(f"Total documents discovered across {stats['pages_scraped']} pages: {stats['documents_discovered']}")
             
-            # ✅ NEW: Add pagination support
-            if pagination_enabled and len(documents) < max_documents:
-                pagination_links = scraper.get_pagination_links(page_result['soup'], source.url)
-                
-                pages_scraped = 1
-                for page_url in pagination_links:
-                    # Check stop flag
-                    if stop_flag and stop_flag():
-                        logger.info(f"Scraping stopped by user during pagination after {pages_scraped} pages")
-                        break
-                    
-                    if pages_scraped >= max_pages:
-                        break
-                    
-                    if stats["documents_discovered"] >= max_documents:
-                        break
-                    
-                    try:
-                        logger.info(f"Scraping additional page {pages_scraped + 1}: {page_url}")
-                        
-                        page_result = scraper.scrape_page(page_url)
-                        if page_result['status'] != 'success':
-                            continue
-                        
-                        more_documents = scraper.get_document_links(page_result['soup'], page_url)
-                        documents.extend(more_documents)
-                        stats["documents_discovered"] += len(more_documents)
-                        stats["pages_scraped"] += 1
-                        pages_scraped += 1
-                        
-                        logger.info(f"Found {len(more_documents)} more documents on page {pages_scraped}")
-                        
-                        # Rate limiting between pages
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        logger.error(f"Error scraping page {page_url}: {e}")
-                        continue
+            # Filter by keywords and skip documents already in the database (one query)
+            candidates = documents[:max_documents]
+            if keywords:
+                candidates = [
+                    doc_info for doc_info in candidates
+                    if any(keyword.lower() in doc_info.get('title', '').lower() for keyword in keywords)
+                ]
+            
+            existing_urls = set()
+            if candidates:
+                existing_urls = {
+                    url for (url,) in db.query(Document.source_url).filter(
+                        Document.source_url.in_([doc_info['url'] for doc_info in candidates])
+                    )
+                }
             
-            logger.info(f"Total documents discovered across {stats['pages_scraped']} pages: {stats['documents_discovered']}")
+            to_download = []
+            for doc_info in candidates:
+                if doc_info['url'] in existing_urls:
+                    stats["documents_unchanged"] += 1
+                    logger.info(f"Document already exists: {doc_info['title']}")
+                else:
+                    to_download.append(doc_info)
             
             # ✅ FIXED: Process all documents up to max_documents (removed 10-doc limit)
             processed_count = 0
-            for doc_info in documents[:max_documents]:  # ✅ No more hard-coded limit!
+            for doc_info, download in _iter_downloads(to_download, headers=scraper.headers):
                 # Check stop flag
                 if stop_flag and stop_flag():
                     logger.info(f"Scraping stopped by user after processing {processed_count} documents")
@@ -599,35 +653,19 @@ def enhanced_scrape_source(
                 try:
                     # ✅ NEW: Progress logging every 50 documents
                     if processed_count > 0 and processed_count % 50 == 0:
-                        logger.info(f"Progress: {processed_count}/{min(len(documents), max_documents)} documents processed")
+                        logger.info(f"Progress: {processed_count}/{len(to_download)} documents processed")
                         logger.info(f"Stats: {stats['documents_new']} new, {stats['documents_unchanged']} unchanged")
                     
-                    # Filter by keywords if provided
-                    if keywords:
-                        title_lower = doc_info.get('title', '').lower()
-                        if not any(keyword.lower() in title_lower for keyword in keywords):
-                            continue
-                    
-                    # Check if document already exists in database
-                    existing_doc = db.query(Document).filter(
-                        Document.source_url == doc_info['url']
-                    ).first()
-                    
-                    if existing_doc:
-                        stats["documents_unchanged"] += 1
-                        logger.info(f"Document already exists: {doc_info['title']}")
-                        continue
-                    
                     # Download and extract text content (following normal workflow)
                     logger.info(f"Downloading and processing document: {doc_info['url']}")
                     
                     try:
-                        # Download document
-                        response = requests.get(doc_info['url'], timeout=30)
-                        response.raise_for_status()
+                        # Document was downloaded ahead of time by _iter_downloads
+                        if download['status'] != 'success':
+                            raise Exception(download.get('error') or 'download failed')
+                        tmp_path = download['filepath']
                         
-                        # Save temporarily for text extraction and permanent storage
-                        import tempfile
+                        # Temp file is used for text extraction and permanent storage
                         import re
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         
@@ -655,11 +693,6 @@ def enhanced_scrape_source(
                         
                         unique_filename = f"scraped_{timestamp}_{safe_filename}.{doc_info.get('file_type', 'pdf')}"
                         
-                        # Create temp file for processing
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{doc_info.get('file_type', 'pdf')}") as tmp_file:
-                            tmp_file.write(response.content)
-                            tmp_path = tmp_file.name
-                        
                         # Extract text using the same method as normal uploads
                         from backend.utils.text_extractor import extract_text_enhanced
                         extraction_result = extract_text_enhanced(tmp_path, doc_info.get('file_type', 'pdf'), use_ocr=False)
@@ -670,9 +703,6 @@ def enhanced_scrape_source(
                         from backend.utils.supabase_storage import upload_to_supabase
                         s3_url = upload_to_supabase(tmp_path, unique_filename)
                         
-                        # Clean up temp file
-                        os.unlink(tmp_path)
-                        
                         # Skip if no meaningful text extracted
                         if not extracted_text or len(extracted_text.strip()) < 50:
                             logger.warning(f"No meaningful text extracted from {doc_info['url']}")
@@ -805,9 +835,10 @@ def enhanced_scrape_source(
                     processed_count += 1
                     
                     logger.info(f"Successfully processed document {document.id}: {doc_info['title']}")
+                    enqueue_embedding(document.id, priority=PRIORITY_SCRAPE, source="scrape")
                     
-                    # ✅ FIXED: Faster rate limiting for large scrapes
-                    time.sleep(0.2)  # Was missing, now added for rate limiting
+                    # Keep the HTTP validators so re-scans can revalidate with a conditional GET
+                    hash_tracker.update_validators(doc_info['url'], download, source.id, db, document_id=document.id)
                     
                 except Exception as e:
                     logger.error(f"Error processing document {doc_info.get('url', 'unknown')}: {str(e)}")
@@ -385,7 +385,7 @@ class EnhancedScrapingOrchestrator:
             
             # Step 2: Check if page has changed using content hashing
             hash_decision = self.page_hash_tracker.should_process_page(
-                page_url, soup, source.id, db
+                page_url, soup, source.id, db, content=page_result.get('content')
             )
             
             results['page_changed'] = hash_decision['should_process']
@@ -400,6 +400,9 @@ class EnhancedScrapingOrchestrator:
             documents = scraper.get_document_links(soup, page_url)
             results['documents_found'] = len(documents)
             
+            # Resolve every link on the page in bulk so per-document checks hit the cache
+            self.document_identity_manager.resolve_identities([doc['url'] for doc in documents], db)
+            
             # Step 4: Process each document with enhanced identity checking
             for doc_info in documents:
                 try:
@@ -70,6 +70,11 @@ class IncrementalScraper:
         
         logger.info(f"Filtering {len(all_documents)} discovered documents for source {source_id}")
         
+        # One tracker lookup for the whole listing
+        stored_hashes = self.storage.get_document_hashes(
+            doc['url'] for doc in all_documents if doc.get('url')
+        )
+        
         for doc in all_documents:
             url = doc.get('url')
             if not url:
@@ -77,11 +82,11 @@ class IncrementalScraper:
                 continue
             
             # Check if document has been scraped before
-            if self.is_document_scraped(url):
+            if url in stored_hashes:
                 # Document exists in tracker
                 if check_content_hash:
                     # Check if content has changed
-                    stored_hash = self.storage.get_document_hash(url)
+                    stored_hash = stored_hashes[url]
                     current_hash = self._generate_doc_hash(doc)
                     
                     if stored_hash != current_hash:
@@ -133,6 +138,7 @@ class IncrementalScraper:
         """
         logger.info(f"Marking {len(documents)} documents as scraped for source {source_id}")
         
+        entries = []
         for doc in documents:
             url = doc.get('url')
             if not url:
@@ -140,10 +146,10 @@ class IncrementalScraper:
                 continue
             
             # Generate content hash
-            content_hash = self._generate_doc_hash(doc)
-            
-            # Mark as scraped in storage
-            self.storage.mark_document_scraped(url, content_hash, source_id)
+            entries.append((url, self._generate_doc_hash(doc)))
+        
+        # Mark as scraped in storage (single batched write)
+        self.storage.mark_documents_scraped(entries, source_id)
         
         logger.info(f"Successfully marked {len(documents)} documents as scraped")
     
@@ -195,14 +201,17 @@ class IncrementalScraper:
             List of documents with changed content
         """
         changed_docs = []
+        stored_hashes = self.storage.get_document_hashes(
+            doc['url'] for doc in current_documents if doc.get('url')
+        )
         
         for doc in current_documents:
             url = doc.get('url')
             if not url:
                 continue
             
-            if self.is_document_scraped(url):
-                stored_hash = self.storage.get_document_hash(url)
+            if url in stored_hashes:
+                stored_hash = stored_hashes[url]
                 current_hash = self._generate_doc_hash(doc)
                 
                 if stored_hash and stored_hash != current_hash:
@@ -250,14 +259,9 @@ class IncrementalScraper:
         Returns:
             Count of new documents
         """
-        new_count = 0
-        
-        for doc in discovered_documents:
-            url = doc.get('url')
-            if url and not self.is_document_scraped(url):
-                new_count += 1
-        
-        return new_count
+        urls = [doc['url'] for doc in discovered_documents if doc.get('url')]
+        scraped = self.storage.get_document_hashes(urls)
+        return sum(1 for url in urls if url not in scraped)
     
     def validate_incremental_accuracy(self, result: Dict[str, Any]) -> bool:
         """
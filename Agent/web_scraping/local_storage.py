@@ -1,11 +1,17 @@
 """
 Local file-based storage for web scraping data (temporary, no database)
 This allows development and testing without database access
+
+get_local_storage() returns the SQLite-backed store by default
+(SCRAPING_STORAGE_BACKEND=sqlite|json); LocalStorage is the original
+JSON-file implementation and defines the interface.
 """
 import json
 import os
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Tuple
 from pathlib import Path
 import hashlib
 
@@ -206,6 +212,37 @@ class LocalStorage:
         
         self._write_json(self.tracker_file, tracker)
     
+    def get_document_hashes(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Get stored content hashes for the scraped URLs among urls (one lookup)"""
+        tracker = self._read_json(self.tracker_file)
+        hashes = {}
+        for url in urls:
+            entry = tracker.get(hashlib.md5(url.encode()).hexdigest())
+            if entry is not None:
+                hashes[url] = entry.get('content_hash')
+        return hashes
+    
+    def mark_documents_scraped(self, entries: Iterable[Tuple[str, str]], source_id: int):
+        """Mark (url, content_hash) pairs as scraped with a single write"""
+        tracker = self._read_json(self.tracker_file)
+        now = datetime.utcnow().isoformat()
+        
+        for url, content_hash in entries:
+            url_hash = hashlib.md5(url.encode()).hexdigest()
+            if url_hash in tracker:
+                tracker[url_hash]['last_seen_at'] = now
+                tracker[url_hash]['content_hash'] = content_hash
+            else:
+                tracker[url_hash] = {
+                    'document_url': url,
+                    'content_hash': content_hash,
+                    'source_id': source_id,
+                    'first_scraped_at': now,
+                    'last_seen_at': now
+                }
+        
+        self._write_json(self.tracker_file, tracker)
+    
     def get_tracked_documents_by_source(self, source_id: int) -> List[Dict[str, Any]]:
         """Get all tracked documents for a source"""
         tracker = self._read_json(self.tracker_file)
@@ -308,6 +345,10 @@ class LocalStorage:
     
     # ==================== UTILITY ====================
     
+    def batch(self):
+        """Group several writes into one commit (no-op for JSON files)"""
+        return nullcontext()
+    
     def clear_all(self):
         """Clear all storage (for testing)"""
         for file in [self.sources_file, self.jobs_file, self.tracker_file, self.health_file]:
@@ -390,3 +431,21 @@ class LocalStorage:
         }
         
         self._write_json(self.logs_file, filtered_logs)
+
+
+# Global storage instance
+_local_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_local_storage() -> LocalStorage:
+    """Get or create the scraping storage for SCRAPING_STORAGE_BACKEND"""
+    global _local_storage
+    with _storage_lock:
+        if _local_storage is None:
+            if os.getenv("SCRAPING_STORAGE_BACKEND", "sqlite").lower() == "json":
+                _local_storage = LocalStorage()
+            else:
+                from .sqlite_storage import SQLiteLocalStorage
+                _local_storage = SQLiteLocalStorage()
+        return _local_storage
@@ -0,0 +1,177 @@
+"""
+Streaming page fingerprints for change detection
+
+A listing page is reduced in one lxml parse, with chrome stripped and text
+and links pulled out by compiled XPath (all in C, no BeautifulSoup copy), to
+the two things that matter for re-scans: its set of document links and its
+main-content text. From those we derive:
+- exact_hash: SHA256 of links + normalized text (strict mode)
+- links_hash: SHA256 of the sorted document-link set
+- simhash:    64-bit SimHash of the text's word shingles; near-identical
+              pages (rotating banners, visitor counters, dates) differ in a
+              few bits, so comparison is one XOR + popcount
+
+A page counts as unchanged in near mode when its document links are
+identical and its SimHash is within PAGE_SIMHASH_THRESHOLD bits.
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import List, Optional, Union
+from urllib.parse import urljoin
+
+import numpy as np
+from lxml import etree
+
+SIMHASH_THRESHOLD = int(os.getenv("PAGE_SIMHASH_THRESHOLD", "3"))
+FINGERPRINT_MODE = os.getenv("PAGE_FINGERPRINT_MODE", "near").lower()  # near | strict
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.doc', '.pptx', '.xlsx', '.xls', '.ppt')
+
+# Elements whose content is chrome, not page content
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'nav', 'footer', 'header', 'aside', 'svg'}
+
+# Text that changes without the page changing
+_VOLATILE_RE = re.compile(
+    r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'               # dates
+    r'|\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM)?'        # times
+    r'|(?:last updated|updated on):?\s*\S+',         # "last updated ..."
+    re.IGNORECASE
+)
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+SHINGLE_SIZE = 3
+
+_local = threading.local()
+
+
+class PageFingerprint:
+    """Fingerprint of one page; see module docstring"""
+
+    __slots__ = ('exact_hash', 'links_hash', 'simhash', 'hrefs', 'base_url')
+
+    def __init__(self, exact_hash: str, links_hash: str, simhash: int, hrefs: List[str], base_url: str = ''):
+        self.exact_hash = exact_hash
+        self.links_hash = links_hash
+        self.simhash = simhash
+        self.hrefs = hrefs
+        self.base_url = base_url
+
+    @property
+    def document_links(self) -> List[str]:
+        """Absolute document URLs (resolved on demand; hashes use the raw hrefs)"""
+        return [urljoin(self.base_url, href) for href in self.hrefs]
+
+    @property
+    def simhash_hex(self) -> str:
+        return format(self.simhash, '016x')
+
+    def matches(
+        self,
+        exact_hash: Optional[str],
+        links_hash: Optional[str] = None,
+        simhash_hex: Optional[str] = None,
+        strict: Optional[bool] = None,
+        threshold: int = SIMHASH_THRESHOLD
+    ) -> bool:
+        """
+        Compare against stored values
+
+        Strict mode (or no stored SimHash) requires the exact hash to match.
+        """
+        if exact_hash and exact_hash == self.exact_hash:
+            return True
+        if strict if strict is not None else FINGERPRINT_MODE == 'strict':
+            return False
+        if not (links_hash and simhash_hex) or links_hash != self.links_hash:
+            return False
+        return hamming_distance(self.simhash, int(simhash_hex, 16)) <= threshold
+
+
+_TEXT = etree.XPath('//text()')
+_HREFS = etree.XPath('//a/@href')
+
+
+def _rotl(values: np.ndarray, bits: int) -> np.ndarray:
+    return (values << np.uint64(bits)) | (values >> np.uint64(64 - bits))
+
+
+def simhash(words: List[str]) -> int:
+    """
+    64-bit SimHash over word shingles of SHINGLE_SIZE
+
+    Each distinct word is hashed once; shingle hashes are combined from word
+    hashes with rotations, vectorized, so the cost is linear in page text.
+    """
+    if not words:
+        return 0
+    vocab = {}
+    ids = [vocab.setdefault(word, len(vocab)) for word in words]
+    word_hashes = np.frombuffer(
+        b''.join(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest() for word in vocab),
+        dtype='>u8'
+    ).astype(np.uint64)
+    features = word_hashes[np.asarray(ids)]
+
+    n = len(features) - SHINGLE_SIZE + 1
+    if n > 0:
+        shingles = features[SHINGLE_SIZE - 1:].copy()
+        for offset in range(SHINGLE_SIZE - 1):
+            shingles ^= _rotl(features[offset:offset + n], SHINGLE_SIZE - 1 - offset)
+        features = shingles
+
+    # Bit columns, most significant first; a bit is set when most features set it
+    bits = np.unpackbits(features.astype('>u8').view(np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(features)
+    return int.from_bytes(np.packbits(majority).tobytes(), 'big')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and drop dates/times/"last updated" stamps"""
+    return _VOLATILE_RE.sub('', ' '.join(text.split()))
+
+
+def _is_document_href(href: str) -> bool:
+    return href.split('#', 1)[0].split('?', 1)[0].lower().endswith(DOCUMENT_EXTENSIONS)
+
+
+def fingerprint_page(content: Union[bytes, str], base_url: str = '') -> PageFingerprint:
+    """
+    Fingerprint raw page HTML
+
+    Args:
+        content: Page body (bytes preferred; lxml sniffs the encoding)
+        base_url: Page URL, used only to resolve document_links
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    root = etree.HTML(content, _parser()) if content and content.strip() else None
+    if root is not None:
+        etree.strip_elements(root, *SKIP_TAGS, with_tail=False)
+        text = normalize_text(' '.join(_TEXT(root)))
+        hrefs = sorted({href.strip() for href in _HREFS(root) if _is_document_href(href)})
+    else:
+        text, hrefs = '', []
+    links_blob = '\n'.join(hrefs)
+
+    return PageFingerprint(
+        exact_hash=hashlib.sha256(f"{links_blob}\n\n{text}".encode('utf-8')).hexdigest(),
+        links_hash=hashlib.sha256(links_blob.encode('utf-8')).hexdigest(),
+        simhash=simhash(_WORD_RE.findall(text.lower())),
+        hrefs=hrefs,
+        base_url=base_url
+    )
+
+
+def _parser() -> etree.HTMLParser:
+    # Parsers are not thread-safe; crawl threads each get their own
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = _local.parser = etree.HTMLParser(recover=True, no_network=True, remove_comments=True)
+    return parser
@@ -4,12 +4,13 @@ Track page content changes to avoid reprocessing unchanged pages
 """
 import hashlib
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from bs4 import BeautifulSoup
 
 from backend.database import ScrapedDocumentTracker
+from Agent.web_scraping.page_fingerprint import PageFingerprint, fingerprint_page
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,21 @@ class PageHashTracker:
         """Initialize page hash tracker"""
         self.hash_cache = {}  # In-memory cache for current session
         
+    def fingerprint_page(self, content: Union[bytes, str], url: str) -> PageFingerprint:
+        """
+        Fingerprint raw page HTML (one lxml parse; see page_fingerprint)
+        
+        Args:
+            content: Page body as fetched
+            url: Page URL
+            
+        Returns:
+            PageFingerprint with exact hash, document-link hash and SimHash
+        """
+        fingerprint = fingerprint_page(content, url)
+        logger.debug(f"Calculated fingerprint for {url}: {fingerprint.exact_hash[:8]}... simhash {fingerprint.simhash_hex}")
+        return fingerprint
+    
     def calculate_page_hash(self, soup: BeautifulSoup, url: str) -> str:
         """
         Calculate hash of meaningful page content
@@ -30,92 +46,48 @@ class PageHashTracker:
             url: Page URL for logging
             
         Returns:
-            SHA256 hash of cleaned content
+            SHA256 hash of document links and cleaned content
         """
         try:
-            # Create a copy to avoid modifying original
-            soup_copy = BeautifulSoup(str(soup), 'html.parser')
-            
-            # Remove non-content elements that change frequently
-            elements_to_remove = [
-                'script', 'style', 'nav', 'footer', 'header', 'aside',
-                # Remove dynamic elements
-                '.timestamp', '.last-updated', '.current-time',
-                '.social-media', '.advertisement', '.ads',
-                # Remove navigation that might change
-                '.breadcrumb', '.pagination', '.page-nav',
-                # Remove user-specific content
-                '.user-info', '.login-status', '.session-info'
-            ]
-            
-            for selector in elements_to_remove:
-                if selector.startswith('.') or selector.startswith('#'):
-                    # CSS selector
-                    for element in soup_copy.select(selector):
-                        element.decompose()
-                else:
-                    # Tag name
-                    for element in soup_copy.find_all(selector):
-                        element.decompose()
-            
-            # Remove attributes that change frequently
-            for tag in soup_copy.find_all():
-                # Remove dynamic attributes
-                dynamic_attrs = ['data-timestamp', 'data-session', 'data-user', 'id', 'class']
-                for attr in dynamic_attrs:
-                    if tag.has_attr(attr):
-                        del tag[attr]
-            
-            # Get meaningful text content
-            content = soup_copy.get_text(strip=True)
-            
-            # Normalize whitespace and line breaks
-            content = ' '.join(content.split())
-            
-            # Remove common dynamic text patterns
-            import re
-            
-            # Remove timestamps and dates that might change
-            content = re.sub(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', '', content)
-            content = re.sub(r'\d{1,2}:\d{2}(:\d{2})?\s*(AM|PM)?', '', content)
-            
-            # Remove "last updated" type text
-            content = re.sub(r'last updated:?\s*\S+', '', content, flags=re.IGNORECASE)
-            content = re.sub(r'updated on:?\s*\S+', '', content, flags=re.IGNORECASE)
-            
-            # Calculate hash
-            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-            
-            logger.debug(f"Calculated hash for {url}: {content_hash[:8]}...")
-            return content_hash
-            
+            return self.fingerprint_page(str(soup), url).exact_hash
         except Exception as e:
             logger.error(f"Error calculating page hash for {url}: {str(e)}")
             # Return a timestamp-based hash as fallback
             return hashlib.sha256(f"{url}_{datetime.utcnow().isoformat()}".encode()).hexdigest()
     
-    def has_page_changed(self, url: str, current_hash: str, db: Session) -> Dict[str, Any]:
+    @staticmethod
+    def _is_unchanged(stored: Tuple[Optional[str], Optional[str], Optional[str]], current: Union[str, PageFingerprint]) -> bool:
+        """Compare stored (content_hash, links_hash, simhash) with a hash or fingerprint"""
+        if isinstance(current, PageFingerprint):
+            return current.matches(*stored)
+        return stored[0] == current
+    
+    def has_page_changed(self, url: str, current_hash: Union[str, PageFingerprint], db: Session) -> Dict[str, Any]:
         """
         Check if page has changed since last scrape
         
         Args:
             url: Page URL
-            current_hash: Current page hash
+            current_hash: Current page hash, or a PageFingerprint for
+                near-duplicate comparison
             db: Database session
             
         Returns:
             Dict with change status and metadata
         """
+        fingerprint = current_hash if isinstance(current_hash, PageFingerprint) else None
+        current = fingerprint.exact_hash if fingerprint else current_hash
+        
         try:
             # Check cache first
             if url in self.hash_cache:
-                cached_hash = self.hash_cache[url]
-                if cached_hash == current_hash:
+                cached = self.hash_cache[url]
+                if self._is_unchanged(cached, current_hash):
                     return {
                         'changed': False,
                         'source': 'cache',
-                        'previous_hash': cached_hash,
-                        'current_hash': current_hash
+                        'previous_hash': cached[0],
+                        'current_hash': current
                     }
             
             # Check database
@@ -125,37 +97,26 @@ class PageHashTracker:
             
             if not tracker:
                 # New page
-                self.hash_cache[url] = current_hash
                 return {
                     'changed': True,
                     'source': 'new_page',
                     'previous_hash': None,
-                    'current_hash': current_hash,
+                    'current_hash': current,
                     'is_new': True
                 }
             
-            previous_hash = tracker.content_hash
+            # The stored fingerprint stays the baseline until the page is
+            # processed again, so small edits cannot accumulate unnoticed
+            stored = (tracker.content_hash, tracker.links_hash, tracker.simhash)
+            self.hash_cache[url] = stored
             
-            if previous_hash == current_hash:
-                # Page unchanged
-                self.hash_cache[url] = current_hash
-                return {
-                    'changed': False,
-                    'source': 'database',
-                    'previous_hash': previous_hash,
-                    'current_hash': current_hash,
-                    'last_seen': tracker.last_seen_at.isoformat() if tracker.last_seen_at else None
-                }
-            else:
-                # Page changed
-                self.hash_cache[url] = current_hash
-                return {
-                    'changed': True,
-                    'source': 'database',
-                    'previous_hash': previous_hash,
-                    'current_hash': current_hash,
-                    'last_seen': tracker.last_seen_at.isoformat() if tracker.last_seen_at else None
-                }
+            return {
+                'changed': not self._is_unchanged(stored, current_hash),
+                'source': 'database',
+                'previous_hash': tracker.content_hash,
+                'current_hash': current,
+                'last_seen': tracker.last_seen_at.isoformat() if tracker.last_seen_at else None
+            }
                 
         except Exception as e:
             logger.error(f"Error checking page change for {url}: {str(e)}")
@@ -164,7 +125,7 @@ class PageHashTracker:
                 'changed': True,
                 'source': 'error',
                 'error': str(e),
-                'current_hash': current_hash
+                'current_hash': current
             }
     
     def update_page_hash(
@@ -172,7 +133,8 @@ class PageHashTracker:
         url: str,
         page_hash: str,
         source_id: Optional[int],
-        db: Session
+        db: Session,
+        fingerprint: Optional[PageFingerprint] = None
     ) -> bool:
         """
         Update page hash in database
@@ -182,6 +144,7 @@ class PageHashTracker:
             page_hash: New page hash
             source_id: Source ID (optional)
             db: Database session
+            fingerprint: Page fingerprint, stored for near-duplicate checks
             
         Returns:
             True if successful
@@ -209,10 +172,13 @@ class PageHashTracker:
                 )
                 db.add(tracker)
             
+            tracker.links_hash = fingerprint.links_hash if fingerprint else None
+            tracker.simhash = fingerprint.simhash_hex if fingerprint else None
+            
             db.commit()
             
             # Update cache
-            self.hash_cache[url] = page_hash
+            self.hash_cache[url] = (page_hash, tracker.links_hash, tracker.simhash)
             
             logger.debug(f"Updated page hash for {url}")
             return True
@@ -222,13 +188,103 @@ class PageHashTracker:
             db.rollback()
             return False
     
+    def get_validators(self, url: str, db: Session) -> Optional[Dict[str, Any]]:
+        """
+        Get stored HTTP validators for a document URL
+        
+        Args:
+            url: Document URL
+            db: Database session
+            
+        Returns:
+            {'etag', 'last_modified', 'content_length', 'document_id'} or None if
+            the URL has never been downloaded with validators
+        """
+        try:
+            tracker = db.query(ScrapedDocumentTracker).filter(
+                ScrapedDocumentTracker.document_url == url
+            ).first()
+            
+            if not tracker or not (tracker.etag or tracker.last_modified):
+                return None
+            
+            return {
+                'etag': tracker.etag,
+                'last_modified': tracker.last_modified,
+                'content_length': tracker.content_length,
+                'document_id': tracker.document_id
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting validators for {url}: {str(e)}")
+            return None
+    
+    def update_validators(
+        self,
+        url: str,
+        download: Dict[str, Any],
+        source_id: Optional[int],
+        db: Session,
+        document_id: Optional[int] = None
+    ) -> bool:
+        """
+        Record the validators returned by a crawl engine download
+        
+        Args:
+            url: Document URL
+            download: Result of CrawlEngine.download ('success' or 'not_modified')
+            source_id: Source ID (optional)
+            db: Database session
+            document_id: Document created from this download (optional)
+            
+        Returns:
+            True if successful
+        """
+        try:
+            now = datetime.utcnow()
+            tracker = db.query(ScrapedDocumentTracker).filter(
+                ScrapedDocumentTracker.document_url == url
+            ).first()
+            
+            if not tracker:
+                if download.get('status') != 'success':
+                    return False
+                tracker = ScrapedDocumentTracker(
+                    document_url=url,
+                    content_hash=download['file_hash'],
+                    first_scraped_at=now
+                )
+                db.add(tracker)
+            elif download.get('file_hash'):
+                tracker.content_hash = download['file_hash']
+            
+            # A 304 may omit validators; keep the stored ones in that case
+            for field in ('etag', 'last_modified', 'content_length'):
+                if download.get(field):
+                    setattr(tracker, field, download[field])
+            tracker.last_checked_at = now
+            tracker.last_seen_at = now
+            if source_id:
+                tracker.source_id = source_id
+            if document_id:
+                tracker.document_id = document_id
+            
+            db.commit()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating validators for {url}: {str(e)}")
+            db.rollback()
+            return False
+    
     def should_process_page(
         self,
         url: str,
         soup: BeautifulSoup,
         source_id: Optional[int],
         db: Session,
-        force_process: bool = False
+        force_process: bool = False,
+        content: Optional[Union[bytes, str]] = None
     ) -> Dict[str, Any]:
         """
         Determine if page should be processed based on content changes
@@ -239,6 +295,8 @@ class PageHashTracker:
             source_id: Source ID
             db: Database session
             force_process: Force processing regardless of changes
+            content: Raw page body; fingerprinted directly when given,
+                which avoids re-serializing the soup
             
         Returns:
             Dict with processing decision and metadata
@@ -250,17 +308,18 @@ class PageHashTracker:
                 'changed': True
             }
         
-        # Calculate current hash
-        current_hash = self.calculate_page_hash(soup, url)
+        # Fingerprint current page
+        fingerprint = self.fingerprint_page(content if content is not None else str(soup), url)
+        current_hash = fingerprint.exact_hash
         
         # Check if changed
-        change_result = self.has_page_changed(url, current_hash, db)
+        change_result = self.has_page_changed(url, fingerprint, db)
         
         should_process = change_result['changed']
         
         # Update hash if processing
         if should_process:
-            self.update_page_hash(url, current_hash, source_id, db)
+            self.update_page_hash(url, current_hash, source_id, db, fingerprint=fingerprint)
         
         return {
             'should_process': should_process,
@@ -409,7 +468,7 @@ class PageHashTracker:
             ).limit(limit).all()
             
             for tracker in trackers:
-                self.hash_cache[tracker.document_url] = tracker.content_hash
+                self.hash_cache[tracker.document_url] = (tracker.content_hash, tracker.links_hash, tracker.simhash)
             
             logger.info(f"Preloaded {len(trackers)} page hashes into cache for source {source_id}")
             
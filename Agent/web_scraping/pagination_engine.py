@@ -6,7 +6,6 @@ from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 import re
-import time
 
 from .config import ScrapingConfig
 
@@ -253,18 +252,22 @@ class PaginationEngine:
         """
         Scrape all pages following pagination
         
+        When the page count is known and page URLs can be built (query or path
+        pattern), pages are fetched a window at a time concurrently; otherwise
+        next links are followed one page at a time. Either way each page is
+        fetched once, through the crawl engine.
+        
         Args:
             base_url: Starting URL
             keywords: Keywords to filter documents
             max_pages: Maximum number of pages to scrape
-            delay: Delay between page requests (seconds)
+            delay: Minimum spacing between requests to the site (seconds)
             max_documents: Maximum documents to collect (defaults to ScrapingConfig.MAX_DOCUMENTS_PER_SOURCE)
         
         Returns:
             List of all documents found across all pages (up to max_documents limit)
         """
         all_documents = []
-        current_url = base_url
         pages_scraped = 0
         
         # Use config default if not specified
@@ -273,67 +276,96 @@ class PaginationEngine:
         
         logger.info(f"Starting pagination scraping from {base_url} (max {max_pages} pages, max {max_documents} documents)")
         
-        while pages_scraped < max_pages and len(all_documents) < max_documents:
-            pages_scraped += 1
-            logger.info(f"Scraping page {pages_scraped}: {current_url}")
-            
-            # Scrape current page
-            try:
-                response = self.scraper.session.get(current_url, timeout=30)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-            except Exception as e:
-                logger.error(f"Error fetching page {pages_scraped}: {str(e)}")
-                break
-            
-            # Find documents on current page
-            documents = self.scraper.find_document_links(current_url, keywords=keywords)
-            
-            # Early termination if no documents found
-            if not documents:
-                logger.info(f"No documents found on page {pages_scraped}, terminating pagination early")
-                break
+        engine = self.scraper.engine
+        fetch_options = {'headers': self.scraper.headers, 'timeout': 30, 'min_delay': delay}
+        
+        def add_page(response, page_url: str):
+            """Parse a fetched page and add its documents; returns (soup, documents on page)"""
+            soup = BeautifulSoup(response.content, 'html.parser')
+            documents = self.scraper.extract_document_links(soup, page_url, keywords=keywords)
             
             # Add documents but respect the limit
             remaining_capacity = max_documents - len(all_documents)
-            documents_to_add = documents[:remaining_capacity]
-            all_documents.extend(documents_to_add)
-            
-            logger.info(f"Found {len(documents)} documents on page {pages_scraped}, added {len(documents_to_add)} (total: {len(all_documents)}/{max_documents})")
-            
-            # Check if we've reached the document limit
-            if len(all_documents) >= max_documents:
-                logger.info(f"Reached maximum document limit ({max_documents}), stopping pagination")
-                break
-            
-            # Detect pagination for next page
-            pagination_info = self.detect_pagination(soup, current_url)
-            
-            if not pagination_info:
-                logger.info(f"No more pagination detected after page {pages_scraped}")
-                break
-            
-            # Get next page URL
-            if pagination_info['pattern'] == 'next_button':
-                next_url = pagination_info.get('next_url')
+            all_documents.extend(documents[:remaining_capacity])
+            logger.info(f"Found {len(documents)} documents on page {pages_scraped}, total: {len(all_documents)}/{max_documents}")
+            return soup, documents
+        
+        # First page also tells us the pagination pattern
+        try:
+            response = engine.run(engine.fetch(base_url, **fetch_options))
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error fetching first page {base_url}: {str(e)}")
+            return all_documents
+        pages_scraped = 1
+        soup, documents = add_page(response, base_url)
+        
+        pagination_info = self.detect_pagination(soup, base_url) if documents else None
+        total_pages = pagination_info.get('total_pages') if pagination_info else None
+        
+        if pagination_info and pagination_info['pattern'] != 'next_button' and total_pages:
+            # Every page URL is known: fetch windows of pages concurrently, consume in order
+            page_urls = [
+                self.build_page_url(base_url, page_num, pagination_info)
+                for page_num in range(2, min(total_pages, max_pages) + 1)
+            ]
+            window = ScrapingConfig.MAX_WORKERS
+            finished = False
+            for start in range(0, len(page_urls), window):
+                batch = page_urls[start:start + window]
+                responses = engine.run(engine.fetch_many(batch, **fetch_options))
+                
+                for page_url, response in zip(batch, responses):
+                    if isinstance(response, Exception) or response.status_code >= 400:
+                        error = response if isinstance(response, Exception) else f"HTTP {response.status_code}"
+                        logger.error(f"Error fetching page {page_url}: {error}")
+                        finished = True
+                        break
+                    pages_scraped += 1
+                    _, documents = add_page(response, page_url)
+                    if not documents:
+                        logger.info(f"No documents found on page {pages_scraped}, terminating pagination early")
+                        finished = True
+                        break
+                    if len(all_documents) >= max_documents:
+                        logger.info(f"Reached maximum document limit ({max_documents}), stopping pagination")
+                        finished = True
+                        break
+                if finished:
+                    break
+        else:
+            # Next links or unknown length: follow one page at a time
+            current_url = base_url
+            while pagination_info and pages_scraped < max_pages and len(all_documents) < max_documents:
+                if pagination_info['pattern'] == 'next_button':
+                    next_url = pagination_info.get('next_url')
+                else:
+                    next_url = self.build_page_url(base_url, pages_scraped + 1, pagination_info)
                 if not next_url or next_url == current_url:
                     logger.info(f"No next page available after page {pages_scraped}")
                     break
                 current_url = next_url
-            else:
-                # Build URL for next page
-                next_page_num = pages_scraped + 1
-                current_url = self.build_page_url(base_url, next_page_num, pagination_info)
-            
-            # Check if we've reached the last page
-            if pagination_info.get('total_pages'):
-                if pages_scraped >= pagination_info['total_pages']:
+                
+                try:
+                    response = engine.run(engine.fetch(current_url, **fetch_options))
+                    response.raise_for_status()
+                except Exception as e:
+                    logger.error(f"Error fetching page {pages_scraped + 1}: {str(e)}")
+                    break
+                pages_scraped += 1
+                soup, documents = add_page(response, current_url)
+                
+                # Early termination if no documents found
+                if not documents:
+                    logger.info(f"No documents found on page {pages_scraped}, terminating pagination early")
+                    break
+                
+                # Check if we've reached the last page
+                if pagination_info.get('total_pages') and pages_scraped >= pagination_info['total_pages']:
                     logger.info(f"Reached last page ({pagination_info['total_pages']})")
                     break
-            
-            # Be polite - wait between requests
-            if pages_scraped < max_pages:
-                time.sleep(delay)
+                
+                pagination_info = self.detect_pagination(soup, current_url)
         
         logger.info(f"Pagination complete: scraped {pages_scraped} pages, found {len(all_documents)} documents")
         
@@ -1,13 +1,15 @@
 """
 PDF and document downloader for web scraping
 """
-import requests
 import os
 from typing import Dict, Any, Optional
 import logging
 from datetime import datetime
 import hashlib
 from pathlib import Path
+import time
+
+from .crawl_engine import get_crawl_engine
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +25,7 @@ class PDFDownloader:
             download_dir: Directory to store downloaded files
         """
         self.download_dir = download_dir
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'BEACON Policy Intelligence Bot/1.0'
-        })
+        self.engine = get_crawl_engine()
         
         # Create download directory if it doesn't exist
         Path(self.download_dir).mkdir(parents=True, exist_ok=True)
@@ -47,81 +46,29 @@ class PDFDownloader:
         Returns:
             Dict with download status and file info
         """
+        # Generate filename if not provided
+        if not filename:
+            filename = self._generate_filename(url)
+        
+        filepath = os.path.join(self.download_dir, filename)
         last_error = None
         
         for attempt in range(retry_count):
-            try:
-                logger.info(f"Downloading: {url} (attempt {attempt + 1}/{retry_count})")
-                
-                # Generate filename if not provided
-                if not filename:
-                    filename = self._generate_filename(url)
-                
-                filepath = os.path.join(self.download_dir, filename)
-                
-                # Try different user agents on retry
-                headers = {
-                    'User-Agent': self._get_user_agent(attempt),
-                    'Accept': 'application/pdf,application/octet-stream,*/*',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Referer': url.rsplit('/', 1)[0] + '/'
-                }
-                
-                # Download file
-                response = self.session.get(url, timeout=timeout, stream=True, headers=headers)
-                response.raise_for_status()
-                
-                # Check content type
-                content_type = response.headers.get('Content-Type', '')
-                
-                # Write to file
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                
-                # Get file size
-                file_size = os.path.getsize(filepath)
-                
-                # Calculate file hash for deduplication
-                file_hash = self._calculate_file_hash(filepath)
-                
-                logger.info(f"Downloaded {filename} ({file_size} bytes)")
-                
-                return {
-                    "status": "success",
-                    "url": url,
-                    "filepath": filepath,
-                    "filename": filename,
-                    "file_size": file_size,
-                    "file_hash": file_hash,
-                    "content_type": content_type,
-                    "downloaded_at": datetime.utcnow().isoformat()
-                }
-            
-            except requests.exceptions.Timeout as e:
-                last_error = f"Download timeout"
-                logger.warning(f"Timeout downloading {url} (attempt {attempt + 1}/{retry_count})")
-                if attempt < retry_count - 1:
-                    import time
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
+            logger.info(f"Downloading: {url} (attempt {attempt + 1}/{retry_count})")
             
-            except requests.exceptions.RequestException as e:
-                last_error = str(e)
-                logger.warning(f"Error downloading {url}: {str(e)} (attempt {attempt + 1}/{retry_count})")
-                if attempt < retry_count - 1:
-                    import time
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
+            # Streamed to disk by the crawl engine (pooled, per-domain throttled);
+            # retries here rotate the user agent
+            result = self.engine.run(self.engine.download(
+                url, filepath, headers=self._request_headers(url, attempt), timeout=timeout, retries=0
+            ))
+            if result["status"] == "success":
+                logger.info(f"Downloaded {filename} ({result['file_size']} bytes)")
+                return self._download_result(result, filename)
             
-            except Exception as e:
-                last_error = f"Unexpected error: {str(e)}"
-                logger.warning(f"Unexpected error downloading {url}: {str(e)} (attempt {attempt + 1}/{retry_count})")
-                if attempt < retry_count - 1:
-                    import time
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
+            last_error = result["error"]
+            logger.warning(f"Error downloading {url}: {last_error} (attempt {attempt + 1}/{retry_count})")
+            if attempt < retry_count - 1:
+                time.sleep(2 ** attempt)  # Exponential backoff
         
         # All retries failed
         logger.error(f"Failed to download {url} after {retry_count} attempts: {last_error}")
@@ -136,7 +83,7 @@ class PDFDownloader:
     def download_batch(self, urls: list,
                       max_concurrent: int = 5) -> Dict[str, Any]:
         """
-        Download multiple documents
+        Download multiple documents concurrently
         
         Args:
             urls: List of document URLs
@@ -152,18 +99,56 @@ class PDFDownloader:
             "downloads": []
         }
         
-        for url in urls:
-            result = self.download_document(url)
-            results["downloads"].append(result)
+        # Timestamped names can collide within a batch; keep them unique
+        items = []
+        used_names = set()
+        for index, url in enumerate(urls):
+            filename = self._generate_filename(url)
+            if filename in used_names:
+                filename = f"{index}_{filename}"
+            used_names.add(filename)
+            items.append((url, filename))
+        
+        for start in range(0, len(items), max_concurrent):
+            batch = items[start:start + max_concurrent]
+            downloads = self.engine.run(self.engine.download_many(
+                [(url, os.path.join(self.download_dir, filename)) for url, filename in batch],
+                headers_for=self._request_headers  # Referer is per URL
+            ))
             
-            if result["status"] == "success":
-                results["successful"] += 1
-            else:
-                results["failed"] += 1
+            for (url, filename), result in zip(batch, downloads):
+                if result["status"] == "success":
+                    results["downloads"].append(self._download_result(result, filename))
+                    results["successful"] += 1
+                else:
+                    results["downloads"].append({**result, "downloaded_at": datetime.utcnow().isoformat()})
+                    results["failed"] += 1
         
         logger.info(f"Batch download complete: {results['successful']}/{results['total']} successful")
         return results
     
+    def _request_headers(self, url: str, attempt: int = 0) -> Dict[str, str]:
+        # Try different user agents on retry
+        return {
+            'User-Agent': self._get_user_agent(attempt),
+            'Accept': 'application/pdf,application/octet-stream,*/*',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Referer': url.rsplit('/', 1)[0] + '/'
+        }
+    
+    @staticmethod
+    def _download_result(result: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "url": result["url"],
+            "filepath": result["filepath"],
+            "filename": filename,
+            "file_size": result["file_size"],
+            "file_hash": result["file_hash"],
+            "content_type": result["content_type"],
+            "downloaded_at": datetime.utcnow().isoformat()
+        }
+    
     def _generate_filename(self, url: str) -> str:
         """
         Generate filename from URL
@@ -1,14 +1,15 @@
 """
 Web scraper for government policy documents
 """
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
 import logging
 from urllib.parse import urljoin, urlparse
-import time
 from datetime import datetime
 
+from .config import ScrapingConfig
+from .crawl_engine import get_crawl_engine, CrawlError, CrawlResponse
 from .keyword_filter import KeywordFilter
 from .retry_utils import retry_with_backoff, RetriableError
 
@@ -26,16 +27,20 @@ class WebScraper:
             user_agent: Custom user agent string
         """
         self.user_agent = user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': self.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
-        })
-    
+        }
+        self.engine = get_crawl_engine()
+
+    def fetch(self, url: str, timeout: int = 30) -> CrawlResponse:
+        """GET a page through the shared crawl engine (raises CrawlError on HTTP errors)"""
+        response = self.engine.run(self.engine.fetch(url, headers=self.headers, timeout=timeout))
+        response.raise_for_status()
+        return response
+
     def scrape_page(self, url: str, timeout: int = 30) -> Dict[str, Any]:
         """
         Scrape a single page
@@ -49,11 +54,10 @@ class WebScraper:
         """
         try:
             logger.info(f"Scraping: {url}")
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
+            response = self.fetch(url, timeout=timeout)
+
             soup = BeautifulSoup(response.content, 'html.parser')
-            
+
             return {
                 "status": "success",
                 "url": url,
@@ -64,7 +68,7 @@ class WebScraper:
                 "status_code": response.status_code
             }
         
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error(f"Timeout scraping {url}")
             return {
                 "status": "error",
@@ -73,7 +77,7 @@ class WebScraper:
                 "scraped_at": datetime.utcnow().isoformat()
             }
         
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, CrawlError) as e:
             logger.error(f"Error scraping {url}: {str(e)}")
             return {
                 "status": "error",
@@ -96,62 +100,77 @@ class WebScraper:
         Returns:
             List of document links with metadata (only matching documents if keywords provided)
         """
-        if extensions is None:
-            extensions = ['.pdf', '.docx', '.doc', '.pptx']
-        
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            response = self.fetch(url, timeout=30)
             soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Initialize keyword filter
-            keyword_filter = KeywordFilter(keywords)
-            
-            documents = []
-            total_discovered = 0
-            filtered_out = 0
-            
-            # Find all links
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                absolute_url = urljoin(url, href)
-                
-                # Check if link points to a document
-                if any(absolute_url.lower().endswith(ext) for ext in extensions):
-                    total_discovered += 1
-                    link_text = link.get_text(strip=True)
-                    
-                    # Evaluate document against keyword filter
-                    match_result = self._evaluate_document_match(link_text, keyword_filter)
-                    
-                    if match_result['matches']:
-                        # Document matches filter - include it
-                        documents.append({
-                            "url": absolute_url,
-                            "text": link_text,
-                            "type": self._get_file_extension(absolute_url),
-                            "source_page": url,
-                            "found_at": datetime.utcnow().isoformat(),
-                            "matched_keywords": match_result['matched_keywords']
-                        })
-                        logger.debug(f"Document matched: {link_text[:50]}... (keywords: {match_result['matched_keywords']})")
-                    else:
-                        # Document doesn't match filter - skip it
-                        filtered_out += 1
-                        logger.debug(f"Document filtered out: {link_text[:50]}...")
-            
-            # Log filtering statistics
-            if keyword_filter.is_active():
-                logger.info(f"Found {len(documents)} matching documents out of {total_discovered} discovered on {url} (filtered out: {filtered_out})")
-            else:
-                logger.info(f"Found {len(documents)} documents on {url} (no filtering)")
-            
-            return documents
+            return self.extract_document_links(soup, url, extensions, keywords)
         
         except Exception as e:
             logger.error(f"Error finding documents on {url}: {str(e)}")
             return []
     
+    def extract_document_links(self, soup: BeautifulSoup, url: str,
+                               extensions: List[str] = None,
+                               keywords: List[str] = None) -> List[Dict[str, str]]:
+        """
+        Find document links in an already fetched page (see find_document_links)
+        
+        Args:
+            soup: BeautifulSoup object of the page
+            url: Page URL, for resolving relative links
+            extensions: File extensions to look for (default: pdf, docx, doc, pptx)
+            keywords: Keywords to filter links
+        
+        Returns:
+            List of document links with metadata
+        """
+        if extensions is None:
+            extensions = ['.pdf', '.docx', '.doc', '.pptx']
+        
+        # Initialize keyword filter
+        keyword_filter = KeywordFilter(keywords)
+        
+        documents = []
+        total_discovered = 0
+        filtered_out = 0
+        
+        # Find all links
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            absolute_url = urljoin(url, href)
+            
+            # Check if link points to a document
+            if any(absolute_url.lower().endswith(ext) for ext in extensions):
+                total_discovered += 1
+                link_text = link.get_text(strip=True)
+                
+                # Evaluate document against keyword filter
+                match_result = self._evaluate_document_match(link_text, keyword_filter)
+                
+                if match_result['matches']:
+                    # Document matches filter - include it
+                    documents.append({
+                        "url": absolute_url,
+                        "text": link_text,
+                        "type": self._get_file_extension(absolute_url),
+                        "source_page": url,
+                        "found_at": datetime.utcnow().isoformat(),
+                        "matched_keywords": match_result['matched_keywords']
+                    })
+                    logger.debug(f"Document matched: {link_text[:50]}... (keywords: {match_result['matched_keywords']})")
+                else:
+                    # Document doesn't match filter - skip it
+                    filtered_out += 1
+                    logger.debug(f"Document filtered out: {link_text[:50]}...")
+        
+        # Log filtering statistics
+        if keyword_filter.is_active():
+            logger.info(f"Found {len(documents)} matching documents out of {total_discovered} discovered on {url} (filtered out: {filtered_out})")
+        else:
+            logger.info(f"Found {len(documents)} documents on {url} (no filtering)")
+        
+        return documents
+    
     def scrape_documents_section(self, url: str,
                                 section_selector: Optional[str] = None) -> List[Dict[str, str]]:
         """
@@ -165,8 +184,7 @@ class WebScraper:
             List of document links
         """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            response = self.fetch(url, timeout=30)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Find section if selector provided
@@ -215,28 +233,33 @@ class WebScraper:
             List of all documents found
         """
         all_documents = []
-        
-        for page_num in range(1, max_pages + 1):
-            # Build paginated URL
-            if '?' in base_url:
-                page_url = f"{base_url}&{page_param}={page_num}"
-            else:
-                page_url = f"{base_url}?{page_param}={page_num}"
+        separator = '&' if '?' in base_url else '?'
+        page_urls = [f"{base_url}{separator}{page_param}={page_num}" for page_num in range(1, max_pages + 1)]
+        pages_scraped = 0
+        
+        # Page URLs are known up front: fetch a window of them concurrently (the
+        # crawl engine keeps per-domain spacing) and stop at the first empty page
+        window = ScrapingConfig.MAX_WORKERS
+        for start in range(0, len(page_urls), window):
+            batch = page_urls[start:start + window]
+            logger.info(f"Scraping pages {start + 1}-{start + len(batch)}: {base_url}")
+            responses = self.engine.run(self.engine.fetch_many(batch, headers=self.headers, timeout=30))
             
-            logger.info(f"Scraping page {page_num}: {page_url}")
-            
-            documents = self.find_document_links(page_url)
-            
-            if not documents:
-                logger.info(f"No documents found on page {page_num}, stopping pagination")
-                break
-            
-            all_documents.extend(documents)
-            
-            # Be polite - wait between requests
-            time.sleep(1)
+            for page_url, response in zip(batch, responses):
+                documents = []
+                if not isinstance(response, Exception) and response.status_code < 400:
+                    soup = BeautifulSoup(response.content, 'html.parser')
+                    documents = self.extract_document_links(soup, page_url)
+                
+                if not documents:
+                    logger.info(f"No documents found on {page_url}, stopping pagination")
+                    logger.info(f"Total documents found across {pages_scraped} pages: {len(all_documents)}")
+                    return all_documents
+                
+                all_documents.extend(documents)
+                pages_scraped += 1
         
-        logger.info(f"Total documents found across {page_num} pages: {len(all_documents)}")
+        logger.info(f"Total documents found across {pages_scraped} pages: {len(all_documents)}")
         return all_documents
     
     def _evaluate_document_match(self, link_text: str, keyword_filter: KeywordFilter) -> Dict[str, Any]:
@@ -284,8 +307,7 @@ class WebScraper:
             Dict with page metadata
         """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            response = self.fetch(url, timeout=30)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             metadata = {
@@ -413,7 +435,7 @@ class WebScraper:
                 
                 return result
             
-            except requests.exceptions.RequestException as e:
+            except (httpx.HTTPError, CrawlError) as e:
                 raise RetriableError(str(e))
         
         try:
@@ -4,7 +4,7 @@ Scraping Logger - Stores scraping logs in database for frontend display
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from .local_storage import LocalStorage
+from .local_storage import LocalStorage, get_local_storage
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +19,7 @@ class ScrapingLogger:
         Args:
             storage: LocalStorage instance
         """
-        self.storage = storage or LocalStorage()
+        self.storage = storage or get_local_storage()
     
     def log_scraping_start(self, 
                           source_id: int,
@@ -1,9 +1,13 @@
 """
 Session-based storage for web scraping data
 Persists data to disk until explicitly cleared
+
+get_session_storage() returns the SQLite-backed store by default
+(SCRAPING_STORAGE_BACKEND=sqlite|json).
 """
 import json
 import os
+import threading
 from typing import List, Dict, Any
 from pathlib import Path
 import logging
@@ -140,3 +144,21 @@ class SessionStorage:
                 "counters": self.counters_file.exists()
             }
         }
+
+
+# Global session storage instance
+_session_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_session_storage() -> SessionStorage:
+    """Get or create the session storage for SCRAPING_STORAGE_BACKEND"""
+    global _session_storage
+    with _storage_lock:
+        if _session_storage is None:
+            if os.getenv("SCRAPING_STORAGE_BACKEND", "sqlite").lower() == "json":
+                _session_storage = SessionStorage()
+            else:
+                from .sqlite_storage import SQLiteSessionStorage
+                _session_storage = SQLiteSessionStorage()
+        return _session_storage
@@ -7,6 +7,7 @@ from .base_scraper import BaseScraper
 from .moe_scraper import MoEScraper
 from .ugc_scraper import UGCScraper
 from .aicte_scraper import AICTEScraper
+from .ncert_scraper import NCERTScraper
 
 # Scraper registry for easy access
 SCRAPER_REGISTRY = {
@@ -16,6 +17,7 @@ SCRAPER_REGISTRY = {
     'university_grants_commission': UGCScraper,
     'aicte': AICTEScraper,
     'all_india_council_technical_education': AICTEScraper,
+    'ncert': NCERTScraper,
     'generic': BaseScraper,
     'default': BaseScraper
 }
@@ -41,6 +43,7 @@ def get_available_scrapers() -> dict:
         'moe': 'Ministry of Education',
         'ugc': 'University Grants Commission', 
         'aicte': 'All India Council for Technical Education',
+        'ncert': 'National Council of Educational Research and Training',
         'generic': 'Generic Government Site'
     }
 
@@ -49,6 +52,7 @@ __all__ = [
     'MoEScraper', 
     'UGCScraper',
     'AICTEScraper',
+    'NCERTScraper',
     'get_scraper_for_site',
     'get_available_scrapers',
     'SCRAPER_REGISTRY'
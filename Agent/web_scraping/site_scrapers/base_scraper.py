@@ -2,13 +2,14 @@
 Base scraper class for government websites
 All site-specific scrapers inherit from this
 """
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import logging
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
-import time
+
+from ..crawl_engine import get_crawl_engine, CrawlError
 
 logger = logging.getLogger(__name__)
 
@@ -17,19 +18,17 @@ class BaseScraper:
     """Base scraper with common functionality"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Requests go through the shared crawl engine (pooled, per-domain throttled)
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
+        }
         
         # Site-specific configuration (override in subclasses)
         self.site_name = "Generic Government Site"
         self.document_extensions = ['.pdf', '.docx', '.doc', '.pptx', '.xlsx']
-        self.rate_limit_delay = 1.0  # seconds between requests
+        self.rate_limit_delay = 1.0  # minimum seconds between requests to this site
         
     def get_document_links(self, soup: BeautifulSoup, base_url: str) -> List[Dict[str, Any]]:
         """
@@ -105,7 +104,10 @@ class BaseScraper:
         try:
             logger.info(f"[{self.site_name}] Scraping: {url}")
             
-            response = self.session.get(url, timeout=timeout)
+            engine = get_crawl_engine()
+            response = engine.run(engine.fetch(
+                url, headers=self.headers, timeout=timeout, min_delay=self.rate_limit_delay
+            ))
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -114,12 +116,14 @@ class BaseScraper:
                 'status': 'success',
                 'url': url,
                 'soup': soup,
+                'content': response.content,
                 'title': soup.title.string if soup.title else 'No title',
                 'scraped_at': datetime.utcnow().isoformat(),
-                'scraper': self.__class__.__name__
+                'scraper': self.__class__.__name__,
+                'not_modified': response.not_modified  # 304: served from the crawl cache
             }
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error(f"[{self.site_name}] Timeout scraping {url}")
             return {
                 'status': 'error',
@@ -128,14 +132,14 @@ class BaseScraper:
                 'error_type': 'timeout'
             }
             
-        except requests.exceptions.HTTPError as e:
+        except CrawlError as e:
             logger.error(f"[{self.site_name}] HTTP error scraping {url}: {e}")
             return {
                 'status': 'error',
                 'url': url,
-                'error': f'HTTP {e.response.status_code}',
+                'error': f'HTTP {e.status_code}',
                 'error_type': 'http_error',
-                'status_code': e.response.status_code
+                'status_code': e.status_code
             }
             
         except Exception as e:
@@ -198,9 +202,6 @@ class BaseScraper:
                 if link not in recent_pages:  # Avoid infinite loops
                     current_url = link
                     break
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
         
         # Re-scan sliding window pages for updates
         if len(recent_pages) > 1:
@@ -219,12 +220,32 @@ class BaseScraper:
                     
                     if new_documents:
                         logger.info(f"[{self.site_name}] Found {len(new_documents)} new documents in sliding window re-scan")
-                
-                time.sleep(self.rate_limit_delay)
         
         logger.info(f"[{self.site_name}] Sliding window scrape complete: {len(all_documents)} total documents")
         return all_documents
     
+    def crawl(
+        self,
+        base_url: str,
+        max_pages: int = 50,
+        max_documents: Optional[int] = None,
+        stop_flag: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Crawl a listing and its pagination concurrently through the crawl engine
+        
+        Args:
+            base_url: Listing URL
+            max_pages: Maximum pages to fetch
+            max_documents: Stop once this many documents are found
+            stop_flag: Callable that returns True if crawling should stop
+            
+        Returns:
+            dict: {'documents', 'pages_scraped', 'pages_not_modified', 'errors', 'stopped'}
+        """
+        engine = get_crawl_engine()
+        return engine.run(engine.crawl_listing(self, base_url, max_pages, max_documents, stop_flag))
+    
     def _is_document_url(self, url: str) -> bool:
         """Check if URL points to a document"""
         url_lower = url.lower()
@@ -3,12 +3,12 @@ Sliding Window Re-scanning Manager
 Always re-scan first N pages to catch updates, then continue from where we left off
 """
 import logging
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-import hashlib
 
 from backend.database import WebScrapingSource, ScrapedDocumentTracker
+from .page_fingerprint import PageFingerprint, fingerprint_page
 from .site_scrapers import get_scraper_for_site
 
 logger = logging.getLogger(__name__)
@@ -150,9 +150,9 @@ class SlidingWindowManager:
             soup = page_result['soup']
             pages_scraped += 1
             
-            # Calculate and store page hash
-            page_hash = self._calculate_page_hash(soup)
-            self._store_page_hash(current_url, page_hash, db)
+            # Calculate and store page fingerprint
+            fingerprint = self._calculate_page_hash(page_result, current_url)
+            self._store_page_hash(current_url, fingerprint, db)
             
             # Extract documents
             documents = scraper.get_document_links(soup, current_url)
@@ -238,11 +238,18 @@ class SlidingWindowManager:
             soup = page_result['soup']
             pages_scanned += 1
             
-            # Check if page has changed
-            page_hash = self._calculate_page_hash(soup)
-            old_hash = self._get_stored_page_hash(current_url, db)
+            # HTTP 304 from the crawl cache: byte-identical to the last fetch, no need to hash
+            if page_result.get('not_modified') and self._page_exists_in_db(current_url, db):
+                logger.debug(f"Page not modified, skipping: {current_url}")
+                pagination_links = scraper.get_pagination_links(soup, current_url)
+                current_url = self._get_next_page(pagination_links, [])
+                continue
             
-            if old_hash and old_hash == page_hash:
+            # Check if page has changed (same document links, near-identical text)
+            fingerprint = self._calculate_page_hash(page_result, current_url)
+            stored = self._get_stored_page_hash(current_url, db)
+            
+            if stored and fingerprint.matches(*stored):
                 logger.debug(f"Page unchanged, skipping: {current_url}")
                 # Get next page for window scanning
                 pagination_links = scraper.get_pagination_links(soup, current_url)
@@ -253,7 +260,7 @@ class SlidingWindowManager:
             logger.info(f"Page changed, processing: {current_url}")
             
             # Update stored hash
-            self._store_page_hash(current_url, page_hash, db)
+            self._store_page_hash(current_url, fingerprint, db)
             
             # Extract documents
             page_documents = scraper.get_document_links(soup, current_url)
@@ -320,8 +327,8 @@ class SlidingWindowManager:
             pages_scanned += 1
             
             # Store page hash
-            page_hash = self._calculate_page_hash(soup)
-            self._store_page_hash(current_url, page_hash, db)
+            fingerprint = self._calculate_page_hash(page_result, current_url)
+            self._store_page_hash(current_url, fingerprint, db)
             
             # Extract documents
             page_documents = scraper.get_document_links(soup, current_url)
@@ -340,31 +347,25 @@ class SlidingWindowManager:
         logger.info(f"New pages scan complete: {len(documents)} documents found")
         return documents
     
-    def _calculate_page_hash(self, soup) -> str:
+    def _calculate_page_hash(self, page_result: Dict[str, Any], url: str) -> PageFingerprint:
         """
-        Calculate hash of meaningful page content (excluding scripts, styles, etc.)
+        Fingerprint meaningful page content (excluding scripts, styles, etc.)
+        
+        Works from the raw response body, so the soup is left intact for
+        link extraction.
         
         Args:
-            soup: BeautifulSoup object
+            page_result: Result of scraper.scrape_page
+            url: Page URL
             
         Returns:
-            SHA256 hash of cleaned content
+            PageFingerprint of document links and cleaned content
         """
-        # Remove scripts, styles, and other non-content elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            element.decompose()
-        
-        # Get text content
-        content = soup.get_text(strip=True)
-        
-        # Normalize whitespace
-        content = ' '.join(content.split())
-        
-        # Calculate hash
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        content = page_result.get('content')
+        return fingerprint_page(content if content is not None else str(page_result['soup']), url)
     
-    def _store_page_hash(self, url: str, page_hash: str, db: Session):
-        """Store page hash in database"""
+    def _store_page_hash(self, url: str, fingerprint: PageFingerprint, db: Session):
+        """Store page fingerprint in database"""
         try:
             # Check if entry exists
             tracker = db.query(ScrapedDocumentTracker).filter(
@@ -372,31 +373,34 @@ class SlidingWindowManager:
             ).first()
             
             if tracker:
-                tracker.content_hash = page_hash
+                tracker.content_hash = fingerprint.exact_hash
                 tracker.last_seen_at = datetime.utcnow()
             else:
                 tracker = ScrapedDocumentTracker(
                     document_url=url,
-                    content_hash=page_hash,
+                    content_hash=fingerprint.exact_hash,
                     first_scraped_at=datetime.utcnow(),
                     last_seen_at=datetime.utcnow()
                 )
                 db.add(tracker)
             
+            tracker.links_hash = fingerprint.links_hash
+            tracker.simhash = fingerprint.simhash_hex
+            
             db.commit()
             
         except Exception as e:
             logger.error(f"Error storing page hash for {url}: {str(e)}")
             db.rollback()
     
-    def _get_stored_page_hash(self, url: str, db: Session) -> Optional[str]:
-        """Get stored page hash from database"""
+    def _get_stored_page_hash(self, url: str, db: Session) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Get stored (content_hash, links_hash, simhash) from database"""
         try:
             tracker = db.query(ScrapedDocumentTracker).filter(
                 ScrapedDocumentTracker.document_url == url
             ).first()
             
-            return tracker.content_hash if tracker else None
+            return (tracker.content_hash, tracker.links_hash, tracker.simhash) if tracker else None
             
         except Exception as e:
             logger.error(f"Error getting stored hash for {url}: {str(e)}")
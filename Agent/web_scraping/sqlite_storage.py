@@ -0,0 +1,610 @@
+"""
+SQLite-backed scraping and session storage
+
+Drop-in replacements for the JSON-file LocalStorage and SessionStorage:
+lookups go through indexes (URL hash, source id, created_at) and writes touch
+only the affected rows, instead of re-reading and rewriting a whole JSON file
+per call. Existing JSON files are imported on first use and renamed to
+*.json.migrated.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.utils.sqlite_store import SQLiteStore, dumps, loads, read_legacy_json, retire_legacy_json
+from .local_storage import LocalStorage
+from .session_storage import SessionStorage
+
+logger = logging.getLogger(__name__)
+
+# Parameters per IN (...) query, below SQLite's default variable limit
+LOOKUP_CHUNK = 500
+
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs (source_id, created_at);
+CREATE TABLE IF NOT EXISTS document_tracker (
+    url_hash TEXT PRIMARY KEY,
+    document_url TEXT NOT NULL,
+    content_hash TEXT,
+    source_id INTEGER,
+    first_scraped_at TEXT,
+    last_seen_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tracker_source ON document_tracker (source_id);
+CREATE TABLE IF NOT EXISTS health_metrics (
+    source_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scraping_logs (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_created ON scraping_logs (created_at);
+CREATE INDEX IF NOT EXISTS idx_logs_source ON scraping_logs (source_id, created_at);
+"""
+
+SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_items (
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, position)
+);
+CREATE TABLE IF NOT EXISTS session_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def _chunks(items: List[Any], size: int = LOOKUP_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SQLiteLocalStorage(LocalStorage):
+    """LocalStorage interface on an indexed SQLite file (WAL mode, thread-safe)"""
+
+    def __init__(self, storage_dir: str = "data/scraping_storage", db_name: str = "storage.db"):
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        # Legacy JSON files, imported once
+        self.sources_file = self.storage_dir / "sources.json"
+        self.jobs_file = self.storage_dir / "jobs.json"
+        self.tracker_file = self.storage_dir / "document_tracker.json"
+        self.health_file = self.storage_dir / "health_metrics.json"
+        self.logs_file = self.storage_dir / "scraping_logs.json"
+
+        self.db = SQLiteStore(str(self.storage_dir / db_name), LOCAL_SCHEMA)
+        self._migrate_json_files()
+
+    def _migrate_json_files(self):
+        """Import the JSON stores into empty tables"""
+        def records(path, table):
+            if not self.db.is_empty(table):
+                return None
+            data = read_legacy_json(path)
+            return data if isinstance(data, dict) else None
+
+        imported = []
+        with self.db.transaction() as conn:
+            sources = records(self.sources_file, "sources")
+            if sources:
+                conn.executemany(
+                    "INSERT INTO sources (id, data) VALUES (?, ?)",
+                    [(int(k), dumps(v)) for k, v in sources.items()]
+                )
+            if sources is not None:
+                imported.append(self.sources_file)
+
+            jobs = records(self.jobs_file, "jobs")
+            if jobs:
+                conn.executemany(
+                    "INSERT INTO jobs (id, source_id, created_at, data) VALUES (?, ?, ?, ?)",
+                    [(int(k), v.get('source_id'), v.get('created_at'), dumps(v)) for k, v in jobs.items()]
+                )
+            if jobs is not None:
+                imported.append(self.jobs_file)
+
+            tracker = records(self.tracker_file, "document_tracker")
+            if tracker:
+                conn.executemany(
+                    "INSERT INTO document_tracker VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (k, v.get('document_url', ''), v.get('content_hash'), v.get('source_id'),
+                         v.get('first_scraped_at'), v.get('last_seen_at'))
+                        for k, v in tracker.items()
+                    ]
+                )
+            if tracker is not None:
+                imported.append(self.tracker_file)
+
+            health = records(self.health_file, "health_metrics")
+            if health:
+                conn.executemany(
+                    "INSERT INTO health_metrics (source_id, data) VALUES (?, ?)",
+                    [(int(k), dumps(v)) for k, v in health.items()]
+                )
+            if health is not None:
+                imported.append(self.health_file)
+
+            logs = records(self.logs_file, "scraping_logs")
+            if logs:
+                conn.executemany(
+                    "INSERT INTO scraping_logs (id, source_id, created_at, data) VALUES (?, ?, ?, ?)",
+                    [(int(k), v.get('source_id'), v.get('created_at'), dumps(v)) for k, v in logs.items()]
+                )
+            if logs is not None:
+                imported.append(self.logs_file)
+
+        for path in imported:
+            retire_legacy_json(path)
+
+    def _next_id(self, conn, table: str) -> int:
+        return conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    def batch(self):
+        """Group several writes into one transaction"""
+        return self.db.transaction()
+
+    # ==================== SOURCES ====================
+
+    def create_source(self, source_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new scraping source"""
+        with self.db.transaction() as conn:
+            source_id = self._next_id(conn, "sources")
+
+            source_data['id'] = source_id
+            source_data['created_at'] = datetime.utcnow().isoformat()
+            source_data['updated_at'] = datetime.utcnow().isoformat()
+
+            source_data.setdefault('pagination_enabled', False)
+            source_data.setdefault('max_pages', 10)
+            source_data.setdefault('schedule_enabled', False)
+            source_data.setdefault('schedule_type', None)
+            source_data.setdefault('schedule_time', None)
+            source_data.setdefault('next_scheduled_run', None)
+            source_data.setdefault('total_documents_scraped', 0)
+            source_data.setdefault('last_scraped_at', None)
+            source_data.setdefault('last_scrape_status', None)
+
+            conn.execute("INSERT INTO sources (id, data) VALUES (?, ?)", (source_id, dumps(source_data)))
+
+        return source_data
+
+    def get_source(self, source_id: int) -> Optional[Dict[str, Any]]:
+        """Get a source by ID"""
+        row = self.db.fetchone("SELECT data FROM sources WHERE id = ?", (int(source_id),))
+        return loads(row['data']) if row else None
+
+    def list_sources(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
+        """List all sources"""
+        source_list = [loads(row['data']) for row in self.db.fetchall("SELECT data FROM sources ORDER BY id")]
+
+        if enabled_only:
+            source_list = [s for s in source_list if s.get('scraping_enabled', True)]
+
+        return source_list
+
+    def update_source(self, source_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a source"""
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT data FROM sources WHERE id = ?", (int(source_id),)).fetchone()
+            if not row:
+                return None
+
+            source = loads(row['data'])
+            source.update(updates)
+            source['updated_at'] = datetime.utcnow().isoformat()
+            conn.execute("UPDATE sources SET data = ? WHERE id = ?", (dumps(source), int(source_id)))
+
+        return source
+
+    def delete_source(self, source_id: int) -> bool:
+        """Delete a source"""
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM sources WHERE id = ?", (int(source_id),)).rowcount > 0
+
+    # ==================== JOBS ====================
+
+    def create_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new scraping job"""
+        with self.db.transaction() as conn:
+            job_id = self._next_id(conn, "jobs")
+
+            job_data['id'] = job_id
+            job_data['created_at'] = datetime.utcnow().isoformat()
+            job_data.setdefault('status', 'pending')
+            job_data.setdefault('documents_discovered', 0)
+            job_data.setdefault('documents_matched', 0)
+            job_data.setdefault('documents_new', 0)
+            job_data.setdefault('documents_skipped', 0)
+            job_data.setdefault('retry_count', 0)
+
+            conn.execute(
+                "INSERT INTO jobs (id, source_id, created_at, data) VALUES (?, ?, ?, ?)",
+                (job_id, job_data.get('source_id'), job_data['created_at'], dumps(job_data))
+            )
+
+        return job_data
+
+    def update_job(self, job_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a job"""
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (int(job_id),)).fetchone()
+            if not row:
+                return None
+
+            job = loads(row['data'])
+            job.update(updates)
+            conn.execute(
+                "UPDATE jobs SET source_id = ?, data = ? WHERE id = ?",
+                (job.get('source_id'), dumps(job), int(job_id))
+            )
+
+        return job
+
+    def get_jobs_by_source(self, source_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get jobs for a specific source"""
+        rows = self.db.fetchall(
+            "SELECT data FROM jobs WHERE source_id = ? ORDER BY created_at DESC LIMIT ?",
+            (source_id, limit)
+        )
+        return [loads(row['data']) for row in rows]
+
+    # ==================== DOCUMENT TRACKER ====================
+
+    def is_document_scraped(self, url: str) -> bool:
+        """Check if a document URL has been scraped"""
+        return self.db.fetchone(
+            "SELECT 1 FROM document_tracker WHERE url_hash = ?", (_url_hash(url),)
+        ) is not None
+
+    def get_document_hash(self, url: str) -> Optional[str]:
+        """Get the stored content hash for a URL"""
+        row = self.db.fetchone(
+            "SELECT content_hash FROM document_tracker WHERE url_hash = ?", (_url_hash(url),)
+        )
+        return row['content_hash'] if row else None
+
+    def get_document_hashes(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Get stored content hashes for the scraped URLs among urls (one lookup)"""
+        by_hash = {_url_hash(url): url for url in urls}
+        hashes = {}
+        for chunk in _chunks(list(by_hash)):
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.db.fetchall(
+                f"SELECT url_hash, content_hash FROM document_tracker WHERE url_hash IN ({placeholders})", chunk
+            ):
+                hashes[by_hash[row['url_hash']]] = row['content_hash']
+        return hashes
+
+    def mark_document_scraped(self, url: str, content_hash: str, source_id: int):
+        """Mark a document as scraped"""
+        self.mark_documents_scraped([(url, content_hash)], source_id)
+
+    def mark_documents_scraped(self, entries: Iterable[Tuple[str, str]], source_id: int):
+        """Mark (url, content_hash) pairs as scraped in one transaction"""
+        now = datetime.utcnow().isoformat()
+        with self.db.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO document_tracker
+                    (url_hash, document_url, content_hash, source_id, first_scraped_at, last_seen_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url_hash) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    last_seen_at = excluded.last_seen_at
+                """,
+                [(_url_hash(url), url, content_hash, source_id, now, now) for url, content_hash in entries]
+            )
+
+    def get_tracked_documents_by_source(self, source_id: int) -> List[Dict[str, Any]]:
+        """Get all tracked documents for a source"""
+        rows = self.db.fetchall(
+            "SELECT document_url, content_hash, source_id, first_scraped_at, last_seen_at "
+            "FROM document_tracker WHERE source_id = ?",
+            (source_id,)
+        )
+        return [dict(row) for row in rows]
+
+    # ==================== HEALTH METRICS ====================
+
+    def get_health_metrics(self, source_id: int) -> Dict[str, Any]:
+        """Get health metrics for a source"""
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT data FROM health_metrics WHERE source_id = ?", (int(source_id),)).fetchone()
+            if row:
+                return loads(row['data'])
+
+            # Initialize metrics
+            metrics = {
+                'source_id': source_id,
+                'total_executions': 0,
+                'successful_executions': 0,
+                'failed_executions': 0,
+                'consecutive_failures': 0,
+                'last_success_at': None,
+                'last_failure_at': None,
+                'average_execution_time': None,
+                'total_documents_found': 0,
+                'average_documents_per_run': None,
+                'updated_at': datetime.utcnow().isoformat()
+            }
+            conn.execute(
+                "INSERT INTO health_metrics (source_id, data) VALUES (?, ?)", (int(source_id), dumps(metrics))
+            )
+            return metrics
+
+    def update_health_metrics(self, source_id: int, updates: Dict[str, Any]):
+        """Update health metrics for a source"""
+        with self.db.transaction() as conn:
+            metrics = self.get_health_metrics(source_id)
+            metrics.update(updates)
+            metrics['updated_at'] = datetime.utcnow().isoformat()
+            conn.execute(
+                "UPDATE health_metrics SET data = ? WHERE source_id = ?", (dumps(metrics), int(source_id))
+            )
+
+    def record_job_execution(self, source_id: int, success: bool,
+                           documents_found: int = 0,
+                           execution_time: Optional[int] = None,
+                           error: Optional[str] = None):
+        """Record a job execution and update health metrics (atomically)"""
+        with self.db.transaction():
+            super().record_job_execution(source_id, success, documents_found, execution_time, error)
+
+    def check_alerts(self, threshold: int = 3) -> List[Dict[str, Any]]:
+        """Check for sources that need attention"""
+        alerts = []
+
+        for row in self.db.fetchall("SELECT source_id, data FROM health_metrics"):
+            metrics = loads(row['data'])
+            if metrics.get('consecutive_failures', 0) >= threshold:
+                alerts.append({
+                    'source_id': row['source_id'],
+                    'consecutive_failures': metrics['consecutive_failures'],
+                    'last_failure_at': metrics.get('last_failure_at'),
+                    'message': f"Source {row['source_id']} has failed {metrics['consecutive_failures']} times consecutively"
+                })
+
+        return alerts
+
+    # ==================== UTILITY ====================
+
+    def clear_all(self):
+        """Clear all storage (for testing)"""
+        with self.db.transaction() as conn:
+            for table in ("sources", "jobs", "document_tracker", "health_metrics"):
+                conn.execute(f"DELETE FROM {table}")
+
+    def export_data(self) -> Dict[str, Any]:
+        """Export all data"""
+        return {
+            'sources': {str(row['id']): loads(row['data']) for row in self.db.fetchall("SELECT id, data FROM sources")},
+            'jobs': {str(row['id']): loads(row['data']) for row in self.db.fetchall("SELECT id, data FROM jobs")},
+            'tracker': {
+                row['url_hash']: {key: row[key] for key in row.keys() if key != 'url_hash'}
+                for row in self.db.fetchall("SELECT * FROM document_tracker")
+            },
+            'health': {
+                str(row['source_id']): loads(row['data'])
+                for row in self.db.fetchall("SELECT source_id, data FROM health_metrics")
+            }
+        }
+
+    # ==================== SCRAPING LOGS ====================
+
+    def create_scraping_log(self, log_data: Dict[str, Any]) -> int:
+        """Create a new scraping log entry"""
+        with self.db.transaction() as conn:
+            log_id = self._next_id(conn, "scraping_logs")
+
+            log_data['id'] = log_id
+            log_data['created_at'] = datetime.utcnow().isoformat()
+
+            conn.execute(
+                "INSERT INTO scraping_logs (id, source_id, created_at, data) VALUES (?, ?, ?, ?)",
+                (log_id, log_data.get('source_id'), log_data['created_at'], dumps(log_data))
+            )
+
+        return log_id
+
+    def get_scraping_log(self, log_id: int) -> Optional[Dict[str, Any]]:
+        """Get a specific scraping log"""
+        row = self.db.fetchone("SELECT data FROM scraping_logs WHERE id = ?", (int(log_id),))
+        return loads(row['data']) if row else None
+
+    def update_scraping_log(self, log_id: int, log_data: Dict[str, Any]):
+        """Update a scraping log"""
+        log_data['updated_at'] = datetime.utcnow().isoformat()
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE scraping_logs SET source_id = ?, data = ? WHERE id = ?",
+                (log_data.get('source_id'), dumps(log_data), int(log_id))
+            )
+
+    def get_recent_scraping_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get recent scraping logs"""
+        rows = self.db.fetchall("SELECT data FROM scraping_logs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [loads(row['data']) for row in rows]
+
+    def get_scraping_logs_for_source(self, source_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get scraping logs for a specific source"""
+        rows = self.db.fetchall(
+            "SELECT data FROM scraping_logs WHERE source_id = ? ORDER BY created_at DESC LIMIT ?",
+            (source_id, limit)
+        )
+        return [loads(row['data']) for row in rows]
+
+    def clear_old_scraping_logs(self, days: int = 30):
+        """Clear logs older than specified days"""
+        cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM scraping_logs WHERE created_at <= ?", (cutoff_date,))
+
+
+class SQLiteSessionStorage(SessionStorage):
+    """
+    SessionStorage interface on SQLite
+
+    Callers still save whole lists; only rows whose content changed since the
+    last load/save are written, so appending a log entry writes one row.
+    """
+
+    KINDS = ("sources", "logs", "docs")
+
+    def __init__(self, storage_dir: str = "data/web_scraping_sessions", db_name: str = "session.db"):
+        super().__init__(storage_dir)
+        self.db = SQLiteStore(str(self.storage_dir / db_name), SESSION_SCHEMA)
+        # kind -> serialized rows as last read from / written to the database
+        self._saved: Dict[str, List[str]] = {}
+        self._migrate_json_files()
+
+    def _migrate_json_files(self):
+        """Import the JSON session files into an empty database"""
+        if not (self.db.is_empty("session_items") and self.db.is_empty("session_counters")):
+            return
+
+        files = {"sources": self.sources_file, "logs": self.logs_file, "docs": self.docs_file}
+        imported = []
+        with self.db.transaction():
+            for kind, path in files.items():
+                items = read_legacy_json(path)
+                if isinstance(items, list):
+                    self._save(kind, items)
+                    imported.append(path)
+            counters = read_legacy_json(self.counters_file)
+            if isinstance(counters, dict):
+                self.save_counters(counters.get("source_id", 1), counters.get("log_id", 1))
+                imported.append(self.counters_file)
+
+        for path in imported:
+            retire_legacy_json(path)
+
+    def _load(self, kind: str) -> List[Dict]:
+        try:
+            rows = self.db.fetchall(
+                "SELECT data FROM session_items WHERE kind = ? ORDER BY position", (kind,)
+            )
+            self._saved[kind] = [row['data'] for row in rows]
+            data = [loads(text) for text in self._saved[kind]]
+            logger.info(f"Loaded {len(data)} {kind} from disk")
+            return data
+        except Exception as e:
+            logger.error(f"Error loading {kind}: {e}")
+            return []
+
+    def _save(self, kind: str, items: List[Dict]) -> None:
+        try:
+            rows = [dumps(item) for item in items]
+            previous = self._saved.get(kind)
+            with self.db.transaction() as conn:
+                if previous is None:
+                    previous = [
+                        row['data'] for row in conn.execute(
+                            "SELECT data FROM session_items WHERE kind = ? ORDER BY position", (kind,)
+                        )
+                    ]
+                changed = [
+                    (kind, position, text) for position, text in enumerate(rows)
+                    if position >= len(previous) or previous[position] != text
+                ]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO session_items (kind, position, data) VALUES (?, ?, ?)", changed
+                )
+                conn.execute("DELETE FROM session_items WHERE kind = ? AND position >= ?", (kind, len(rows)))
+            self._saved[kind] = rows
+            logger.debug(f"Saved {len(items)} {kind} to disk ({len(changed)} rows written)")
+        except Exception as e:
+            self._saved.pop(kind, None)
+            logger.error(f"Error saving {kind}: {e}")
+
+    def load_sources(self) -> List[Dict]:
+        """Load sources from disk"""
+        return self._load("sources")
+
+    def save_sources(self, sources: List[Dict]) -> None:
+        """Save sources to disk"""
+        self._save("sources", sources)
+
+    def load_logs(self) -> List[Dict]:
+        """Load logs from disk"""
+        return self._load("logs")
+
+    def save_logs(self, logs: List[Dict]) -> None:
+        """Save logs to disk"""
+        self._save("logs", logs)
+
+    def load_scraped_docs(self) -> List[Dict]:
+        """Load scraped documents from disk"""
+        return self._load("docs")
+
+    def save_scraped_docs(self, docs: List[Dict]) -> None:
+        """Save scraped documents to disk"""
+        self._save("docs", docs)
+
+    def load_counters(self) -> Dict[str, int]:
+        """Load ID counters from disk"""
+        try:
+            rows = self.db.fetchall("SELECT name, value FROM session_counters")
+            if rows:
+                return {row['name']: row['value'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error loading counters: {e}")
+        return {"source_id": 1, "log_id": 1}
+
+    def save_counters(self, source_id: int, log_id: int) -> None:
+        """Save ID counters to disk"""
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO session_counters (name, value) VALUES (?, ?)",
+                    [("source_id", source_id), ("log_id", log_id)]
+                )
+        except Exception as e:
+            logger.error(f"Error saving counters: {e}")
+
+    def clear_all(self) -> None:
+        """Clear all session data (on logout)"""
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM session_items")
+                conn.execute("DELETE FROM session_counters")
+            self._saved.clear()
+            logger.info("Cleared all session data")
+        except Exception as e:
+            logger.error(f"Error clearing session data: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get storage statistics"""
+        counts = {
+            row['kind']: row['n']
+            for row in self.db.fetchall("SELECT kind, COUNT(*) AS n FROM session_items GROUP BY kind")
+        }
+        return {
+            "sources_count": counts.get("sources", 0),
+            "logs_count": counts.get("logs", 0),
+            "docs_count": counts.get("docs", 0),
+            "storage_dir": str(self.storage_dir),
+            "database": str(self.db.db_path)
+        }
@@ -13,6 +13,7 @@ from backend.utils.supabase_storage import upload_to_supabase
 from backend.database import Document, DocumentMetadata, SessionLocal
 from Agent.metadata.extractor import MetadataExtractor
 from Agent.lazy_rag.lazy_embedder import LazyEmbedder
+from Agent.lazy_rag.embedding_queue import enqueue_embedding, PRIORITY_SCRAPE
 
 logger = logging.getLogger(__name__)
 
@@ -437,8 +438,8 @@ class WebScrapingProcessor:
                 
                 logger.info(f"Successfully processed and stored: {filename} (ID: {document.id})")
                 
-                # Step 5: Document is now ready for lazy embedding
-                # Embedding will happen on first query automatically
+                # Step 5: Queue background embedding
+                enqueue_embedding(document.id, priority=PRIORITY_SCRAPE, source="scrape")
                 
                 return {
                     'status': 'success',
@@ -12,7 +12,7 @@ from .provenance_tracker import ProvenanceTracker
 from .pagination_engine import PaginationEngine
 from .incremental_scraper import IncrementalScraper
 from .parallel_processor import ParallelProcessor
-from .local_storage import LocalStorage
+from .local_storage import LocalStorage, get_local_storage
 from .config import ScrapingConfig
 
 logger = logging.getLogger(__name__)
@@ -26,13 +26,13 @@ class WebSourceManager:
         Initialize web source manager
         
         Args:
-            storage: LocalStorage instance (creates new if not provided)
+            storage: LocalStorage instance (shared store if not provided)
         """
         self.scraper = WebScraper()
         self.downloader = PDFDownloader()
         self.provenance = ProvenanceTracker()
         self.pagination_engine = PaginationEngine(self.scraper)
-        self.storage = storage or LocalStorage()
+        self.storage = storage or get_local_storage()
         self.incremental_scraper = IncrementalScraper(self.storage)
         self.parallel_processor = ParallelProcessor(max_workers=5)
     
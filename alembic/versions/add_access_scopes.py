@@ -0,0 +1,64 @@
+"""Add generated access_scopes columns for role-visibility filtering
+
+Revision ID: add_access_scopes
+Revises: add_embedding_jobs
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_access_scopes'
+down_revision = 'add_embedding_jobs'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of backend.utils.access_scope.ACCESS_SCOPES_FUNCTION_SQL
+ACCESS_SCOPES_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION beacon_access_scopes(visibility text, institution integer)
+RETURNS integer[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT array_remove(ARRAY[
+        CASE WHEN visibility = 'public' THEN 1 END,
+        CASE WHEN visibility IN ('public', 'restricted', 'institution_only') THEN 2 END,
+        CASE WHEN visibility = 'institution_only' THEN institution * 8 + 1 END,
+        CASE WHEN visibility IN ('institution_only', 'restricted') THEN institution * 8 + 2 END,
+        institution * 8 + 3
+    ], NULL)
+$$
+"""
+
+
+def upgrade():
+    """Add generated access_scopes columns on documents and chunks with GIN indexes"""
+    op.execute(ACCESS_SCOPES_FUNCTION_SQL)
+    
+    for table in ("documents", "document_embeddings"):
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS access_scopes integer[] "
+            "GENERATED ALWAYS AS (beacon_access_scopes(visibility_level, institution_id)) STORED"
+        )
+    
+    # Build the GIN indexes without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_access_scopes "
+            "ON documents USING gin (access_scopes)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_access_scopes "
+            "ON document_embeddings USING gin (access_scopes)"
+        )
+    
+    print("✅ Access scope columns and indexes created successfully!")
+
+
+def downgrade():
+    """Drop the access_scopes columns (indexes are dropped with them) and their function"""
+    op.execute("ALTER TABLE document_embeddings DROP COLUMN IF EXISTS access_scopes")
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS access_scopes")
+    op.execute("DROP FUNCTION IF EXISTS beacon_access_scopes(text, integer)")
+    
+    print("✅ Access scope columns removed successfully!")
@@ -0,0 +1,45 @@
+"""Add persistent agent checkpoint pending-writes table
+
+Revision ID: add_agent_checkpoint_writes
+Revises: add_insights_dirty_days
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_agent_checkpoint_writes'
+down_revision = 'add_insights_dirty_days'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create agent_checkpoint_writes (pending writes of in-flight agent steps)"""
+    op.create_table(
+        'agent_checkpoint_writes',
+        sa.Column('thread_id', sa.String(length=100), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(length=100), nullable=False),
+        sa.Column('checkpoint_id', sa.String(length=64), nullable=False),
+        sa.Column('task_id', sa.String(length=100), nullable=False),
+        sa.Column('idx', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(length=100), nullable=False),
+        sa.Column('task_path', sa.String(length=200), nullable=False),
+        sa.Column('value_type', sa.String(length=32), nullable=False),
+        sa.Column('value', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx')
+    )
+    op.create_index('ix_agent_checkpoint_writes_created_at', 'agent_checkpoint_writes', ['created_at'])
+    
+    print("✅ Agent checkpoint writes table created successfully!")
+
+
+def downgrade():
+    """Drop agent_checkpoint_writes"""
+    op.drop_index('ix_agent_checkpoint_writes_created_at', table_name='agent_checkpoint_writes')
+    op.drop_table('agent_checkpoint_writes')
+    
+    print("✅ Agent checkpoint writes table removed successfully!")
@@ -0,0 +1,44 @@
+"""Add persistent agent checkpoint table
+
+Revision ID: add_agent_checkpoints
+Revises: add_chat_session_summary
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_agent_checkpoints'
+down_revision = 'add_chat_session_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create agent_checkpoints (latest LangGraph checkpoint per thread)"""
+    op.create_table(
+        'agent_checkpoints',
+        sa.Column('thread_id', sa.String(length=100), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(length=100), nullable=False),
+        sa.Column('checkpoint_id', sa.String(length=64), nullable=False),
+        sa.Column('parent_checkpoint_id', sa.String(length=64), nullable=True),
+        sa.Column('checkpoint_type', sa.String(length=32), nullable=False),
+        sa.Column('checkpoint', sa.LargeBinary(), nullable=False),
+        sa.Column('metadata_type', sa.String(length=32), nullable=False),
+        sa.Column('checkpoint_metadata', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns')
+    )
+    op.create_index('ix_agent_checkpoints_updated_at', 'agent_checkpoints', ['updated_at'])
+    
+    print("✅ Agent checkpoint table created successfully!")
+
+
+def downgrade():
+    """Drop agent_checkpoints"""
+    op.drop_index('ix_agent_checkpoints_updated_at', table_name='agent_checkpoints')
+    op.drop_table('agent_checkpoints')
+    
+    print("✅ Agent checkpoint table removed successfully!")
@@ -0,0 +1,63 @@
+"""Add chat session message summary and trigram search indexes
+
+Revision ID: add_chat_session_summary
+Revises: add_insights_rollups
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_chat_session_summary'
+down_revision = 'add_insights_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add message_count/last_message_preview on chat_sessions and trigram indexes for search"""
+    op.add_column('chat_sessions', sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('chat_sessions', sa.Column('last_message_preview', sa.String(length=60), nullable=True))
+    
+    # Backfill from existing messages (preview matches backend.database.chat_message_preview)
+    op.execute("""
+        UPDATE chat_sessions s
+        SET message_count = summary.message_count,
+            last_message_preview = summary.preview
+        FROM (
+            SELECT DISTINCT ON (session_id)
+                session_id,
+                count(*) OVER (PARTITION BY session_id) AS message_count,
+                CASE WHEN length(content) > 50 THEN left(content, 50) || '...' ELSE content END AS preview
+            FROM chat_messages
+            ORDER BY session_id, created_at DESC, id DESC
+        ) summary
+        WHERE s.id = summary.session_id
+    """)
+    
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # Build the GIN indexes without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_messages_content_trgm "
+            "ON chat_messages USING gin (content gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_sessions_title_trgm "
+            "ON chat_sessions USING gin (title gin_trgm_ops)"
+        )
+    
+    print("✅ Chat session summary columns and search indexes created successfully!")
+
+
+def downgrade():
+    """Drop the trigram indexes and summary columns"""
+    op.execute("DROP INDEX IF EXISTS idx_chat_sessions_title_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_chat_messages_content_trgm")
+    op.drop_column('chat_sessions', 'last_message_preview')
+    op.drop_column('chat_sessions', 'message_count')
+    
+    print("✅ Chat session summary columns and search indexes removed successfully!")
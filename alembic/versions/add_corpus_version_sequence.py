@@ -0,0 +1,30 @@
+"""Add corpus_version_seq for retrieval cache invalidation
+
+Revision ID: add_corpus_version_seq
+Revises: add_embedding_cache
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_corpus_version_seq'
+down_revision = 'add_embedding_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the corpus version sequence"""
+    op.execute("CREATE SEQUENCE IF NOT EXISTS corpus_version_seq")
+    
+    print("✅ corpus_version_seq created successfully!")
+
+
+def downgrade():
+    """Drop the corpus version sequence"""
+    op.execute("DROP SEQUENCE IF EXISTS corpus_version_seq")
+    
+    print("✅ corpus_version_seq removed successfully!")
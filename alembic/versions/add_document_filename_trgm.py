@@ -0,0 +1,37 @@
+"""Add trigram index on documents.filename for metadata search
+
+Revision ID: add_filename_trgm
+Revises: add_agent_checkpoints
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_filename_trgm'
+down_revision = 'add_agent_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index filename for the ILIKE '%term%' branch of metadata search"""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # Build the GIN index without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_filename_trgm "
+            "ON documents USING gin (filename gin_trgm_ops)"
+        )
+    
+    print("✅ Filename trigram index created successfully!")
+
+
+def downgrade():
+    """Drop the filename trigram index"""
+    op.execute("DROP INDEX IF EXISTS idx_documents_filename_trgm")
+    
+    print("✅ Filename trigram index removed successfully!")
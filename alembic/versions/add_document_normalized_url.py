@@ -0,0 +1,47 @@
+"""Add generated normalized_source_url column for batched identity resolution
+
+Revision ID: add_normalized_source_url
+Revises: add_tracker_fingerprint
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_normalized_source_url'
+down_revision = 'add_tracker_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of backend.database.NORMALIZED_SOURCE_URL_EXPRESSION
+NORMALIZED_SOURCE_URL_EXPRESSION = "rtrim(split_part(split_part(source_url, '#', 1), '?', 1), '/')"
+
+
+def upgrade():
+    """Add generated normalized_source_url on documents with a B-tree index"""
+    # Adding a STORED generated column rewrites the whole documents table under
+    # an ACCESS EXCLUSIVE lock: reads and writes on documents block until it
+    # finishes, so run this in a maintenance window on large corpora
+    op.execute(
+        "ALTER TABLE documents ADD COLUMN IF NOT EXISTS normalized_source_url varchar(1000) "
+        f"GENERATED ALWAYS AS ({NORMALIZED_SOURCE_URL_EXPRESSION}) STORED"
+    )
+    
+    # Build the index without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_normalized_source_url "
+            "ON documents (normalized_source_url)"
+        )
+    
+    print("✅ Normalized source URL column and index created successfully!")
+
+
+def downgrade():
+    """Drop normalized_source_url (its index is dropped with it)"""
+    op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS normalized_source_url")
+    
+    print("✅ Normalized source URL column removed successfully!")
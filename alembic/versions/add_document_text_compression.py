@@ -0,0 +1,47 @@
+"""Compress document body text with lz4
+
+Revision ID: add_text_compression
+Revises: add_access_scopes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_text_compression'
+down_revision = 'add_access_scopes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Store new extracted_text values lz4-compressed out of line (Postgres 14+)"""
+    # Older servers or builds without lz4 keep the default pglz compression
+    op.execute("""
+        DO $$
+        BEGIN
+            ALTER TABLE documents ALTER COLUMN extracted_text SET COMPRESSION lz4;
+        EXCEPTION WHEN others THEN
+            RAISE NOTICE 'lz4 compression unavailable, keeping default: %', SQLERRM;
+        END
+        $$
+    """)
+    
+    print("✅ Document text compression updated successfully!")
+
+
+def downgrade():
+    """Return extracted_text to the server's default compression"""
+    op.execute("""
+        DO $$
+        BEGIN
+            ALTER TABLE documents ALTER COLUMN extracted_text SET COMPRESSION default;
+        EXCEPTION WHEN others THEN
+            RAISE NOTICE 'Could not reset compression: %', SQLERRM;
+        END
+        $$
+    """)
+    
+    print("✅ Document text compression reset successfully!")
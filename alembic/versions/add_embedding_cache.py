@@ -0,0 +1,43 @@
+"""Add embedding_cache table for content-addressed embeddings
+
+Revision ID: add_embedding_cache
+Revises: add_vector_ann_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_embedding_cache'
+down_revision = 'add_vector_ann_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create embedding_cache table"""
+    op.create_table(
+        'embedding_cache',
+        sa.Column('model_key', sa.String(length=64), nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('embedding', Vector(), nullable=False),
+        sa.Column('dimension', sa.Integer(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('model_key', 'text_hash')
+    )
+    op.create_index('idx_embedding_cache_last_used', 'embedding_cache', ['last_used_at'])
+    
+    print("✅ embedding_cache table created successfully!")
+
+
+def downgrade():
+    """Drop embedding_cache table"""
+    op.drop_index('idx_embedding_cache_last_used', table_name='embedding_cache')
+    op.drop_table('embedding_cache')
+    
+    print("✅ embedding_cache table removed successfully!")
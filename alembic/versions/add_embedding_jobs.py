@@ -0,0 +1,58 @@
+"""Add embedding_jobs queue table
+
+Revision ID: add_embedding_jobs
+Revises: add_fulltext_search
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_embedding_jobs'
+down_revision = 'add_fulltext_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create embedding_jobs table"""
+    op.create_table(
+        'embedding_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('run_after', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_embedding_jobs_id', 'embedding_jobs', ['id'])
+    op.create_index('idx_embedding_jobs_claim', 'embedding_jobs', ['status', 'priority', 'run_after'])
+    op.create_index(
+        'uq_embedding_jobs_active_document',
+        'embedding_jobs',
+        ['document_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')")
+    )
+    
+    print("✅ embedding_jobs table created successfully!")
+
+
+def downgrade():
+    """Drop embedding_jobs table"""
+    op.drop_index('uq_embedding_jobs_active_document', table_name='embedding_jobs')
+    op.drop_index('idx_embedding_jobs_claim', table_name='embedding_jobs')
+    op.drop_index('ix_embedding_jobs_id', table_name='embedding_jobs')
+    op.drop_table('embedding_jobs')
+    
+    print("✅ embedding_jobs table removed successfully!")
@@ -0,0 +1,54 @@
+"""Add full-text search_vector columns for hybrid retrieval
+
+Revision ID: add_fulltext_search
+Revises: add_corpus_version_seq
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_fulltext_search'
+down_revision = 'add_corpus_version_seq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add generated tsvector columns on chunks and metadata with GIN indexes"""
+    op.execute(
+        "ALTER TABLE document_embeddings ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(chunk_text, ''))) STORED"
+    )
+    op.execute(
+        "ALTER TABLE document_metadata ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(bm25_keywords, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(department, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(summary, '')), 'D')"
+        ") STORED"
+    )
+    
+    # Build the GIN indexes without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_search_vector "
+            "ON document_embeddings USING gin (search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_meta_search_vector "
+            "ON document_metadata USING gin (search_vector)"
+        )
+    
+    print("✅ Full-text search columns and indexes created successfully!")
+
+
+def downgrade():
+    """Drop the full-text search columns (indexes are dropped with them)"""
+    op.execute("ALTER TABLE document_embeddings DROP COLUMN IF EXISTS search_vector")
+    op.execute("ALTER TABLE document_metadata DROP COLUMN IF EXISTS search_vector")
+    
+    print("✅ Full-text search columns removed successfully!")
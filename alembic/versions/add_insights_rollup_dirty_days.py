@@ -0,0 +1,181 @@
+"""Log rollup-dirty upload days with triggers; narrow the uploader dimension
+
+Revision ID: add_insights_dirty_days
+Revises: add_filename_trgm
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_insights_dirty_days'
+down_revision = 'add_filename_trgm'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of backend.utils.insights_rollup.ROLLUP_TRIGGERS_SQL
+ROLLUP_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION insights_log_document_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(uploaded_at) FROM new_rows WHERE uploaded_at IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(uploaded_at) FROM old_rows WHERE uploaded_at IS NOT NULL;
+    ELSE
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT day FROM (
+            SELECT date(o.uploaded_at) AS day FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.uploaded_at, o.institution_id, o.visibility_level, o.approval_status, o.uploader_id)
+                  IS DISTINCT FROM (n.uploaded_at, n.institution_id, n.visibility_level, n.approval_status, n.uploader_id)
+            UNION
+            SELECT date(n.uploaded_at) FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.uploaded_at, o.institution_id, o.visibility_level, o.approval_status, o.uploader_id)
+                  IS DISTINCT FROM (n.uploaded_at, n.institution_id, n.visibility_level, n.approval_status, n.uploader_id)
+        ) changed WHERE day IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION insights_log_metadata_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at) FROM new_rows r JOIN documents d ON d.id = r.document_id
+        WHERE d.uploaded_at IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at) FROM old_rows r JOIN documents d ON d.id = r.document_id
+        WHERE d.uploaded_at IS NOT NULL;
+    ELSE
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at)
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        JOIN documents d ON d.id IN (o.document_id, n.document_id)
+        WHERE d.uploaded_at IS NOT NULL
+          AND (o.document_id, o.document_type, o.department, o.keywords, o.key_topics)
+              IS DISTINCT FROM (n.document_id, n.document_type, n.department, n.keywords, n.key_topics);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION insights_log_uploader_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Role changes move a user's uploads in or out of the uploader dimension
+    INSERT INTO insights_rollup_dirty_days (day)
+    SELECT DISTINCT date(d.uploaded_at)
+    FROM old_rows o
+    JOIN new_rows n ON n.id = o.id
+    JOIN documents d ON d.uploader_id = n.id
+    WHERE d.uploaded_at IS NOT NULL AND o.role IS DISTINCT FROM n.role;
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    spec text[];
+BEGIN
+    FOREACH spec SLICE 1 IN ARRAY ARRAY[
+        ['documents', 'insights_documents_insert', 'INSERT', 'NEW TABLE AS new_rows', 'insights_log_document_days'],
+        ['documents', 'insights_documents_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_document_days'],
+        ['documents', 'insights_documents_delete', 'DELETE', 'OLD TABLE AS old_rows', 'insights_log_document_days'],
+        ['document_metadata', 'insights_metadata_insert', 'INSERT', 'NEW TABLE AS new_rows', 'insights_log_metadata_days'],
+        ['document_metadata', 'insights_metadata_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_metadata_days'],
+        ['document_metadata', 'insights_metadata_delete', 'DELETE', 'OLD TABLE AS old_rows', 'insights_log_metadata_days'],
+        ['users', 'insights_users_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_uploader_days']
+    ]
+    LOOP
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = spec[2] AND tgrelid = spec[1]::regclass) THEN
+            EXECUTE 'CREATE TRIGGER ' || quote_ident(spec[2]) || ' AFTER ' || spec[3]
+                || ' ON ' || quote_ident(spec[1]) || ' REFERENCING ' || spec[4]
+                || ' FOR EACH STATEMENT EXECUTE FUNCTION ' || quote_ident(spec[5]) || '()';
+        END IF;
+    END LOOP;
+END
+$$;
+"""
+
+# Snapshot of backend.utils.insights_rollup.DAILY_ROLLUP_SQL / KEYWORD_ROLLUP_SQL (no day filter)
+DAILY_ROLLUP_SQL = """
+INSERT INTO insights_daily_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id,
+    document_type, department, document_count, metadata_count
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, CASE WHEN u.role = 'ministry_admin' THEN d.uploader_id END,
+       m.document_type, m.department, count(*), count(m.id)
+FROM documents d
+LEFT JOIN users u ON u.id = d.uploader_id
+LEFT JOIN document_metadata m ON m.document_id = d.id
+WHERE d.uploaded_at IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+KEYWORD_ROLLUP_SQL = """
+INSERT INTO insights_keyword_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id, kind, term, occurrences
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, CASE WHEN u.role = 'ministry_admin' THEN d.uploader_id END,
+       t.kind, t.term, count(*)
+FROM documents d
+LEFT JOIN users u ON u.id = d.uploader_id
+JOIN document_metadata m ON m.document_id = d.id
+CROSS JOIN LATERAL (
+    SELECT 'keyword' AS kind, unnest(m.keywords) AS term
+    UNION ALL
+    SELECT 'topic', unnest(m.key_topics)
+) t
+WHERE d.uploaded_at IS NOT NULL AND t.term IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+TRIGGERS = (
+    ("insights_documents_insert", "documents"),
+    ("insights_documents_update", "documents"),
+    ("insights_documents_delete", "documents"),
+    ("insights_metadata_insert", "document_metadata"),
+    ("insights_metadata_update", "document_metadata"),
+    ("insights_metadata_delete", "document_metadata"),
+    ("insights_users_update", "users"),
+)
+
+
+def upgrade():
+    """Create the dirty-day log and its triggers, then rebuild the rollups at the new grain"""
+    op.create_table(
+        'insights_rollup_dirty_days',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    op.execute(ROLLUP_TRIGGERS_SQL)
+    
+    # uploader_id is now kept only for ministry admins' uploads
+    op.execute("DELETE FROM insights_daily_rollup")
+    op.execute("DELETE FROM insights_keyword_rollup")
+    op.execute(DAILY_ROLLUP_SQL)
+    op.execute(KEYWORD_ROLLUP_SQL)
+    
+    print("✅ Insights rollup triggers created and rollups rebuilt successfully!")
+
+
+def downgrade():
+    """Drop the triggers, their functions and the dirty-day log"""
+    for trigger, table in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+    for function in ("insights_log_document_days", "insights_log_metadata_days", "insights_log_uploader_days"):
+        op.execute(f"DROP FUNCTION IF EXISTS {function}()")
+    op.drop_table('insights_rollup_dirty_days')
+    
+    print("✅ Insights rollup triggers removed successfully!")
@@ -0,0 +1,105 @@
+"""Add insights rollup tables for the dashboard endpoints
+
+Revision ID: add_insights_rollups
+Revises: add_normalized_source_url
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_insights_rollups'
+down_revision = 'add_normalized_source_url'
+branch_labels = None
+depends_on = None
+
+
+ACCESS_SCOPES_COLUMN = (
+    "access_scopes integer[] "
+    "GENERATED ALWAYS AS (beacon_access_scopes(visibility_level, institution_id)) STORED"
+)
+
+# Snapshot of backend.utils.insights_rollup.DAILY_ROLLUP_SQL / KEYWORD_ROLLUP_SQL (no day filter)
+DAILY_ROLLUP_SQL = """
+INSERT INTO insights_daily_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id,
+    document_type, department, document_count, metadata_count
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, d.uploader_id,
+       m.document_type, m.department, count(*), count(m.id)
+FROM documents d
+LEFT JOIN document_metadata m ON m.document_id = d.id
+WHERE d.uploaded_at IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+KEYWORD_ROLLUP_SQL = """
+INSERT INTO insights_keyword_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id, kind, term, occurrences
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, d.uploader_id,
+       t.kind, t.term, count(*)
+FROM documents d
+JOIN document_metadata m ON m.document_id = d.id
+CROSS JOIN LATERAL (
+    SELECT 'keyword' AS kind, unnest(m.keywords) AS term
+    UNION ALL
+    SELECT 'topic', unnest(m.key_topics)
+) t
+WHERE d.uploaded_at IS NOT NULL AND t.term IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+
+def upgrade():
+    """Create the daily and keyword rollups and fill them from existing documents"""
+    op.create_table(
+        'insights_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('institution_id', sa.Integer(), nullable=True),
+        sa.Column('visibility_level', sa.String(length=50), nullable=True),
+        sa.Column('approval_status', sa.String(length=50), nullable=True),
+        sa.Column('uploader_id', sa.Integer(), nullable=True),
+        sa.Column('document_type', sa.String(length=100), nullable=True),
+        sa.Column('department', sa.String(length=200), nullable=True),
+        sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('metadata_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_insights_daily_day', 'insights_daily_rollup', ['day'])
+    op.create_index('idx_insights_daily_institution', 'insights_daily_rollup', ['institution_id'])
+    
+    op.create_table(
+        'insights_keyword_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('institution_id', sa.Integer(), nullable=True),
+        sa.Column('visibility_level', sa.String(length=50), nullable=True),
+        sa.Column('approval_status', sa.String(length=50), nullable=True),
+        sa.Column('uploader_id', sa.Integer(), nullable=True),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('term', sa.Text(), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_insights_keyword_day_kind', 'insights_keyword_rollup', ['day', 'kind'])
+    
+    # Same generated role-visibility tokens as documents (beacon_access_scopes exists since add_access_scopes)
+    for table in ("insights_daily_rollup", "insights_keyword_rollup"):
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {ACCESS_SCOPES_COLUMN}")
+    
+    op.execute(DAILY_ROLLUP_SQL)
+    op.execute(KEYWORD_ROLLUP_SQL)
+    
+    print("✅ Insights rollup tables created and filled successfully!")
+
+
+def downgrade():
+    """Drop the insights rollup tables"""
+    op.drop_table('insights_keyword_rollup')
+    op.drop_table('insights_daily_rollup')
+    
+    print("✅ Insights rollup tables removed successfully!")
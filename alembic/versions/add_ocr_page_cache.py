@@ -0,0 +1,46 @@
+"""Add ocr_page_cache table for per-page OCR results
+
+Revision ID: add_ocr_page_cache
+Revises: add_text_compression
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ocr_page_cache'
+down_revision = 'add_text_compression'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create ocr_page_cache table"""
+    op.create_table(
+        'ocr_page_cache',
+        sa.Column('engine', sa.String(length=32), nullable=False),
+        sa.Column('settings', sa.String(length=64), nullable=False),
+        sa.Column('page_hash', sa.String(length=64), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False, server_default=''),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.Column('tables', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('engine', 'settings', 'page_hash')
+    )
+    op.create_index('idx_ocr_page_cache_last_used', 'ocr_page_cache', ['last_used_at'])
+
+    print("✅ ocr_page_cache table created successfully!")
+
+
+def downgrade():
+    """Drop ocr_page_cache table"""
+    op.drop_index('idx_ocr_page_cache_last_used', table_name='ocr_page_cache')
+    op.drop_table('ocr_page_cache')
+
+    print("✅ ocr_page_cache table removed successfully!")
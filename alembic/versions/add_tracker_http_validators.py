@@ -0,0 +1,36 @@
+"""Add HTTP validator columns to scraped_document_tracker
+
+Revision ID: add_tracker_validators
+Revises: add_ocr_page_cache
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tracker_validators'
+down_revision = 'add_ocr_page_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Store ETag / Last-Modified / Content-Length per scraped document URL"""
+    op.add_column('scraped_document_tracker', sa.Column('etag', sa.String(length=255), nullable=True))
+    op.add_column('scraped_document_tracker', sa.Column('last_modified', sa.String(length=64), nullable=True))
+    op.add_column('scraped_document_tracker', sa.Column('content_length', sa.Integer(), nullable=True))
+    op.add_column('scraped_document_tracker', sa.Column('last_checked_at', sa.DateTime(), nullable=True))
+    
+    print("✅ Scraped document tracker validators added successfully!")
+
+
+def downgrade():
+    """Remove HTTP validator columns"""
+    op.drop_column('scraped_document_tracker', 'last_checked_at')
+    op.drop_column('scraped_document_tracker', 'content_length')
+    op.drop_column('scraped_document_tracker', 'last_modified')
+    op.drop_column('scraped_document_tracker', 'etag')
+    
+    print("✅ Scraped document tracker validators removed successfully!")
@@ -0,0 +1,32 @@
+"""Add page fingerprint columns to scraped_document_tracker
+
+Revision ID: add_tracker_fingerprint
+Revises: add_tracker_validators
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tracker_fingerprint'
+down_revision = 'add_tracker_validators'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Store document-link hash and SimHash for near-duplicate page detection"""
+    op.add_column('scraped_document_tracker', sa.Column('links_hash', sa.String(length=64), nullable=True))
+    op.add_column('scraped_document_tracker', sa.Column('simhash', sa.String(length=16), nullable=True))
+    
+    print("✅ Scraped document tracker fingerprint columns added successfully!")
+
+
+def downgrade():
+    """Remove page fingerprint columns"""
+    op.drop_column('scraped_document_tracker', 'simhash')
+    op.drop_column('scraped_document_tracker', 'links_hash')
+    
+    print("✅ Scraped document tracker fingerprint columns removed successfully!")
@@ -0,0 +1,66 @@
+"""Add ANN index on document_embeddings.embedding
+
+Revision ID: add_vector_ann_index
+Revises: 004
+Create Date: 2026-10-16
+
+"""
+import math
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_vector_ann_index'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def _index_sql(index_type, row_count):
+    """Snapshot of ANNIndexManager.build_index_sql for VECTOR_INDEX_TYPE"""
+    if index_type == "hnsw":
+        m = int(os.getenv("HNSW_M", "16"))
+        ef_construction = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+        return (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_ann "
+            "ON document_embeddings USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {m}, ef_construction = {ef_construction})"
+        )
+    if index_type == "ivfflat":
+        lists = int(os.getenv("IVFFLAT_LISTS", "0"))
+        if lists <= 0:
+            lists = max(10, row_count // 1000) if row_count <= 1_000_000 else int(math.sqrt(row_count))
+        return (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_ann "
+            f"ON document_embeddings USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        )
+    return None
+
+
+def upgrade():
+    """Create the ANN index used by PGVectorStore.search (type from VECTOR_INDEX_TYPE)"""
+    index_type = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+    # CREATE INDEX CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        row_count = op.get_bind().execute(sa.text("SELECT count(*) FROM document_embeddings")).scalar() or 0
+        sql = _index_sql(index_type, row_count)
+        if sql is None:
+            print("⏭️  VECTOR_INDEX_TYPE=none, ANN index not created")
+            return
+        op.execute("SET maintenance_work_mem = '512MB'")
+        op.execute(sql)
+        # Refresh planner statistics so the role-filter estimates are accurate
+        op.execute("ANALYZE document_embeddings")
+    
+    print(f"✅ {index_type} ANN index on document_embeddings created successfully!")
+
+
+def downgrade():
+    """Drop the ANN index"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_embeddings_ann")
+    
+    print("✅ ANN index on document_embeddings removed successfully!")
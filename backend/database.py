@@ -1,13 +1,17 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, ForeignKey, ARRAY, Boolean, JSON, Index, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, ForeignKey, ARRAY, Boolean, JSON, Index, Float, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, ARRAY as PG_ARRAY
+from sqlalchemy.pool import NullPool, QueuePool
 from pgvector.sqlalchemy import Vector
 from datetime import datetime
+from typing import Optional
 import os
 from dotenv import load_dotenv
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Sequence, Computed, DDL, text, event
+
+from backend.utils.access_scope import ACCESS_SCOPES_FUNCTION_SQL
+from backend.utils.insights_rollup import ROLLUP_TRIGGERS_SQL, register_session_events
 
 load_dotenv()
 
@@ -20,23 +24,134 @@ DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD")
 
 DATABASE_URL = f"postgresql://{DATABASE_USERNAME}:{DATABASE_PASSWORD}@{DATABASE_HOSTNAME}:{DATABASE_PORT}/{DATABASE_NAME}"
 
-# Create engine with NullPool for Supabase pooler compatibility
-# NullPool creates a new connection for each request and closes it immediately
-# This prevents SASL authentication issues with Supabase's connection pooler
+# Connection pooling mode (DB_POOL_MODE):
+# - queue:     QueuePool kept per worker process; pre-ping drops dead connections and
+#              recycle retires them before server/pooler idle timeouts
+# - pgbouncer: QueuePool in front of PgBouncer/Supavisor transaction pooling. Nothing
+#              may outlive a transaction (session SETs, advisory locks, server-side
+#              prepared statements); psycopg2 never prepares server-side, so the
+#              engine needs no extra connect args for it
+# - null:      NullPool, a new connection per session (previous behaviour)
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+# DB_MAX_CONNECTIONS is a budget for the whole deployment, split across WEB_CONCURRENCY
+# worker processes (each process has its own pool)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+_per_worker_budget = max(1, DB_MAX_CONNECTIONS // WEB_CONCURRENCY) if DB_MAX_CONNECTIONS else None
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(_per_worker_budget or 5)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "0" if _per_worker_budget else "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300" if DB_POOL_MODE == "pgbouncer" else "1800"))
+
+CONNECT_ARGS = {
+    "connect_timeout": 10,
+    "application_name": "beacon_app",
+    "sslmode": "require",
+    # Detect half-open connections held in the pool
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+}
+
+
+def _pool_options() -> dict:
+    if DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    if DB_POOL_MODE not in ("queue", "pgbouncer"):
+        raise ValueError(f"Unknown DB_POOL_MODE '{DB_POOL_MODE}' (expected queue, pgbouncer or null)")
+    return {
+        "poolclass": QueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        # Reuse the most recently returned connection so idle ones can age out
+        "pool_use_lifo": True,
+    }
+
+
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,  # Use NullPool to avoid connection pooling issues
     echo=False,  # Disable SQL logging in production for performance
-    connect_args={
-        "connect_timeout": 10,
-        "application_name": "beacon_app",
-        "sslmode": "require",
-    }
+    connect_args=CONNECT_ARGS,
+    **_pool_options()
 )
 
+
+class PoolMetrics:
+    """Counters fed by pool events, reported by get_pool_status()"""
+    
+    def __init__(self):
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.invalidated = 0
+    
+    def attach(self, target):
+        event.listen(target, "connect", self._on_connect)
+        event.listen(target, "checkout", self._on_checkout)
+        event.listen(target, "invalidate", self._on_invalidate)
+    
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connections_opened += 1
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+    
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidated += 1
+
+
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+
+
+def get_pool_status() -> dict:
+    """Pool occupancy and connection reuse for this worker process"""
+    pool = engine.pool
+    status = {
+        "mode": DB_POOL_MODE,
+        "pool_class": type(pool).__name__,
+        "connections_opened": pool_metrics.connections_opened,
+        "checkouts": pool_metrics.checkouts,
+        "invalidated": pool_metrics.invalidated,
+        # Share of checkouts served without opening a new connection
+        "reuse_ratio": (
+            1 - pool_metrics.connections_opened / pool_metrics.checkouts
+            if pool_metrics.checkouts else 0.0
+        ),
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "recycle_seconds": DB_POOL_RECYCLE,
+        })
+    return status
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Bumped whenever searchable embeddings change; stamps cached retrieval results
+corpus_version_seq = Sequence("corpus_version_seq", metadata=Base.metadata)
+
+# Generated access_scopes columns call this function, so it must exist before create_all
+event.listen(Base.metadata, "before_create", DDL(ACCESS_SCOPES_FUNCTION_SQL))
+
+# Trigram operator classes for the chat history and filename search indexes
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+ACCESS_SCOPES_EXPRESSION = "beacon_access_scopes(visibility_level, institution_id)"
+
+# source_url without query string, fragment or trailing slash; mirrored in
+# Agent/web_scraping/document_identity_manager.normalize_source_url
+NORMALIZED_SOURCE_URL_EXPRESSION = "rtrim(split_part(split_part(source_url, '#', 1), '?', 1), '/')"
+
 
 class Institution(Base):
     """Institutions (Universities, Research Centres, Hospitals, etc.) and Ministries"""
@@ -132,7 +247,8 @@ class Document(Base):
     file_type = Column(String)
     file_path = Column(String)
     s3_url = Column(String)
-    extracted_text = Column(Text)
+    # Body text is deferred: load it explicitly (backend/utils/document_text.py) or with undefer()
+    extracted_text = deferred(Column(Text))
     
     # Document versioning and family grouping
     document_family_id = Column(Integer, ForeignKey("document_families.id"), nullable=True, index=True)  # Existing column
@@ -143,6 +259,8 @@ class Document(Base):
     supersedes_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
     content_hash = Column(String(64), nullable=True, index=True)  # SHA256 for deduplication
     source_url = Column(String(1000), nullable=True, index=True)  # Original URL if scraped
+    # Equality lookups for URL variations (replaces LIKE 'url%' scans)
+    normalized_source_url = Column(String(1000), Computed(NORMALIZED_SOURCE_URL_EXPRESSION, persisted=True))
     last_modified_at_source = Column(DateTime, nullable=True)  # Last modified date at source
     
     # Access control
@@ -150,6 +268,8 @@ class Document(Base):
     # Levels: public, institution_only, restricted, confidential
     institution_id = Column(Integer, ForeignKey("institutions.id"), nullable=True)
     uploader_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # Preserve document if uploader deleted
+    # Role-visibility tokens derived from visibility_level/institution_id (see backend/utils/access_scope.py)
+    access_scopes = Column(PG_ARRAY(Integer), Computed(ACCESS_SCOPES_EXPRESSION, persisted=True))
     download_allowed = Column(Boolean, default=False, nullable=False)
     # Approval workflow
     approval_status = Column(String(50), default="draft", index=True)
@@ -214,7 +334,10 @@ class Document(Base):
         Index('idx_documents_is_latest', 'is_latest_version'),
         Index('idx_documents_content_hash', 'content_hash'),
         Index('idx_documents_source_url', 'source_url'),
+        Index('idx_documents_normalized_source_url', 'normalized_source_url'),
         Index('idx_documents_family_latest', 'family_id', 'is_latest_version'),
+        Index('idx_documents_access_scopes', 'access_scopes', postgresql_using='gin'),
+        Index('idx_documents_filename_trgm', 'filename', postgresql_using='gin', postgresql_ops={'filename': 'gin_trgm_ops'}),
     )
 
 
@@ -247,6 +370,18 @@ class DocumentMetadata(Base):
     bm25_keywords = Column(Text, nullable=True)
     text_length = Column(Integer, nullable=True)
     
+    # Weighted full-text index over the searchable metadata fields (maintained by Postgres)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(bm25_keywords, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(department, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(summary, '')), 'D')",
+            persisted=True
+        )
+    ))
+    
     # Timestamps
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -261,6 +396,7 @@ class DocumentMetadata(Base):
         Index('idx_meta_updated_at', 'updated_at'),
         Index('idx_meta_embedding_status', 'embedding_status'),
         Index('idx_meta_metadata_status', 'metadata_status'),
+        Index('idx_meta_search_vector', 'search_vector', postgresql_using='gin'),
     )
 
 
@@ -490,12 +626,21 @@ class ChatSession(Base):
     title = Column(String(200), nullable=False, default="New Chat")
     thread_id = Column(String(100), nullable=False, unique=True, index=True)
     
+    # Denormalized for session lists (maintained on message insert, see below)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_preview = Column(String(60), nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan", order_by="ChatMessage.created_at")
+    
+    # Trigram index so title ILIKE '%q%' searches use an index
+    __table_args__ = (
+        Index('idx_chat_sessions_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
 
 class ChatMessage(Base):
@@ -517,9 +662,73 @@ class ChatMessage(Base):
     # Performance indexes
     __table_args__ = (
         Index('idx_chat_messages_session_created', 'session_id', 'created_at'),
+        # Trigram index so content ILIKE '%q%' searches use an index
+        Index('idx_chat_messages_content_trgm', 'content', postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}),
     )
 
 
+CHAT_PREVIEW_LENGTH = 50
+
+
+def chat_message_preview(content: Optional[str]) -> Optional[str]:
+    """First CHAT_PREVIEW_LENGTH characters of a message, with an ellipsis if cut"""
+    if content is None:
+        return None
+    if len(content) > CHAT_PREVIEW_LENGTH:
+        return content[:CHAT_PREVIEW_LENGTH] + "..."
+    return content
+
+
+@event.listens_for(ChatMessage, "after_insert")
+def _update_session_summary(mapper, connection, target):
+    """Keep ChatSession.message_count / last_message_preview current in the same transaction"""
+    sessions = ChatSession.__table__
+    connection.execute(
+        sessions.update().where(sessions.c.id == target.session_id).values(
+            message_count=sessions.c.message_count + 1,
+            last_message_preview=chat_message_preview(target.content),
+            updated_at=sessions.c.updated_at  # Leave updated_at to the caller
+        )
+    )
+
+
+class AgentCheckpoint(Base):
+    """Latest LangGraph checkpoint per agent thread (see Agent/rag_agent/checkpointer.py)"""
+    __tablename__ = "agent_checkpoints"
+    
+    thread_id = Column(String(100), primary_key=True)  # ChatSession.thread_id
+    checkpoint_ns = Column(String(100), primary_key=True, default="")
+    checkpoint_id = Column(String(64), nullable=False)
+    parent_checkpoint_id = Column(String(64), nullable=True)
+    
+    # Serializer type tag + payload (langgraph JsonPlusSerializer.dumps_typed)
+    checkpoint_type = Column(String(32), nullable=False)
+    checkpoint = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String(32), nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # TTL eviction
+
+
+class AgentCheckpointWrite(Base):
+    """Pending writes of an agent checkpoint's in-flight step (see Agent/rag_agent/checkpointer.py)"""
+    __tablename__ = "agent_checkpoint_writes"
+    
+    thread_id = Column(String(100), primary_key=True)
+    checkpoint_ns = Column(String(100), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(100), primary_key=True)
+    idx = Column(Integer, primary_key=True)  # Position in the write batch; negative for ERROR/INTERRUPT/...
+    
+    channel = Column(String(100), nullable=False)
+    task_path = Column(String(200), nullable=False, default="")
+    # Serializer type tag + payload (langgraph JsonPlusSerializer.dumps_typed)
+    value_type = Column(String(32), nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # TTL eviction
+
+
 class DocumentEmbedding(Base):
     """Vector embeddings stored in pgvector for centralized RAG access"""
     __tablename__ = "document_embeddings"
@@ -534,10 +743,18 @@ class DocumentEmbedding(Base):
     visibility_level = Column(String(50), nullable=False, index=True)
     institution_id = Column(Integer, nullable=True, index=True)
     approval_status = Column(String(50), nullable=False, index=True)
+    # Role-visibility tokens derived from the two fields above (see backend/utils/access_scope.py)
+    access_scopes = Column(PG_ARRAY(Integer), Computed(ACCESS_SCOPES_EXPRESSION, persisted=True))
     
     # Metadata for each chunk (renamed to avoid SQLAlchemy conflict)
     chunk_metadata = Column(JSONB, nullable=True)  # Stores filename, page_number, etc.
     
+    # Full-text index of chunk_text for lexical retrieval (maintained by Postgres)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(chunk_text, ''))", persisted=True)
+    ))
+    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -547,6 +764,82 @@ class DocumentEmbedding(Base):
         Index('idx_doc_chunk', 'document_id', 'chunk_index'),
         Index('idx_visibility_institution', 'visibility_level', 'institution_id'),
         Index('idx_approval_status', 'approval_status'),
+        # The ANN index on embedding (idx_embeddings_ann) is not declared here: its
+        # type follows VECTOR_INDEX_TYPE, see Agent/vector_store/ann_index.py
+        Index('idx_embeddings_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_embeddings_access_scopes', 'access_scopes', postgresql_using='gin'),
+    )
+
+
+class EmbeddingCacheEntry(Base):
+    """Content-addressed embedding cache keyed by (model and dimension, normalized text hash)"""
+    __tablename__ = "embedding_cache"
+    
+    model_key = Column(String(64), primary_key=True)  # "<ACTIVE_MODEL>:<dimension>"
+    text_hash = Column(String(64), primary_key=True)  # SHA256 of normalized text
+    embedding = Column(Vector(), nullable=False)  # Dimension depends on the model
+    dimension = Column(Integer, nullable=False)
+    
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Index for LRU eviction
+    __table_args__ = (
+        Index('idx_embedding_cache_last_used', 'last_used_at'),
+    )
+
+
+class OCRPageCacheEntry(Base):
+    """Per-page OCR results keyed by (engine, settings, rendered page hash)"""
+    __tablename__ = "ocr_page_cache"
+
+    engine = Column(String(32), primary_key=True)  # easyocr, cloud-ocr, opencv-tables
+    settings = Column(String(64), primary_key=True)  # Preprocessing level, languages
+    page_hash = Column(String(64), primary_key=True)  # SHA256 of the page image
+    text = Column(Text, nullable=False, default="")
+    confidence = Column(Float, nullable=True)
+    tables = Column(JSONB, nullable=True)
+    details = Column(JSONB, nullable=True)  # Rotation, preprocessing, engine metadata
+
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Index for LRU eviction
+    __table_args__ = (
+        Index('idx_ocr_page_cache_last_used', 'last_used_at'),
+    )
+
+
+class EmbeddingJob(Base):
+    """Durable embedding work queue drained by Agent/lazy_rag/embedding_queue.py workers"""
+    __tablename__ = "embedding_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    source = Column(String(20), nullable=False)  # upload, approval, scrape, query, backfill
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Retry backoff
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Claim order for SELECT ... FOR UPDATE SKIP LOCKED
+        Index('idx_embedding_jobs_claim', 'status', 'priority', 'run_after'),
+        # At most one active job per document; re-enqueueing raises its priority instead
+        Index(
+            'uq_embedding_jobs_active_document',
+            'document_id',
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
     )
 
 
@@ -839,6 +1132,16 @@ class ScrapedDocumentTracker(Base):
     first_scraped_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     last_seen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    # HTTP validators from the last download, sent back as a conditional GET on re-scan
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)  # Raw Last-Modified header
+    content_length = Column(Integer, nullable=True)
+    last_checked_at = Column(DateTime, nullable=True)
+    
+    # Listing-page fingerprint (see Agent/web_scraping/page_fingerprint.py)
+    links_hash = Column(String(64), nullable=True)
+    simhash = Column(String(16), nullable=True)  # 64-bit SimHash, hex
+    
     source_id = Column(Integer, ForeignKey("web_scraping_sources.id", ondelete="SET NULL"), nullable=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True, index=True)
     
@@ -887,3 +1190,70 @@ class SourceHealthMetrics(Base):
         Index('idx_health_metrics_source', 'source_id'),
         Index('idx_health_metrics_failures', 'consecutive_failures'),
     )
+
+
+# ============================================================================
+# INSIGHTS ROLLUPS (maintained by backend/utils/insights_rollup.py)
+# ============================================================================
+
+class InsightsDailyRollup(Base):
+    """Document counts per upload day and dashboard dimension"""
+    __tablename__ = "insights_daily_rollup"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    
+    # Dimensions (everything dashboards filter or group by)
+    institution_id = Column(Integer, nullable=True)
+    visibility_level = Column(String(50), nullable=True)
+    approval_status = Column(String(50), nullable=True)
+    uploader_id = Column(Integer, nullable=True)  # Set only for ministry admins' uploads
+    document_type = Column(String(100), nullable=True)
+    department = Column(String(200), nullable=True)
+    access_scopes = Column(PG_ARRAY(Integer), Computed(ACCESS_SCOPES_EXPRESSION, persisted=True))
+    
+    # Measures
+    document_count = Column(Integer, nullable=False, default=0)
+    metadata_count = Column(Integer, nullable=False, default=0)  # Documents with a metadata row
+    
+    __table_args__ = (
+        Index('idx_insights_daily_day', 'day'),
+        Index('idx_insights_daily_institution', 'institution_id'),
+    )
+
+
+class InsightsKeywordRollup(Base):
+    """Keyword and topic occurrences per upload day and dashboard dimension"""
+    __tablename__ = "insights_keyword_rollup"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    
+    institution_id = Column(Integer, nullable=True)
+    visibility_level = Column(String(50), nullable=True)
+    approval_status = Column(String(50), nullable=True)
+    uploader_id = Column(Integer, nullable=True)
+    access_scopes = Column(PG_ARRAY(Integer), Computed(ACCESS_SCOPES_EXPRESSION, persisted=True))
+    
+    kind = Column(String(10), nullable=False)  # keyword, topic
+    term = Column(Text, nullable=False)
+    occurrences = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('idx_insights_keyword_day_kind', 'day', 'kind'),
+    )
+
+
+class InsightsRollupDirtyDay(Base):
+    """Upload days whose rollup cells are stale; appended by triggers, drained by refresh_days()"""
+    __tablename__ = "insights_rollup_dirty_days"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+
+
+# Triggers need documents, document_metadata, users and the dirty-day log to exist
+event.listen(Base.metadata, "after_create", DDL(ROLLUP_TRIGGERS_SQL))
+
+# Every process that writes through these sessions (API, scrapers, scripts) nudges a refresh
+register_session_events()
@@ -28,9 +28,11 @@ from backend.routers import scraping_logs
 from backend.routers.enhanced_web_scraping_router import router as enhanced_scraping_router
 from backend.init_developer import initialize_developer_account
 from Agent.data_ingestion.scheduler import start_scheduler
+from Agent.lazy_rag.embedding_queue import queue_enabled, start_embedding_workers, stop_embedding_workers
 from backend.utils.quota_manager import get_quota_manager
 from dotenv import load_dotenv
 import logging
+import os
 import time
 
 load_dotenv()
@@ -160,6 +162,12 @@ async def health_check():
         "services": ["auth", "documents", "chat", "approvals", "data-sources", "insights"]
     }
 
+@app.get("/health/db-pool")
+async def db_pool_status():
+    """Database connection pool metrics for this worker process"""
+    from backend.database import get_pool_status
+    return {"status": "success", "pool": get_pool_status()}
+
 @app.get("/quota/status")
 async def get_quota_status():
     """Get current quota status for all cloud services"""
@@ -214,6 +222,14 @@ async def startup_event():
     """Start background scheduler and initialize cache on app startup"""
     logger.info("Starting BEACON Platform...")
     
+    # Sync endpoints and dependencies (database access) run in this threadpool
+    from backend.utils.db_executor import configure_threadpool
+    configure_threadpool()
+    
+    # Drain the insights rollup dirty-day log (written by triggers from every writer)
+    from backend.utils.insights_rollup import get_insights_rollup
+    get_insights_rollup().start()
+    
     # Initialize cache (Redis if available, fallback to in-memory)
     try:
         from fastapi_cache import FastAPICache
@@ -267,4 +283,27 @@ async def startup_event():
     logger.info("Starting sync scheduler...")
     start_scheduler(sync_time="02:00")  # Daily sync at 2 AM
     logger.info("Sync scheduler started")
-    logger.info("BEACON Platform ready!")
\ No newline at end of file
+    
+    # Start background embedding workers
+    if queue_enabled() and os.getenv("EMBEDDING_WORKERS_ENABLED", "true").lower() == "true":
+        start_embedding_workers()
+    logger.info("BEACON Platform ready!")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background embedding workers, the PDF page pool, the crawl engine and shared HTTP clients"""
+    stop_embedding_workers()
+    
+    from backend.utils.insights_rollup import get_insights_rollup
+    get_insights_rollup().stop()
+    get_insights_rollup().flush()
+    
+    from backend.utils.pdf_pages import shutdown_page_pool
+    shutdown_page_pool()
+    
+    from backend.utils.download_proxy import close_http_client
+    await close_http_client()
+    
+    from Agent.web_scraping.crawl_engine import shutdown_crawl_engine
+    shutdown_crawl_engine()
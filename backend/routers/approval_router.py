@@ -7,6 +7,7 @@ from datetime import datetime
 
 from backend.database import get_db, Document, User, AuditLog
 from backend.routers.auth_router import get_current_user
+from Agent.lazy_rag.embedding_queue import sync_document_embeddings
 
 router = APIRouter()
 
@@ -262,6 +263,9 @@ async def approve_document(
     document.approved_at = datetime.utcnow()
     db.commit()
     
+    # Make the document searchable: update existing embeddings or queue embedding
+    sync_document_embeddings(document, source="approval")
+    
     # Log audit
     # audit = AuditLog(
     #     user_id=current_user.id,
@@ -335,6 +339,9 @@ async def reject_document(
     document.approved_at = datetime.utcnow()
     db.commit()
     
+    # Remove it from search results
+    sync_document_embeddings(document, source="approval")
+    
     # Log audit
     # audit = AuditLog(
     #     user_id=current_user.id,
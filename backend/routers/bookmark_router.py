@@ -19,7 +19,7 @@ except ImportError:
     CACHE_AVAILABLE = False
 
 @router.post("/toggle/{document_id}")
-async def toggle_bookmark(
+def toggle_bookmark(
     document_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -48,7 +48,7 @@ async def toggle_bookmark(
 
 @router.get("/list")
 @cache(expire=30)  # Cache for 30 seconds - bookmarks don't change frequently
-async def list_bookmarks(
+def list_bookmarks(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -76,12 +76,54 @@ class MessagesResponse(BaseModel):
     messages: List[MessageResponse]
 
 
+# ============================================================================
+# Helpers
+# ============================================================================
+
+def _search_condition(db: Session, q: str):
+    """Title or any message contains q (both ILIKEs are served by trigram indexes)"""
+    search_term = f"%{q}%"
+    return or_(
+        ChatSession.title.ilike(search_term),
+        ChatSession.id.in_(
+            db.query(ChatMessage.session_id).filter(
+                ChatMessage.content.ilike(search_term)
+            )
+        )
+    )
+
+
+def _page_sessions(query, limit: int, offset: int):
+    """One page of sessions, most recent first, plus the total match count"""
+    rows = query.add_columns(
+        func.count().over().label("total")
+    ).order_by(ChatSession.updated_at.desc()).offset(offset).limit(limit).all()
+    
+    if rows:
+        return [session for session, _ in rows], rows[0].total
+    
+    # Past the last page the window count is unavailable
+    return [], query.count() if offset else 0
+
+
+def _session_response(session: ChatSession) -> SessionResponse:
+    return SessionResponse(
+        session_id=session.id,
+        title=session.title,
+        thread_id=session.thread_id,
+        created_at=session.created_at,
+        updated_at=session.updated_at,
+        message_count=session.message_count or 0,
+        last_message=session.last_message_preview
+    )
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
 
 @router.post("/sessions", response_model=SessionResponse, tags=["chat-history"])
-async def create_session(
+def create_session(
     request: CreateSessionRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -118,7 +160,7 @@ async def create_session(
 
 
 @router.get("/sessions", response_model=SessionListResponse, tags=["chat-history"])
-async def list_sessions(
+def list_sessions(
     limit: int = Query(20, ge=1, le=100, description="Number of sessions to return"),
     offset: int = Query(0, ge=0, description="Number of sessions to skip"),
     search: Optional[str] = Query(None, description="Search query for title or content"),
@@ -138,53 +180,13 @@ async def list_sessions(
     
     # Apply search filter if provided
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                ChatSession.title.ilike(search_term),
-                ChatSession.id.in_(
-                    db.query(ChatMessage.session_id).filter(
-                        ChatMessage.content.ilike(search_term)
-                    )
-                )
-            )
-        )
+        query = query.filter(_search_condition(db, search))
     
-    # Get total count
-    total = query.count()
+    # Paginated sessions ordered by most recent, with total count
+    sessions, total = _page_sessions(query, limit, offset)
     
-    # Get paginated sessions ordered by most recent
-    sessions = query.order_by(ChatSession.updated_at.desc()).offset(offset).limit(limit).all()
-    
-    # Build response with message counts and previews
-    session_responses = []
-    for session in sessions:
-        # Get message count
-        message_count = db.query(func.count(ChatMessage.id)).filter(
-            ChatMessage.session_id == session.id
-        ).scalar()
-        
-        # Get last message preview
-        last_message = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session.id
-        ).order_by(ChatMessage.created_at.desc()).first()
-        
-        last_message_text = None
-        if last_message:
-            # Get first 50 characters
-            last_message_text = last_message.content[:50]
-            if len(last_message.content) > 50:
-                last_message_text += "..."
-        
-        session_responses.append(SessionResponse(
-            session_id=session.id,
-            title=session.title,
-            thread_id=session.thread_id,
-            created_at=session.created_at,
-            updated_at=session.updated_at,
-            message_count=message_count,
-            last_message=last_message_text
-        ))
+    # Message counts and previews are stored on the session
+    session_responses = [_session_response(session) for session in sessions]
     
     return SessionListResponse(
         sessions=session_responses,
@@ -195,7 +197,7 @@ async def list_sessions(
 
 
 @router.get("/sessions/{session_id}/messages", response_model=MessagesResponse, tags=["chat-history"])
-async def get_session_messages(
+def get_session_messages(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -244,7 +246,7 @@ async def get_session_messages(
 
 
 @router.put("/sessions/{session_id}", response_model=SessionResponse, tags=["chat-history"])
-async def update_session_title(
+def update_session_title(
     session_id: int,
     request: UpdateTitleRequest,
     current_user: User = Depends(get_current_user),
@@ -277,23 +279,11 @@ async def update_session_title(
     db.commit()
     db.refresh(session)
     
-    # Get message count for response
-    message_count = db.query(func.count(ChatMessage.id)).filter(
-        ChatMessage.session_id == session.id
-    ).scalar()
-    
-    return SessionResponse(
-        session_id=session.id,
-        title=session.title,
-        thread_id=session.thread_id,
-        created_at=session.created_at,
-        updated_at=session.updated_at,
-        message_count=message_count
-    )
+    return _session_response(session)
 
 
 @router.delete("/sessions/{session_id}", tags=["chat-history"])
-async def delete_session(
+def delete_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -328,7 +318,7 @@ async def delete_session(
 
 
 @router.get("/sessions/search", response_model=SessionListResponse, tags=["chat-history"])
-async def search_sessions(
+def search_sessions(
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(20, ge=1, le=100, description="Number of results to return"),
     current_user: User = Depends(get_current_user),
@@ -342,55 +332,16 @@ async def search_sessions(
     - Searches in session titles and message content
     - Returns matching sessions ordered by relevance (most recent first)
     """
-    search_term = f"%{q}%"
-    
     # Search in titles and message content
     query = db.query(ChatSession).filter(
         ChatSession.user_id == current_user.id,
-        or_(
-            ChatSession.title.ilike(search_term),
-            ChatSession.id.in_(
-                db.query(ChatMessage.session_id).filter(
-                    ChatMessage.content.ilike(search_term)
-                )
-            )
-        )
+        _search_condition(db, q)
     )
     
-    # Get total count
-    total = query.count()
-    
-    # Get sessions ordered by most recent
-    sessions = query.order_by(ChatSession.updated_at.desc()).limit(limit).all()
+    # Sessions ordered by most recent, with total count
+    sessions, total = _page_sessions(query, limit, 0)
     
-    # Build response with message counts and previews
-    session_responses = []
-    for session in sessions:
-        # Get message count
-        message_count = db.query(func.count(ChatMessage.id)).filter(
-            ChatMessage.session_id == session.id
-        ).scalar()
-        
-        # Get last message preview
-        last_message = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session.id
-        ).order_by(ChatMessage.created_at.desc()).first()
-        
-        last_message_text = None
-        if last_message:
-            last_message_text = last_message.content[:50]
-            if len(last_message.content) > 50:
-                last_message_text += "..."
-        
-        session_responses.append(SessionResponse(
-            session_id=session.id,
-            title=session.title,
-            thread_id=session.thread_id,
-            created_at=session.created_at,
-            updated_at=session.updated_at,
-            message_count=message_count,
-            last_message=last_message_text
-        ))
+    session_responses = [_session_response(session) for session in sessions]
     
     return SessionListResponse(
         sessions=session_responses,
@@ -6,7 +6,8 @@ from pydantic import BaseModel
 
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional, AsyncGenerator
+from typing import Optional, AsyncGenerator, Tuple
+import logging
 import os
 import uuid
 import json
@@ -14,11 +15,14 @@ import asyncio
 from dotenv import load_dotenv
 
 from Agent.rag_agent.react_agent import PolicyRAGAgent
-from backend.database import User, ChatSession, ChatMessage, get_db
+from backend.database import User, ChatSession, ChatMessage
 from backend.routers.auth_router import get_current_user
+from backend.utils.db_executor import run_agent, run_db
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["chat"])
 
 # Initialize agent (lazy loading)
@@ -36,7 +40,7 @@ def get_agent():
 
 class ChatRequest(BaseModel):
     question: str
-    thread_id: Optional[str] = "default"  # Deprecated, use session_id instead
+    thread_id: Optional[str] = "default"  # Deprecated and ignored: memory is keyed on the session
     session_id: Optional[int] = None  # NEW: Optional session ID
 
 
@@ -95,17 +99,74 @@ def get_or_create_session(
         return session
 
 
-async def generate_stream(question: str, thread_id: str, user_role: str = None, user_institution_id: int = None) -> AsyncGenerator[str, None]:
+def confidence_percent(confidence: float) -> int:
+    """Stored confidence as 0-100 (the agent reports 0-1 or 0-100)"""
+    confidence = confidence or 0
+    return int(confidence * 100) if confidence <= 1 else int(confidence)
+
+
+def start_chat_turn(db: Session, session_id: Optional[int], user_id: int, question: str) -> Tuple[int, str]:
+    """
+    Resolve the caller's session and save the question
+    
+    Returns:
+        (session id, thread_id the agent memory is keyed on)
+    """
+    session = get_or_create_session(session_id, user_id, db)
+    db.add(ChatMessage(session_id=session.id, role="user", content=question))
+    db.commit()
+    return session.id, session.thread_id
+
+
+def finish_chat_turn(db: Session, session_id: int, question: str, answer: str, citations: list, confidence: float) -> Optional[int]:
+    """
+    Save the answer, bump the session and title it from its first question
+    
+    Returns:
+        ID of the saved assistant message (None if the session is gone)
+    """
+    session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+    if not session:
+        return None
+    
+    ai_message = ChatMessage(
+        session_id=session.id,
+        role="assistant",
+        content=answer,
+        citations=citations,
+        confidence=confidence_percent(confidence)  # Handle both 0-1 and 0-100 formats
+    )
+    db.add(ai_message)
+    session.updated_at = datetime.utcnow()
+    if session.title == "New Chat":
+        session.title = question[:50] + ("..." if len(question) > 50 else "")
+    db.commit()
+    return ai_message.id
+
+
+async def generate_stream(
+    question: str,
+    thread_id: str,
+    user_role: str = None,
+    user_institution_id: int = None,
+    session_id: Optional[int] = None
+) -> AsyncGenerator[str, None]:
     """
     Generate SSE stream for chat response
     
+    With session_id, the final answer is saved to that chat session.
+    
     Yields SSE formatted events with:
-    - content chunks (token-by-token)
+    - tool progress (tool start/end while the agent searches)
+    - content chunks (token-by-token, as the LLM emits them)
+    - retract (the content streamed so far was a tool-call preamble; discard it)
     - citations (when available)
     - final metadata (confidence, status)
     """
     try:
         rag_agent = get_agent()
+        citations = []
+        final = None
         
         # Stream the response with user context
         async for chunk in rag_agent.query_stream(question, thread_id, user_role, user_institution_id):
@@ -120,7 +181,21 @@ async def generate_stream(question: str, thread_id: str, user_role: str = None,
                 }
                 yield f"data: {json.dumps(data)}\n\n"
                 
+            elif event_type == "retract":
+                yield f"data: {json.dumps({'type': 'retract', 'timestamp': chunk.get('timestamp')})}\n\n"
+                
+            elif event_type == "tool":
+                # Tool-call progress
+                data = {
+                    "type": "tool",
+                    "status": chunk.get("status"),
+                    "tool": chunk.get("tool"),
+                    "timestamp": chunk.get("timestamp")
+                }
+                yield f"data: {json.dumps(data)}\n\n"
+                
             elif event_type == "citation":
+                citations.append(chunk.get("citation"))
                 # Stream citations as they're discovered
                 data = {
                     "type": "citation",
@@ -130,13 +205,16 @@ async def generate_stream(question: str, thread_id: str, user_role: str = None,
                 yield f"data: {json.dumps(data)}\n\n"
                 
             elif event_type == "metadata":
+                final = chunk
                 # Final metadata
                 data = {
                     "type": "metadata",
+                    "session_id": session_id,
                     "confidence": chunk.get("confidence", 0.0),
                     "status": chunk.get("status", "success"),
                     "format": chunk.get("format", "text"),
                     "data": chunk.get("data"),
+                    "answer": chunk.get("answer"),
                     "timestamp": chunk.get("timestamp")
                 }
                 yield f"data: {json.dumps(data)}\n\n"
@@ -150,6 +228,15 @@ async def generate_stream(question: str, thread_id: str, user_role: str = None,
                 }
                 yield f"data: {json.dumps(data)}\n\n"
                 
+        if session_id is not None and final is not None and final.get("answer"):
+            try:
+                await run_db(
+                    finish_chat_turn, session_id, question, final["answer"],
+                    citations, final.get("confidence", 0.0)
+                )
+            except Exception as e:
+                logger.error(f"Could not save streamed answer to session {session_id}: {e}")
+        
         # Send done signal
         yield f"data: {json.dumps({'type': 'done'})}\n\n"
         
@@ -172,29 +259,41 @@ async def chat_query_stream(
     
     Args:
         question: The question to ask
-        thread_id: Optional thread ID for conversation memory
+        session_id: Optional session ID (creates new if not provided); the
+                    agent's conversation memory is keyed on this session
+        thread_id: Deprecated and ignored
     
     Returns:
         Server-Sent Events stream with:
+        - tool: Tool-call progress (start/end)
         - content: Token chunks as they're generated
+        - retract: Discard the content received so far (it preceded a tool call)
         - citation: Citations as they're discovered (with approval status)
-        - metadata: Final confidence and status
+        - metadata: Final confidence, status, formatted answer and session_id
         - done: Stream completion signal
     
     Requires authentication - applies role-based access control
     """
+    # Memory is per ChatSession: a shared client-supplied thread_id would mix
+    # users' conversations in the persistent checkpointer
+    session_id, thread_id = await run_db(
+        start_chat_turn, request.session_id, current_user.id, request.question
+    )
+    
     return StreamingResponse(
         generate_stream(
             request.question, 
-            request.thread_id,
+            thread_id,
             current_user.role,
-            current_user.institution_id
+            current_user.institution_id,
+            session_id
         ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Disable nginx buffering
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+            "X-Session-Id": str(session_id)
         }
     )
 
@@ -202,8 +301,7 @@ async def chat_query_stream(
 @router.post("/query", response_model=ChatResponse)
 async def chat_query(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Ask a question to the RAG agent (non-streaming, backward compatible)
@@ -221,52 +319,28 @@ async def chat_query(
     NEW: Now saves all messages to database for chat history
     """
     try:
-        # Step 1: Get or create session
-        session = get_or_create_session(request.session_id, current_user.id, db)
-        
-        # Step 2: Save user message to database
-        user_message = ChatMessage(
-            session_id=session.id,
-            role="user",
-            content=request.question
+        # Steps 1-2: Get or create session, save the user message
+        session_id, thread_id = await run_db(
+            start_chat_turn, request.session_id, current_user.id, request.question
         )
-        db.add(user_message)
-        db.commit()
-        db.refresh(user_message)
         
-        # Step 3: Query the RAG agent using session's thread_id with user context
+        # Step 3: Query the RAG agent using session's thread_id with user context.
+        # The LLM call takes seconds, so it runs on the agent limiter, not the
+        # threadpool that auth and database endpoints share
         rag_agent = get_agent()
-        # Pass user context to agent for role-based filtering
-        result = rag_agent.query(
-            request.question, 
-            session.thread_id,
+        result = await run_agent(
+            rag_agent.query,
+            request.question,
+            thread_id,
             user_role=current_user.role,
             user_institution_id=current_user.institution_id
         )
         
-        # Step 4: Save AI response to database
-        ai_message = ChatMessage(
-            session_id=session.id,
-            role="assistant",
-            content=result["answer"],
-            citations=result.get("citations", []),
-            confidence=int(result.get("confidence", 0) * 100) if result.get("confidence", 0) <= 1 else int(result.get("confidence", 0))  # Handle both 0-1 and 0-100 formats
+        # Steps 4-6: Save AI response, update session timestamp and title
+        message_id = await run_db(
+            finish_chat_turn, session_id, request.question, result["answer"],
+            result.get("citations", []), result.get("confidence", 0)
         )
-        db.add(ai_message)
-        
-        # Step 5: Update session timestamp
-        session.updated_at = datetime.utcnow()
-        
-        # Step 6: Auto-generate title from first user message
-        if session.title == "New Chat":
-            # Get first 50 characters of user message
-            title = request.question[:50]
-            if len(request.question) > 50:
-                title += "..."
-            session.title = title
-        
-        db.commit()
-        db.refresh(ai_message)
         
         # Step 7: Return response with session and message IDs
         return ChatResponse(
@@ -276,8 +350,8 @@ async def chat_query(
             citations=result.get("citations", []),
             confidence=result.get("confidence", 0.0),
             status=result.get("status", "success"),
-            session_id=session.id,
-            message_id=ai_message.id
+            session_id=session_id,
+            message_id=message_id
         )
         
     except HTTPException:
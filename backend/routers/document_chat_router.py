@@ -17,6 +17,7 @@ from backend.database import (
     Notification, get_db
 )
 from backend.routers.auth_router import get_current_user, decode_token
+from backend.utils.db_executor import run_db
 
 load_dotenv()
 
@@ -329,7 +330,7 @@ async def send_message(
 
 
 @router.get("/messages", response_model=List[MessageResponse])
-async def get_messages(
+def get_messages(
     document_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -377,13 +378,8 @@ async def get_messages(
     return response
 
 
-@router.get("/stream")
-async def stream_messages(
-    document_id: int,
-    token: str = Query(..., description="JWT token"),
-    db: Session = Depends(get_db)
-):
-    """SSE endpoint for real-time updates"""
+def _join_stream(db: Session, document_id: int, token: str):
+    """Authenticate the SSE client and mark it active; returns (user_id, user_name)"""
     try:
         payload = decode_token(token)
         user_id = payload.get("sub")
@@ -398,12 +394,6 @@ async def stream_messages(
     
     check_document_access(document_id, current_user, db)
     
-    message_queue = asyncio.Queue()
-    
-    if document_id not in active_connections:
-        active_connections[document_id] = {}
-    active_connections[document_id][current_user.id] = message_queue
-    
     participant = db.query(DocumentChatParticipant).filter(
         and_(
             DocumentChatParticipant.document_id == document_id,
@@ -423,18 +413,49 @@ async def stream_messages(
         db.add(participant)
     
     db.commit()
+    return current_user.id, current_user.name
+
+
+def _leave_stream(db: Session, document_id: int, user_id: int):
+    participant = db.query(DocumentChatParticipant).filter(
+        and_(
+            DocumentChatParticipant.document_id == document_id,
+            DocumentChatParticipant.user_id == user_id
+        )
+    ).first()
+    
+    if participant:
+        participant.is_active = False
+        participant.last_seen = datetime.utcnow()
+        db.commit()
+
+
+@router.get("/stream")
+async def stream_messages(
+    document_id: int,
+    token: str = Query(..., description="JWT token")
+):
+    """SSE endpoint for real-time updates"""
+    # Database work runs in the threadpool; this coroutine lives as long as the stream
+    user_id, user_name = await run_db(_join_stream, document_id, token)
+    
+    message_queue = asyncio.Queue()
+    
+    if document_id not in active_connections:
+        active_connections[document_id] = {}
+    active_connections[document_id][user_id] = message_queue
     
     await broadcast_message(document_id, {
         "type": "participant_joined",
         "data": {
-            "user_id": current_user.id,
-            "user_name": current_user.name
+            "user_id": user_id,
+            "user_name": user_name
         }
     })
     
     async def event_generator():
         try:
-            yield f"data: {json.dumps({'type': 'connected', 'data': {'user_id': current_user.id}})}\n\n"
+            yield f"data: {json.dumps({'type': 'connected', 'data': {'user_id': user_id}})}\n\n"
             
             while True:
                 message = await message_queue.get()
@@ -443,34 +464,20 @@ async def stream_messages(
         except asyncio.CancelledError:
             pass
         finally:
-            if document_id in active_connections and current_user.id in active_connections[document_id]:
-                del active_connections[document_id][current_user.id]
+            if document_id in active_connections and user_id in active_connections[document_id]:
+                del active_connections[document_id][user_id]
                 if not active_connections[document_id]:
                     del active_connections[document_id]
             
-            db_session = next(get_db())
-            try:
-                participant = db_session.query(DocumentChatParticipant).filter(
-                    and_(
-                        DocumentChatParticipant.document_id == document_id,
-                        DocumentChatParticipant.user_id == current_user.id
-                    )
-                ).first()
-                
-                if participant:
-                    participant.is_active = False
-                    participant.last_seen = datetime.utcnow()
-                    db_session.commit()
-                
-                await broadcast_message(document_id, {
-                    "type": "participant_left",
-                    "data": {
-                        "user_id": current_user.id,
-                        "user_name": current_user.name
-                    }
-                })
-            finally:
-                db_session.close()
+            await run_db(_leave_stream, document_id, user_id)
+            
+            await broadcast_message(document_id, {
+                "type": "participant_left",
+                "data": {
+                    "user_id": user_id,
+                    "user_name": user_name
+                }
+            })
     
     return StreamingResponse(
         event_generator(),
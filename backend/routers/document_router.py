@@ -1,19 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks, Body
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks, Body, Request
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List,Optional
 from pydantic import BaseModel
 import os
-import shutil
 import re
 import glob
 from sqlalchemy import or_,and_
+from sqlalchemy.orm import undefer
 from datetime import datetime
 from backend.routers.auth_router import get_current_user
-from backend.database import get_db, Document, DocumentMetadata, User, AuditLog, Institution
+from backend.database import get_db, SessionLocal, Document, DocumentMetadata, User, AuditLog, Institution
+from backend.utils.access_scope import (
+    SCOPE_PUBLIC, apply_dashboard_access, institution_scope, member_scope, scope_filter, staff_scope
+)
+from backend.utils.document_text import iter_document_text
+from backend.utils.download_proxy import DOWNLOAD_HEADERS, is_first_request, proxy_download
 from backend.utils.text_extractor import extract_text
-from backend.utils.supabase_storage import upload_to_supabase
+from backend.utils.supabase_storage import stream_upload_to_supabase
 from Agent.metadata.extractor import MetadataExtractor
+from Agent.lazy_rag.embedding_queue import enqueue_embedding, sync_document_embeddings, PRIORITY_UPLOAD
 
 router = APIRouter(tags=["documents"])
 
@@ -54,6 +61,97 @@ def sanitize_filename(filename: str) -> str:
     return f"{safe_name}{ext}"
 
 
+def upload_size(file: UploadFile) -> int:
+    """Size of an uploaded file in bytes (file position is left at the start)"""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def can_access_document(doc: Document, current_user: User) -> bool:
+    """Check if current user can access this document - Respects institutional autonomy"""
+    visibility = doc.visibility_level
+    user_role = current_user.role
+    user_institution = current_user.institution_id
+    doc_institution = doc.institution_id
+    is_uploader = doc.uploader_id == current_user.id
+    approval_status = doc.approval_status
+    
+    # Developer: Full access
+    if user_role == "developer":
+        return True
+    
+    # Public documents: Everyone can access
+    if visibility == "public":
+        return True
+    
+    # Uploader: Always has access to their own documents
+    if is_uploader:
+        return True
+    
+    # MOE Admin: Institutional autonomy rules
+    if user_role == "ministry_admin":
+        # Can access if:
+        # a) Document is pending approval (university requesting MOE review)
+        if approval_status == "pending":
+            return True
+        # b) Document is from MOE's own institution
+        if user_institution and user_institution == doc_institution:
+            return True
+        # c) Document is public (already handled above)
+        # Otherwise, NO ACCESS to university documents
+        return False
+    
+    # Confidential documents
+    if visibility == "confidential":
+        # Only: Developer, University Admin (same institution), Uploader
+        if user_role == "university_admin" and user_institution == doc_institution:
+            return True
+        return False
+    
+    # Restricted documents
+    if visibility == "restricted":
+        # Only: Developer, University Admin (same inst), Document Officer (same inst)
+        if user_role in ["university_admin", "document_officer"] and user_institution == doc_institution:
+            return True
+        return False
+    
+    # Institution-only documents
+    if visibility == "institution_only":
+        # Only: Developer, University Admin (same inst), Document Officer (same inst), Students (same inst)
+        if user_role in ["university_admin", "document_officer", "student"] and user_institution == doc_institution:
+            return True
+        return False
+    
+    return False
+
+
+def ensure_document_access(doc: Document, current_user: User) -> None:
+    """Raise 403 (with a visibility-specific message) if the user cannot access doc"""
+    if not can_access_document(doc, current_user):
+        visibility = doc.visibility_level
+        # Return appropriate error message based on visibility level
+        if visibility == "confidential":
+            raise HTTPException(
+                status_code=403,
+                detail="Access Denied — This document requires elevated clearance."
+            )
+        elif visibility == "restricted":
+            raise HTTPException(
+                status_code=403,
+                detail="This document has limited access permissions."
+            )
+        elif visibility == "institution_only":
+            raise HTTPException(
+                status_code=403,
+                detail="Access restricted to institution members."
+            )
+        else:
+            raise HTTPException(status_code=403, detail="Access denied")
+
 
 def process_ocr_background(document_id: int, file_path: str, file_ext: str, db_session):
     """
@@ -121,7 +219,7 @@ def process_ocr_background(document_id: int, file_path: str, file_ext: str, db_s
         # Convert all numpy types to Python types
         ocr_result = OCRResult(
             document_id=document_id,
-            engine_used='easyocr',
+            engine_used=ocr_metadata.get('engine', 'easyocr'),
             confidence_score=float(ocr_metadata.get('confidence')) if ocr_metadata.get('confidence') is not None else None,
             extraction_time=float(ocr_metadata.get('extraction_time')) if ocr_metadata.get('extraction_time') is not None else None,
             language_detected=ocr_metadata.get('language_detected'),
@@ -157,6 +255,57 @@ def process_ocr_background(document_id: int, file_path: str, file_ext: str, db_s
         db_session.close()
 
 
+def process_upload_background(document_id: int, file_path: str, file_ext: str, filename: str):
+    """
+    Background task: text extraction moved out of the upload request
+    Runs as a FastAPI BackgroundTask in this API process, after the response is sent.
+    Quick extraction (no OCR) first; scanned documents then go through OCR,
+    and the final text is handed to AI metadata extraction.
+    """
+    from backend.utils.text_extractor import extract_text_enhanced
+    
+    db_session = SessionLocal()
+    try:
+        extraction_result = extract_text_enhanced(file_path, file_ext, use_ocr=False)
+        extracted_text = extraction_result['text'] or ""
+        is_scanned = extraction_result['is_scanned']
+        
+        doc = db_session.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            print(f"Document {document_id} not found")
+            db_session.close()
+            return
+        
+        doc.extracted_text = extracted_text
+        doc.is_scanned = is_scanned
+        doc.ocr_status = 'processing' if is_scanned else None
+        db_session.query(DocumentMetadata).filter(
+            DocumentMetadata.document_id == document_id
+        ).update({"text_length": len(extracted_text)})
+        db_session.commit()
+    except Exception as e:
+        print(f"Error extracting text for doc {document_id}: {str(e)}")
+        db_session.rollback()
+        
+        # Don't leave the upload 'pending' forever
+        try:
+            db_session.query(Document).filter(Document.id == document_id).update({"ocr_status": "failed"})
+            db_session.commit()
+        except:
+            pass
+        db_session.close()
+        return
+    
+    if is_scanned:
+        process_ocr_background(document_id, file_path, file_ext, SessionLocal())
+        db_session.expire_all()
+        doc = db_session.query(Document).filter(Document.id == document_id).first()
+        extracted_text = (doc.extracted_text or "") if doc else extracted_text
+    
+    # Closes db_session
+    extract_metadata_background(document_id, extracted_text, filename, db_session)
+
+
 def extract_metadata_background(document_id: int, text: str, filename: str, db_session):
     """
     Background task: SMART FILL Logic.
@@ -215,6 +364,85 @@ def extract_metadata_background(document_id: int, text: str, filename: str, db_s
         db_session.close()
 
 
+def create_upload_records(
+    db: Session,
+    current_user: User,
+    filename: str,
+    file_ext: str,
+    file_path: str,
+    s3_url: str,
+    content_hash: str,
+    title: Optional[str],
+    category: Optional[str],
+    department: Optional[str],
+    description: Optional[str],
+    visibility: Optional[str],
+    institution: Optional[str],
+    year: Optional[str],
+    version: Optional[str],
+    download_allowed: bool
+) -> int:
+    """Insert the Document and DocumentMetadata rows for an upload (blocking; run in the threadpool)"""
+    # 4. Handle Institution
+    final_inst_id = current_user.institution_id
+    if institution and institution.strip() and institution != "null":
+         try: final_inst_id = int(institution)
+         except ValueError: pass 
+    
+    # 5. Create Document
+    # MoE Admin and Developer don't need approval - their uploads are auto-approved
+    initial_status = "approved" if current_user.role in ["ministry_admin", "developer"] else "draft"
+    
+    doc = Document(
+        filename=filename,
+        file_type=file_ext,
+        file_path=file_path,
+        s3_url=s3_url,
+        content_hash=content_hash,
+        extracted_text="",  # Filled in by process_upload_background
+        uploader_id=current_user.id,
+        institution_id=final_inst_id,
+        visibility_level=visibility or "public",
+        approval_status=initial_status,  # MoE/Developer: approved, Others: draft
+        download_allowed=download_allowed,
+        version=version,
+        user_description=description,
+        approved_by=current_user.id if current_user.role in ["ministry_admin", "developer"] else None,
+        approved_at=datetime.utcnow() if current_user.role in ["ministry_admin", "developer"] else None,
+        ocr_status='pending',  # Set once process_upload_background has extracted the text
+        ocr_confidence=None  # Will be set after OCR completes
+    )
+    db.add(doc)
+    db.commit()
+    db.refresh(doc)
+
+    # 6. Create Metadata
+    pub_date = None
+    if year and year.isdigit():
+        try: pub_date = datetime(int(year), 1, 1)
+        except: pass
+
+    doc_metadata = DocumentMetadata(
+        document_id=doc.id,
+        title=title if title and title.strip() else filename,
+        department=department if department else "General",
+        document_type=category if category else "Uncategorized",
+        summary=None,
+        date_published=pub_date,
+        text_length=0,
+        embedding_status='uploaded',
+        metadata_status='processing'
+    )
+    db.add(doc_metadata)
+    db.commit()
+    
+    # 6a. Queue embedding for searchable uploads (drafts are queued when submitted or approved)
+    if initial_status == "approved":
+        enqueue_embedding(doc.id, priority=PRIORITY_UPLOAD, source="upload")
+    
+    return doc.id
+
+
 @router.post("/upload")
 async def upload_documents(
     file: UploadFile = File(...),
@@ -239,108 +467,43 @@ async def upload_documents(
         if file_ext not in ["pdf", "docx", "pptx", "jpeg", "jpg", "png", "txt"]:
             raise ValueError(f"Unsupported file type: {file_ext}")
         
-        # 2. Save file locally
+        # 2. Storage name (also used for the local copy)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_filename = sanitize_filename(file.filename)
         unique_filename = f"{timestamp}_{safe_filename}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 3. Upload to Supabase first (fast)
-        s3_url = upload_to_supabase(file_path, unique_filename)
-        
-        # 3b. Quick text extraction (without OCR for now - will be done in background)
-        from backend.utils.text_extractor import extract_text_enhanced
-        extraction_result = extract_text_enhanced(file_path, file_ext, use_ocr=False)
-        extracted_text = extraction_result['text']
-        is_scanned = extraction_result['is_scanned']
-        
-        # 4. Handle Institution
-        final_inst_id = current_user.institution_id
-        if institution and institution.strip() and institution != "null":
-             try: final_inst_id = int(institution)
-             except ValueError: pass 
-        
-        # 5. Create Document
-        # MoE Admin and Developer don't need approval - their uploads are auto-approved
-        initial_status = "approved" if current_user.role in ["ministry_admin", "developer"] else "draft"
-        
-        # Set OCR status to 'processing' if document is scanned
-        ocr_status = 'processing' if is_scanned else None
-        
-        doc = Document(
-            filename=file.filename,
-            file_type=file_ext,
-            file_path=file_path,
-            s3_url=s3_url,
-            extracted_text=extracted_text if extracted_text else "",  # Empty for scanned docs initially
-            uploader_id=current_user.id,
-            institution_id=final_inst_id,
-            visibility_level=visibility or "public",
-            approval_status=initial_status,  # MoE/Developer: approved, Others: draft
-            download_allowed=download_allowed,
-            version=version,
-            user_description=description,
-            approved_by=current_user.id if current_user.role in ["ministry_admin", "developer"] else None,
-            approved_at=datetime.utcnow() if current_user.role in ["ministry_admin", "developer"] else None,
-            is_scanned=is_scanned,
-            ocr_status=ocr_status,
-            ocr_confidence=None  # Will be set after OCR completes
+        # 3. Stream to Supabase (resumable chunks for large files) while writing the
+        # local copy and hashing the content in the same pass, off the event loop
+        s3_url, content_hash = await run_in_threadpool(
+            stream_upload_to_supabase, file.file, unique_filename, upload_size(file), file_path
         )
-        db.add(doc)
-        db.commit()
-        db.refresh(doc)
-
-        # 6. Create Metadata
-        pub_date = None
-        if year and year.isdigit():
-            try: pub_date = datetime(int(year), 1, 1)
-            except: pass
-
-        doc_metadata = DocumentMetadata(
-            document_id=doc.id,
-            title=title if title and title.strip() else file.filename,
-            department=department if department else "General",
-            document_type=category if category else "Uncategorized",
-            summary=None,
-            date_published=pub_date,
-            text_length=len(extracted_text),
-            embedding_status='uploaded',
-            metadata_status='processing'
+        
+        # 4-6. Create the Document and Metadata rows off the event loop
+        document_id = await run_in_threadpool(
+            create_upload_records, db, current_user, file.filename, file_ext, file_path,
+            s3_url, content_hash, title, category, department, description,
+            visibility, institution, year, version, download_allowed
         )
-        db.add(doc_metadata)
-        db.commit()
         
-        # 6b. Schedule OCR processing in background if document is scanned
-        if is_scanned and background_tasks:
-            from backend.database import SessionLocal
-            bg_db_ocr = SessionLocal()
-            background_tasks.add_task(process_ocr_background, doc.id, file_path, file_ext, bg_db_ocr)
-
-        # 7. Background Task: Extract metadata (which will then trigger embedding)
+        # 7. Background Task: Extract text (then OCR if scanned, then metadata)
         if background_tasks:
-            from backend.database import SessionLocal
-            bg_db = SessionLocal()
-            background_tasks.add_task(extract_metadata_background, doc.id, extracted_text, file.filename, bg_db)
+            background_tasks.add_task(process_upload_background, document_id, file_path, file_ext, file.filename)
         
         # ✅ SUCCESS: Append structured result
         result_data = {
             "filename": file.filename,
             "status": "success",
-            "document_id": doc.id,
+            "document_id": document_id,
+            "content_hash": content_hash,
             "metadata_status": "processing",
+            # Not known until the background extraction has run; poll the document for the result
+            "is_scanned": None,
+            "ocr_status": "pending",
             # Determine source: if user typed something, it's user provided. Else AI.
             "metadata_source": "user_provided" if (title or description) else "ai_extraction"
         }
         
-        # Add OCR information if document was scanned
-        if is_scanned:
-            result_data["is_scanned"] = True
-            result_data["ocr_status"] = "processing"  # OCR is running in background
-            result_data["ocr_message"] = "OCR processing started in background. Results will be available shortly."
-        
         results.append(result_data)
         
     except Exception as e:
@@ -363,7 +526,7 @@ async def upload_documents(
 
 @router.get("/list")
 @cache(expire=30)  # Cache for 30 seconds (adjust based on your needs)
-async def list_documents(
+def list_documents(
     category: Optional[str] = None,
     search: Optional[str] = None,
     sort_by: Optional[str] = "recent",
@@ -393,6 +556,11 @@ async def list_documents(
     # 🔒 ROLE-BASED VISIBILITY LOGIC (Security through Obscurity + Access Control)
     # ==================================================================
     
+    # Visibility is an overlap test on the GIN-indexed access_scopes column
+    # (scope tokens: backend/utils/access_scope.py), OR-ed with ownership
+    user_inst = current_user.institution_id
+    own_uploads = Document.uploader_id == current_user.id
+
     # 1. DEVELOPER: Full access to everything
     if current_user.role == "developer":
         pass  # No filters - sees all documents
@@ -404,68 +572,26 @@ async def list_documents(
         # b) Documents pending approval (requires_moe_approval)
         # c) Documents from MOE institution (if MOE has an institution_id)
         # d) Documents they uploaded
-        query = query.filter(
-            or_(
-                # Public documents
-                Document.visibility_level == "public",
-                # Documents pending approval (universities requesting MOE approval)
-                Document.approval_status == "pending",
-                # Documents from MOE's own institution (if applicable)
-                Document.institution_id == current_user.institution_id,
-                # Documents uploaded by this MOE admin
-                Document.uploader_id == current_user.id
-            )
-        )
+        query = apply_dashboard_access(query, current_user.role, user_inst, current_user.id)
 
     # 3. UNIVERSITY ADMIN: Sees docs from their institution + public
     elif current_user.role == "university_admin":
-        query = query.filter(
-            or_(
-                # Public documents (everyone can see)
-                Document.visibility_level == "public",
-                # Confidential, Restricted, Institution-only from THEIR institution
-                and_(
-                    Document.visibility_level.in_(["confidential", "restricted", "institution_only"]),
-                    Document.institution_id == current_user.institution_id
-                ),
-                # OR documents they uploaded (ownership)
-                Document.uploader_id == current_user.id
-            )
-        )
+        scopes = [SCOPE_PUBLIC] + ([institution_scope(user_inst)] if user_inst is not None else [])
+        query = query.filter(or_(scope_filter(Document.access_scopes, scopes), own_uploads))
 
     # 4. DOCUMENT OFFICER: Sees restricted/institution docs from their institution + public
     elif current_user.role == "document_officer":
-        query = query.filter(
-            or_(
-                # Public documents
-                Document.visibility_level == "public",
-                # Restricted and Institution-only from THEIR institution
-                and_(
-                    Document.visibility_level.in_(["restricted", "institution_only"]),
-                    Document.institution_id == current_user.institution_id
-                ),
-                # OR documents they uploaded
-                Document.uploader_id == current_user.id
-            )
-        )
+        scopes = [SCOPE_PUBLIC] + ([staff_scope(user_inst)] if user_inst is not None else [])
+        query = query.filter(or_(scope_filter(Document.access_scopes, scopes), own_uploads))
 
     # 5. STUDENT: Sees public + institution-only from their institution
     elif current_user.role == "student":
-        visible_conditions = [Document.visibility_level == "public"]
-        
-        if current_user.institution_id:
-            visible_conditions.append(
-                and_(
-                    Document.visibility_level == "institution_only",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        query = query.filter(or_(*visible_conditions))
+        scopes = [SCOPE_PUBLIC] + ([member_scope(user_inst)] if user_inst else [])
+        query = query.filter(scope_filter(Document.access_scopes, scopes))
 
     # 6. PUBLIC VIEWER / OTHERS: Only public documents
     else:
-        query = query.filter(Document.visibility_level == "public")
+        query = query.filter(scope_filter(Document.access_scopes, [SCOPE_PUBLIC]))
 
     # ==================================================================
     # ✅ APPROVAL STATUS FILTER
@@ -649,7 +775,7 @@ async def get_vector_stats():
         }
 
 @router.get("/vector-stats/{document_id}")
-async def get_document_vector_stats(document_id: int, db: Session = Depends(get_db)):
+def get_document_vector_stats(document_id: int, db: Session = Depends(get_db)):
     """Get vector store statistics for a specific document using pgvector"""
     try:
         from Agent.vector_store.pgvector_store import PGVectorStore
@@ -686,7 +812,7 @@ async def get_document_vector_stats(document_id: int, db: Session = Depends(get_
         }
 
 @router.get("/{document_id}")
-async def get_document(
+def get_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -702,87 +828,8 @@ async def get_document(
     
     doc, meta, inst = result
     
-    # ==================================================================
     # 🔒 ACCESS CONTROL CHECK
-    # ==================================================================
-    def check_access():
-        """Check if current user can access this document - Respects institutional autonomy"""
-        visibility = doc.visibility_level
-        user_role = current_user.role
-        user_institution = current_user.institution_id
-        doc_institution = doc.institution_id
-        is_uploader = doc.uploader_id == current_user.id
-        approval_status = doc.approval_status
-        
-        # Developer: Full access
-        if user_role == "developer":
-            return True
-        
-        # Public documents: Everyone can access
-        if visibility == "public":
-            return True
-        
-        # Uploader: Always has access to their own documents
-        if is_uploader:
-            return True
-        
-        # MOE Admin: Institutional autonomy rules
-        if user_role == "ministry_admin":
-            # Can access if:
-            # a) Document is pending approval (university requesting MOE review)
-            if approval_status == "pending":
-                return True
-            # b) Document is from MOE's own institution
-            if user_institution and user_institution == doc_institution:
-                return True
-            # c) Document is public (already handled above)
-            # Otherwise, NO ACCESS to university documents
-            return False
-        
-        # Confidential documents
-        if visibility == "confidential":
-            # Only: Developer, University Admin (same institution), Uploader
-            if user_role == "university_admin" and user_institution == doc_institution:
-                return True
-            return False
-        
-        # Restricted documents
-        if visibility == "restricted":
-            # Only: Developer, University Admin (same inst), Document Officer (same inst)
-            if user_role in ["university_admin", "document_officer"] and user_institution == doc_institution:
-                return True
-            return False
-        
-        # Institution-only documents
-        if visibility == "institution_only":
-            # Only: Developer, University Admin (same inst), Document Officer (same inst), Students (same inst)
-            if user_role in ["university_admin", "document_officer", "student"] and user_institution == doc_institution:
-                return True
-            return False
-        
-        return False
-    
-    # Check access
-    if not check_access():
-        visibility = doc.visibility_level
-        # Return appropriate error message based on visibility level
-        if visibility == "confidential":
-            raise HTTPException(
-                status_code=403,
-                detail="Access Denied — This document requires elevated clearance."
-            )
-        elif visibility == "restricted":
-            raise HTTPException(
-                status_code=403,
-                detail="This document has limited access permissions."
-            )
-        elif visibility == "institution_only":
-            raise HTTPException(
-                status_code=403,
-                detail="Access restricted to institution members."
-            )
-        else:
-            raise HTTPException(status_code=403, detail="Access denied")
+    ensure_document_access(doc, current_user)
     
     # Get uploader info
     uploader = db.query(User).filter(User.id == doc.uploader_id).first()
@@ -815,8 +862,31 @@ async def get_document(
         "uploader": {"id": uploader.id, "name": uploader.name, "role": uploader.role} if uploader else None
     }
 
+@router.get("/{document_id}/text")
+def get_document_text(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a document's extracted text (plain text, sent in slices)"""
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    ensure_document_access(doc, current_user)
+    
+    def stream_text():
+        # Own session: the request session is closed once the response starts
+        text_db = SessionLocal()
+        try:
+            yield from iter_document_text(text_db, document_id)
+        finally:
+            text_db.close()
+    
+    return StreamingResponse(stream_text(), media_type="text/plain; charset=utf-8")
+
 @router.get("/{document_id}/status")
-async def get_document_status(document_id: int, db: Session = Depends(get_db)):
+def get_document_status(document_id: int, db: Session = Depends(get_db)):
     """Get document processing status"""
     doc = db.query(Document).filter(Document.id == document_id).first()
     if not doc:
@@ -846,7 +916,7 @@ async def get_document_status(document_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/browse/metadata")
-async def browse_documents(
+def browse_documents(
     department: str = None,
     document_type: str = None,
     year: int = None,
@@ -894,73 +964,19 @@ async def browse_documents(
         "documents": documents
     }
 
-# ✅ NEW: Add download endpoint
-@router.get("/{document_id}/download")
-async def download_document(
-    document_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Download a document (if allowed)"""
+def authorize_download(db: Session, document_id: int, current_user: User, log_download: bool) -> dict:
+    """
+    Access checks and audit logging for a download (blocking; run in the threadpool)
+
+    Returns the fields the response needs as plain values, so nothing lazy-loads
+    from the session on the event loop afterwards.
+    """
     doc = db.query(Document).filter(Document.id == document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # ==================================================================
     # 🔒 ACCESS CONTROL CHECK (Same as get_document)
-    # ==================================================================
-    def check_access():
-        """Check if current user can access this document - Respects institutional autonomy"""
-        visibility = doc.visibility_level
-        user_role = current_user.role
-        user_institution = current_user.institution_id
-        doc_institution = doc.institution_id
-        is_uploader = doc.uploader_id == current_user.id
-        approval_status = doc.approval_status
-        
-        if user_role == "developer":
-            return True
-        if visibility == "public":
-            return True
-        if is_uploader:
-            return True
-        
-        # MOE Admin: Institutional autonomy
-        if user_role == "ministry_admin":
-            if approval_status == "pending":
-                return True
-            if user_institution and user_institution == doc_institution:
-                return True
-            return False
-        
-        if visibility == "confidential":
-            if user_role == "university_admin" and user_institution == doc_institution:
-                return True
-            return False
-        
-        if visibility == "restricted":
-            if user_role in ["university_admin", "document_officer"] and user_institution == doc_institution:
-                return True
-            return False
-        
-        if visibility == "institution_only":
-            if user_role in ["university_admin", "document_officer", "student"] and user_institution == doc_institution:
-                return True
-            return False
-        
-        return False
-    
-    # Check access first
-    if not check_access():
-        visibility = doc.visibility_level
-        if visibility == "confidential":
-            raise HTTPException(status_code=403, detail="Access Denied — This document requires elevated clearance.")
-        elif visibility == "restricted":
-            raise HTTPException(status_code=403, detail="This document has limited access permissions.")
-        elif visibility == "institution_only":
-            raise HTTPException(status_code=403, detail="Access restricted to institution members.")
-        else:
-            raise HTTPException(status_code=403, detail="Access denied")
+    ensure_document_access(doc, current_user)
     
     # 1. Security Check: Is download allowed?
     if not doc.download_allowed:
@@ -968,92 +984,78 @@ async def download_document(
         if current_user.role not in ["developer", "ministry_admin"] and current_user.id != doc.uploader_id:
              raise HTTPException(status_code=403, detail="Download not allowed for this document")
     
-    # 2. Check if file is stored in S3/Supabase or locally
-    if doc.s3_url:
-        # File is stored in Supabase Storage - stream it with proper headers
-        import httpx
-        import mimetypes
-        from fastapi.responses import StreamingResponse
+    info = {"filename": doc.filename, "s3_url": doc.s3_url, "file_path": doc.file_path}
+    
+    # 2. Local files must exist before the download is logged
+    if not doc.s3_url:
+        if not doc.file_path:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"No file path or S3 URL set for document {document_id}. Document may not have been uploaded correctly."
+            )
         
-        try:
-            # Download file from S3
-            async with httpx.AsyncClient() as client:
-                response = await client.get(doc.s3_url)
-                response.raise_for_status()
-                
-                # Determine MIME type
-                mime_type, _ = mimetypes.guess_type(doc.filename)
-                if not mime_type:
-                    mime_type = "application/octet-stream"
-                
-                # Log the Download (Audit Trail)
-                audit = AuditLog(
-                    user_id=current_user.id,
-                    action="document_downloaded",
-                    action_metadata={
-                        "document_id": document_id,
-                        "filename": doc.filename,
-                        "user_role": current_user.role,
-                        "storage": "supabase"
-                    }
-                )
-                db.add(audit)
-                db.commit()
-                
-                # Stream the file with proper headers
-                return StreamingResponse(
-                    iter([response.content]),
-                    media_type=mime_type,
-                    headers={
-                        "Content-Disposition": f'attachment; filename="{doc.filename}"'
-                    }
-                )
-                
-        except Exception as e:
+        if not os.path.exists(doc.file_path):
             raise HTTPException(
-                status_code=500,
-                detail=f"Failed to download file from Supabase: {str(e)}"
+                status_code=404, 
+                detail=f"File not found at path: {doc.file_path}. The file may have been moved or deleted."
             )
     
-    # 3. File stored locally - check existence
-    if not doc.file_path:
-        raise HTTPException(
-            status_code=404, 
-            detail=f"No file path or S3 URL set for document {document_id}. Document may not have been uploaded correctly."
+    # 3. Log the Download (Audit Trail) - once per download, not per byte range
+    if log_download:
+        audit = AuditLog(
+            user_id=current_user.id,
+            action="document_downloaded",
+            action_metadata={
+                "document_id": document_id,
+                "filename": doc.filename,
+                "user_role": current_user.role,
+                "storage": "supabase" if doc.s3_url else "local"
+            }
         )
+        db.add(audit)
+        db.commit()
     
-    if not os.path.exists(doc.file_path):
-        raise HTTPException(
-            status_code=404, 
-            detail=f"File not found at path: {doc.file_path}. The file may have been moved or deleted."
-        )
+    return info
+
+
+# ✅ NEW: Add download endpoint
+@router.get("/{document_id}/download")
+async def download_document(
+    document_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download a document (if allowed)"""
+    import mimetypes
     
-    # 4. Log the Download (Audit Trail)
-    audit = AuditLog(
-        user_id=current_user.id,
-        action="document_downloaded",
-        action_metadata={
-            "document_id": document_id,
-            "filename": doc.filename,
-            "user_role": current_user.role,
-            "storage": "local"
-        }
+    info = await run_in_threadpool(
+        authorize_download, db, document_id, current_user, is_first_request(request)
     )
-    db.add(audit)
-    db.commit()
     
-    # 5. Serve the File with correct MIME type
-    import mimetypes
-    mime_type, _ = mimetypes.guess_type(doc.filename)
-    
-    # Default to octet-stream if type cannot be determined
+    # Determine MIME type (default to octet-stream if type cannot be determined)
+    mime_type, _ = mimetypes.guess_type(info["filename"])
     if not mime_type:
         mime_type = "application/octet-stream"
     
+    # File is stored in Supabase Storage - stream it through with proper headers
+    if info["s3_url"]:
+        try:
+            return await proxy_download(request, info["s3_url"], info["filename"], mime_type)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to download file from Supabase: {str(e)}"
+            )
+    
+    # File stored locally: FileResponse answers Range and If-None-Match requests itself
     return FileResponse(
-        path=doc.file_path,
-        filename=doc.filename,
-        media_type=mime_type
+        path=info["file_path"],
+        filename=info["filename"],
+        media_type=mime_type,
+        headers=DOWNLOAD_HEADERS
     )
 
 @router.post("/embed")
@@ -1065,8 +1067,8 @@ async def embed_documents(
     """Manually trigger embedding for specific documents"""
     from Agent.lazy_rag.lazy_embedder import LazyEmbedder
     
-    # Validate documents exist
-    docs = db.query(Document).filter(Document.id.in_(doc_ids)).all()
+    # Validate documents exist (body text is needed for every one of them)
+    docs = db.query(Document).options(undefer(Document.extracted_text)).filter(Document.id.in_(doc_ids)).all()
     if len(docs) != len(doc_ids):
         raise HTTPException(status_code=404, detail="One or more documents not found")
     
@@ -1132,6 +1134,9 @@ async def submit_document_for_review(
     doc.escalated_at = datetime.utcnow()
     db.commit()
     
+    # Pending documents are searchable
+    sync_document_embeddings(doc, source="approval")
+    
     # Create notification for Ministry Admin of the parent ministry
     from backend.database import Notification
     
@@ -1368,7 +1373,7 @@ async def request_changes(
 
 
 @router.get("/approvals/pending")
-async def get_pending_approvals(
+def get_pending_approvals(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
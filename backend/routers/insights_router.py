@@ -1,7 +1,7 @@
 """Insights router for document analytics and intelligence"""
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, extract
+from sqlalchemy import func, desc, and_, extract, case
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from collections import Counter
@@ -9,19 +9,36 @@ import json
 
 from backend.database import (
     get_db, 
-    Document, 
-    DocumentMetadata, 
     AuditLog, 
     User,
-    Institution
+    Institution,
+    InsightsDailyRollup,
+    InsightsKeywordRollup
 )
 from backend.routers.auth_router import get_current_user
+from backend.utils.access_scope import apply_dashboard_access
 
 router = APIRouter(prefix="/insights", tags=["insights"])
 
 
+def _daily_rollup(db: Session, current_user: User, *columns):
+    """Query over the document rollup, restricted to what the user's dashboard may count"""
+    return apply_dashboard_access(
+        db.query(*columns), current_user.role, current_user.institution_id, current_user.id,
+        model=InsightsDailyRollup
+    )
+
+
+def _keyword_rollup(db: Session, current_user: User, *columns):
+    """Query over the keyword rollup, restricted like _daily_rollup"""
+    return apply_dashboard_access(
+        db.query(*columns), current_user.role, current_user.institution_id, current_user.id,
+        model=InsightsKeywordRollup
+    )
+
+
 @router.get("/document-stats")
-async def get_document_stats(
+def get_document_stats(
     category: Optional[str] = None,
     department: Optional[str] = None,
     date_from: Optional[str] = None,
@@ -41,167 +58,85 @@ async def get_document_stats(
     - Upload trends over time
     """
     try:
-        # Base query with role-based filtering
-        query = db.query(Document)
-        
-        # Apply role-based access control (respects institutional autonomy)
-        if current_user.role == "developer":
-            # Developer: Full access to all documents
-            pass  # No filters
-        
-        elif current_user.role == "ministry_admin":
-            # MoE Admin: LIMITED access (respects institutional autonomy)
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.approval_status == "pending",
-                    Document.institution_id == current_user.institution_id,
-                    Document.uploader_id == current_user.id
-                )
-            )
-        
-        elif current_user.role == "university_admin":
-            # University Admin: Public + their institution
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "document_officer":
-            # Document Officer: Public + their institution
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "student":
-            # Student: Approved public + their institution's approved institution_only
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    or_(
-                        Document.visibility_level == "public",
-                        and_(
-                            Document.visibility_level == "institution_only",
-                            Document.institution_id == current_user.institution_id
-                        )
-                    )
-                )
-            )
-        
-        elif current_user.role == "public_viewer":
-            # Public Viewer: Only approved public documents
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    Document.visibility_level == "public"
-                )
-            )
-        
-        # Apply filters
+        # Filters on the role-scoped rollup
+        filters = []
         if category:
-            query = query.join(DocumentMetadata).filter(
-                DocumentMetadata.document_type == category
-            )
+            filters.append(InsightsDailyRollup.document_type == category)
         
         if department:
-            query = query.join(DocumentMetadata).filter(
-                DocumentMetadata.department == department
-            )
+            filters.append(InsightsDailyRollup.department == department)
         
         if date_from:
             date_from_obj = datetime.fromisoformat(date_from)
-            query = query.filter(Document.uploaded_at >= date_from_obj)
+            filters.append(InsightsDailyRollup.day >= date_from_obj.date())
         
         if date_to:
             date_to_obj = datetime.fromisoformat(date_to)
-            query = query.filter(Document.uploaded_at <= date_to_obj)
-        
-        # Total documents
-        total_documents = query.count()
-        
-        # Documents by category (document_type)
-        category_stats = db.query(
-            DocumentMetadata.document_type,
-            func.count(Document.id).label('count')
-        ).join(Document).filter(
-            Document.id.in_([d.id for d in query.all()])
-        ).group_by(DocumentMetadata.document_type).all()
-        
-        documents_by_category = {
-            cat or "Uncategorized": count 
-            for cat, count in category_stats
-        }
-        
-        # Documents by department
-        department_stats = db.query(
-            DocumentMetadata.department,
-            func.count(Document.id).label('count')
-        ).join(Document).filter(
-            Document.id.in_([d.id for d in query.all()])
-        ).group_by(DocumentMetadata.department).all()
-        
-        documents_by_department = {
-            dept or "Unknown": count 
-            for dept, count in department_stats
-        }
-        
-        # Documents by approval status
-        status_stats = query.with_entities(
-            Document.approval_status,
-            func.count(Document.id).label('count')
-        ).group_by(Document.approval_status).all()
-        
-        documents_by_status = {
-            status: count 
-            for status, count in status_stats
-        }
-        
-        # Documents by visibility level
-        visibility_stats = query.with_entities(
-            Document.visibility_level,
-            func.count(Document.id).label('count')
-        ).group_by(Document.visibility_level).all()
+            filters.append(InsightsDailyRollup.day <= date_to_obj.date())
+        
+        # One pass over the rollup cells gives every breakdown
+        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).date()
+        cells = _daily_rollup(
+            db, current_user,
+            InsightsDailyRollup.document_type,
+            InsightsDailyRollup.department,
+            InsightsDailyRollup.approval_status,
+            InsightsDailyRollup.visibility_level,
+            func.sum(InsightsDailyRollup.document_count),
+            func.sum(InsightsDailyRollup.metadata_count),
+            func.sum(case(
+                (InsightsDailyRollup.day >= seven_days_ago, InsightsDailyRollup.document_count),
+                else_=0
+            ))
+        ).filter(*filters).group_by(
+            InsightsDailyRollup.document_type,
+            InsightsDailyRollup.department,
+            InsightsDailyRollup.approval_status,
+            InsightsDailyRollup.visibility_level
+        ).all()
         
-        documents_by_visibility = {
-            visibility: count 
-            for visibility, count in visibility_stats
-        }
+        total_documents = 0
+        recent_uploads = 0
+        documents_by_category = Counter()
+        documents_by_department = Counter()
+        documents_by_status = Counter()
+        documents_by_visibility = Counter()
+        
+        for cat, dept, status, visibility, doc_count, meta_count, recent_count in cells:
+            total_documents += doc_count
+            recent_uploads += recent_count
+            documents_by_status[status] += doc_count
+            documents_by_visibility[visibility] += doc_count
+            # Category/department come from metadata; documents without it are not counted
+            if meta_count:
+                documents_by_category[cat or "Uncategorized"] += meta_count
+                documents_by_department[dept or "Unknown"] += meta_count
         
         # Upload trends (last 30 days, grouped by day)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        upload_trends = db.query(
-            func.date(Document.uploaded_at).label('date'),
-            func.count(Document.id).label('count')
+        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date()
+        upload_trends = _daily_rollup(
+            db, current_user,
+            InsightsDailyRollup.day,
+            func.sum(InsightsDailyRollup.document_count)
         ).filter(
-            Document.uploaded_at >= thirty_days_ago
-        ).group_by(func.date(Document.uploaded_at)).order_by('date').all()
+            InsightsDailyRollup.day >= thirty_days_ago
+        ).group_by(InsightsDailyRollup.day).order_by(InsightsDailyRollup.day).all()
         
         upload_timeline = [
             {
-                "date": date.isoformat(),
+                "date": day.isoformat(),
                 "count": count
             }
-            for date, count in upload_trends
+            for day, count in upload_trends
         ]
         
-        # Recent uploads (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_uploads = query.filter(
-            Document.uploaded_at >= seven_days_ago
-        ).count()
-        
         return {
             "total_documents": total_documents,
             "recent_uploads_7d": recent_uploads,
-            "documents_by_category": documents_by_category,
-            "documents_by_department": documents_by_department,
-            "documents_by_status": documents_by_status,
-            "documents_by_visibility": documents_by_visibility,
+            "documents_by_category": dict(documents_by_category),
+            "documents_by_department": dict(documents_by_department),
+            "documents_by_status": dict(documents_by_status),
+            "documents_by_visibility": dict(documents_by_visibility),
             "upload_timeline": upload_timeline,
             "filters_applied": {
                 "category": category,
@@ -216,7 +151,7 @@ async def get_document_stats(
 
 
 @router.get("/trending-topics")
-async def get_trending_topics(
+def get_trending_topics(
     limit: int = Query(20, ge=5, le=100),
     days: int = Query(30, ge=7, le=365),
     current_user: User = Depends(get_current_user),
@@ -231,91 +166,35 @@ async def get_trending_topics(
     - Recent trending topics
     """
     try:
-        # Get documents from last N days
-        date_threshold = datetime.utcnow() - timedelta(days=days)
-        
-        # Base query with role-based filtering
-        query = db.query(DocumentMetadata).join(Document).filter(
-            Document.uploaded_at >= date_threshold
-        )
-        
-        # Apply role-based access control (respects institutional autonomy)
-        if current_user.role == "developer":
-            pass  # Full access
-        
-        elif current_user.role == "ministry_admin":
-            # MoE Admin: LIMITED access
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.approval_status == "pending",
-                    Document.institution_id == current_user.institution_id,
-                    Document.uploader_id == current_user.id
-                )
-            )
-        
-        elif current_user.role == "university_admin":
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "document_officer":
-            query = query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "student":
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    or_(
-                        Document.visibility_level == "public",
-                        and_(
-                            Document.visibility_level == "institution_only",
-                            Document.institution_id == current_user.institution_id
-                        )
-                    )
-                )
-            )
-        
-        elif current_user.role == "public_viewer":
-            query = query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    Document.visibility_level == "public"
-                )
-            )
-        
-        # Get all keywords
-        metadata_records = query.all()
-        
-        all_keywords = []
-        all_topics = []
-        
-        for record in metadata_records:
-            if record.keywords:
-                all_keywords.extend(record.keywords)
-            if record.key_topics:
-                all_topics.extend(record.key_topics)
-        
-        # Count keyword frequencies
-        keyword_counter = Counter(all_keywords)
-        topic_counter = Counter(all_topics)
+        # Rollup days from the last N days
+        date_threshold = (datetime.utcnow() - timedelta(days=days)).date()
+        
+        # Documents with metadata in range (role-scoped)
+        documents_analyzed = _daily_rollup(
+            db, current_user, func.coalesce(func.sum(InsightsDailyRollup.metadata_count), 0)
+        ).filter(InsightsDailyRollup.day >= date_threshold).scalar()
+        
+        def term_counts(kind: str):
+            occurrences = func.sum(InsightsKeywordRollup.occurrences).label("occurrences")
+            terms = _keyword_rollup(db, current_user, InsightsKeywordRollup.term, occurrences).filter(
+                InsightsKeywordRollup.kind == kind,
+                InsightsKeywordRollup.day >= date_threshold
+            ).group_by(InsightsKeywordRollup.term)
+            top = terms.order_by(desc("occurrences"), InsightsKeywordRollup.term).limit(limit).all()
+            unique = terms.order_by(None).count()
+            return top, unique
+        
+        keyword_counts, unique_keywords = term_counts("keyword")
+        topic_counts, unique_topics = term_counts("topic")
         
         # Get top keywords
         top_keywords = [
             {
                 "keyword": keyword,
                 "frequency": count,
-                "percentage": round((count / len(metadata_records)) * 100, 2) if metadata_records else 0
+                "percentage": round((count / documents_analyzed) * 100, 2) if documents_analyzed else 0
             }
-            for keyword, count in keyword_counter.most_common(limit)
+            for keyword, count in keyword_counts
         ]
         
         # Get top topics
@@ -323,18 +202,18 @@ async def get_trending_topics(
             {
                 "topic": topic,
                 "frequency": count,
-                "percentage": round((count / len(metadata_records)) * 100, 2) if metadata_records else 0
+                "percentage": round((count / documents_analyzed) * 100, 2) if documents_analyzed else 0
             }
-            for topic, count in topic_counter.most_common(limit)
+            for topic, count in topic_counts
         ]
         
         return {
             "trending_keywords": top_keywords,
             "trending_topics": top_topics,
-            "total_documents_analyzed": len(metadata_records),
+            "total_documents_analyzed": documents_analyzed,
             "date_range_days": days,
-            "unique_keywords": len(keyword_counter),
-            "unique_topics": len(topic_counter)
+            "unique_keywords": unique_keywords,
+            "unique_topics": unique_topics
         }
         
     except Exception as e:
@@ -342,7 +221,7 @@ async def get_trending_topics(
 
 
 @router.get("/recent-activity")
-async def get_recent_activity(
+def get_recent_activity(
     limit: int = Query(50, ge=10, le=200),
     activity_type: Optional[str] = None,
     current_user: User = Depends(get_current_user),
@@ -409,7 +288,7 @@ async def get_recent_activity(
 
 
 @router.get("/search-analytics")
-async def get_search_analytics(
+def get_search_analytics(
     days: int = Query(30, ge=7, le=365),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -498,7 +377,7 @@ async def get_search_analytics(
 
 
 @router.get("/user-activity")
-async def get_user_activity(
+def get_user_activity(
     days: int = Query(30, ge=7, le=365),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -573,7 +452,7 @@ async def get_user_activity(
 
 
 @router.get("/institution-stats")
-async def get_institution_stats(
+def get_institution_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -593,44 +472,28 @@ async def get_institution_stats(
                 detail="Only administrators can view institution statistics"
             )
         
-        # Documents by institution
-        doc_stats = db.query(
-            Institution.name,
-            func.count(Document.id).label('document_count')
-        ).outerjoin(Document, Institution.id == Document.institution_id).group_by(
-            Institution.name
-        ).all()
-        
-        documents_by_institution = {
-            name: count 
-            for name, count in doc_stats
-        }
+        # Documents and users per institution id, one grouped query each
+        doc_counts = dict(db.query(
+            InsightsDailyRollup.institution_id,
+            func.sum(InsightsDailyRollup.document_count)
+        ).group_by(InsightsDailyRollup.institution_id).all())
         
-        # Users by institution
-        user_stats = db.query(
-            Institution.name,
-            func.count(User.id).label('user_count')
-        ).outerjoin(User, Institution.id == User.institution_id).group_by(
-            Institution.name
-        ).all()
-        
-        users_by_institution = {
-            name: count 
-            for name, count in user_stats
-        }
+        user_counts = dict(db.query(
+            User.institution_id,
+            func.count(User.id)
+        ).group_by(User.institution_id).all())
         
         # Get all institutions with details
         institutions = db.query(Institution).all()
         
+        documents_by_institution = Counter()
+        users_by_institution = Counter()
         institution_details = []
         for inst in institutions:
-            doc_count = db.query(func.count(Document.id)).filter(
-                Document.institution_id == inst.id
-            ).scalar()
-            
-            user_count = db.query(func.count(User.id)).filter(
-                User.institution_id == inst.id
-            ).scalar()
+            doc_count = doc_counts.get(inst.id, 0)
+            user_count = user_counts.get(inst.id, 0)
+            documents_by_institution[inst.name] += doc_count
+            users_by_institution[inst.name] += user_count
             
             institution_details.append({
                 "id": inst.id,
@@ -642,8 +505,8 @@ async def get_institution_stats(
             })
         
         return {
-            "documents_by_institution": documents_by_institution,
-            "users_by_institution": users_by_institution,
+            "documents_by_institution": dict(documents_by_institution),
+            "users_by_institution": dict(users_by_institution),
             "institution_details": institution_details,
             "total_institutions": len(institutions)
         }
@@ -655,7 +518,7 @@ async def get_institution_stats(
 
 
 @router.get("/dashboard-summary")
-async def get_dashboard_summary(
+def get_dashboard_summary(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -665,86 +528,49 @@ async def get_dashboard_summary(
     Returns all key metrics in one call for dashboard display
     """
     try:
-        # Total documents (role-based - respects institutional autonomy)
-        doc_query = db.query(Document)
-        
-        if current_user.role == "developer":
-            pass  # Full access
-        
-        elif current_user.role == "ministry_admin":
-            # MoE Admin: LIMITED access
-            doc_query = doc_query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.approval_status == "pending",
-                    Document.institution_id == current_user.institution_id,
-                    Document.uploader_id == current_user.id
-                )
-            )
-        
-        elif current_user.role == "university_admin":
-            doc_query = doc_query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "document_officer":
-            doc_query = doc_query.filter(
-                or_(
-                    Document.visibility_level == "public",
-                    Document.institution_id == current_user.institution_id
-                )
-            )
-        
-        elif current_user.role == "student":
-            doc_query = doc_query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    or_(
-                        Document.visibility_level == "public",
-                        and_(
-                            Document.visibility_level == "institution_only",
-                            Document.institution_id == current_user.institution_id
-                        )
-                    )
-                )
-            )
+        seven_days_ago = datetime.utcnow() - timedelta(days=7)
         
-        elif current_user.role == "public_viewer":
-            doc_query = doc_query.filter(
-                and_(
-                    Document.approval_status == "approved",
-                    Document.visibility_level == "public"
-                )
-            )
+        # Totals, recent uploads and categories (role-based - respects institutional autonomy)
+        category_stats = _daily_rollup(
+            db, current_user,
+            InsightsDailyRollup.document_type,
+            func.sum(InsightsDailyRollup.document_count),
+            func.sum(InsightsDailyRollup.metadata_count),
+            func.sum(case(
+                (InsightsDailyRollup.day >= seven_days_ago.date(), InsightsDailyRollup.document_count),
+                else_=0
+            ))
+        ).group_by(InsightsDailyRollup.document_type).all()
+        
+        total_documents = sum(doc_count for _, doc_count, _, _ in category_stats)
+        recent_uploads = sum(recent_count for _, _, _, recent_count in category_stats)
         
-        total_documents = doc_query.count()
+        # Top categories
+        top_categories = [
+            {"category": cat or "Uncategorized", "count": meta_count}
+            for cat, _, meta_count, _ in sorted(category_stats, key=lambda row: row[2], reverse=True)[:5]
+            if meta_count
+        ]
         
         # Pending approvals (admin only)
         pending_approvals = 0
         if current_user.role in ["developer", "ministry_admin", "university_admin"]:
-            pending_query = db.query(Document).filter(
-                Document.approval_status == "pending"
+            pending_query = db.query(
+                func.coalesce(func.sum(InsightsDailyRollup.document_count), 0)
+            ).filter(
+                InsightsDailyRollup.approval_status == "pending"
             )
             if current_user.role == "university_admin":
                 pending_query = pending_query.filter(
-                    Document.institution_id == current_user.institution_id
+                    InsightsDailyRollup.institution_id == current_user.institution_id
                 )
-            pending_approvals = pending_query.count()
+            pending_approvals = pending_query.scalar()
         
         # Total users (admin only)
         total_users = 0
         if current_user.role in ["developer", "ministry_admin"]:
             total_users = db.query(User).count()
         
-        # Recent uploads (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_uploads = doc_query.filter(
-            Document.uploaded_at >= seven_days_ago
-        ).count()
-        
         # Recent searches (last 7 days, admin only)
         recent_searches = 0
         if current_user.role in ["developer", "ministry_admin"]:
@@ -755,19 +581,6 @@ async def get_dashboard_summary(
                 )
             ).count()
         
-        # Top categories
-        category_stats = db.query(
-            DocumentMetadata.document_type,
-            func.count(Document.id).label('count')
-        ).join(Document).filter(
-            Document.id.in_([d.id for d in doc_query.all()])
-        ).group_by(DocumentMetadata.document_type).order_by(desc('count')).limit(5).all()
-        
-        top_categories = [
-            {"category": cat or "Uncategorized", "count": count}
-            for cat, count in category_stats
-        ]
-        
         return {
             "total_documents": total_documents,
             "pending_approvals": pending_approvals,
@@ -23,7 +23,7 @@ except ImportError:
 
 
 @router.get("/list")
-async def get_notifications(
+def get_notifications(
     unread_only: bool = Query(False),
     priority: Optional[str] = Query(None),
     type: Optional[str] = Query(None),
@@ -61,7 +61,7 @@ async def get_notifications(
 
 @router.get("/unread-count")
 @cache(expire=10)  # Cache for 10 seconds - frequently polled endpoint
-async def get_unread_count(
+def get_unread_count(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -75,7 +75,7 @@ async def get_unread_count(
 
 
 @router.post("/{notification_id}/mark-read")
-async def mark_notification_read(
+def mark_notification_read(
     notification_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -97,7 +97,7 @@ async def mark_notification_read(
 
 
 @router.post("/mark-all-read")
-async def mark_all_read(
+def mark_all_read(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -115,7 +115,7 @@ async def mark_all_read(
 
 
 @router.delete("/{notification_id}")
-async def delete_notification(
+def delete_notification(
     notification_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -6,13 +6,13 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from Agent.web_scraping.local_storage import LocalStorage
+from Agent.web_scraping.local_storage import get_local_storage
 from Agent.web_scraping.scraping_logger import ScrapingLogger
 
 router = APIRouter(prefix="/api/scraping-logs", tags=["scraping-logs"])
 
 # Initialize storage and logger
-storage = LocalStorage()
+storage = get_local_storage()
 scraping_logger = ScrapingLogger(storage)
 
 
@@ -9,7 +9,7 @@ from datetime import datetime
 import logging
 
 from Agent.web_scraping.web_source_manager import WebSourceManager
-from Agent.web_scraping.session_storage import SessionStorage
+from Agent.web_scraping.session_storage import get_session_storage
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ router = APIRouter(prefix="/api/web-scraping", tags=["Web Scraping"])
 
 # Initialize web source manager and session storage
 web_manager = WebSourceManager()
-session_storage = SessionStorage()
+session_storage = get_session_storage()
 
 # Load persisted data from disk
 TEMP_SOURCES: List[Dict] = session_storage.load_sources()
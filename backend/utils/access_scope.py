@@ -0,0 +1,158 @@
+"""
+Access-scope engine for role-based document visibility
+
+Every document and embedding row carries access_scopes, a small integer array
+generated by Postgres from (visibility_level, institution_id) with the
+beacon_access_scopes() SQL function. A user's role maps to the set of scopes
+they may read, so role filtering is a single GIN-indexable overlap test
+(access_scopes && ARRAY[...]) instead of an OR of ANDs per query.
+
+Scope tokens (X = institution id):
+- SCOPE_PUBLIC        visibility public
+- SCOPE_MINISTRY      visibility public, restricted or institution_only
+- member_scope(X)     institution_only documents of X
+- staff_scope(X)      institution_only or restricted documents of X
+- institution_scope(X) any document of X
+
+document_scopes() must stay in sync with ACCESS_SCOPES_FUNCTION_SQL.
+"""
+from typing import List, Optional
+
+from backend.constants.roles import (
+    DEVELOPER, MINISTRY_ADMIN, UNIVERSITY_ADMIN, DOCUMENT_OFFICER, STUDENT, PUBLIC_VIEWER
+)
+
+SCOPE_PUBLIC = 1
+SCOPE_MINISTRY = 2
+
+# Filter purposes
+SEARCH = "search"          # RAG search, agent tools, vector search
+DASHBOARD = "dashboard"    # Insights and other institution dashboards
+
+ACCESS_SCOPES_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION beacon_access_scopes(visibility text, institution integer)
+RETURNS integer[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT array_remove(ARRAY[
+        CASE WHEN visibility = 'public' THEN 1 END,
+        CASE WHEN visibility IN ('public', 'restricted', 'institution_only') THEN 2 END,
+        CASE WHEN visibility = 'institution_only' THEN institution * 8 + 1 END,
+        CASE WHEN visibility IN ('institution_only', 'restricted') THEN institution * 8 + 2 END,
+        institution * 8 + 3
+    ], NULL)
+$$
+"""
+
+
+def member_scope(institution_id: int) -> int:
+    return institution_id * 8 + 1
+
+
+def staff_scope(institution_id: int) -> int:
+    return institution_id * 8 + 2
+
+
+def institution_scope(institution_id: int) -> int:
+    return institution_id * 8 + 3
+
+
+def document_scopes(visibility_level: Optional[str], institution_id: Optional[int]) -> List[int]:
+    """Scopes of a document (Python mirror of beacon_access_scopes)"""
+    scopes = []
+    if visibility_level == "public":
+        scopes.append(SCOPE_PUBLIC)
+    if visibility_level in ("public", "restricted", "institution_only"):
+        scopes.append(SCOPE_MINISTRY)
+    if institution_id is not None:
+        if visibility_level == "institution_only":
+            scopes.append(member_scope(institution_id))
+        if visibility_level in ("institution_only", "restricted"):
+            scopes.append(staff_scope(institution_id))
+        scopes.append(institution_scope(institution_id))
+    return scopes
+
+
+def user_scopes(
+    user_role: Optional[str],
+    user_institution_id: Optional[int],
+    purpose: str = SEARCH
+) -> Optional[List[int]]:
+    """
+    Scopes a user may read
+
+    Returns:
+        List of scope tokens, or None when the role is unrestricted
+    """
+    if user_role == DEVELOPER:
+        return None
+
+    inst = user_institution_id
+    if purpose == SEARCH:
+        if user_role == MINISTRY_ADMIN:
+            return [SCOPE_PUBLIC, SCOPE_MINISTRY]
+        if user_role == UNIVERSITY_ADMIN:
+            return [SCOPE_PUBLIC] + ([staff_scope(inst)] if inst is not None else [])
+        return [SCOPE_PUBLIC] + ([member_scope(inst)] if inst else [])
+
+    if purpose == DASHBOARD:
+        if user_role in (MINISTRY_ADMIN, UNIVERSITY_ADMIN, DOCUMENT_OFFICER):
+            return [SCOPE_PUBLIC] + ([institution_scope(inst)] if inst is not None else [])
+        if user_role == STUDENT:
+            return [SCOPE_PUBLIC] + ([member_scope(inst)] if inst is not None else [])
+        return [SCOPE_PUBLIC]
+
+    raise ValueError(f"Unknown access purpose: {purpose}")
+
+
+def scope_filter(scopes_column, scopes: Optional[List[int]]):
+    """access_scopes && ARRAY[scopes] (None when unrestricted)"""
+    if scopes is None:
+        return None
+    from sqlalchemy import Integer
+    from sqlalchemy.dialects.postgresql import array
+
+    return scopes_column.overlap(array(scopes, type_=Integer))
+
+
+def apply_search_access(query, scopes_column, user_role: Optional[str], user_institution_id: Optional[int]):
+    """Restrict a query to rows the user may see in search"""
+    condition = scope_filter(scopes_column, user_scopes(user_role, user_institution_id, SEARCH))
+    return query if condition is None else query.filter(condition)
+
+
+def apply_dashboard_access(
+    query,
+    user_role: Optional[str],
+    user_institution_id: Optional[int],
+    user_id: Optional[int] = None,
+    model=None
+):
+    """
+    Restrict a Document query for dashboards (insights, conflict scans)
+
+    Ministry admins also see pending documents and their own uploads; students
+    and public viewers only see approved documents.
+
+    model: Table to filter instead of Document; it needs access_scopes,
+    approval_status and uploader_id columns (e.g. the insights rollups).
+    """
+    from sqlalchemy import or_
+
+    if model is None:
+        from backend.database import Document as model
+
+    if user_role == DEVELOPER:
+        return query
+    if user_role not in (MINISTRY_ADMIN, UNIVERSITY_ADMIN, DOCUMENT_OFFICER, STUDENT, PUBLIC_VIEWER):
+        return query
+
+    condition = scope_filter(
+        model.access_scopes, user_scopes(user_role, user_institution_id, DASHBOARD)
+    )
+    if user_role == MINISTRY_ADMIN:
+        alternatives = [condition, model.approval_status == "pending"]
+        if user_id is not None:
+            alternatives.append(model.uploader_id == user_id)
+        return query.filter(or_(*alternatives))
+    if user_role in (STUDENT, PUBLIC_VIEWER):
+        return query.filter(model.approval_status == "approved", condition)
+    return query.filter(condition)
@@ -10,6 +10,7 @@ import tempfile
 import base64
 
 from backend.utils.quota_manager import get_quota_manager, QuotaExceededException
+from backend.utils.ocr_page_cache import get_ocr_page_cache, page_hash
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,24 @@ class CloudOCRService:
         """
         logger.info(f"Extracting text from image: {image_path}")
         
+        # Identical images (unchanged pages of a re-uploaded document) cost no quota
+        with open(image_path, "rb") as image_file:
+            image_hash = page_hash(image_file.read())
+        cache = get_ocr_page_cache()
+        cached = cache.get("cloud-ocr", language, image_hash)
+        if cached is not None:
+            logger.info("OCR page cache hit - no quota used")
+            cached["cache_hit"] = True
+            return cached
+        
+        result = self._extract_with_fallback(image_path, language)
+        # Tesseract fallbacks are not cached so the page gets Vision once quota is back
+        if result.get("engine") == "google-vision":
+            cache.put("cloud-ocr", language, image_hash, result)
+        return result
+    
+    def _extract_with_fallback(self, image_path: str, language: str) -> Dict[str, Any]:
+        """Vision API first, Tesseract when quota is exhausted or the API fails"""
         try:
             # Try Google Cloud Vision API first
             if self.vision_client:
@@ -331,6 +350,72 @@ class CloudOCRService:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
     
+    def extract_text_from_pdf(
+        self,
+        pdf_path: str,
+        language: str = "en",
+        dpi: int = 200
+    ) -> Dict[str, Any]:
+        """
+        Extract text from a PDF page by page
+        
+        Pages with a text layer are read directly; scanned pages are rendered
+        and OCR'd one at a time, so unchanged pages are served from the page
+        cache and only new pages use quota.
+        
+        Args:
+            pdf_path: Path to PDF file
+            language: Language code for OCR
+            dpi: Render resolution for scanned pages
+        
+        Returns:
+            OCR result dict, plus pages_with_ocr, pages_with_text and cache_hits
+        """
+        import fitz  # PyMuPDF
+        
+        texts = []
+        confidences = []
+        pages_with_ocr = []
+        pages_with_text = []
+        engines = set()
+        cache_hits = 0
+        
+        doc = fitz.open(pdf_path)
+        try:
+            for page_num, page in enumerate(doc, start=1):
+                page_text = page.get_text().strip()
+                if page_text:
+                    texts.append(page_text)
+                    confidences.append(1.0)
+                    pages_with_text.append(page_num)
+                    continue
+                
+                pix = page.get_pixmap(dpi=dpi)
+                img_data = pix.tobytes("png")
+                del pix
+                
+                result = self.extract_text_from_bytes(img_data, "png", language)
+                texts.append(result["text"])
+                confidences.append(result["confidence"])
+                pages_with_ocr.append(page_num)
+                engines.add(result["engine"])
+                cache_hits += 1 if result.get("cache_hit") else 0
+        finally:
+            doc.close()
+        
+        full_text = "\n\n".join(text for text in texts if text)
+        return {
+            "text": full_text,
+            "confidence": sum(confidences) / len(confidences) if confidences else 0.0,
+            "engine": "+".join(sorted(engines)) or "text-layer",
+            "language": language,
+            "word_count": len(full_text.split()),
+            "pages_processed": len(confidences),
+            "pages_with_ocr": pages_with_ocr,
+            "pages_with_text": pages_with_text,
+            "cache_hits": cache_hits
+        }
+    
     def get_quota_status(self) -> dict:
         """Get current quota status for OCR"""
         return self.quota_manager.get_quota_status("vision_ocr")
@@ -341,7 +426,8 @@ class CloudOCRService:
             "cloud_only": self.cloud_only,
             "vision_api_available": bool(self.vision_client),
             "tesseract_available": self.tesseract_available,
-            "quota_status": self.get_quota_status()
+            "quota_status": self.get_quota_status(),
+            "page_cache": get_ocr_page_cache().get_stats()
         }
 
 
@@ -0,0 +1,89 @@
+"""
+Blocking database work off the event loop
+
+SQLAlchemy sessions here are synchronous, so request handlers that touch the
+database are plain `def` endpoints (FastAPI runs those and sync dependencies
+such as get_db / get_current_user in its worker threadpool). Code that must
+stay `async` (SSE streams, websockets) uses run_db() for its queries.
+
+The threadpool is sized at startup. It is shared by every sync endpoint and
+dependency (including auth), uploads/downloads and sync streaming bodies, so
+it is never made smaller than anyio's default. Multi-second LLM calls run on
+their own limiter (run_agent) so a burst of chats cannot starve it.
+"""
+import functools
+import logging
+import os
+from typing import Any, Callable, Optional
+
+import anyio
+import anyio.to_thread
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+ANYIO_DEFAULT_THREADS = 40
+CHAT_THREADPOOL_SIZE = max(1, int(os.getenv("CHAT_THREADPOOL_SIZE", "20")))
+
+_agent_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def configure_threadpool() -> int:
+    """
+    Size the anyio worker threadpool used for sync endpoints and dependencies
+
+    The limiter also serves requests that never touch the database (auth
+    token checks, file streaming), so the default is anyio's own (40), raised
+    to the connections one worker's pool can hand out (DB_POOL_SIZE +
+    DB_MAX_OVERFLOW) when that is larger. Agent calls do not count against it
+    (see run_agent). THREADPOOL_SIZE overrides the default.
+
+    Returns:
+        Number of worker threads
+    """
+    from backend.database import DB_MAX_OVERFLOW, DB_POOL_MODE, DB_POOL_SIZE
+
+    default = ANYIO_DEFAULT_THREADS
+    if DB_POOL_MODE != "null":
+        default = max(default, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    size = max(1, int(os.getenv("THREADPOOL_SIZE", str(default))))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = size
+    logger.info(f"Threadpool size set to {size}")
+    return size
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run func(db, *args, **kwargs) with its own session in the threadpool
+
+    Usage:
+        messages = await run_db(load_messages, session_id)
+    """
+    def call():
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return func(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call)
+
+
+async def run_agent(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking agent/LLM call in a thread from its own limiter
+
+    Agent calls hold a thread for the whole LLM round trip (seconds), so they
+    are capped by CHAT_THREADPOOL_SIZE instead of taking threads from the
+    shared pool that auth and database endpoints need.
+
+    Usage:
+        result = await run_agent(agent.query, question, thread_id)
+    """
+    global _agent_limiter
+    if _agent_limiter is None:
+        # Created on first use: the limiter needs the running event loop
+        _agent_limiter = anyio.CapacityLimiter(CHAT_THREADPOOL_SIZE)
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_agent_limiter)
@@ -0,0 +1,83 @@
+"""
+Access to document body text
+
+Document.extracted_text is a deferred column: ordinary Document queries do
+not load it, and Postgres keeps it out of line in compressed TOAST storage.
+Code that needs the body asks for it explicitly here, ideally for only the
+part it uses (previews are cut in SQL, full text is streamed in slices from
+one server-side cursor).
+"""
+from typing import Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from backend.database import Document
+
+# Characters per slice when streaming a document body
+TEXT_SLICE_CHARS = 64 * 1024
+
+
+def get_document_text(db: Session, document_id: int) -> Optional[str]:
+    """Full extracted text of a document (None if missing)"""
+    return db.query(Document.extracted_text).filter(Document.id == document_id).scalar()
+
+
+def get_text_length(db: Session, document_id: int) -> int:
+    return db.query(func.coalesce(func.length(Document.extracted_text), 0)).filter(
+        Document.id == document_id
+    ).scalar() or 0
+
+
+def get_text_previews(db: Session, document_ids: Iterable[int], max_chars: int) -> Dict[int, str]:
+    """
+    First max_chars characters of several documents, cut in SQL
+
+    Returns:
+        Dict document_id -> text prefix ("" when no text)
+    """
+    document_ids = list(document_ids)
+    if not document_ids:
+        return {}
+
+    rows = db.query(
+        Document.id, func.substr(func.coalesce(Document.extracted_text, ""), 1, max_chars)
+    ).filter(Document.id.in_(document_ids)).all()
+    return {doc_id: preview for doc_id, preview in rows}
+
+
+# One statement, one decompression: the CTE detoasts the body once (`|| ''`
+# forces a plain in-memory copy instead of a TOAST pointer) and the slices are
+# cut from that copy. Slicing the column directly with one substr() query per
+# slice would decompress the value from the start each time. Slice starts come
+# from a recursive CTE rather than generate_series so SQLite runs it too.
+_TEXT_SLICES_SQL = text("""
+    WITH RECURSIVE body AS MATERIALIZED (
+        SELECT t, length(t) AS n FROM (
+            SELECT coalesce(extracted_text, '') || '' AS t FROM documents WHERE id = :document_id
+        ) AS doc
+    ),
+    starts(start) AS (
+        SELECT 1 FROM body WHERE body.n > 0
+        UNION ALL
+        SELECT start + :slice_chars FROM starts, body WHERE start + :slice_chars <= body.n
+    )
+    SELECT substr(body.t, starts.start, :slice_chars) AS slice
+    FROM body, starts
+    ORDER BY starts.start
+""")
+
+
+def iter_document_text(db: Session, document_id: int, slice_chars: int = TEXT_SLICE_CHARS) -> Iterator[str]:
+    """Yield a document's text in slices so the whole body is never held at once"""
+    result = db.execute(
+        _TEXT_SLICES_SQL,
+        {"document_id": document_id, "slice_chars": slice_chars},
+        # Server-side cursor, buffering only a few slices client-side
+        execution_options={"stream_results": True, "max_row_buffer": 4}
+    )
+    try:
+        for row in result:
+            yield row[0]
+    finally:
+        result.close()
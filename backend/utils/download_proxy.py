@@ -0,0 +1,189 @@
+"""
+Streaming download proxy for files kept in Supabase Storage
+
+Bytes are passed through chunk by chunk from a shared, pooled httpx client,
+so memory per download stays at one chunk and the first byte reaches the
+client as soon as upstream sends it. Range, If-Range and conditional
+(If-None-Match / If-Modified-Since) requests are forwarded to storage, and
+recently seen ETags are cached so repeat conditional requests are answered
+with 304 without an upstream round trip.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+# Client request headers forwarded to storage
+FORWARDED_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+# Storage response headers passed back to the client
+PASSTHROUGH_RESPONSE_HEADERS = (
+    "content-length", "content-range", "accept-ranges", "etag", "last-modified", "content-encoding"
+)
+
+# Documents are access-controlled: browsers may keep a copy but must revalidate,
+# shared caches must not store it. Content-Encoding: identity keeps
+# GZipMiddleware from re-encoding byte ranges.
+DOWNLOAD_HEADERS = {
+    "cache-control": "private, no-cache",
+    "content-encoding": "identity",
+}
+
+
+class ETagCache:
+    """Recently seen upstream validators per storage URL (TTL bounded)"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: int = 2048):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.getenv("DOWNLOAD_ETAG_TTL", "300"))
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            stored_at, validators = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[url]
+                return None
+            return validators
+
+    def set(self, url: str, validators: Dict[str, str]) -> None:
+        if not validators.get("etag") or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries and url not in self._entries:
+                # Drop the oldest entry
+                oldest = min(self._entries, key=lambda key: self._entries[key][0])
+                del self._entries[oldest]
+            self._entries[url] = (time.time(), validators)
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def normalize(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return normalize(etag) in {normalize(tag) for tag in if_none_match.split(",")}
+
+
+def content_disposition(filename: str) -> str:
+    """attachment header safe for non-ASCII filenames (RFC 6266)"""
+    from urllib.parse import quote
+
+    ascii_name = filename.encode("ascii", "ignore").decode() or "download"
+    ascii_name = ascii_name.replace('"', "")
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def is_first_request(request: Request) -> bool:
+    """False for follow-up byte-range and revalidation requests (not audited again)"""
+    if request.headers.get("if-none-match") or request.headers.get("if-modified-since"):
+        return False
+    range_header = request.headers.get("range")
+    return not range_header or range_header.replace(" ", "").startswith("bytes=0-")
+
+
+async def proxy_download(request: Request, url: str, filename: str, media_type: str) -> Response:
+    """
+    Stream a storage object to the client
+
+    Args:
+        request: Incoming request (Range and conditional headers are honoured)
+        url: Storage object URL
+        filename: Download filename
+        media_type: MIME type for the response
+
+    Returns:
+        StreamingResponse (200/206), or an empty 304/416 response
+    """
+    headers = dict(DOWNLOAD_HEADERS)
+    headers["content-disposition"] = content_disposition(filename)
+
+    cached = _etag_cache.get(url)
+    if cached and etag_matches(request.headers.get("if-none-match"), cached["etag"]):
+        return Response(status_code=304, headers={**headers, **cached})
+
+    upstream_headers = {
+        name: request.headers[name] for name in FORWARDED_REQUEST_HEADERS if name in request.headers
+    }
+    # Byte ranges must refer to the stored bytes, not a compressed transfer
+    upstream_headers["accept-encoding"] = "identity"
+
+    client = get_http_client()
+    upstream = await client.send(client.build_request("GET", url, headers=upstream_headers), stream=True)
+
+    if upstream.status_code not in (200, 206, 304, 416):
+        status = upstream.status_code
+        await upstream.aclose()
+        logger.error(f"Storage returned {status} for {url}")
+        raise HTTPException(status_code=502, detail=f"Failed to download file from Supabase (status {status})")
+
+    for name in PASSTHROUGH_RESPONSE_HEADERS:
+        if name in upstream.headers:
+            headers[name] = upstream.headers[name]
+    validators = {
+        name: upstream.headers[name] for name in ("etag", "last-modified") if name in upstream.headers
+    }
+    _etag_cache.set(url, validators)
+
+    if upstream.status_code in (304, 416):
+        await upstream.aclose()
+        headers.pop("content-length", None)
+        return Response(status_code=upstream.status_code, headers=headers)
+
+    return StreamingResponse(
+        upstream.aiter_raw(CHUNK_SIZE),
+        status_code=upstream.status_code,
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(upstream.aclose)
+    )
+
+
+# Global instances
+_http_client: Optional[httpx.AsyncClient] = None
+_etag_cache = ETagCache()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared storage HTTP client (connection pooled, HTTP keep-alive)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        max_connections = int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", "50"))
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(20, max_connections),
+                keepalive_expiry=30.0
+            ),
+            # No read deadline for the whole body, only between chunks
+            timeout=httpx.Timeout(connect=10.0, read=60.0, write=30.0, pool=30.0),
+            follow_redirects=True
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared client (app shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
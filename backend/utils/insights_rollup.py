@@ -0,0 +1,384 @@
+"""
+Pre-aggregated document analytics for the insights dashboards
+
+Dashboards used to count documents and unnest metadata keywords on every
+request. Two rollup tables hold those aggregates instead, one row per upload
+day and dashboard dimension (institution, visibility, approval status,
+document type, department):
+- insights_daily_rollup:   document and metadata counts
+- insights_keyword_rollup: keyword and topic occurrences
+Both carry the generated access_scopes column, so the usual
+apply_dashboard_access filter works on them unchanged. uploader_id is kept
+only for uploads by ministry admins (the one role whose dashboard counts its
+own uploads), so the number of cells per day is bounded by the dimension
+vocabularies rather than by the number of uploaders.
+
+Refresh is incremental and per day. Statement-level triggers on documents,
+document_metadata and users.role append the upload days every write touches
+to insights_rollup_dirty_days, whoever writes (API, scrapers, scripts, bulk
+query.update(), raw SQL). refresh_days() drains that log and recomputes only
+those days in one transaction. The API drains it every
+INSIGHTS_ROLLUP_INTERVAL seconds; ORM commits in any process also schedule a
+drain after a short debounce (INSIGHTS_ROLLUP_DELAY) so dashboards catch up
+quickly after uploads and approvals.
+"""
+import logging
+import os
+import threading
+from datetime import date
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from backend.constants.roles import MINISTRY_ADMIN
+
+logger = logging.getLogger(__name__)
+
+# Serializes rollup refreshes across workers (arbitrary, fixed key)
+ROLLUP_LOCK_KEY = 7_312_026
+
+# Columns that move a document between rollup cells
+DOCUMENT_FIELDS = ("uploaded_at", "institution_id", "visibility_level", "approval_status", "uploader_id")
+METADATA_FIELDS = ("document_id", "document_type", "department", "keywords", "key_topics")
+
+# uploader_id dimension: only ministry admins' own uploads are counted per uploader
+UPLOADER_DIMENSION = f"CASE WHEN u.role = '{MINISTRY_ADMIN}' THEN d.uploader_id END"
+
+DAILY_ROLLUP_SQL = """
+INSERT INTO insights_daily_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id,
+    document_type, department, document_count, metadata_count
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, """ + UPLOADER_DIMENSION + """,
+       m.document_type, m.department, count(*), count(m.id)
+FROM documents d
+LEFT JOIN users u ON u.id = d.uploader_id
+LEFT JOIN document_metadata m ON m.document_id = d.id
+WHERE d.uploaded_at IS NOT NULL {where}
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+KEYWORD_ROLLUP_SQL = """
+INSERT INTO insights_keyword_rollup (
+    day, institution_id, visibility_level, approval_status, uploader_id, kind, term, occurrences
+)
+SELECT date(d.uploaded_at), d.institution_id, d.visibility_level, d.approval_status, """ + UPLOADER_DIMENSION + """,
+       t.kind, t.term, count(*)
+FROM documents d
+LEFT JOIN users u ON u.id = d.uploader_id
+JOIN document_metadata m ON m.document_id = d.id
+CROSS JOIN LATERAL (
+    SELECT 'keyword' AS kind, unnest(m.keywords) AS term
+    UNION ALL
+    SELECT 'topic', unnest(m.key_topics)
+) t
+WHERE d.uploaded_at IS NOT NULL AND t.term IS NOT NULL {where}
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+# Drained by refresh_days(); rows are appended by the triggers below
+DIRTY_DAYS_DRAIN_SQL = "DELETE FROM insights_rollup_dirty_days RETURNING day"
+
+# Statement-level triggers logging the upload days each write touches. Rows are
+# only ever appended (no ON CONFLICT), so a day logged by a transaction that
+# commits after a drain started is picked up by the next drain. Idempotent:
+# runs on every create_all and in the migration.
+ROLLUP_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION insights_log_document_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(uploaded_at) FROM new_rows WHERE uploaded_at IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(uploaded_at) FROM old_rows WHERE uploaded_at IS NOT NULL;
+    ELSE
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT day FROM (
+            SELECT date(o.uploaded_at) AS day FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.uploaded_at, o.institution_id, o.visibility_level, o.approval_status, o.uploader_id)
+                  IS DISTINCT FROM (n.uploaded_at, n.institution_id, n.visibility_level, n.approval_status, n.uploader_id)
+            UNION
+            SELECT date(n.uploaded_at) FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.uploaded_at, o.institution_id, o.visibility_level, o.approval_status, o.uploader_id)
+                  IS DISTINCT FROM (n.uploaded_at, n.institution_id, n.visibility_level, n.approval_status, n.uploader_id)
+        ) changed WHERE day IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION insights_log_metadata_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at) FROM new_rows r JOIN documents d ON d.id = r.document_id
+        WHERE d.uploaded_at IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at) FROM old_rows r JOIN documents d ON d.id = r.document_id
+        WHERE d.uploaded_at IS NOT NULL;
+    ELSE
+        INSERT INTO insights_rollup_dirty_days (day)
+        SELECT DISTINCT date(d.uploaded_at)
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        JOIN documents d ON d.id IN (o.document_id, n.document_id)
+        WHERE d.uploaded_at IS NOT NULL
+          AND (o.document_id, o.document_type, o.department, o.keywords, o.key_topics)
+              IS DISTINCT FROM (n.document_id, n.document_type, n.department, n.keywords, n.key_topics);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION insights_log_uploader_days() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Role changes move a user's uploads in or out of the uploader dimension
+    INSERT INTO insights_rollup_dirty_days (day)
+    SELECT DISTINCT date(d.uploaded_at)
+    FROM old_rows o
+    JOIN new_rows n ON n.id = o.id
+    JOIN documents d ON d.uploader_id = n.id
+    WHERE d.uploaded_at IS NOT NULL AND o.role IS DISTINCT FROM n.role;
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    spec text[];
+BEGIN
+    FOREACH spec SLICE 1 IN ARRAY ARRAY[
+        ['documents', 'insights_documents_insert', 'INSERT', 'NEW TABLE AS new_rows', 'insights_log_document_days'],
+        ['documents', 'insights_documents_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_document_days'],
+        ['documents', 'insights_documents_delete', 'DELETE', 'OLD TABLE AS old_rows', 'insights_log_document_days'],
+        ['document_metadata', 'insights_metadata_insert', 'INSERT', 'NEW TABLE AS new_rows', 'insights_log_metadata_days'],
+        ['document_metadata', 'insights_metadata_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_metadata_days'],
+        ['document_metadata', 'insights_metadata_delete', 'DELETE', 'OLD TABLE AS old_rows', 'insights_log_metadata_days'],
+        ['users', 'insights_users_update', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows', 'insights_log_uploader_days']
+    ]
+    LOOP
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = spec[2] AND tgrelid = spec[1]::regclass) THEN
+            EXECUTE 'CREATE TRIGGER ' || quote_ident(spec[2]) || ' AFTER ' || spec[3]
+                || ' ON ' || quote_ident(spec[1]) || ' REFERENCING ' || spec[4]
+                || ' FOR EACH STATEMENT EXECUTE FUNCTION ' || quote_ident(spec[5]) || '()';
+        END IF;
+    END LOOP;
+END
+$$;
+"""
+
+# Range predicate lets the uploaded_at index narrow the scan before date() is applied
+DAY_FILTER = "AND d.uploaded_at >= :start AND d.uploaded_at < :end + 1 AND date(d.uploaded_at) = ANY(:days)"
+
+
+class InsightsRollup:
+    """
+    Incremental maintenance of the insights rollup tables
+
+    Usage:
+        rollup = get_insights_rollup()
+        rollup.refresh_days([date(2026, 10, 16)])   # recompute specific days
+        rollup.rebuild()                            # recompute everything
+    """
+
+    def __init__(self, delay: Optional[float] = None):
+        self.delay = delay if delay is not None else float(os.getenv("INSIGHTS_ROLLUP_DELAY", "2"))
+        self._lock = threading.Lock()
+        self._pending_days: Set[date] = set()
+        self._pending_documents: Set[int] = set()
+        self._timer: Optional[threading.Timer] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh_days(self, days: Iterable[date] = (), document_ids: Iterable[int] = ()) -> int:
+        """
+        Recompute the rollup rows of the given upload days and of the logged dirty days
+
+        Args:
+            days: Upload days to recompute
+            document_ids: Documents whose upload day should also be recomputed
+
+        Returns:
+            Number of days refreshed
+        """
+        from backend.database import engine
+
+        days = set(days)
+        document_ids = sorted(set(document_ids))
+
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+
+            # Days logged by the triggers; a failed refresh rolls the drain back
+            days.update(row[0] for row in conn.execute(text(DIRTY_DAYS_DRAIN_SQL)).fetchall())
+
+            if document_ids:
+                rows = conn.execute(
+                    text("SELECT DISTINCT date(uploaded_at) FROM documents WHERE id = ANY(:ids) AND uploaded_at IS NOT NULL"),
+                    {"ids": document_ids}
+                ).fetchall()
+                days.update(row[0] for row in rows)
+
+            if not days:
+                return 0
+
+            params = {"days": sorted(days), "start": min(days), "end": max(days)}
+            conn.execute(text("DELETE FROM insights_daily_rollup WHERE day = ANY(:days)"), params)
+            conn.execute(text("DELETE FROM insights_keyword_rollup WHERE day = ANY(:days)"), params)
+            conn.execute(text(DAILY_ROLLUP_SQL.format(where=DAY_FILTER)), params)
+            conn.execute(text(KEYWORD_ROLLUP_SQL.format(where=DAY_FILTER)), params)
+
+        logger.debug(f"Refreshed insights rollups for {len(days)} day(s)")
+        return len(days)
+
+    def rebuild(self) -> None:
+        """Recompute both rollup tables from scratch"""
+        from backend.database import engine
+
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+            conn.execute(text("DELETE FROM insights_rollup_dirty_days"))
+            conn.execute(text("DELETE FROM insights_daily_rollup"))
+            conn.execute(text("DELETE FROM insights_keyword_rollup"))
+            conn.execute(text(DAILY_ROLLUP_SQL.format(where="")))
+            conn.execute(text(KEYWORD_ROLLUP_SQL.format(where="")))
+
+        logger.info("Rebuilt insights rollups")
+
+    def schedule(self, days: Iterable[date] = (), document_ids: Iterable[int] = ()) -> None:
+        """Queue days/documents for refresh after the debounce delay"""
+        with self._lock:
+            self._pending_days.update(days)
+            self._pending_documents.update(document_ids)
+            if not (self._pending_days or self._pending_documents):
+                return
+            if self.delay > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Refresh everything queued so far"""
+        with self._lock:
+            days, self._pending_days = self._pending_days, set()
+            document_ids, self._pending_documents = self._pending_documents, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not (days or document_ids):
+            return
+        try:
+            self.refresh_days(days, document_ids)
+        except Exception as e:
+            # The next refresh of these days (or a rebuild) repairs the rollups
+            logger.error(f"Insights rollup refresh failed for {len(days)} day(s): {e}")
+
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """Drain the dirty-day log every `interval` seconds (INSIGHTS_ROLLUP_INTERVAL, default 60)"""
+        if self._thread is not None:
+            return
+        interval = interval or float(os.getenv("INSIGHTS_ROLLUP_INTERVAL", "60"))
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.refresh_days()
+                except Exception as e:
+                    logger.error(f"Insights rollup refresh failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="insights-rollup", daemon=True)
+        self._thread.start()
+        logger.info(f"Insights rollup refresh every {interval:.0f}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread = None
+
+
+# ============================================================================
+# Session hooks
+# ============================================================================
+
+def _changed(instance, fields) -> bool:
+    state = inspect(instance)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    """after_flush: remember which upload days the flushed changes touch"""
+    from backend.database import Document, DocumentMetadata
+
+    days = session.info.setdefault("insights_rollup_days", set())
+    document_ids = session.info.setdefault("insights_rollup_documents", set())
+
+    for instance in session.new:
+        if isinstance(instance, Document):
+            document_ids.add(instance.id)
+        elif isinstance(instance, DocumentMetadata):
+            document_ids.add(instance.document_id)
+
+    for instance in session.dirty:
+        if isinstance(instance, Document) and _changed(instance, DOCUMENT_FIELDS):
+            document_ids.add(instance.id)
+            # Moving uploaded_at empties a cell on the old day too
+            days.update(value.date() for value in inspect(instance).attrs.uploaded_at.history.deleted if value)
+        elif isinstance(instance, DocumentMetadata) and _changed(instance, METADATA_FIELDS):
+            document_ids.add(instance.document_id)
+
+    for instance in session.deleted:
+        if isinstance(instance, Document) and instance.uploaded_at:
+            days.add(instance.uploaded_at.date())
+        elif isinstance(instance, DocumentMetadata):
+            document_ids.add(instance.document_id)
+
+    document_ids.discard(None)
+
+
+def _apply_changes(session: Session) -> None:
+    """after_commit: queue the touched days for refresh"""
+    days = session.info.pop("insights_rollup_days", None)
+    document_ids = session.info.pop("insights_rollup_documents", None)
+    if days or document_ids:
+        get_insights_rollup().schedule(days or (), document_ids or ())
+
+
+def _discard_changes(session: Session) -> None:
+    """after_rollback: nothing was committed"""
+    session.info.pop("insights_rollup_days", None)
+    session.info.pop("insights_rollup_documents", None)
+
+
+def register_session_events() -> None:
+    """Refresh the rollups soon after ORM commits (idempotent; registered by backend.database)"""
+    for name, listener in (
+        ("after_flush", _collect_changes),
+        ("after_commit", _apply_changes),
+        ("after_rollback", _discard_changes),
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+
+
+# Global instance
+_insights_rollup: Optional[InsightsRollup] = None
+
+
+def get_insights_rollup() -> InsightsRollup:
+    """Get or create global insights rollup"""
+    global _insights_rollup
+    if _insights_rollup is None:
+        _insights_rollup = InsightsRollup()
+    return _insights_rollup
@@ -8,6 +8,8 @@ import io
 from typing import Dict, List, Tuple
 import time
 
+from backend.utils.pdf_pages import extract_pdf_pages, page_timings, METHOD_OCR
+from backend.utils.ocr_page_cache import get_ocr_page_cache
 from .easyocr_engine import EasyOCREngine
 from .preprocessor import ImagePreprocessor
 from .postprocessor import TextPostprocessor
@@ -24,6 +26,7 @@ class OCRManager:
         Args:
             languages: List of language codes for OCR
         """
+        self.languages = languages
         self.ocr_engine = EasyOCREngine(languages=languages)
         self.preprocessor = ImagePreprocessor()
         self.postprocessor = TextPostprocessor()
@@ -55,82 +58,70 @@ class OCRManager:
         """
         start_time = time.time()
         
-        doc = fitz.open(file_path)
         all_text = []
         pages_with_ocr = []
         pages_with_text = []
         confidence_scores = []
+        
+        # Pages are extracted (and scanned pages OCR'd) in parallel, returned in page order
+        extraction = extract_pdf_pages(
+            file_path,
+            ocr=True,
+            preprocessing_level=preprocessing_level,
+            languages=self.languages,
+            ocr_manager=self
+        )
+        total_pages = extraction['page_count']
         ocr_details = {
-            'total_pages': len(doc),
+            'total_pages': total_pages,
             'scanned_pages': 0,
             'text_pages': 0,
             'preprocessing_applied': [],
-            'rotation_corrections': []
+            'rotation_corrections': [],
+            'workers': extraction['workers'],
+            'ocr_workers': extraction['ocr_workers'],
+            'page_timings': page_timings(extraction['pages']),
+            'cache_hits': 0
         }
         
-        # Extract tables later (after doc is closed) to avoid conflicts
+        # Tables are extracted separately below
         tables = []
         
-        for page_num, page in enumerate(doc, start=1):
-            # Try to extract text directly
-            page_text = page.get_text().strip()
+        for page in extraction['pages']:
+            page_num = page['page']
             
-            if page_text:
+            if page['method'] != METHOD_OCR:
                 # Page has digital text
-                all_text.append(page_text)
+                all_text.append(page['text'].strip())
                 pages_with_text.append(page_num)
                 ocr_details['text_pages'] += 1
                 confidence_scores.append(1.0)  # Digital text = 100% confidence
+                continue
+            
+            # Page was scanned - OCR'd with rotation correction
+            pages_with_ocr.append(page_num)
+            ocr_details['scanned_pages'] += 1
+            if page.get('cache_hit'):
+                ocr_details['cache_hits'] += 1
+            if page.get('rotation'):
+                ocr_details['rotation_corrections'].append({
+                    'page': page_num,
+                    'angle': page['rotation']
+                })
+            
+            if page['text']:
+                all_text.append(page['text'])
+                confidence_scores.append(page['confidence'])
+                ocr_details['preprocessing_applied'].append({
+                    'page': page_num,
+                    'methods': page['preprocessing_applied']
+                })
             else:
-                # Page is scanned - apply OCR with rotation correction
-                print(f"Page {page_num} is scanned, applying OCR...")
-                
-                # Convert page to image
-                pix = page.get_pixmap(dpi=300)  # Higher DPI for better OCR
-                img_data = pix.tobytes("png")
-                
-                # Step 1: Detect and correct rotation
-                try:
-                    corrected_img, rotation_angle = self.preprocessor.detect_and_correct_rotation(img_data)
-                    if rotation_angle != 0:
-                        print(f"  → Corrected rotation: {rotation_angle}°")
-                        ocr_details['rotation_corrections'].append({
-                            'page': page_num,
-                            'angle': rotation_angle
-                        })
-                    img_data = corrected_img
-                except Exception as e:
-                    print(f"  → Rotation correction failed: {str(e)}")
-                
-                # Step 2: Preprocess image
-                processed_img, preprocessing_applied = self.preprocessor.preprocess(
-                    img_data, 
-                    preprocessing_level=preprocessing_level
-                )
-                
-                # Step 3: Extract text with OCR
-                ocr_result = self.ocr_engine.extract_text(processed_img, detail=True)
-                
-                if ocr_result['text']:
-                    all_text.append(ocr_result['text'])
-                    confidence_scores.append(ocr_result['confidence'])
-                    pages_with_ocr.append(page_num)
-                    ocr_details['scanned_pages'] += 1
-                    ocr_details['preprocessing_applied'].append({
-                        'page': page_num,
-                        'methods': preprocessing_applied
-                    })
-                else:
-                    # No text found even with OCR
-                    all_text.append(f"[Page {page_num}: No text detected]")
-                    confidence_scores.append(0.0)
-                    pages_with_ocr.append(page_num)
-                    ocr_details['scanned_pages'] += 1
-        
-        total_pages = len(doc)
-        doc.close()
-        
-        # Extract tables AFTER closing the document to avoid conflicts
+                # No text found even with OCR
+                all_text.append(f"[Page {page_num}: No text detected]")
+                confidence_scores.append(0.0)
+        
+        # Extract tables (separate pass over the file)
         if extract_tables:
             try:
                 tables = self.table_extractor.extract_tables_from_pdf(file_path)
@@ -180,6 +171,57 @@ class OCRManager:
         
         return result
     
+    def ocr_page_image(self, img_data: bytes, preprocessing_level='medium') -> Dict:
+        """
+        OCR one rendered page: rotation correction, preprocessing, EasyOCR
+        
+        Args:
+            img_data: PNG bytes of the rendered page
+            preprocessing_level: 'light', 'medium', 'heavy'
+            
+        Returns:
+            dict: {'text', 'confidence', 'rotation', 'preprocessing_applied'}
+            ('cache_hit': True when served from the page cache)
+        """
+        return get_ocr_page_cache().get_or_compute(
+            'easyocr',
+            self._cache_settings(preprocessing_level),
+            img_data,
+            lambda: self._ocr_page_image(img_data, preprocessing_level)
+        )
+    
+    def _cache_settings(self, preprocessing_level: str, extract_tables=False) -> str:
+        """Page cache key part for everything besides the image that changes OCR output"""
+        settings = f"{preprocessing_level}:{'+'.join(self.languages)}"
+        return settings + ":tables" if extract_tables else settings
+    
+    def _ocr_page_image(self, img_data: bytes, preprocessing_level: str) -> Dict:
+        # Step 1: Detect and correct rotation
+        rotation_angle = 0
+        try:
+            corrected_img, rotation_angle = self.preprocessor.detect_and_correct_rotation(img_data)
+            if rotation_angle != 0:
+                print(f"  → Corrected rotation: {rotation_angle}°")
+            img_data = corrected_img
+        except Exception as e:
+            print(f"  → Rotation correction failed: {str(e)}")
+        
+        # Step 2: Preprocess image
+        processed_img, preprocessing_applied = self.preprocessor.preprocess(
+            img_data, 
+            preprocessing_level=preprocessing_level
+        )
+        
+        # Step 3: Extract text with OCR
+        ocr_result = self.ocr_engine.extract_text(processed_img, detail=True)
+        
+        return {
+            'text': ocr_result['text'],
+            'confidence': ocr_result['confidence'] if ocr_result['text'] else 0.0,
+            'rotation': rotation_angle,
+            'preprocessing_applied': preprocessing_applied
+        }
+    
     def extract_from_image(self, file_path: str, preprocessing_level='medium', extract_tables=True) -> Dict:
         """
         Extract text from image file with rotation correction and table extraction
@@ -198,6 +240,18 @@ class OCRManager:
         with open(file_path, 'rb') as f:
             img_data = f.read()
         
+        result = get_ocr_page_cache().get_or_compute(
+            'easyocr-image',
+            self._cache_settings(preprocessing_level, extract_tables),
+            img_data,
+            lambda: self._extract_from_image_data(img_data, preprocessing_level, extract_tables)
+        )
+        result['extraction_time'] = time.time() - start_time
+        return result
+    
+    def _extract_from_image_data(self, img_data: bytes, preprocessing_level: str, extract_tables: bool) -> Dict:
+        start_time = time.time()
+        
         # Step 1: Detect and correct rotation
         rotation_angle = 0
         try:
@@ -11,6 +11,8 @@ import fitz  # PyMuPDF
 from typing import List, Dict, Tuple
 import pandas as pd
 
+from backend.utils.ocr_page_cache import get_ocr_page_cache
+
 
 class TableExtractor:
     """Extract tables from documents with structure preservation"""
@@ -42,8 +44,15 @@ class TableExtractor:
                 # If no digital tables found, try OCR-based extraction
                 pix = page.get_pixmap(dpi=300)
                 img_data = pix.tobytes("png")
+                del pix
                 
-                scanned_tables = TableExtractor._extract_tables_from_image(img_data)
+                # Unchanged scanned pages reuse their cached table detection
+                scanned_tables = get_ocr_page_cache().get_or_compute(
+                    'opencv-tables',
+                    '300dpi',
+                    img_data,
+                    lambda: {'text': '', 'confidence': None, 'tables': TableExtractor._extract_tables_from_image(img_data)}
+                )['tables']
                 for table in scanned_tables:
                     table['page'] = page_num
                     table['source'] = 'ocr'
@@ -0,0 +1,260 @@
+"""
+Page-level OCR result cache
+
+OCR results are keyed by (engine, settings, SHA256 of the page image), so a
+re-uploaded or re-scraped PDF only pays for the pages whose rendering
+actually changed; amended gazettes usually differ by a page or two. Saves
+EasyOCR CPU time and Cloud Vision quota. Two tiers:
+- In-process LRU (OCR_CACHE_MEMORY_SIZE entries)
+- Postgres table ocr_page_cache, shared across workers and restarts
+  (OCR_CACHE_BACKEND=postgres|memory|none)
+"""
+import copy
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Result keys stored in their own columns; everything else goes to details
+_COLUMN_KEYS = ("text", "confidence", "tables")
+
+
+def page_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def _json_safe(value):
+    """Convert numpy scalars/arrays and tuples (bounding boxes) for JSONB storage"""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+class OCRPageCache:
+    """
+    Two-tier cache of per-page OCR results
+
+    Usage:
+        cache = get_ocr_page_cache()
+        result = cache.get_or_compute("easyocr", "medium:en+hi", png_bytes, lambda: run_ocr(png_bytes))
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        memory_size: Optional[int] = None,
+        max_store_entries: Optional[int] = None,
+        max_age_days: Optional[int] = None
+    ):
+        self.backend = (backend or os.getenv("OCR_CACHE_BACKEND", "postgres")).lower()
+        self.memory_size = memory_size or int(os.getenv("OCR_CACHE_MEMORY_SIZE", "512"))
+        self.max_store_entries = max_store_entries or int(os.getenv("OCR_CACHE_MAX_ENTRIES", "200000"))
+        self.max_age_days = max_age_days or int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "365"))
+        self.evict_every = 500  # Run store eviction after this many writes
+
+        self._memory: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._stats = {
+            "memory_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "store_evictions": 0,
+            "store_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    @property
+    def store_enabled(self) -> bool:
+        return self.backend == "postgres"
+
+    def get(self, engine: str, settings: str, image_hash: str) -> Optional[Dict]:
+        """Cached result for a page image (a copy), or None"""
+        if not self.enabled:
+            return None
+
+        key = (engine, settings, image_hash)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return copy.deepcopy(self._memory[key])
+
+        result = self._store_get(engine, settings, image_hash) if self.store_enabled else None
+        with self._lock:
+            if result is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["store_hits"] += 1
+        self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, engine: str, settings: str, image_hash: str, result: Dict) -> None:
+        if not self.enabled:
+            return
+
+        self._remember((engine, settings, image_hash), copy.deepcopy(result))
+        with self._lock:
+            self._stats["writes"] += 1
+        if self.store_enabled:
+            self._store_put(engine, settings, image_hash, result)
+
+    def get_or_compute(self, engine: str, settings: str, image_bytes: bytes, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached result for image_bytes, or compute and cache it"""
+        image_hash = page_hash(image_bytes)
+        result = self.get(engine, settings, image_hash)
+        if result is not None:
+            result["cache_hit"] = True
+            return result
+
+        result = compute()
+        self.put(engine, settings, image_hash, result)
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["store_hits"]) / lookups if lookups else 0.0
+        stats["backend"] = self.backend
+        return stats
+
+    def evict(self) -> int:
+        """Trim the store tier to max_store_entries and drop entries unused for max_age_days"""
+        if not self.store_enabled:
+            return 0
+
+        from sqlalchemy import text
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+            deleted = db.execute(
+                text("DELETE FROM ocr_page_cache WHERE last_used_at < :cutoff"),
+                {"cutoff": cutoff}
+            ).rowcount or 0
+            # LRU trim: everything older than the Nth most recently used entry
+            deleted += db.execute(
+                text(
+                    "DELETE FROM ocr_page_cache WHERE last_used_at < ("
+                    "SELECT last_used_at FROM ocr_page_cache "
+                    "ORDER BY last_used_at DESC OFFSET :max_entries LIMIT 1)"
+                ),
+                {"max_entries": self.max_store_entries}
+            ).rowcount or 0
+            db.commit()
+            with self._lock:
+                self._stats["store_evictions"] += deleted
+            if deleted:
+                logger.info(f"Evicted {deleted} OCR page cache entries")
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"OCR page cache eviction failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _remember(self, key: tuple, result: Dict) -> None:
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _store_get(self, engine: str, settings: str, image_hash: str) -> Optional[Dict]:
+        from sqlalchemy import text
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            # Fetch and touch LRU bookkeeping in one round trip
+            row = db.execute(
+                text(
+                    "UPDATE ocr_page_cache SET last_used_at = now(), hit_count = hit_count + 1 "
+                    "WHERE engine = :engine AND settings = :settings AND page_hash = :page_hash "
+                    "RETURNING text, confidence, tables, details"
+                ),
+                {"engine": engine, "settings": settings, "page_hash": image_hash}
+            ).fetchone()
+            db.commit()
+            if row is None:
+                return None
+            result = dict(row.details or {})
+            result.update({"text": row.text, "confidence": row.confidence})
+            if row.tables is not None:
+                result["tables"] = row.tables
+            return result
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._stats["store_errors"] += 1
+            logger.warning(f"OCR page cache lookup failed, continuing without store tier: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _store_put(self, engine: str, settings: str, image_hash: str, result: Dict) -> None:
+        from sqlalchemy.dialects.postgresql import insert
+        from backend.database import SessionLocal, OCRPageCacheEntry
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            statement = insert(OCRPageCacheEntry.__table__).values(
+                engine=engine,
+                settings=settings,
+                page_hash=image_hash,
+                text=result.get("text") or "",
+                confidence=result.get("confidence"),
+                tables=_json_safe(result.get("tables")),
+                details=_json_safe({k: v for k, v in result.items() if k not in _COLUMN_KEYS and k != "cache_hit"}),
+                hit_count=0,
+                created_at=now,
+                last_used_at=now,
+            ).on_conflict_do_nothing(index_elements=["engine", "settings", "page_hash"])
+            db.execute(statement)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._stats["store_errors"] += 1
+            logger.warning(f"OCR page cache write failed: {e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self._writes_since_evict += 1
+            run_eviction = self._writes_since_evict >= self.evict_every
+            if run_eviction:
+                self._writes_since_evict = 0
+        if run_eviction:
+            self.evict()
+
+
+# Global OCR page cache instance
+_ocr_page_cache = None
+
+
+def get_ocr_page_cache() -> OCRPageCache:
+    """Get or create global OCR page cache"""
+    global _ocr_page_cache
+    if _ocr_page_cache is None:
+        _ocr_page_cache = OCRPageCache()
+    return _ocr_page_cache
@@ -0,0 +1,259 @@
+"""
+Page-parallel PDF extraction
+
+PyMuPDF text extraction and OCR are CPU bound, so pages are split into
+contiguous batches and fanned out over a process pool. Each worker opens the
+PDF itself and renders at most one page pixmap at a time; only page text and
+timings cross the process boundary, and at most two batches per worker are
+in flight. Memory is therefore bounded by the worker count, not the page
+count. Results are joined back in page order.
+
+Every OCR process loads its own OCR model (hundreds of MB), so OCR is kept
+off the text pool: pages without a text layer are OCR'd afterwards, in the
+calling process with its OCRManager (PDF_OCR_WORKERS=1, the default) or over
+a separate pool of PDF_OCR_WORKERS processes.
+
+Small documents are extracted in-process, where a pool would cost more than
+it saves.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Processes that OCR (each loads an OCR model); 1 keeps OCR in the calling process
+PDF_OCR_WORKERS = max(1, int(os.getenv("PDF_OCR_WORKERS", "1")))
+# Below this many pages extraction stays in the calling process
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+# Pages per task: text pages take milliseconds, OCR pages take seconds
+TEXT_BATCH_PAGES = 25
+OCR_BATCH_PAGES = 1
+OCR_DPI = 300
+
+METHOD_TEXT = "text"
+METHOD_OCR = "ocr"
+METHOD_EMPTY = "empty"
+
+
+# OCR managers are expensive (model load), so each OCR process keeps its own
+_ocr_managers: Dict[tuple, object] = {}
+
+
+def _get_ocr_manager(languages: Sequence[str]):
+    key = tuple(languages)
+    if key not in _ocr_managers:
+        from backend.utils.ocr.ocr_manager import OCRManager
+        _ocr_managers[key] = OCRManager(languages=list(languages))
+    return _ocr_managers[key]
+
+
+def _extract_page(doc, page_index: int, ocr: bool, preprocessing_level: str, languages, ocr_manager=None) -> Dict:
+    start = time.perf_counter()
+    page = doc[page_index]
+    text = page.get_text()
+    result = {"page": page_index + 1, "text": text, "method": METHOD_TEXT, "confidence": 1.0}
+
+    if not text.strip():
+        if ocr:
+            # Render, OCR and drop the pixmap before the next page is touched
+            pix = page.get_pixmap(dpi=OCR_DPI)
+            img_data = pix.tobytes("png")
+            del pix
+            manager = ocr_manager or _get_ocr_manager(languages)
+            result.update(manager.ocr_page_image(img_data, preprocessing_level))
+            result["method"] = METHOD_OCR
+        else:
+            result.update({"method": METHOD_EMPTY, "confidence": 0.0})
+
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _extract_batch(
+    file_path: str,
+    page_indexes: List[int],
+    ocr: bool,
+    preprocessing_level: str,
+    languages: Sequence[str],
+    ocr_manager=None
+) -> List[Dict]:
+    doc = fitz.open(file_path)
+    try:
+        return [
+            _extract_page(doc, index, ocr, preprocessing_level, languages, ocr_manager)
+            for index in page_indexes
+        ]
+    finally:
+        doc.close()
+
+
+def _run_parallel(
+    pool: ProcessPoolExecutor,
+    workers: int,
+    file_path: str,
+    batches: List[List[int]],
+    ocr: bool,
+    preprocessing_level: str,
+    languages
+) -> List[Dict]:
+    pages: List[Dict] = []
+    remaining = iter(batches)
+    pending = set()
+
+    def submit_next():
+        batch = next(remaining, None)
+        if batch is not None:
+            pending.add(pool.submit(_extract_batch, file_path, batch, ocr, preprocessing_level, tuple(languages)))
+
+    for _ in range(workers * 2):
+        submit_next()
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            pages.extend(future.result())
+            submit_next()
+    return pages
+
+
+def _batches(page_indexes: List[int], batch_size: int) -> List[List[int]]:
+    return [page_indexes[i:i + batch_size] for i in range(0, len(page_indexes), batch_size)]
+
+
+def _extract_pages(
+    pool_getter,
+    workers: int,
+    file_path: str,
+    batches: List[List[int]],
+    ocr: bool,
+    preprocessing_level: str,
+    languages,
+    ocr_manager=None
+) -> Tuple[List[Dict], int]:
+    """Extract batches over the pool when it pays off, otherwise in-process; returns (pages, workers used)"""
+    if workers > 1 and len(batches) > 1:
+        try:
+            return _run_parallel(pool_getter(), workers, file_path, batches, ocr, preprocessing_level, languages), workers
+        except BrokenProcessPool:
+            logger.error("PDF worker pool crashed, extracting in-process")
+            shutdown_page_pool()
+
+    pages = [
+        page
+        for batch in batches
+        for page in _extract_batch(file_path, batch, ocr, preprocessing_level, languages, ocr_manager)
+    ]
+    return pages, 1
+
+
+def extract_pdf_pages(
+    file_path: str,
+    ocr: bool = False,
+    preprocessing_level: str = "medium",
+    languages: Sequence[str] = ("en", "hi"),
+    ocr_manager=None
+) -> Dict:
+    """
+    Extract every page of a PDF, in parallel for larger documents
+
+    Args:
+        file_path: Path to PDF file
+        ocr: OCR pages that have no text layer (otherwise they come back empty)
+        preprocessing_level: OCR preprocessing ('light', 'medium', 'heavy')
+        languages: OCR languages
+        ocr_manager: OCRManager to use when OCR runs in-process
+
+    Returns:
+        dict: {
+            'pages': [{'page', 'text', 'method', 'confidence', 'seconds', ...}] in page order,
+            'page_count': int,
+            'workers': int (text extraction processes, 1 when extracted in-process),
+            'ocr_workers': int (OCR processes, 1 when OCR'd in-process or no page needed OCR),
+            'elapsed': float
+        }
+    """
+    start = time.perf_counter()
+    with fitz.open(file_path) as doc:
+        page_count = len(doc)
+
+    # Text layer of every page; OCR never runs in the text pool
+    text_workers = PDF_WORKERS if page_count >= PARALLEL_MIN_PAGES else 1
+    pages, workers = _extract_pages(
+        get_page_pool, text_workers, file_path,
+        _batches(list(range(page_count)), TEXT_BATCH_PAGES), False, preprocessing_level, languages
+    )
+
+    ocr_workers = 1
+    scanned = sorted(page["page"] - 1 for page in pages if page["method"] == METHOD_EMPTY)
+    if ocr and scanned:
+        ocr_pages, ocr_workers = _extract_pages(
+            get_ocr_pool, min(PDF_OCR_WORKERS, len(scanned)), file_path,
+            _batches(scanned, OCR_BATCH_PAGES), True, preprocessing_level, languages, ocr_manager
+        )
+        text_seconds = {page["page"]: page["seconds"] for page in pages}
+        for page in ocr_pages:
+            page["seconds"] = round(page["seconds"] + text_seconds[page["page"]], 4)
+        ocr_by_page = {page["page"]: page for page in ocr_pages}
+        pages = [ocr_by_page.get(page["page"], page) for page in pages]
+
+    pages.sort(key=lambda page: page["page"])
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Extracted {page_count} pages from {os.path.basename(file_path)} in {elapsed:.2f}s "
+        f"({workers} workers, {len(scanned) if ocr else 0} pages OCR'd by {ocr_workers})"
+    )
+    return {"pages": pages, "page_count": page_count, "workers": workers, "ocr_workers": ocr_workers, "elapsed": elapsed}
+
+
+def page_timings(pages: List[Dict]) -> List[Dict]:
+    """Per-page timing summary for logs and OCR details"""
+    return [{"page": page["page"], "method": page["method"], "seconds": page["seconds"]} for page in pages]
+
+
+# Global instances
+_page_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _spawn_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned: the app process has live threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def get_page_pool() -> ProcessPoolExecutor:
+    """Get or create the shared text extraction pool (PDF_WORKERS processes)"""
+    global _page_pool
+    with _pool_lock:
+        if _page_pool is None:
+            _page_pool = _spawn_pool(PDF_WORKERS)
+        return _page_pool
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Get or create the shared OCR pool (PDF_OCR_WORKERS processes, one OCR model each)"""
+    global _ocr_pool
+    with _pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = _spawn_pool(PDF_OCR_WORKERS)
+        return _ocr_pool
+
+
+def shutdown_page_pool() -> None:
+    """Shut down the text and OCR pools"""
+    global _page_pool, _ocr_pool
+    with _pool_lock:
+        for pool in (_page_pool, _ocr_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
+        _ocr_pool = None
@@ -1,9 +1,15 @@
 """
 Quota Management System for Free-Tier Cloud APIs
 Tracks and enforces usage limits for Google Cloud services
+
+Usage counters are stored in SQLite next to the legacy JSON file
+(QUOTA_STORAGE_BACKEND=sqlite|json); each consume is one upsert instead of a
+full-file rewrite, and the check-and-increment is atomic across processes.
 """
 import json
 import os
+import threading
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
@@ -11,6 +17,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+QUOTA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_usage (
+    service TEXT NOT NULL,
+    period TEXT NOT NULL,
+    period_key TEXT NOT NULL,
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (service, period, period_key)
+);
+"""
+
 class QuotaManager:
     """
     Manages API quotas for free-tier cloud services
@@ -22,9 +38,14 @@ class QuotaManager:
     - Google Cloud Vision OCR: 1,000 requests/month
     """
     
-    def __init__(self, quota_file: str = "data/quota_usage.json"):
+    def __init__(self, quota_file: str = "data/quota_usage.json", backend: Optional[str] = None):
         self.quota_file = Path(quota_file)
         self.quota_file.parent.mkdir(parents=True, exist_ok=True)
+        self.backend = (backend or os.getenv("QUOTA_STORAGE_BACKEND", "sqlite")).lower()
+        self._store = None
+        if self.backend == "sqlite":
+            from backend.utils.sqlite_store import SQLiteStore
+            self._store = SQLiteStore(str(self.quota_file.with_suffix(".db")), QUOTA_SCHEMA)
         
         # Free tier limits
         self.limits = {
@@ -49,9 +70,22 @@ class QuotaManager:
         }
         
         self.usage = self._load_usage()
+        # Embedding workers consume quota from several threads
+        self._lock = threading.RLock()
+    
+    def _empty_usage(self) -> Dict[str, Any]:
+        return {
+            "gemini_embeddings": {"daily": {}, "minute": {}},
+            "gemini_chat": {"daily": {}, "minute": {}},
+            "speech_to_text": {"monthly": {}},
+            "vision_ocr": {"monthly": {}}
+        }
     
     def _load_usage(self) -> Dict[str, Any]:
         """Load usage data from file"""
+        if self._store is not None:
+            return self._load_usage_sqlite()
+        
         if self.quota_file.exists():
             try:
                 with open(self.quota_file, 'r') as f:
@@ -60,15 +94,73 @@ class QuotaManager:
                 logger.error(f"Error loading quota file: {e}")
         
         # Initialize empty usage
-        return {
-            "gemini_embeddings": {"daily": {}, "minute": {}},
-            "gemini_chat": {"daily": {}, "minute": {}},
-            "speech_to_text": {"monthly": {}},
-            "vision_ocr": {"monthly": {}}
-        }
+        return self._empty_usage()
+    
+    def _load_usage_sqlite(self) -> Dict[str, Any]:
+        """Load usage rows, importing the legacy JSON file into an empty table"""
+        from backend.utils.sqlite_store import read_legacy_json, retire_legacy_json
+        
+        if self._store.is_empty("quota_usage"):
+            legacy = read_legacy_json(self.quota_file)
+            if isinstance(legacy, dict):
+                with self._store.transaction() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO quota_usage (service, period, period_key, used) VALUES (?, ?, ?, ?)",
+                        [
+                            (service, period, key, used)
+                            for service, periods in legacy.items()
+                            for period, counts in periods.items()
+                            for key, used in counts.items()
+                        ]
+                    )
+                retire_legacy_json(self.quota_file)
+        
+        usage = self._empty_usage()
+        for row in self._store.fetchall("SELECT service, period, period_key, used FROM quota_usage"):
+            usage.setdefault(row["service"], {}).setdefault(row["period"], {})[row["period_key"]] = row["used"]
+        return usage
+    
+    def _refresh_usage(self, service: str):
+        """Pick up current-period counters written by other processes (SQLite backend)"""
+        if self._store is None:
+            return
+        keys = [(period, self._get_current_period_key(period)) for period in ("daily", "minute", "monthly")]
+        rows = self._store.fetchall(
+            "SELECT period, period_key, used FROM quota_usage WHERE service = ? AND ("
+            + " OR ".join("(period = ? AND period_key = ?)" for _ in keys) + ")",
+            [service] + [value for key in keys for value in key]
+        )
+        for row in rows:
+            self.usage.setdefault(service, {}).setdefault(row["period"], {})[row["period_key"]] = row["used"]
+    
+    def _record_usage(self, service: str, period: str, amount: int):
+        """Add amount to the current period's counter"""
+        key = self._get_current_period_key(period)
+        if self._store is None:
+            self.usage[service].setdefault(period, {})
+            self.usage[service][period][key] = self.usage[service][period].get(key, 0) + amount
+            return
+        
+        with self._store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO quota_usage (service, period, period_key, used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (service, period, period_key) DO UPDATE SET used = used + excluded.used",
+                (service, period, key, amount)
+            )
+            used = conn.execute(
+                "SELECT used FROM quota_usage WHERE service = ? AND period = ? AND period_key = ?",
+                (service, period, key)
+            ).fetchone()["used"]
+        self.usage[service].setdefault(period, {})[key] = used
+    
+    def _transaction(self):
+        return self._store.transaction() if self._store is not None else nullcontext()
     
     def _save_usage(self):
         """Save usage data to file"""
+        if self._store is not None:
+            # Rows are written as they change (_record_usage)
+            return
         try:
             with open(self.quota_file, 'w') as f:
                 json.dump(self.usage, f, indent=2)
@@ -91,30 +183,27 @@ class QuotaManager:
     def _cleanup_old_data(self, service: str):
         """Remove old usage data to keep file size manageable"""
         now = datetime.now()
+        cutoffs = {
+            "daily": (now - timedelta(days=7)).strftime("%Y-%m-%d"),        # keep last 7 days
+            "minute": (now - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M"),  # keep last 2 hours
+            "monthly": (now - timedelta(days=400)).strftime("%Y-%m"),       # keep last 13 months
+        }
         
-        # Clean daily data (keep last 7 days)
-        if "daily" in self.usage[service]:
-            cutoff_date = (now - timedelta(days=7)).strftime("%Y-%m-%d")
-            self.usage[service]["daily"] = {
-                k: v for k, v in self.usage[service]["daily"].items()
-                if k >= cutoff_date
-            }
-        
-        # Clean minute data (keep last 2 hours)
-        if "minute" in self.usage[service]:
-            cutoff_time = (now - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
-            self.usage[service]["minute"] = {
-                k: v for k, v in self.usage[service]["minute"].items()
-                if k >= cutoff_time
-            }
+        for period, cutoff in cutoffs.items():
+            if period in self.usage[service]:
+                self.usage[service][period] = {
+                    k: v for k, v in self.usage[service][period].items()
+                    if k >= cutoff
+                }
         
-        # Clean monthly data (keep last 13 months)
-        if "monthly" in self.usage[service]:
-            cutoff_month = (now - timedelta(days=400)).strftime("%Y-%m")
-            self.usage[service]["monthly"] = {
-                k: v for k, v in self.usage[service]["monthly"].items()
-                if k >= cutoff_month
-            }
+        if self._store is not None:
+            self._store.execute(
+                "DELETE FROM quota_usage WHERE service = ? AND ("
+                "(period = 'daily' AND period_key < ?) OR "
+                "(period = 'minute' AND period_key < ?) OR "
+                "(period = 'monthly' AND period_key < ?))",
+                (service, cutoffs["daily"], cutoffs["minute"], cutoffs["monthly"])
+            )
     
     def check_quota(self, service: str, amount: int = 1) -> Tuple[bool, str, Dict[str, Any]]:
         """
@@ -130,6 +219,7 @@ class QuotaManager:
         if service not in self.limits:
             return True, "", {}
         
+        self._refresh_usage(service)
         limits = self.limits[service]
         service_usage = self.usage.get(service, {})
         
@@ -188,46 +278,69 @@ class QuotaManager:
         Returns:
             True if quota was consumed, False if quota exceeded
         """
-        allowed, error_msg, quota_info = self.check_quota(service, amount)
-        
-        if not allowed:
-            logger.warning(f"Quota exceeded: {error_msg}")
-            return False
-        
-        # Initialize service usage if not exists
-        if service not in self.usage:
-            self.usage[service] = {}
-        
-        limits = self.limits[service]
-        
-        # Update daily usage
-        if "daily_limit" in limits:
-            daily_key = self._get_current_period_key("daily")
-            if "daily" not in self.usage[service]:
-                self.usage[service]["daily"] = {}
-            self.usage[service]["daily"][daily_key] = self.usage[service]["daily"].get(daily_key, 0) + amount
-        
-        # Update minute usage
-        if "minute_limit" in limits:
-            minute_key = self._get_current_period_key("minute")
-            if "minute" not in self.usage[service]:
-                self.usage[service]["minute"] = {}
-            self.usage[service]["minute"][minute_key] = self.usage[service]["minute"].get(minute_key, 0) + amount
-        
-        # Update monthly usage
-        if "monthly_limit" in limits:
-            monthly_key = self._get_current_period_key("monthly")
-            if "monthly" not in self.usage[service]:
-                self.usage[service]["monthly"] = {}
-            self.usage[service]["monthly"][monthly_key] = self.usage[service]["monthly"].get(monthly_key, 0) + amount
-        
-        # Cleanup old data and save
-        self._cleanup_old_data(service)
-        self._save_usage()
+        with self._lock:
+            return self._consume_quota_locked(service, amount)
+    
+    def _consume_quota_locked(self, service: str, amount: int) -> bool:
+        """Check and record usage; caller holds self._lock"""
+        # With SQLite the check and the increment share one write transaction,
+        # so concurrent processes cannot both take the last unit
+        with self._transaction():
+            allowed, error_msg, quota_info = self.check_quota(service, amount)
+            
+            if not allowed:
+                logger.warning(f"Quota exceeded: {error_msg}")
+                return False
+            
+            # Initialize service usage if not exists
+            if service not in self.usage:
+                self.usage[service] = {}
+            
+            limits = self.limits[service]
+            
+            # Update daily / minute / monthly usage
+            for period in ("daily", "minute", "monthly"):
+                if f"{period}_limit" in limits:
+                    self._record_usage(service, period, amount)
+            
+            # Cleanup old data and save
+            self._cleanup_old_data(service)
+            self._save_usage()
         
         logger.info(f"Consumed {amount} quota for {service}")
         return True
     
+    def seconds_until_available(self, service: str, amount: int = 1) -> Optional[float]:
+        """
+        How long to wait before `amount` units fit in the quota
+        
+        Returns:
+            0 if allowed now, seconds until the next minute window if only the
+            per-minute rate limit is exhausted, None if a daily/monthly quota
+            is exhausted (waiting will not help)
+        """
+        allowed, _, quota_info = self.check_quota(service, amount)
+        if allowed:
+            return 0.0
+        if quota_info.get("period") != "minute" or amount > quota_info.get("limit", 0):
+            return None
+        now = datetime.now()
+        return 60.0 - now.second - now.microsecond / 1_000_000
+    
+    def reserve_quota(self, service: str, amount: int = 1) -> Tuple[bool, Optional[float]]:
+        """
+        Atomically consume quota if available (thread-safe)
+        
+        Returns:
+            (reserved, wait_seconds) - wait_seconds is None when the quota
+            cannot be reserved until the next day/month
+        """
+        with self._lock, self._transaction():
+            wait = self.seconds_until_available(service, amount)
+            if wait == 0.0:
+                return self._consume_quota_locked(service, amount), 0.0
+            return False, wait
+    
     def get_quota_status(self, service: str = None) -> Dict[str, Any]:
         """
         Get current quota status for service(s)
@@ -249,6 +362,7 @@ class QuotaManager:
             if svc not in self.limits:
                 continue
             
+            self._refresh_usage(svc)
             limits = self.limits[svc]
             service_usage = self.usage.get(svc, {})
             svc_status = {"service": svc, "limits": limits}
@@ -307,6 +421,12 @@ class QuotaManager:
         else:
             self.usage[service] = {}
         
+        if self._store is not None:
+            if period:
+                self._store.execute("DELETE FROM quota_usage WHERE service = ? AND period = ?", (service, period))
+            else:
+                self._store.execute("DELETE FROM quota_usage WHERE service = ?", (service,))
+        
         self._save_usage()
         logger.info(f"Reset quota for {service}" + (f" ({period})" if period else ""))
 
@@ -0,0 +1,125 @@
+"""
+Embedded SQLite store for the local JSON-file stores
+
+Scraping storage, session storage and quota usage used to rewrite a whole
+JSON file on every write. SQLiteStore gives them indexed lookups and
+row-level writes instead:
+- WAL journal, so readers never block the writer and several processes
+  (uvicorn workers, scheduler) can share one file
+- One connection per store guarded by an RLock, so ParallelProcessor and
+  embedding worker threads serialize cleanly
+- transaction() nests, so callers can batch many writes into one commit
+"""
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 30000
+
+
+class SQLiteStore:
+    """Thread-safe SQLite connection with WAL mode and nested transactions"""
+
+    def __init__(self, db_path: str, schema: str = ""):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Transactions are managed explicitly (isolation_level=None)
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._depth = 0
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            if schema:
+                self._conn.executescript(schema)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Write transaction; nested calls join the outermost one
+
+        BEGIN IMMEDIATE takes the write lock up front, so read-modify-write
+        sequences (next id, counters) are safe across processes too.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self._conn
+                finally:
+                    self._depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params))
+
+    def fetchone(self, sql: str, params: Iterable[Any] = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchone()
+
+    def fetchall(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def is_empty(self, table: str) -> bool:
+        return self.fetchone(f"SELECT 1 FROM {table} LIMIT 1") is None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def dumps(data: Any) -> str:
+    """Serialize a record the way the JSON stores did (datetimes as strings)"""
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+def loads(text: Optional[str]) -> Any:
+    return json.loads(text) if text else None
+
+
+def read_legacy_json(path: Path) -> Optional[Any]:
+    """Read a legacy JSON store for import (None if missing or unreadable)"""
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read {path} for migration: {e}")
+        return None
+
+
+def retire_legacy_json(path: Path) -> None:
+    """Rename an imported JSON store to *.json.migrated so it is not imported twice"""
+    if path.exists():
+        path.rename(path.with_name(path.name + ".migrated"))
+        logger.info(f"Migrated {path} to SQLite")
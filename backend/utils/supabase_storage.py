@@ -1,5 +1,10 @@
 from supabase import create_client, Client
+import base64
+import hashlib
 import os
+from typing import BinaryIO, Optional, Tuple
+
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,21 +13,167 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "Docs")
 
+# Supabase's resumable (TUS) endpoint requires every chunk but the last to be exactly 6 MB
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+# Files larger than this go through the resumable endpoint, smaller ones in one request
+RESUMABLE_THRESHOLD = int(os.getenv("SUPABASE_RESUMABLE_THRESHOLD", str(RESUMABLE_CHUNK_SIZE)))
+READ_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_RETRIES = 3
+
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+
+class ResumableUpload:
+    """
+    Chunked upload to Supabase Storage over the TUS resumable protocol
+
+    Bytes are buffered only up to one 6 MB chunk. A failed chunk is retried
+    from the offset the server reports, so a dropped connection does not
+    restart the whole upload.
+    """
+
+    def __init__(self, object_name: str, size: int, content_type: str = "application/octet-stream"):
+        self.object_name = object_name
+        self.size = size
+        self.offset = 0
+        self._buffer = bytearray()
+        self._client = httpx.Client(timeout=httpx.Timeout(60.0, connect=10.0))
+        self._headers = {
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "apikey": SUPABASE_KEY,
+            "Tus-Resumable": "1.0.0",
+        }
+
+        metadata = {
+            "bucketName": BUCKET_NAME,
+            "objectName": object_name,
+            "contentType": content_type,
+        }
+        response = self._client.post(
+            f"{SUPABASE_URL}/storage/v1/upload/resumable",
+            headers={
+                **self._headers,
+                "Upload-Length": str(size),
+                "Upload-Metadata": ",".join(
+                    f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in metadata.items()
+                ),
+            }
+        )
+        response.raise_for_status()
+        self.location = response.headers["Location"]
+
+    def write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        while len(self._buffer) >= RESUMABLE_CHUNK_SIZE:
+            self._send(bytes(self._buffer[:RESUMABLE_CHUNK_SIZE]))
+            del self._buffer[:RESUMABLE_CHUNK_SIZE]
+
+    def finish(self) -> None:
+        if self._buffer:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+        if self.offset != self.size:
+            # Client stays open so the caller's abort() can delete the partial upload
+            raise IOError(f"Upload of {self.object_name} incomplete: {self.offset}/{self.size} bytes")
+        self._client.close()
+
+    def abort(self) -> None:
+        if self._client.is_closed:
+            return
+        try:
+            self._client.delete(self.location, headers=self._headers)
+        except httpx.HTTPError:
+            pass
+        finally:
+            self._client.close()
+
+    def _send(self, chunk: bytes) -> None:
+        start = self.offset
+        end = start + len(chunk)
+        for attempt in range(MAX_CHUNK_RETRIES):
+            try:
+                response = self._client.patch(
+                    self.location,
+                    headers={
+                        **self._headers,
+                        "Upload-Offset": str(self.offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                    content=chunk[self.offset - start:]
+                )
+                response.raise_for_status()
+                self.offset = int(response.headers["Upload-Offset"])
+            except httpx.HTTPError:
+                if attempt == MAX_CHUNK_RETRIES - 1:
+                    raise
+                # Resume from what the server actually stored
+                head = self._client.head(self.location, headers=self._headers)
+                head.raise_for_status()
+                self.offset = int(head.headers["Upload-Offset"])
+            if self.offset >= end:
+                return
+            # Server stored only part of the chunk: send the rest from its offset
+        raise IOError(
+            f"Upload of {self.object_name} stalled at {self.offset}/{self.size} bytes "
+            f"after {MAX_CHUNK_RETRIES} attempts"
+        )
+
+
+def stream_upload_to_supabase(
+    source: BinaryIO,
+    filename: str,
+    size: int,
+    local_path: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Upload a file object to Supabase storage in one streaming pass
+
+    The SHA-256 of the content is computed, and an optional local copy written,
+    from the same chunks that are sent to storage.
+
+    Returns:
+        (public_url, sha256 hex digest)
+    """
+    digest = hashlib.sha256()
+    local_file = open(local_path, "wb") if local_path else None
+    resumable = ResumableUpload(filename, size) if size > RESUMABLE_THRESHOLD else None
+    small_file = bytearray()
+
+    try:
+        while True:
+            chunk = source.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if local_file:
+                local_file.write(chunk)
+            if resumable:
+                resumable.write(chunk)
+            else:
+                small_file.extend(chunk)
+
+        if resumable:
+            resumable.finish()
+        else:
+            supabase.storage.from_(BUCKET_NAME).upload(
+                path=filename,
+                file=bytes(small_file),
+                file_options={"content-type": "application/octet-stream"}
+            )
+    except Exception:
+        if resumable:
+            resumable.abort()
+        raise
+    finally:
+        if local_file:
+            local_file.close()
+
+    return supabase.storage.from_(BUCKET_NAME).get_public_url(filename), digest.hexdigest()
+
+
 def upload_to_supabase(file_path: str, filename: str) -> str:
     """Upload file to Supabase storage and return public URL"""
     with open(file_path, 'rb') as f:
-        file_data = f.read()
-    
-    # Upload to Supabase storage
-    response = supabase.storage.from_(BUCKET_NAME).upload(
-        path=filename,
-        file=file_data,
-        file_options={"content-type": "application/octet-stream"}
-    )
-    
-    # Get public URL
-    public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(filename)
-    
+        public_url, _ = stream_upload_to_supabase(f, filename, os.path.getsize(file_path))
+
     return public_url
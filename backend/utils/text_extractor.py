@@ -4,7 +4,8 @@ from pptx import Presentation
 from PIL import Image
 import io
 import os
-from pptx import Presentation
+
+from backend.utils.pdf_pages import extract_pdf_pages
 
 # Cloud OCR service for deployment
 def get_cloud_ocr():
@@ -15,39 +16,47 @@ def get_cloud_ocr():
     except ImportError:
         return None
 
+def _cloud_ocr_pdf_page(page) -> str:
+    """OCR one rendered PDF page with the cloud OCR service"""
+    ocr_service = get_cloud_ocr()
+    if not ocr_service:
+        return ""
+    
+    pix = page.get_pixmap()
+    img = Image.open(io.BytesIO(pix.tobytes("png")))
+    try:
+        # Save image temporarily for OCR
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
+            img.save(temp_file.name)
+            ocr_result = ocr_service.extract_text_from_image(temp_file.name)
+            os.unlink(temp_file.name)
+            return ocr_result.get("text", "")
+    except Exception as e:
+        print(f"OCR failed: {e}")
+        return ""
+
 def extract_text_from_pdf(file_path: str) -> str:
     """
-    Extract text from PDF using PyMuPDF (fitz)
+    Extract text from PDF using PyMuPDF (fitz), pages extracted in parallel
     LEGACY METHOD - Use OCRManager for new uploads with confidence scoring
     """
-    text = ""
-    doc = fitz.open(file_path)
+    page_texts = [page["text"] for page in extract_pdf_pages(file_path)["pages"]]
     
-    for page in doc:
-        text += page.get_text()
-        
-        # If no text found, try OCR on images
-        if not text.strip():
-            pix = page.get_pixmap()
-            img_data = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_data))
-            
-            # Use cloud OCR service
-            ocr_service = get_cloud_ocr()
-            if ocr_service:
-                try:
-                    # Save image temporarily for OCR
-                    import tempfile
-                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-                        img.save(temp_file.name)
-                        ocr_result = ocr_service.extract_text_from_image(temp_file.name)
-                        text += ocr_result.get("text", "")
-                        os.unlink(temp_file.name)
-                except Exception as e:
-                    print(f"OCR failed: {e}")
+    # If no text found yet, try OCR on the leading image-only pages
+    if page_texts and not page_texts[0].strip():
+        doc = fitz.open(file_path)
+        try:
+            for index, page_text in enumerate(page_texts):
+                if page_text.strip():
+                    break
+                page_texts[index] = page_text + _cloud_ocr_pdf_page(doc[index])
+                if page_texts[index].strip():
+                    break
+        finally:
+            doc.close()
     
-    doc.close()
-    return text.strip()
+    return "".join(page_texts).strip()
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX"""
@@ -169,7 +178,11 @@ def extract_text_enhanced(file_path: str, file_type: str, use_ocr=True):
             from backend.utils.cloud_ocr_service import get_ocr_service
             
             ocr_service = get_ocr_service()
-            result = ocr_service.extract_text_from_image(file_path, language="en")
+            if file_type == "pdf":
+                # Vision OCRs images, so PDFs go page by page (unchanged pages hit the page cache)
+                result = ocr_service.extract_text_from_pdf(file_path, language="en")
+            else:
+                result = ocr_service.extract_text_from_image(file_path, language="en")
             
             return {
                 'text': result['text'],
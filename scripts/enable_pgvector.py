@@ -5,6 +5,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import text
 from backend.database import engine, Base, DocumentEmbedding
+from Agent.vector_store.ann_index import get_index_manager
 
 def enable_pgvector():
     """Enable pgvector extension in PostgreSQL"""
@@ -23,10 +24,18 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("✅ document_embeddings table created")
 
+def create_ann_index():
+    """Create the ANN index configured by VECTOR_INDEX_TYPE"""
+    print("Creating ANN index on document_embeddings...")
+    
+    if get_index_manager().create_index():
+        print("✅ ANN index created")
+
 def main():
     try:
         enable_pgvector()
         create_tables()
+        create_ann_index()
         print("\n✅ Database setup complete!")
         print("You can now use pgvector for centralized vector storage.")
     except Exception as e:
@@ -0,0 +1,67 @@
+"""
+Manage the ANN (HNSW/IVFFlat) index on document_embeddings
+
+Usage:
+    python scripts/manage_vector_index.py status
+    python scripts/manage_vector_index.py create
+    python scripts/manage_vector_index.py rebuild            # REINDEX CONCURRENTLY
+    python scripts/manage_vector_index.py rebuild --recreate # drop + create with current env config
+    python scripts/manage_vector_index.py drop
+
+Index type and build parameters come from VECTOR_INDEX_TYPE, HNSW_M,
+HNSW_EF_CONSTRUCTION and IVFFLAT_LISTS in .env
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agent.vector_store.ann_index import get_index_manager
+
+
+def print_status(manager):
+    info = manager.get_index_info()
+    print(f"📊 Index: {info['index_name']}")
+    print(f"  Exists: {'✅' if info['exists'] else '❌'}")
+    if info['exists']:
+        print(f"  Definition: {info['definition']}")
+        print(f"  Size: {info['size']}")
+    print(f"  Configured type: {info['configured_type']}")
+    print(f"  ef_search: {info['ef_search']}  probes: {info['probes']}")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("status", "create", "rebuild", "drop"):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    manager = get_index_manager()
+
+    try:
+        if command == "status":
+            print_status(manager)
+        elif command == "create":
+            print("🚀 Creating ANN index (this can take a while on large tables)...")
+            if manager.create_index():
+                print("✅ Index created")
+            print_status(manager)
+        elif command == "rebuild":
+            recreate = "--recreate" in sys.argv[2:]
+            print(f"🔧 Rebuilding ANN index ({'drop + create' if recreate else 'reindex'})...")
+            manager.rebuild_index(recreate=recreate)
+            print("✅ Index rebuilt")
+            print_status(manager)
+        elif command == "drop":
+            response = input("⚠️  Vector search will fall back to sequential scans. Continue? (yes/no): ")
+            if response.lower() == 'yes':
+                manager.drop_index()
+                print("✅ Index dropped")
+            else:
+                print("❌ Drop cancelled")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
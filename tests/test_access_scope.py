@@ -0,0 +1,62 @@
+"""Tests for the role-visibility access scopes"""
+import itertools
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.access_scope import DASHBOARD, SEARCH, document_scopes, user_scopes
+
+ROLES = ["developer", "ministry_admin", "university_admin", "document_officer", "student", "public_viewer"]
+VISIBILITIES = ["public", "institution_only", "restricted", "confidential"]
+INSTITUTIONS = [None, 1, 2]
+
+
+def search_rule(role, user_inst, visibility, doc_inst):
+    """Role filter previously written as an OR-tree in each search tool"""
+    if role == "developer":
+        return True
+    if role == "ministry_admin":
+        return visibility in ("public", "restricted", "institution_only")
+    if role == "university_admin":
+        return visibility == "public" or (
+            visibility in ("institution_only", "restricted") and doc_inst == user_inst and doc_inst is not None
+        )
+    return visibility == "public" or (
+        bool(user_inst) and visibility == "institution_only" and doc_inst == user_inst
+    )
+
+
+def dashboard_rule(role, user_inst, visibility, doc_inst):
+    """Visibility part of the insights filters (approval/uploader clauses excluded)"""
+    same_inst = doc_inst is not None and doc_inst == user_inst
+    if role == "developer":
+        return True
+    if role in ("ministry_admin", "university_admin", "document_officer"):
+        return visibility == "public" or same_inst
+    if role == "student":
+        return visibility == "public" or (visibility == "institution_only" and same_inst)
+    return visibility == "public"
+
+
+def visible(role, user_inst, visibility, doc_inst, purpose):
+    allowed = user_scopes(role, user_inst, purpose)
+    return allowed is None or bool(set(allowed) & set(document_scopes(visibility, doc_inst)))
+
+
+def test_search_scopes_match_role_rules():
+    for role, user_inst, visibility, doc_inst in itertools.product(ROLES, INSTITUTIONS, VISIBILITIES, INSTITUTIONS):
+        expected = search_rule(role, user_inst, visibility, doc_inst)
+        assert visible(role, user_inst, visibility, doc_inst, SEARCH) == expected, (role, user_inst, visibility, doc_inst)
+
+
+def test_dashboard_scopes_match_role_rules():
+    for role, user_inst, visibility, doc_inst in itertools.product(ROLES, INSTITUTIONS, VISIBILITIES, INSTITUTIONS):
+        expected = dashboard_rule(role, user_inst, visibility, doc_inst)
+        assert visible(role, user_inst, visibility, doc_inst, DASHBOARD) == expected, (role, user_inst, visibility, doc_inst)
+
+
+def test_scope_tokens_do_not_collide_across_institutions():
+    tokens = [set(document_scopes(v, i)) - {1, 2} for i in (1, 2) for v in VISIBILITIES]
+    assert not (set().union(*tokens[:4]) & set().union(*tokens[4:]))
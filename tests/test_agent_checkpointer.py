@@ -0,0 +1,136 @@
+"""Tests for the persistent, compacted agent checkpointer"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import backend.database as database
+from Agent.rag_agent.checkpointer import PostgresCheckpointSaver, compact_checkpoint
+
+
+@pytest.fixture
+def saver(monkeypatch):
+    """Checkpointer backed by an in-memory SQLite agent_checkpoints table"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    database.AgentCheckpoint.__table__.create(engine)
+    database.AgentCheckpointWrite.__table__.create(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    return PostgresCheckpointSaver(window=3, ttl_hours=1, prune_interval=3600)
+
+
+def make_checkpoint(checkpoint_id, messages):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = checkpoint_id
+    checkpoint["channel_values"] = {"messages": messages, "question": "q"}
+    return checkpoint
+
+
+def thread(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def test_compaction_keeps_last_window_messages():
+    checkpoint = make_checkpoint("1", ["m1", "m2", "m3", "m4", "m5"])
+
+    compacted = compact_checkpoint(checkpoint, window=2)
+
+    assert compacted["channel_values"]["messages"] == ["m4", "m5"]
+    assert compacted["channel_values"]["question"] == "q"
+    # The live checkpoint is not modified
+    assert checkpoint["channel_values"]["messages"] == ["m1", "m2", "m3", "m4", "m5"]
+
+
+def test_short_histories_are_not_copied():
+    checkpoint = make_checkpoint("1", ["m1"])
+    assert compact_checkpoint(checkpoint, window=2) is checkpoint
+    assert compact_checkpoint(make_checkpoint("2", []), window=2)["channel_values"]["messages"] == []
+
+
+def test_put_get_round_trip_keeps_latest_compacted_checkpoint(saver):
+    saver.put(thread("t1"), make_checkpoint("a", ["m1", "m2"]), {"step": 1}, {})
+    returned = saver.put(thread("t1", "a"), make_checkpoint("b", ["m1", "m2", "m3", "m4"]), {"step": 2}, {})
+
+    stored = saver.get_tuple(thread("t1"))
+
+    assert returned["configurable"]["checkpoint_id"] == "b"
+    assert stored.checkpoint["id"] == "b"
+    assert stored.checkpoint["channel_values"]["messages"] == ["m2", "m3", "m4"]
+    assert stored.metadata == {"step": 2}
+    assert stored.parent_config["configurable"]["checkpoint_id"] == "a"
+    # One row per thread: the superseded checkpoint is gone
+    assert saver.get_tuple(thread("t1", "a")) is None
+    assert len(list(saver.list(thread("t1")))) == 1
+    assert saver.get_tuple(thread("other")) is None
+
+
+def test_pending_writes_are_returned_until_the_next_checkpoint(saver):
+    saver.put(thread("t1"), make_checkpoint("a", []), {}, {})
+    saver.put_writes(thread("t1", "a"), [("messages", "partial")], task_id="task-1")
+
+    assert saver.get_tuple(thread("t1")).pending_writes == [("task-1", "messages", "partial")]
+
+    saver.put(thread("t1", "a"), make_checkpoint("b", []), {}, {})
+    assert saver.get_tuple(thread("t1")).pending_writes == []
+
+
+def test_prune_evicts_only_idle_threads(saver):
+    saver.put(thread("idle"), make_checkpoint("a", ["m1"]), {}, {})
+    saver.put(thread("active"), make_checkpoint("b", ["m1"]), {}, {})
+    table = database.AgentCheckpoint.__table__
+    with database.engine.begin() as conn:
+        conn.execute(
+            table.update()
+            .where(table.c.thread_id == "idle")
+            .values(updated_at=datetime.utcnow() - timedelta(hours=2))
+        )
+
+    assert saver.prune() == 1
+    assert saver.get_tuple(thread("idle")) is None
+    assert saver.get_tuple(thread("active")) is not None
+
+
+def test_pending_writes_are_shared_between_workers(saver):
+    saver.put(thread("t1"), make_checkpoint("a", []), {}, {})
+    saver.put_writes(thread("t1", "a"), [("messages", "m1"), ("question", "q")], task_id="task-1")
+    # Regular writes are kept once; special channels (ERROR, ...) are replaced
+    saver.put_writes(thread("t1", "a"), [("messages", "again")], task_id="task-1")
+    saver.put_writes(thread("t1", "a"), [("__error__", "first")], task_id="task-1")
+    saver.put_writes(thread("t1", "a"), [("__error__", "second")], task_id="task-1")
+
+    other_worker = PostgresCheckpointSaver(window=3, ttl_hours=1, prune_interval=3600)
+
+    assert other_worker.get_tuple(thread("t1")).pending_writes == [
+        ("task-1", "__error__", "second"),
+        ("task-1", "messages", "m1"),
+        ("task-1", "question", "q"),
+    ]
+
+
+def test_prune_drops_writes_of_dead_runs(saver):
+    saver.put(thread("dead"), make_checkpoint("a", []), {}, {})
+    saver.put_writes(thread("dead", "a"), [("__error__", "boom")], task_id="task-1")
+    saver.put(thread("live"), make_checkpoint("b", []), {}, {})
+    saver.put_writes(thread("live", "b"), [("messages", "partial")], task_id="task-2")
+    checkpoints = database.AgentCheckpoint.__table__
+    writes = database.AgentCheckpointWrite.__table__
+    old = datetime.utcnow() - timedelta(hours=2)
+    with database.engine.begin() as conn:
+        conn.execute(checkpoints.update().where(checkpoints.c.thread_id == "dead").values(updated_at=old))
+        conn.execute(writes.update().where(writes.c.thread_id == "dead").values(created_at=old))
+
+    assert saver.prune() == 1
+
+    with database.engine.connect() as conn:
+        remaining = [row.thread_id for row in conn.execute(writes.select()).fetchall()]
+    assert remaining == ["live"]
+    assert saver.get_tuple(thread("live")).pending_writes == [("task-2", "messages", "partial")]
@@ -0,0 +1,162 @@
+"""Tests for the agent's streamed answer: tokens are forwarded live, tool-call runs are not"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.rag_agent.react_agent import PolicyRAGAgent
+
+AGENT_NODE = {"langgraph_node": "process_query"}
+
+
+class FakeGraph:
+    """Replays recorded astream_events and serves the final state"""
+
+    def __init__(self, events, values):
+        self.events = events
+        self.values = values
+        self.sent = []  # event kinds handed to query_stream so far
+
+    async def astream_events(self, state, config, version):
+        for event in self.events:
+            self.sent.append(event["event"])
+            yield event
+
+    async def aget_state(self, config):
+        return SimpleNamespace(values=self.values)
+
+
+def token(run_id, text, tool_call_chunks=(), node=AGENT_NODE):
+    chunk = SimpleNamespace(content=text, tool_call_chunks=list(tool_call_chunks))
+    return {"event": "on_chat_model_stream", "run_id": run_id, "metadata": node, "data": {"chunk": chunk}}
+
+
+def model_end(run_id, tool_calls=(), node=AGENT_NODE):
+    output = SimpleNamespace(tool_calls=list(tool_calls))
+    return {"event": "on_chat_model_end", "run_id": run_id, "metadata": node, "data": {"output": output}}
+
+
+def tool(kind, name="search_documents"):
+    return {"event": kind, "run_id": "tool", "name": name, "metadata": AGENT_NODE, "data": {}}
+
+
+def make_agent(events, answer="The policy says X."):
+    agent = PolicyRAGAgent.__new__(PolicyRAGAgent)
+    agent._prepare_run = lambda question, thread_id, user_role, user_institution_id: ({}, {"configurable": {"thread_id": "t"}})
+    agent.graph = FakeGraph(events, {"response": answer, "citations": [{"document_id": 1}], "confidence": 0.9})
+    return agent
+
+
+def stream(events, answer="The policy says X."):
+    agent = make_agent(events, answer)
+
+    async def collect():
+        return [chunk async for chunk in agent.query_stream("What does the policy say?", "t")]
+
+    return asyncio.run(collect())
+
+
+def content(chunks):
+    """Content the client ends up showing: tokens after the last retract"""
+    shown = []
+    for chunk in chunks:
+        if chunk["type"] == "retract":
+            shown = []
+        elif chunk["type"] == "content":
+            shown.append(chunk["token"])
+    return shown
+
+
+def kinds(chunks):
+    return [chunk["type"] for chunk in chunks]
+
+
+def test_answer_tokens_are_yielded_before_the_run_ends():
+    agent = make_agent([
+        token("run-1", "The policy "),
+        token("run-1", "says X."),
+        model_end("run-1"),
+    ])
+
+    async def first_token():
+        async for chunk in agent.query_stream("What does the policy say?", "t"):
+            if chunk["type"] == "content":
+                return chunk["token"], list(agent.graph.sent)
+
+    first, sent = asyncio.run(first_token())
+
+    assert first == "The policy "
+    assert "on_chat_model_end" not in sent
+
+
+def test_tool_calling_run_is_not_streamed():
+    search = {"name": "search_documents", "args": {"query": "policy"}, "id": "call-1"}
+    chunks = stream([
+        token("run-1", "", tool_call_chunks=[{"name": "search_documents"}]),
+        token("run-1", "Searching."),
+        model_end("run-1", tool_calls=[search]),
+        tool("on_tool_start"),
+        tool("on_tool_end"),
+        token("run-2", "The policy "),
+        token("run-2", "says X."),
+        model_end("run-2"),
+    ])
+
+    assert kinds(chunks) == ["tool", "tool", "content", "content", "citation", "metadata"]
+    assert content(chunks) == ["The policy ", "says X."]
+    assert chunks[-1]["answer"] == "The policy says X."
+
+
+def test_preamble_before_tool_call_chunks_is_retracted():
+    search = {"name": "search_documents", "args": {"query": "policy"}, "id": "call-1"}
+    chunks = stream([
+        # Text before the first tool-call chunk
+        token("run-1", "Let me search "),
+        token("run-1", "the documents."),
+        token("run-1", "", tool_call_chunks=[{"name": "search_documents"}]),
+        model_end("run-1", tool_calls=[search]),
+        tool("on_tool_start"),
+        tool("on_tool_end"),
+        token("run-2", "The policy "),
+        token("run-2", "says X."),
+        model_end("run-2"),
+    ])
+
+    assert kinds(chunks)[:3] == ["content", "content", "retract"]
+    assert kinds(chunks).count("retract") == 1
+    assert content(chunks) == ["The policy ", "says X."]
+
+
+def test_run_with_tool_calls_only_in_final_message_is_retracted():
+    search = {"name": "search_documents", "args": {"query": "policy"}, "id": "call-1"}
+    chunks = stream([
+        token("run-1", "Searching now."),
+        model_end("run-1", tool_calls=[search]),
+        token("run-2", "The policy says X."),
+        model_end("run-2"),
+    ])
+
+    assert kinds(chunks)[:2] == ["content", "retract"]
+    assert content(chunks) == ["The policy says X."]
+
+
+def test_other_nodes_are_not_streamed():
+    formatter = {"langgraph_node": "format_response"}
+    chunks = stream([
+        token("run-1", "The policy says X."),
+        model_end("run-1"),
+        token("run-2", "| Policy | Says |", node=formatter),
+        model_end("run-2", node=formatter),
+    ])
+
+    assert content(chunks) == ["The policy says X."]
+
+
+def test_answer_is_sent_when_provider_did_not_stream():
+    chunks = stream([tool("on_tool_start"), tool("on_tool_end")], answer="Quota exceeded, try again later.")
+
+    assert content(chunks) == ["Quota exceeded, try again later."]
+    assert [chunk["type"] for chunk in chunks] == ["tool", "tool", "content", "citation", "metadata"]
@@ -0,0 +1,88 @@
+"""Tests for the concurrent batch embedding engine"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.embeddings.batch_engine import BatchEmbeddingEngine
+from backend.utils.quota_manager import QuotaManager
+
+
+def fake_provider(calls):
+    def embed_many(texts):
+        calls.append(list(texts))
+        if any(text == "bad" for text in texts):
+            raise RuntimeError("provider rejected input")
+        return [[float(len(text))] for text in texts]
+    return embed_many
+
+
+def test_batches_and_preserves_order():
+    calls = []
+    engine = BatchEmbeddingEngine(fake_provider(calls), max_batch_size=2, max_workers=3, max_retries=0)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    result = engine.embed(texts)
+
+    assert result.ok
+    assert result.embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(len(batch) for batch in calls) == [1, 2, 2]
+
+
+def test_failed_items_are_reported_not_zero_filled():
+    calls = []
+    engine = BatchEmbeddingEngine(fake_provider(calls), max_batch_size=3, max_retries=0, backoff_base=0)
+
+    result = engine.embed(["ok", "bad", "fine"])
+
+    assert set(result.failures) == {1}
+    assert result.embeddings[1] is None
+    assert result.embeddings[0] == [2.0] and result.embeddings[2] == [4.0]
+
+
+def test_daily_quota_exhaustion_fails_remaining_items(tmp_path):
+    quota = QuotaManager(quota_file=str(tmp_path / "quota.json"))
+    quota.limits["gemini_embeddings"]["daily_limit"] = 1
+    engine = BatchEmbeddingEngine(
+        fake_provider([]), quota_manager=quota, max_batch_size=1, max_workers=1, max_retries=0
+    )
+
+    result = engine.embed(["one", "two"])
+
+    assert result.embeddings[0] == [3.0]
+    assert set(result.failures) == {1}
+
+
+class ProviderOutage(Exception):
+    code = 503
+
+
+def test_transient_errors_fail_the_batch_without_splitting():
+    calls = []
+
+    def embed_many(texts):
+        calls.append(list(texts))
+        raise ProviderOutage("service unavailable")
+
+    engine = BatchEmbeddingEngine(embed_many, max_batch_size=4, max_workers=1, max_retries=2, backoff_base=0)
+
+    result = engine.embed(["a", "b", "c", "d"])
+
+    assert set(result.failures) == {0, 1, 2, 3}
+    # Only the batch-level retries, no per-item fan-out
+    assert len(calls) == 3
+    assert all(len(batch) == 4 for batch in calls)
+
+
+def test_rejected_batches_are_bisected_without_retries():
+    calls = []
+    engine = BatchEmbeddingEngine(fake_provider(calls), max_batch_size=8, max_workers=1, max_retries=3, backoff_base=0)
+    texts = ["t1", "t2", "t3", "bad", "t5", "t6", "t7", "t8"]
+
+    result = engine.embed(texts)
+
+    assert set(result.failures) == {3}
+    assert result.succeeded == 7
+    # 8 -> 4+4 -> 2+2 -> 1+1: 1 + 2 + 2 + 2 calls instead of 1 + 8 * 4
+    assert len(calls) == 7
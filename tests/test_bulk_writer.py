@@ -0,0 +1,38 @@
+"""Tests for the upsert change check of the bulk embedding writer"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.vector_store.bulk_writer import BulkEmbeddingWriter, chunk_hash, chunk_text_hash
+
+
+class StoredRowsWriter(BulkEmbeddingWriter):
+    """Writer whose stored rows come from a dict instead of the database"""
+
+    def __init__(self, stored):
+        super().__init__()
+        self.stored = stored
+
+    def stored_chunk_hashes(self, db, document_id):
+        return {
+            idx: chunk_hash(chunk_text_hash(chunk), metadata)
+            for idx, (chunk, metadata) in self.stored.items()
+        }
+
+
+def test_chunk_hash_ignores_metadata_key_order():
+    assert chunk_hash("abc", {"page": 1, "section": "A"}) == chunk_hash("abc", {"section": "A", "page": 1})
+
+
+def test_metadata_only_change_is_detected():
+    writer = StoredRowsWriter({0: ("first", {"page": 1}), 1: ("second", {"page": 2})})
+    changed = writer.changed_chunk_indexes(None, 1, ["first", "second"], [{"page": 1}, {"page": 3}])
+    assert changed == {1}
+
+
+def test_new_and_edited_chunks_are_detected():
+    writer = StoredRowsWriter({0: ("first", {"page": 1})})
+    changed = writer.changed_chunk_indexes(None, 1, ["first edited", "new"], [{"page": 1}, {"page": 2}])
+    assert changed == {0, 1}
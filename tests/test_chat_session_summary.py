@@ -0,0 +1,85 @@
+"""Tests for the denormalized chat session summary and session list paging"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import ChatMessage, ChatSession
+from backend.routers.chat_history_router import _page_sessions
+
+LAST_ACTIVE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    """SQLite chat_sessions / chat_messages tables with the model columns"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        for table in (ChatSession.__table__, ChatMessage.__table__):
+            columns = ["id INTEGER PRIMARY KEY" if column.name == "id" else column.name for column in table.columns]
+            conn.exec_driver_sql(f"CREATE TABLE {table.name} ({', '.join(columns)})")
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_sessions(db, count, user_id=1):
+    for index in range(count):
+        db.add(ChatSession(
+            id=index + 1, user_id=user_id, title=f"Chat {index + 1}", thread_id=f"thread-{index + 1}",
+            message_count=0, created_at=LAST_ACTIVE, updated_at=LAST_ACTIVE.replace(hour=index)
+        ))
+    db.commit()
+
+
+def test_message_insert_updates_summary_but_not_updated_at(db):
+    add_sessions(db, 1)
+    long_answer = "The scholarship covers tuition and hostel fees for two years."
+
+    db.add(ChatMessage(session_id=1, role="user", content="What does the scholarship cover?"))
+    db.add(ChatMessage(session_id=1, role="assistant", content=long_answer))
+    db.commit()
+
+    chat = db.query(ChatSession).one()
+    db.refresh(chat)
+    assert chat.message_count == 2
+    assert chat.last_message_preview == long_answer[:50] + "..."
+    assert chat.updated_at == LAST_ACTIVE.replace(hour=0)
+
+
+def test_page_lists_most_recent_first_with_total(db):
+    add_sessions(db, 5)
+
+    sessions, total = _page_sessions(db.query(ChatSession).filter(ChatSession.user_id == 1), limit=2, offset=2)
+
+    assert [chat.id for chat in sessions] == [3, 2]
+    assert total == 5
+
+
+def test_page_past_the_last_row_still_reports_total(db):
+    add_sessions(db, 3)
+
+    sessions, total = _page_sessions(db.query(ChatSession).filter(ChatSession.user_id == 1), limit=10, offset=10)
+
+    assert sessions == []
+    assert total == 3
+
+
+def test_no_matches_at_first_page_skips_the_count_query(db):
+    add_sessions(db, 3)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    sessions, total = _page_sessions(db.query(ChatSession).filter(ChatSession.user_id == 2), limit=10, offset=0)
+
+    assert sessions == []
+    assert total == 0
+    assert len(statements) == 1
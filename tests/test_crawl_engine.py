@@ -0,0 +1,92 @@
+"""Tests for the crawl engine's response cache, per-domain throttle and downloads"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.web_scraping.crawl_engine import CrawlEngine, DomainThrottle, ResponseCache, validators_match
+
+
+def test_response_cache_requires_validators(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_age_days=7)
+
+    assert not cache.put("https://example.gov.in/a", {"content-type": "text/html"}, b"<html></html>")
+    assert cache.get("https://example.gov.in/a") is None
+
+    assert cache.put("https://example.gov.in/b", {"ETag": '"v1"', "Content-Type": "text/html"}, b"<html>b</html>")
+    meta = cache.get("https://example.gov.in/b")
+    assert meta["headers"] == {"etag": '"v1"', "content-type": "text/html"}
+    assert cache.body("https://example.gov.in/b") == b"<html>b</html>"
+
+
+def test_response_cache_expires_entries(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_age_days=0)
+    cache.put("https://example.gov.in/c", {"last-modified": "Mon, 01 Jan 2026 00:00:00 GMT"}, b"c")
+    time.sleep(0.01)
+    assert cache.get("https://example.gov.in/c") is None
+
+
+def test_domain_throttle_spaces_request_starts():
+    throttle = DomainThrottle(concurrency=2, delay=0.05)
+    starts = []
+
+    async def hit(domain):
+        async with throttle.slot(domain):
+            starts.append((domain, time.monotonic()))
+
+    async def main():
+        await asyncio.gather(*(hit("a.gov.in") for _ in range(3)), hit("b.gov.in"))
+
+    asyncio.run(main())
+
+    a_starts = sorted(t for d, t in starts if d == "a.gov.in")
+    assert len(a_starts) == 3
+    assert all(later - earlier >= 0.04 for earlier, later in zip(a_starts, a_starts[1:]))
+    # Other domains are not held back by a.gov.in's spacing
+    b_start = next(t for d, t in starts if d == "b.gov.in")
+    assert b_start - a_starts[0] < 0.04
+
+
+def test_validators_match_prefers_etag_and_checks_length():
+    stored = {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2026 00:00:00 GMT", "content_length": 1024}
+
+    assert validators_match(stored, {"etag": 'W/"v1"', "content-length": "1024"})
+    assert not validators_match(stored, {"etag": '"v2"', "last-modified": stored["last_modified"]})
+    assert not validators_match(stored, {"etag": '"v1"', "content-length": "2048"})
+    assert validators_match({"last_modified": stored["last_modified"]}, {"last-modified": stored["last_modified"]})
+    assert not validators_match(None, {"etag": '"v1"'})
+    assert not validators_match(stored, {})
+
+
+def test_download_many_builds_headers_per_url(tmp_path):
+    referers = {}
+
+    def handler(request):
+        referers[str(request.url)] = request.headers.get("referer")
+        return httpx.Response(200, content=b"%PDF-1.4", headers={"content-type": "application/pdf"})
+
+    engine = CrawlEngine(cache=ResponseCache(cache_dir=str(tmp_path / "cache")), domain_delay=0, max_retries=0)
+    urls = ["https://a.gov.in/circulars/1.pdf", "https://b.gov.in/notices/2.pdf"]
+
+    async def main():
+        engine._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await engine.download_many(
+                [(url, str(tmp_path / f"{index}.pdf")) for index, url in enumerate(urls)],
+                headers_for=lambda url: {"Referer": url.rsplit("/", 1)[0] + "/"}
+            )
+        finally:
+            await engine._client.aclose()
+
+    results = asyncio.run(main())
+
+    assert [result["status"] for result in results] == ["success", "success"]
+    assert referers == {
+        "https://a.gov.in/circulars/1.pdf": "https://a.gov.in/circulars/",
+        "https://b.gov.in/notices/2.pdf": "https://b.gov.in/notices/",
+    }
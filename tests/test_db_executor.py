@@ -0,0 +1,46 @@
+"""Tests for threadpool sizing and the agent call limiter"""
+import sys
+import threading
+from pathlib import Path
+
+import anyio
+import anyio.to_thread
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils import db_executor
+
+
+def test_threadpool_is_never_below_anyio_default(monkeypatch):
+    monkeypatch.delenv("THREADPOOL_SIZE", raising=False)
+
+    async def main():
+        return db_executor.configure_threadpool(), anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    size, tokens = anyio.run(main)
+
+    assert size == tokens
+    assert size >= db_executor.ANYIO_DEFAULT_THREADS
+
+
+def test_agent_calls_do_not_wait_for_the_shared_threadpool():
+    release = threading.Event()
+
+    async def main():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 1
+        async with anyio.create_task_group() as tg:
+            # Occupies the only shared thread until the agent call has finished
+            tg.start_soon(anyio.to_thread.run_sync, release.wait)
+            await anyio.sleep(0.05)
+            try:
+                with anyio.fail_after(5):
+                    answer = await db_executor.run_agent(
+                        lambda question, **kwargs: f"{question}:{kwargs['thread_id']}", "q", thread_id="t"
+                    )
+            finally:
+                release.set()
+        return answer
+
+    assert anyio.run(main) == "q:t"
@@ -0,0 +1,147 @@
+"""Tests for batched document identity resolution and URL normalization"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Document, NORMALIZED_SOURCE_URL_EXPRESSION
+from Agent.web_scraping.document_identity_manager import DocumentIdentityManager, normalize_source_url
+
+URLS = [
+    "https://example.gov.in/policy.pdf",
+    "https://example.gov.in/policy.pdf?download=1",
+    "https://example.gov.in/policy.pdf#page=2",
+    "https://example.gov.in/policy.pdf?a=1#frag?x",
+    "https://example.gov.in/docs/",
+    "https://example.gov.in/docs///",
+    "https://example.gov.in/docs/?q=/",
+    "https://example.gov.in/",
+    "https://example.gov.in/नीति/दस्तावेज़.pdf",
+    "policy.pdf",
+    "",
+]
+
+
+def split_part(value, delimiter, field):
+    """Postgres split_part: the field-th piece (1-based), '' past the last one"""
+    if value is None:
+        return None
+    parts = value.split(delimiter)
+    return parts[field - 1] if field <= len(parts) else ""
+
+
+@pytest.fixture
+def db():
+    """
+    SQLite documents table whose normalized_source_url is generated by
+    NORMALIZED_SOURCE_URL_EXPRESSION, as on Postgres (split_part is registered
+    as a function; rtrim(x, '/') is built in with the same semantics)
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def register_split_part(dbapi_connection, connection_record):
+        dbapi_connection.create_function("split_part", 3, split_part, deterministic=True)
+
+    columns = [
+        "id INTEGER PRIMARY KEY" if column.name == "id"
+        else f"normalized_source_url TEXT GENERATED ALWAYS AS ({NORMALIZED_SOURCE_URL_EXPRESSION}) STORED"
+        if column.name == "normalized_source_url"
+        else column.name
+        for column in Document.__table__.columns
+    ]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE documents ({', '.join(columns)})")
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_document(db, doc_id, source_url, content_hash):
+    db.execute(
+        Document.__table__.insert().values(id=doc_id, source_url=source_url, content_hash=content_hash)
+    )
+    db.commit()
+
+
+def count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_normalization_matches_generated_column(db):
+    for doc_id, url in enumerate(URLS, start=1):
+        add_document(db, doc_id, url, None)
+
+    rows = db.query(Document.source_url, Document.normalized_source_url).all()
+    assert len(rows) == len(URLS)
+    for source_url, normalized_url in rows:
+        assert normalize_source_url(source_url) == normalized_url
+
+
+def test_migration_snapshots_generated_expression():
+    migration = Path(__file__).parent.parent / "alembic" / "versions" / "add_document_normalized_url.py"
+    assert f'NORMALIZED_SOURCE_URL_EXPRESSION = "{NORMALIZED_SOURCE_URL_EXPRESSION}"' in migration.read_text()
+
+
+@pytest.fixture
+def corpus(db):
+    """Known documents: an exact URL, a URL variation target and a mirrored copy"""
+    manager = DocumentIdentityManager()
+    hashes = {name: manager._calculate_content_hash(name) for name in ("policy", "circular", "report", "new")}
+    add_document(db, 1, "https://example.gov.in/policy.pdf", hashes["policy"])
+    add_document(db, 2, "https://example.gov.in/circular.pdf?lang=en", hashes["circular"])
+    add_document(db, 3, "https://mirror.example.org/report.pdf", hashes["report"])
+    return hashes
+
+
+# url -> content of the page fetched from it
+PAGE_LINKS = {
+    "https://example.gov.in/policy.pdf": "policy",                 # same URL, same content
+    "https://example.gov.in/circular.pdf?lang=en": "new",          # same URL, new content
+    "https://example.gov.in/circular.pdf?lang=en#top": "circular", # equivalent URL
+    "https://example.gov.in/report.pdf": "report",                 # same content elsewhere
+    "https://example.gov.in/annual.pdf": "new",                    # new document
+}
+
+
+def test_batch_matches_single_lookups(db, corpus):
+    content_hashes = {url: corpus[content] for url, content in PAGE_LINKS.items()}
+    batched = DocumentIdentityManager().resolve_identities(PAGE_LINKS, db, content_hashes)
+
+    for url, content in PAGE_LINKS.items():
+        single = DocumentIdentityManager().check_document_identity(url, content, "title", db)
+        assert {key: batched[url].get(key) for key in ("action", "reason", "found", "document_id")} == \
+            {key: single.get(key) for key in ("action", "reason", "found", "document_id")}, url
+
+
+def test_batch_without_hashes_reports_known_urls(db, corpus):
+    results = DocumentIdentityManager().resolve_identities(PAGE_LINKS, db)
+
+    assert results["https://example.gov.in/policy.pdf"]["document_id"] == 1
+    assert results["https://example.gov.in/circular.pdf?lang=en"]["reason"] == "same_url"
+    assert results["https://example.gov.in/circular.pdf?lang=en#top"]["reason"] == "equivalent_url"
+    assert results["https://example.gov.in/circular.pdf?lang=en#top"]["document_id"] == 2
+    assert not results["https://example.gov.in/annual.pdf"]["found"]
+
+
+def test_batch_resolution_issues_bounded_queries(db, corpus):
+    content_hashes = {url: corpus[content] for url, content in PAGE_LINKS.items()}
+    manager = DocumentIdentityManager()
+    statements = count_queries(db)
+
+    manager.resolve_identities(PAGE_LINKS, db, content_hashes)
+    assert len(statements) <= 2
+
+    # Later single checks for the same links are answered from the caches
+    for url, content in PAGE_LINKS.items():
+        manager.check_document_identity(url, content, "title", db)
+    assert len(statements) <= 2
@@ -0,0 +1,69 @@
+"""Tests for deferred document body text: previews and sliced streaming"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import Document
+from backend.utils.document_text import get_document_text, get_text_previews, iter_document_text
+
+BODY = "Scholarship rules. छात्रवृत्ति नियम। " * 7  # 259 characters (no multiple of the slice sizes below), some multi-byte
+
+
+@pytest.fixture
+def db():
+    """SQLite documents table with the Document columns"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    columns = ["id INTEGER PRIMARY KEY" if column.name == "id" else column.name for column in Document.__table__.columns]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE documents ({', '.join(columns)})")
+        conn.execute(Document.__table__.insert(), [
+            {"id": 1, "filename": "rules.pdf", "extracted_text": BODY},
+            {"id": 2, "filename": "scan.pdf", "extracted_text": None},
+            {"id": 3, "filename": "short.pdf", "extracted_text": "abc"},
+        ])
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_document_query_does_not_load_body(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    doc = db.query(Document).filter(Document.id == 1).first()
+
+    assert doc.filename == "rules.pdf"
+    assert "extracted_text" not in doc.__dict__
+    assert "extracted_text" not in statements[0]
+    # Loaded on access, in a second query
+    assert doc.extracted_text == BODY
+    assert len(statements) == 2
+
+
+def test_previews_are_cut_to_max_chars(db):
+    previews = get_text_previews(db, [1, 2, 3], max_chars=20)
+
+    assert previews == {1: BODY[:20], 2: "", 3: "abc"}
+    assert get_text_previews(db, [], max_chars=20) == {}
+
+
+@pytest.mark.parametrize("slice_chars", [1, 8, 100, 64 * 1024])
+def test_slices_rejoin_to_the_full_text(db, slice_chars):
+    slices = list(iter_document_text(db, 1, slice_chars=slice_chars))
+
+    assert "".join(slices) == BODY == get_document_text(db, 1)
+    assert len(slices) == -(-len(BODY) // slice_chars)
+    assert all(len(piece) == slice_chars for piece in slices[:-1])
+
+
+def test_missing_text_yields_no_slices(db):
+    assert list(iter_document_text(db, 2)) == []
+    assert list(iter_document_text(db, 404)) == []
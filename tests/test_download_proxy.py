@@ -0,0 +1,40 @@
+"""Tests for the streaming download proxy helpers"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.download_proxy import ETagCache, content_disposition, etag_matches
+
+
+def test_etag_matching_is_weak_and_handles_lists():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', 'W/"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_etag_cache_expires_and_is_bounded():
+    cache = ETagCache(ttl_seconds=300, max_entries=2)
+    cache.set("a", {"etag": '"1"'})
+    cache.set("b", {"etag": '"2"'})
+    cache.set("c", {"etag": '"3"'})
+    cache.set("d", {"last-modified": "Mon, 01 Jan 2026 00:00:00 GMT"})
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"etag": '"3"'}
+    assert cache.get("d") is None
+
+    expired = ETagCache(ttl_seconds=0)
+    expired.set("a", {"etag": '"1"'})
+    assert expired.get("a") is None
+
+
+def test_content_disposition_keeps_unicode_filenames():
+    header = content_disposition('राजपत्र "2026".pdf')
+    assert header.startswith('attachment; filename="')
+    assert '"2026"' not in header.split(";")[1]
+    assert "filename*=UTF-8''" in header
@@ -0,0 +1,77 @@
+"""
+Tests for the content-addressed embedding cache (in-process tier)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.embeddings.embedding_cache import EmbeddingCache, cache_model_key, text_hash
+
+
+def make_cache(**kwargs):
+    return EmbeddingCache(backend="memory", **kwargs)
+
+
+def test_key_ignores_whitespace_differences():
+    assert text_hash("Scholarship  rules\napply") == text_hash(" Scholarship rules apply ")
+    assert text_hash("Scholarship rules apply") != text_hash("scholarship rules apply")
+
+    cache = make_cache()
+    cache.put("bge-m3:1024", "Scholarship rules\n\napply", [0.1, 0.2])
+
+    assert cache.get("bge-m3:1024", "Scholarship rules apply") == [0.1, 0.2]
+
+
+def test_key_includes_model_and_dimension():
+    cache = make_cache()
+    cache.put(cache_model_key("gemini-embedding", 1024), "policy text", [0.5] * 4)
+
+    assert cache.get(cache_model_key("gemini-embedding", 768), "policy text") is None
+    assert cache.get(cache_model_key("bge-m3", 1024), "policy text") is None
+    assert cache.get(cache_model_key("gemini-embedding", 1024), "policy text") == [0.5] * 4
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = make_cache(memory_size=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")  # "b" is now the oldest
+    cache.put("m", "c", [3.0])
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.get("m", "c") == [3.0]
+    stats = cache.get_stats()
+    assert stats["memory_entries"] == 2
+    assert stats["memory_evictions"] == 1
+
+
+def test_get_many_reports_hits_by_index():
+    cache = make_cache()
+    cache.put_many("m", {"a": [1.0], "b": [2.0]})
+
+    assert cache.get_many("m", ["b", "missing", "a", "b"]) == {0: [2.0], 2: [1.0], 3: [2.0]}
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_cached_embeddings_are_copies():
+    cache = make_cache()
+    source = [0.1, 0.2]
+    cache.put("m", "text", source)
+    source.append(0.3)
+
+    hit = cache.get("m", "text")
+    hit[0] = 9.9
+
+    assert cache.get("m", "text") == [0.1, 0.2]
+
+
+def test_disabled_cache_never_hits():
+    cache = EmbeddingCache(backend="none")
+    cache.put("m", "text", [1.0])
+
+    assert cache.get("m", "text") is None
+    assert cache.get_stats()["memory_entries"] == 0
@@ -0,0 +1,146 @@
+"""Tests for the background embedding job queue"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import EmbeddingJob
+from Agent.lazy_rag import embedding_queue
+from Agent.lazy_rag.embedding_queue import (
+    PRIORITY_APPROVAL,
+    PRIORITY_QUERY,
+    PRIORITY_SCRAPE,
+    PRIORITY_UPLOAD,
+    EmbeddingJobQueue,
+    EmbeddingWorkerPool,
+)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Queue sessions backed by an in-memory SQLite embedding_jobs table"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    EmbeddingJob.__table__.create(engine)
+    monkeypatch.setattr(embedding_queue, "SessionLocal", sessionmaker(bind=engine))
+    return engine
+
+
+def jobs(engine):
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(text("SELECT * FROM embedding_jobs ORDER BY id"))]
+
+
+def make_runnable(engine):
+    """Skip the retry backoff"""
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE embedding_jobs SET run_after = :past"), {"past": datetime.utcnow() - timedelta(seconds=1)})
+
+
+def test_claims_follow_producer_priority(engine):
+    queue = EmbeddingJobQueue()
+    queue.enqueue(1, priority=PRIORITY_SCRAPE, source="scrape")
+    queue.enqueue(2, priority=PRIORITY_UPLOAD, source="upload")
+    queue.enqueue(3, priority=PRIORITY_APPROVAL, source="approval")
+    queue.enqueue(4, priority=PRIORITY_QUERY, source="query")
+
+    claimed = [queue.claim("worker-0") for _ in range(5)]
+
+    # Equal priorities (upload, approval) run in queue order
+    assert [job["document_id"] for job in claimed[:4]] == [4, 2, 3, 1]
+    assert [job["source"] for job in claimed[:4]] == ["query", "upload", "approval", "scrape"]
+    assert claimed[4] is None
+    assert all(job["status"] == "running" and job["locked_by"] == "worker-0" for job in jobs(engine))
+
+
+def test_reenqueue_raises_priority_of_the_active_job(engine):
+    queue = EmbeddingJobQueue()
+    queue.enqueue(1, priority=PRIORITY_SCRAPE, source="scrape")
+    queue.enqueue(1, priority=PRIORITY_QUERY, source="query")
+    queue.enqueue(1, priority=PRIORITY_SCRAPE, source="scrape")
+
+    stored = jobs(engine)
+    assert len(stored) == 1
+    assert stored[0]["priority"] == PRIORITY_QUERY
+
+
+def test_failed_job_backs_off_then_parks_after_max_attempts(engine):
+    queue = EmbeddingJobQueue(max_attempts=2)
+    queue.enqueue(1)
+
+    job = queue.claim("worker-0")
+    assert job["attempts"] == 1
+    queue.fail(job["id"], job["attempts"], "provider timeout")
+
+    # Backoff: not runnable yet
+    assert queue.claim("worker-0") is None
+    assert jobs(engine)[0]["status"] == "pending"
+
+    make_runnable(engine)
+    job = queue.claim("worker-0")
+    assert job["attempts"] == 2
+    queue.fail(job["id"], job["attempts"], "provider timeout")
+
+    make_runnable(engine)
+    assert queue.claim("worker-0") is None
+    assert queue.get_stats() == {"failed": 1}
+    assert jobs(engine)[0]["last_error"] == "provider timeout"
+
+    # A parked job does not block a new one for the same document
+    assert queue.enqueue(1)
+    assert queue.claim("worker-0")["document_id"] == 1
+
+
+def test_expired_lease_is_requeued(engine):
+    queue = EmbeddingJobQueue(lease_seconds=60)
+    queue.enqueue(1)
+    queue.enqueue(2)
+    stale = queue.claim("crashed-worker")
+    queue.claim("live-worker")
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE embedding_jobs SET locked_at = :expired WHERE id = :job_id"),
+            {"expired": datetime.utcnow() - timedelta(minutes=2), "job_id": stale["id"]}
+        )
+
+    assert queue.requeue_stale() == 1
+
+    job = queue.claim("worker-0")
+    assert job["id"] == stale["id"]
+    assert job["attempts"] == 2
+    assert queue.requeue_stale() == 0
+
+
+class FakeEmbedder:
+    def __init__(self, results):
+        self.results = results
+
+    def embed_document(self, document_id):
+        return self.results[document_id]
+
+
+def test_worker_completes_or_retries_jobs(engine):
+    pool = EmbeddingWorkerPool(num_workers=1, poll_interval=0.01)
+    pool.queue = EmbeddingJobQueue(max_attempts=3)
+    pool._lazy_embedder = FakeEmbedder({
+        1: {"status": "success"},
+        2: {"status": "error", "message": "no text extracted"},
+    })
+    pool.queue.enqueue(1, priority=PRIORITY_QUERY, source="query")
+    pool.queue.enqueue(2)
+
+    assert pool.run_once("worker-0")
+    assert pool.run_once("worker-0")
+    assert not pool.run_once("worker-0")
+
+    remaining = jobs(engine)
+    assert [job["document_id"] for job in remaining] == [2]
+    assert remaining[0]["status"] == "pending"
+    assert remaining[0]["last_error"] == "no text extracted"
+    assert remaining[0]["locked_by"] is None
@@ -0,0 +1,45 @@
+"""Tests for the family-diversity MMR ordering"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.rag_enhanced.family_aware_retriever import mmr_family_order
+
+
+def order(scores, families, mmr_lambda):
+    return mmr_family_order(np.array(scores, dtype=float), np.array(families), mmr_lambda).tolist()
+
+
+def test_lambda_zero_puts_best_hit_of_each_family_first():
+    scores = [0.9, 0.8, 0.7, 0.6, 0.5]
+    families = [0, 0, 1, 2, 1]
+    assert order(scores, families, 0.0) == [0, 2, 3, 1, 4]
+
+
+def test_lambda_one_is_score_order():
+    scores = [0.5, 0.9, 0.7, 0.6]
+    families = [0, 0, 1, 0]
+    assert order(scores, families, 1.0) == [1, 2, 3, 0]
+
+
+def test_relevance_can_outweigh_diversity():
+    scores = [1.0, 0.95, 0.3]
+    families = [0, 0, 1]
+    assert order(scores, families, 0.7) == [0, 1, 2]
+    assert order(scores, families, 0.0) == [0, 2, 1]
+
+
+def test_ties_keep_input_order():
+    scores = [0.5, 0.5, 0.5]
+    assert order(scores, [0, 0, 1], 0.0) == [0, 2, 1]
+    assert order(scores, [0, 0, 1], 1.0) == [0, 1, 2]
+
+
+def test_single_family_falls_back_to_score_order():
+    scores = [0.2, 0.9, 0.5]
+    for mmr_lambda in (0.0, 0.5, 1.0):
+        assert order(scores, [0, 0, 0], mmr_lambda) == [1, 2, 0]
@@ -0,0 +1,43 @@
+"""Tests for full-text query building and hybrid rank fusion"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.retrieval.text_search import build_tsquery, query_terms, reciprocal_rank_fusion
+from Agent.retrieval.hybrid_retriever import HybridRetriever
+
+
+def result(doc_id, chunk, score):
+    return {"document_id": doc_id, "chunk_index": chunk, "score": score, "text": f"{doc_id}-{chunk}"}
+
+
+def test_tsquery_strips_operators_and_duplicates():
+    assert build_tsquery("Fee & refund | fee policy!") == "fee | refund | policy"
+    assert build_tsquery("a ? !") is None
+
+
+def test_non_latin_queries_keep_their_terms():
+    # Devanagari vowel signs and viramas are combining marks and must stay inside the word
+    assert query_terms("शिक्षा नीति 2020 की छात्रवृत्ति?") == ["शिक्षा", "नीति", "2020", "की", "छात्रवृत्ति"]
+    assert build_tsquery("छात्रवृत्ति & नियम") == "छात्रवृत्ति | नियम"
+
+
+def test_rrf_rewards_items_in_both_rankings():
+    scores = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert max(scores, key=scores.get) == "a"
+    assert scores["c"] > scores["b"]
+
+
+def test_lexical_only_hits_survive_fusion():
+    retriever = HybridRetriever(vector_weight=0.7, bm25_weight=0.3)
+    vector = [result(1, 0, 0.9), result(1, 1, 0.8)]
+    lexical = [result(7, 3, 0.5), result(1, 1, 0.2)]
+
+    fused = retriever.fuse(vector, lexical, top_k=3)
+
+    assert [(r["document_id"], r["chunk_index"]) for r in fused] == [(1, 1), (1, 0), (7, 3)]
+    assert fused[0]["vector_score"] == 0.8 and fused[0]["bm25_score"] == 0.2
+    assert fused[2]["vector_score"] == 0.0
+    assert all(0 < r["score"] <= 1 for r in fused)
@@ -0,0 +1,73 @@
+"""
+Tests for the per-page OCR result cache (in-process tier)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.ocr_page_cache import OCRPageCache, _json_safe
+
+
+def make_cache(**kwargs):
+    return OCRPageCache(backend="memory", **kwargs)
+
+
+def test_unchanged_page_is_computed_once():
+    cache = make_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"text": "page one", "confidence": 0.9, "rotation": 0}
+
+    first = cache.get_or_compute("easyocr", "medium:en", b"png-bytes", compute)
+    second = cache.get_or_compute("easyocr", "medium:en", b"png-bytes", compute)
+
+    assert len(calls) == 1
+    assert "cache_hit" not in first
+    assert second["cache_hit"] is True
+    assert second["text"] == "page one"
+    assert cache.get_stats()["memory_hits"] == 1
+
+
+def test_key_includes_engine_and_settings():
+    cache = make_cache()
+    cache.get_or_compute("easyocr", "medium:en", b"img", lambda: {"text": "a", "confidence": 1.0})
+
+    assert cache.get("easyocr", "heavy:en", "missing") is None
+    result = cache.get_or_compute("easyocr", "heavy:en", b"img", lambda: {"text": "b", "confidence": 1.0})
+    assert result["text"] == "b"
+
+
+def test_memory_tier_is_bounded():
+    cache = make_cache(memory_size=2)
+    for index in range(3):
+        cache.get_or_compute("easyocr", "s", bytes([index]), lambda: {"text": "", "confidence": 0.0})
+
+    assert cache.get_stats()["memory_entries"] == 2
+
+
+def test_cached_results_are_copies():
+    cache = make_cache()
+    cache.get_or_compute("easyocr", "s", b"img", lambda: {"text": "x", "confidence": 1.0})
+    hit = cache.get_or_compute("easyocr", "s", b"img", lambda: {"text": "y", "confidence": 1.0})
+    hit["text"] = "mutated"
+
+    assert cache.get_or_compute("easyocr", "s", b"img", lambda: {})["text"] == "x"
+
+
+def test_disabled_cache_always_computes():
+    cache = OCRPageCache(backend="none")
+    calls = []
+    for _ in range(2):
+        cache.get_or_compute("easyocr", "s", b"img", lambda: calls.append(1) or {"text": "", "confidence": 0.0})
+
+    assert len(calls) == 2
+
+
+def test_json_safe_converts_bounding_boxes():
+    assert _json_safe({"bbox": (1, 2, 3, 4), "cells": [{"bbox": (5, 6)}]}) == {
+        "bbox": [1, 2, 3, 4],
+        "cells": [{"bbox": [5, 6]}],
+    }
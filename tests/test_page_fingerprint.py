@@ -0,0 +1,57 @@
+"""Tests for listing-page fingerprints used by re-scan change detection"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.web_scraping.page_fingerprint import fingerprint_page, hamming_distance
+
+
+def listing(rows, banner="Welcome", stamp="Last updated: 01/02/2026"):
+    links = "".join(
+        f'<tr><td>Circular on examination reform number {i} for universities</td>'
+        f'<td><a href="/docs/circular-{i}.pdf">Download</a></td></tr>'
+        for i in rows
+    )
+    return (
+        f"<html><head><script>var t = {len(rows)};</script></head><body>"
+        f"<nav>Home | About</nav><p>{banner}</p><table>{links}</table>"
+        f"<footer>{stamp} 10:45 AM</footer></body></html>"
+    ).encode()
+
+
+def test_near_duplicate_page_matches():
+    base = fingerprint_page(listing(range(30)), "https://ugc.gov.in/notices")
+    noisy = fingerprint_page(listing(range(30), stamp="Last updated: 09/10/2026"), "https://ugc.gov.in/notices")
+    edited = fingerprint_page(listing(range(30), banner="Welcome visitors"), "https://ugc.gov.in/notices")
+
+    assert noisy.exact_hash == base.exact_hash
+    assert edited.exact_hash != base.exact_hash
+    assert hamming_distance(edited.simhash, base.simhash) <= 3
+    assert edited.matches(base.exact_hash, base.links_hash, base.simhash_hex, strict=False)
+    assert not edited.matches(base.exact_hash, base.links_hash, base.simhash_hex, strict=True)
+
+
+def test_new_document_link_is_a_change():
+    base = fingerprint_page(listing(range(30)), "https://ugc.gov.in/notices")
+    added = fingerprint_page(listing(range(31)), "https://ugc.gov.in/notices")
+
+    assert added.links_hash != base.links_hash
+    assert not added.matches(base.exact_hash, base.links_hash, base.simhash_hex, strict=False)
+    assert added.document_links[-1] == "https://ugc.gov.in/docs/circular-9.pdf"
+
+
+def test_missing_stored_fingerprint_falls_back_to_exact_hash():
+    base = fingerprint_page(listing(range(5)))
+    edited = fingerprint_page(listing(range(5), banner="Welcome visitors"))
+
+    assert edited.matches(edited.exact_hash)
+    assert not edited.matches(base.exact_hash, None, None, strict=False)
+
+
+def test_empty_content():
+    empty = fingerprint_page(b"")
+    assert empty.simhash == 0
+    assert empty.hrefs == []
+    assert fingerprint_page("   ").exact_hash == empty.exact_hash
@@ -0,0 +1,83 @@
+"""Tests for page-parallel PDF extraction"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fitz
+
+from backend.utils import pdf_pages
+
+
+def make_pdf(path, num_pages):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        if i != 3:  # page 4 has no text layer
+            page.insert_text((72, 72), f"Page number {i + 1}")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "circular.pdf"
+    make_pdf(pdf_path, 12)
+    monkeypatch.setattr(pdf_pages, "PDF_WORKERS", 2)
+    monkeypatch.setattr(pdf_pages, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_pages, "TEXT_BATCH_PAGES", 3)
+
+    try:
+        result = pdf_pages.extract_pdf_pages(str(pdf_path))
+    finally:
+        pdf_pages.shutdown_page_pool()
+
+    assert result["workers"] == 2
+    assert [page["page"] for page in result["pages"]] == list(range(1, 13))
+    assert "Page number 12" in result["pages"][11]["text"]
+    assert result["pages"][3]["method"] == pdf_pages.METHOD_EMPTY
+    assert all(page["seconds"] >= 0 for page in result["pages"])
+
+
+def test_small_documents_extract_in_process(tmp_path):
+    pdf_path = tmp_path / "notice.pdf"
+    make_pdf(pdf_path, 2)
+
+    result = pdf_pages.extract_pdf_pages(str(pdf_path))
+
+    assert result["workers"] == 1
+    assert [page["method"] for page in result["pages"]] == [pdf_pages.METHOD_TEXT] * 2
+
+
+class FakeOCRManager:
+    """Stands in for OCRManager; records the pages it was asked to OCR"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def ocr_page_image(self, img_data, preprocessing_level):
+        self.calls += 1
+        return {"text": "scanned text", "confidence": 0.8}
+
+
+def test_ocr_runs_in_calling_process_by_default(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "gazette.pdf"
+    make_pdf(pdf_path, 12)
+    monkeypatch.setattr(pdf_pages, "PDF_WORKERS", 2)
+    monkeypatch.setattr(pdf_pages, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_pages, "TEXT_BATCH_PAGES", 3)
+    ocr_manager = FakeOCRManager()
+
+    try:
+        result = pdf_pages.extract_pdf_pages(str(pdf_path), ocr=True, ocr_manager=ocr_manager)
+    finally:
+        pdf_pages.shutdown_page_pool()
+
+    # Text pages came from the pool; only the page without a text layer was OCR'd, here
+    assert result["workers"] == 2
+    assert result["ocr_workers"] == 1
+    assert ocr_manager.calls == 1
+    assert [page["page"] for page in result["pages"]] == list(range(1, 13))
+    assert result["pages"][3]["method"] == pdf_pages.METHOD_OCR
+    assert result["pages"][3]["text"] == "scanned text"
+    assert result["pages"][4]["method"] == pdf_pages.METHOD_TEXT
@@ -0,0 +1,57 @@
+"""Tests for the retrieval query result cache"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Agent.retrieval.query_cache import QueryResultCache
+
+
+class FakeCorpusVersion:
+    def __init__(self):
+        self.version = (0, 0)
+
+    def current(self):
+        return self.version
+
+    def bump(self):
+        self.version = (self.version[0] + 1, self.version[1])
+
+
+def make_cache(**kwargs):
+    return QueryResultCache(corpus_version=FakeCorpusVersion(), **kwargs)
+
+
+def test_hit_is_scoped_by_role_and_institution():
+    cache = make_cache()
+    cache.set("search", "Exam  Rules", "student", 1, [{"id": 1}], top_k=5)
+
+    assert cache.get("search", "exam rules", "student", 1, top_k=5) == [{"id": 1}]
+    assert cache.get("search", "exam rules", "student", 2, top_k=5) is None
+    assert cache.get("search", "exam rules", "developer", 1, top_k=5) is None
+    assert cache.get("search", "exam rules", "student", 1, top_k=10) is None
+
+
+def test_corpus_change_invalidates_entries():
+    cache = make_cache()
+    cache.set("search", "q", None, None, ["a"])
+
+    cache.corpus_version.bump()
+
+    assert cache.get("search", "q", None, None) is None
+    assert cache.get_stats()["stale"] == 1
+
+
+def test_returned_values_are_copies_and_lru_bounded():
+    cache = make_cache(max_entries=2)
+    cache.set("search", "one", None, None, [{"score": 1}])
+    cache.get("search", "one", None, None)[0]["score"] = 99
+
+    assert cache.get("search", "one", None, None) == [{"score": 1}]
+
+    cache.set("search", "two", None, None, [2])
+    cache.get("search", "one", None, None)
+    cache.set("search", "three", None, None, [3])
+    assert cache.get("search", "two", None, None) is None
+    assert cache.get("search", "one", None, None) == [{"score": 1}]
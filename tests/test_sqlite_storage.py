@@ -0,0 +1,86 @@
+"""Tests for the SQLite-backed scraping storage, session storage and quota usage"""
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.quota_manager import QuotaManager
+from Agent.web_scraping.sqlite_storage import SQLiteLocalStorage, SQLiteSessionStorage
+
+
+def test_local_storage_migrates_json_and_tracks_in_batches(tmp_path):
+    (tmp_path / "sources.json").write_text(json.dumps({"3": {"id": 3, "name": "UGC"}}))
+    (tmp_path / "document_tracker.json").write_text(json.dumps({}))
+
+    storage = SQLiteLocalStorage(storage_dir=str(tmp_path))
+
+    assert storage.get_source(3)["name"] == "UGC"
+    assert storage.create_source({"name": "AICTE"})["id"] == 4
+    assert (tmp_path / "sources.json.migrated").exists()
+
+    storage.mark_documents_scraped([("https://a/1.pdf", "h1"), ("https://a/2.pdf", "h2")], source_id=3)
+    storage.mark_document_scraped("https://a/1.pdf", "h1b", source_id=3)
+
+    assert storage.is_document_scraped("https://a/2.pdf")
+    assert storage.get_document_hashes(["https://a/1.pdf", "https://a/3.pdf"]) == {"https://a/1.pdf": "h1b"}
+    assert len(storage.get_tracked_documents_by_source(3)) == 2
+
+
+def test_local_storage_logs_and_health(tmp_path):
+    storage = SQLiteLocalStorage(storage_dir=str(tmp_path))
+
+    first = storage.create_scraping_log({"source_id": 1, "status": "running"})
+    second = storage.create_scraping_log({"source_id": 2, "status": "running"})
+    storage.update_scraping_log(first, {"id": first, "source_id": 1, "status": "completed"})
+
+    assert storage.get_scraping_log(first)["status"] == "completed"
+    assert [log["id"] for log in storage.get_scraping_logs_for_source(2)] == [second]
+
+    storage.record_job_execution(1, success=False)
+    storage.record_job_execution(1, success=False)
+    storage.record_job_execution(1, success=False)
+    assert storage.check_alerts(threshold=3)[0]["source_id"] == 1
+
+
+def test_session_storage_round_trips_and_rewrites_only_changes(tmp_path):
+    storage = SQLiteSessionStorage(storage_dir=str(tmp_path))
+    logs = [{"id": 1, "status": "ok"}, {"id": 2, "status": "ok"}]
+    storage.save_logs(logs)
+
+    logs.append({"id": 3, "status": "running"})
+    logs.pop(0)
+    storage.save_logs(logs)
+    storage.save_counters(5, 9)
+
+    reopened = SQLiteSessionStorage(storage_dir=str(tmp_path))
+    assert reopened.load_logs() == logs
+    assert reopened.load_counters() == {"source_id": 5, "log_id": 9}
+
+    reopened.clear_all()
+    assert reopened.get_stats()["logs_count"] == 0
+
+
+def test_quota_usage_is_shared_between_managers(tmp_path):
+    quota_file = str(tmp_path / "quota.json")
+    first = QuotaManager(quota_file=quota_file, backend="sqlite")
+    second = QuotaManager(quota_file=quota_file, backend="sqlite")
+    first.limits["vision_ocr"]["monthly_limit"] = 3
+    second.limits["vision_ocr"]["monthly_limit"] = 3
+
+    assert first.consume_quota("vision_ocr", 2)
+    assert not second.consume_quota("vision_ocr", 2)
+    assert second.consume_quota("vision_ocr", 1)
+    assert first.get_quota_status("vision_ocr")["vision_ocr"]["monthly"]["used"] == 3
+
+
+def test_quota_migrates_legacy_json(tmp_path):
+    quota_file = tmp_path / "quota.json"
+    month = QuotaManager(quota_file=str(tmp_path / "probe.json"), backend="json")._get_current_period_key("monthly")
+    quota_file.write_text(json.dumps({"vision_ocr": {"monthly": {month: 7}}}))
+
+    quota = QuotaManager(quota_file=str(quota_file), backend="sqlite")
+
+    assert quota.get_quota_status("vision_ocr")["vision_ocr"]["monthly"]["used"] == 7
+    assert (tmp_path / "quota.json.migrated").exists()
@@ -0,0 +1,87 @@
+"""Tests for the chunked (TUS) Supabase upload: partial chunks and failed uploads"""
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.supabase_storage import ResumableUpload
+
+LOCATION = "https://storage.example.test/upload/resumable/abc"
+
+
+class FakeTusServer:
+    """Stores at most `accept` bytes per PATCH, like a server behind a short-read proxy"""
+
+    def __init__(self, accept=None):
+        self.accept = accept
+        self.stored = bytearray()
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request.method)
+        if request.method == "PATCH":
+            assert int(request.headers["Upload-Offset"]) == len(self.stored)
+            body = request.read()
+            self.stored.extend(body[:self.accept] if self.accept is not None else body)
+        return httpx.Response(204, headers={"Upload-Offset": str(len(self.stored))})
+
+
+def make_upload(server, size):
+    upload = ResumableUpload.__new__(ResumableUpload)
+    upload.object_name = "report.pdf"
+    upload.size = size
+    upload.offset = 0
+    upload._buffer = bytearray()
+    upload._client = httpx.Client(transport=httpx.MockTransport(server))
+    upload._headers = {"Tus-Resumable": "1.0.0"}
+    upload.location = LOCATION
+    return upload
+
+
+def test_short_patch_is_resent_from_server_offset():
+    server = FakeTusServer(accept=4)
+    upload = make_upload(server, size=10)
+
+    upload.write(b"0123456789")
+    upload.finish()
+
+    assert bytes(server.stored) == b"0123456789"
+    assert server.requests == ["PATCH", "PATCH", "PATCH"]
+    assert upload._client.is_closed
+
+
+def test_stalled_chunk_raises_instead_of_reporting_success():
+    server = FakeTusServer(accept=0)
+    upload = make_upload(server, size=10)
+    upload.write(b"0123456789")
+
+    with pytest.raises(IOError, match="stalled at 0/10"):
+        upload.finish()
+
+
+def test_abort_after_incomplete_finish_deletes_the_upload():
+    server = FakeTusServer()
+    upload = make_upload(server, size=10)
+    upload.write(b"01234")
+
+    with pytest.raises(IOError, match="incomplete: 5/10"):
+        upload.finish()
+    upload.abort()
+
+    assert server.requests == ["PATCH", "DELETE"]
+    assert upload._client.is_closed
+
+
+def test_abort_after_finish_is_a_no_op():
+    server = FakeTusServer()
+    upload = make_upload(server, size=5)
+    upload.write(b"01234")
+    upload.finish()
+
+    upload.abort()
+
+    assert server.requests == ["PATCH"]
@@ -0,0 +1,87 @@
+"""Tests for the filter-aware vector search planner"""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.database import DocumentEmbedding
+from Agent.vector_store.ann_index import (
+    INDEX_NAME,
+    ANNIndexConfig,
+    ANNIndexManager,
+    STRATEGY_ANN,
+    STRATEGY_EXACT,
+)
+
+
+STATS = {
+    "total": 1_000_000,
+    "groups": {
+        ("public", None): 900_000,
+        ("institution_only", 1): 60_000,
+        ("restricted", 1): 20_000,
+        ("institution_only", 2): 15_000,
+        ("confidential", 2): 5_000,
+    },
+}
+
+
+def make_manager(exact_max_rows=20000, prefilter_selectivity=0.02):
+    config = ANNIndexConfig()
+    config.index_type = "hnsw"
+    config.exact_max_rows = exact_max_rows
+    config.prefilter_selectivity = prefilter_selectivity
+    manager = ANNIndexManager(config)
+    manager.cached_stats = lambda: STATS
+    return manager
+
+
+def test_visible_rows_follow_role_filters():
+    count = ANNIndexManager.count_visible_rows
+    assert count(STATS, "developer", None) == 1_000_000
+    assert count(STATS, "ministry_admin", None) == 995_000
+    assert count(STATS, "university_admin", 1) == 980_000
+    assert count(STATS, "student", 2) == 915_000
+    assert count(STATS, "student", None) == 900_000
+
+
+def test_document_filter_is_always_exact():
+    plan = make_manager().plan(user_role="student", document_id_filter=42)
+    assert plan["strategy"] == STRATEGY_EXACT
+
+
+def test_broad_filter_uses_ann_index():
+    plan = make_manager().plan(user_role="student", user_institution_id=2)
+    assert plan["strategy"] == STRATEGY_ANN
+    assert 0.9 < plan["selectivity"] < 0.95
+
+
+def test_selective_filter_prefilters():
+    manager = make_manager(exact_max_rows=1000, prefilter_selectivity=0.95)
+    plan = manager.plan(user_role="student", user_institution_id=2)
+    assert plan["strategy"] == STRATEGY_EXACT
+
+
+def test_cold_stats_plan_ann_and_refresh_off_the_request_path():
+    manager = ANNIndexManager(ANNIndexConfig())
+    manager.config.index_type = "hnsw"
+    refreshed = []
+    manager.refresh_stats = lambda: refreshed.append(True) or STATS
+
+    plan = manager.plan(user_role="student")
+
+    assert plan["strategy"] == STRATEGY_ANN
+    assert plan["candidates"] is None
+    # The refresh thread may still be running; wait for it
+    for _ in range(100):
+        if not manager._refreshing:
+            break
+        time.sleep(0.01)
+    assert refreshed == [True]
+
+
+def test_ann_index_is_not_declared_on_the_model():
+    # create_all must not build an HNSW index that VECTOR_INDEX_TYPE disagrees with
+    assert INDEX_NAME not in {index.name for index in DocumentEmbedding.__table__.indexes}